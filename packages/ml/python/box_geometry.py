@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Box Geometry Utilities
+
+This module holds the overlap computations shared by the OCR, layout and
+segmentation components. Boxes are handled as numpy arrays so that overlap
+checks between thousands of candidates run as array operations, and an
+STR-packed R-tree restricts them to boxes that can actually overlap.
+
+Key features:
+1. Conversion between (x, y, width, height) and (x0, y0, x1, y1) boxes
+2. Vectorized IoU and intersection-over-area matrices
+3. Greedy NMS and soft-NMS driven by a spatial index
+4. Sort-Tile-Recursive packed R-tree with intersection and containment queries
+"""
+
+import math
+import logging
+from typing import List, Tuple, Sequence, Union
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BoxArray = Union[np.ndarray, Sequence[Sequence[float]]]
+
+
+def to_xyxy(boxes: BoxArray, box_format: str = 'xywh') -> np.ndarray:
+    """
+    Convert boxes to an (N, 4) float array of (x0, y0, x1, y1)
+
+    Args:
+        boxes: Sequence of boxes
+        box_format: 'xywh' for (x, y, width, height), 'xyxy' for corners
+
+    Returns:
+        Array of corner boxes
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    if box_format == 'xyxy':
+        return boxes
+    if box_format != 'xywh':
+        raise ValueError(f"Unknown box format: {box_format}")
+    return np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
+
+
+def box_areas(boxes: np.ndarray) -> np.ndarray:
+    """Areas of (x0, y0, x1, y1) boxes (zero for degenerate boxes)"""
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def intersection_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection areas of two sets of (x0, y0, x1, y1) boxes
+
+    Args:
+        a: (M, 4) boxes
+        b: (N, 4) boxes
+
+    Returns:
+        (M, N) intersection areas
+    """
+    iw = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    ih = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    return np.clip(iw, 0, None) * np.clip(ih, 0, None)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection over union of two sets of (x0, y0, x1, y1) boxes
+
+    Args:
+        a: (M, 4) boxes
+        b: (N, 4) boxes
+
+    Returns:
+        (M, N) IoU values (zero where the union is empty)
+    """
+    intersection = intersection_matrix(a, b)
+    union = box_areas(a)[:, None] + box_areas(b)[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def coverage_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise fraction of each box in 'a' covered by each box in 'b'
+
+    Args:
+        a: (M, 4) boxes
+        b: (N, 4) boxes
+
+    Returns:
+        (M, N) intersection divided by the area of the 'a' box (zero for
+        degenerate 'a' boxes)
+    """
+    intersection = intersection_matrix(a, b)
+    areas = np.broadcast_to(box_areas(a)[:, None], intersection.shape)
+    return np.divide(intersection, areas, out=np.zeros_like(intersection), where=areas > 0)
+
+
+class STRtree:
+    """
+    Static R-tree over axis-aligned boxes, bulk-loaded with Sort-Tile-Recursive
+    packing.
+
+    Leaves are the boxes themselves in STR order; every upper level groups
+    `node_capacity` consecutive nodes of the level below. Queries descend
+    all levels as array operations.
+    """
+
+    def __init__(self, boxes: BoxArray, box_format: str = 'xyxy', node_capacity: int = 16):
+        """
+        Build the tree
+
+        Args:
+            boxes: Boxes to index
+            box_format: 'xyxy' or 'xywh'
+            node_capacity: Children per node
+        """
+        self.boxes = to_xyxy(boxes, box_format)
+        self.node_capacity = max(2, int(node_capacity))
+        self.order = self._str_order(self.boxes, self.node_capacity)
+
+        # levels[0] holds the leaf boxes in STR order, levels[-1] the root(s)
+        self.levels = [self.boxes[self.order]]
+        while len(self.levels[-1]) > self.node_capacity:
+            self.levels.append(self._parent_bounds(self.levels[-1], self.node_capacity))
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    @staticmethod
+    def _str_order(boxes: np.ndarray, capacity: int) -> np.ndarray:
+        """Sort-Tile-Recursive ordering of the leaf boxes"""
+        count = len(boxes)
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        centers_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        centers_y = (boxes[:, 1] + boxes[:, 3]) / 2
+
+        leaf_count = math.ceil(count / capacity)
+        slice_size = math.ceil(math.sqrt(leaf_count)) * capacity
+
+        # Vertical slices by x center, each sorted by y center
+        by_x = np.argsort(centers_x, kind='stable')
+        slices = [by_x[i:i + slice_size] for i in range(0, count, slice_size)]
+        return np.concatenate([s[np.argsort(centers_y[s], kind='stable')] for s in slices])
+
+    @staticmethod
+    def _parent_bounds(children: np.ndarray, capacity: int) -> np.ndarray:
+        """Bounds of the nodes grouping consecutive children"""
+        starts = np.arange(0, len(children), capacity)
+        return np.stack([
+            np.minimum.reduceat(children[:, 0], starts),
+            np.minimum.reduceat(children[:, 1], starts),
+            np.maximum.reduceat(children[:, 2], starts),
+            np.maximum.reduceat(children[:, 3], starts)
+        ], axis=1)
+
+    def _candidates(self, box: np.ndarray) -> np.ndarray:
+        """Positions (in STR order) of leaves whose bounds intersect the box"""
+        if not len(self.boxes):
+            return np.zeros(0, dtype=np.int64)
+
+        nodes = np.arange(len(self.levels[-1]))
+        for depth in range(len(self.levels) - 1, -1, -1):
+            bounds = self.levels[depth][nodes]
+            hits = ((bounds[:, 0] <= box[2]) & (bounds[:, 2] >= box[0]) &
+                    (bounds[:, 1] <= box[3]) & (bounds[:, 3] >= box[1]))
+            nodes = nodes[hits]
+            if depth == 0 or not len(nodes):
+                break
+            children = (nodes[:, None] * self.node_capacity + np.arange(self.node_capacity)).ravel()
+            nodes = children[children < len(self.levels[depth - 1])]
+        return nodes
+
+    def query(self, box: Sequence[float], predicate: str = 'intersects',
+              box_format: str = 'xyxy') -> np.ndarray:
+        """
+        Find the indexed boxes related to a query box
+
+        Args:
+            box: Query box
+            predicate: 'intersects' (boxes touching or overlapping the query),
+                'within' (boxes inside the query) or 'contains' (boxes
+                enclosing the query)
+            box_format: 'xyxy' or 'xywh'
+
+        Returns:
+            Sorted indices of the matching boxes (into the input order)
+        """
+        box = to_xyxy(box, box_format)[0]
+        positions = self._candidates(box)
+        leaves = self.levels[0][positions]
+
+        if predicate == 'within':
+            positions = positions[(leaves[:, 0] >= box[0]) & (leaves[:, 1] >= box[1]) &
+                                  (leaves[:, 2] <= box[2]) & (leaves[:, 3] <= box[3])]
+        elif predicate == 'contains':
+            positions = positions[(leaves[:, 0] <= box[0]) & (leaves[:, 1] <= box[1]) &
+                                  (leaves[:, 2] >= box[2]) & (leaves[:, 3] >= box[3])]
+        elif predicate != 'intersects':
+            raise ValueError(f"Unknown predicate: {predicate}")
+
+        return np.sort(self.order[positions])
+
+
+def nms(boxes: BoxArray, scores: Sequence[float], iou_threshold: float = 0.5,
+        box_format: str = 'xywh') -> List[int]:
+    """
+    Greedy non-maximum suppression
+
+    Boxes are visited by descending score (ties keep input order); a box is
+    kept unless a kept box overlaps it with IoU above the threshold. Only
+    neighbours found through an R-tree are compared.
+
+    Args:
+        boxes: Boxes
+        scores: Score per box
+        iou_threshold: IoU above which the lower-scored box is suppressed
+        box_format: 'xywh' or 'xyxy'
+
+    Returns:
+        Indices of the kept boxes, by descending score
+    """
+    boxes = to_xyxy(boxes, box_format)
+    if not len(boxes):
+        return []
+
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    tree = STRtree(boxes)
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    kept = []
+
+    for i in order:
+        if suppressed[i]:
+            continue
+        kept.append(int(i))
+
+        # Suppress the lower-ranked neighbours overlapping this box too much
+        neighbours = tree.query(boxes[i])
+        neighbours = neighbours[(rank[neighbours] > rank[i]) & ~suppressed[neighbours]]
+        if len(neighbours):
+            iou = iou_matrix(boxes[i:i + 1], boxes[neighbours])[0]
+            suppressed[neighbours[iou > iou_threshold]] = True
+
+    return kept
+
+
+def soft_nms(boxes: BoxArray, scores: Sequence[float], iou_threshold: float = 0.3,
+             sigma: float = 0.5, score_threshold: float = 0.001, method: str = 'gaussian',
+             box_format: str = 'xywh') -> Tuple[List[int], List[float]]:
+    """
+    Soft non-maximum suppression
+
+    Instead of discarding overlapping boxes, their scores are decayed by
+    their overlap with each selected box ('linear': by 1 - IoU above the
+    threshold, 'gaussian': by exp(-IoU^2 / sigma)). Boxes whose score falls
+    below score_threshold are dropped.
+
+    Args:
+        boxes: Boxes
+        scores: Score per box
+        iou_threshold: IoU above which linear decay applies
+        sigma: Gaussian decay width
+        score_threshold: Minimum decayed score to keep a box
+        method: 'gaussian' or 'linear'
+        box_format: 'xywh' or 'xyxy'
+
+    Returns:
+        Tuple of (kept indices in selection order, their decayed scores)
+    """
+    boxes = to_xyxy(boxes, box_format)
+    scores = np.asarray(scores, dtype=np.float64).copy()
+    if not len(boxes):
+        return [], []
+    if method not in ('gaussian', 'linear'):
+        raise ValueError(f"Unknown soft-NMS method: {method}")
+
+    tree = STRtree(boxes)
+    remaining = np.ones(len(boxes), dtype=bool)
+    kept, kept_scores = [], []
+
+    while remaining.any():
+        candidates = np.flatnonzero(remaining)
+        i = int(candidates[np.argmax(scores[candidates])])
+        remaining[i] = False
+        if scores[i] < score_threshold:
+            break
+        kept.append(i)
+        kept_scores.append(float(scores[i]))
+
+        neighbours = tree.query(boxes[i])
+        neighbours = neighbours[remaining[neighbours]]
+        if not len(neighbours):
+            continue
+
+        iou = iou_matrix(boxes[i:i + 1], boxes[neighbours])[0]
+        if method == 'linear':
+            decay = np.where(iou > iou_threshold, 1.0 - iou, 1.0)
+        else:
+            decay = np.exp(-(iou * iou) / sigma)
+        scores[neighbours] *= decay
+
+    return kept, kept_scores
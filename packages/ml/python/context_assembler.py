@@ -15,12 +15,15 @@ It works with the Hybrid Retriever to provide well-structured,
 informative contexts for the RAG (Retrieval Augmented Generation) system.
 """
 
-import json
+import asyncio
 import logging
 import re
 import time
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
+from context_packer import ContextPacker
+from knowledge_hydrator import KnowledgeHydrator
+
 # Set up logging
 logger = logging.getLogger("context_assembler")
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -60,6 +63,7 @@ class ContextAssembler:
         self.config = {
             # Context structure
             "max_context_length": 8000,
+            "max_context_tokens": None,  # Token budget; max_context_length / 4 if None
             "max_materials_to_include": 5,
             "max_facts_per_material": 8,
             "max_relationships_per_material": 3,
@@ -78,6 +82,11 @@ class ContextAssembler:
             "include_relationships": True,
             "relationship_types": ["similar_to", "complementary_with", "alternative_for"],
             
+            # Knowledge hydration (batched per table, cached per material)
+            "knowledge_cache_ttl": 60,  # seconds
+            "knowledge_cache_size": 4096,
+            "knowledge_batch_size": 100,
+            
             # Formatting
             "format_type": "structured",  # Options: structured, natural, llm_optimized
             "include_citations": True,
@@ -91,6 +100,12 @@ class ContextAssembler:
         # Set up clients
         self.knowledge_client = knowledge_client
         self.vector_client = vector_client
+        self._knowledge_hydrator = None
+        
+        # Packs structured contexts into the token budget
+        self.context_packer = ContextPacker({
+            "prioritize_properties": self.config["prioritize_properties"]
+        })
         
         logger.info("Context Assembler initialized with configuration: %s", self.config)
     
@@ -165,55 +180,9 @@ class ContextAssembler:
         """
         enhanced_materials = []
         
-        # Step 1: Fetch knowledge entries in batch with semantic indexing
-        knowledge_entries = {}
-        if self.config["include_knowledge_entries"] and self.knowledge_client:
-            try:
-                batch_entries = await self.knowledge_client.get_entries_for_materials(
-                    material_ids=material_ids,
-                    quality_threshold=self.config["knowledge_entry_quality_threshold"],
-                    max_entries_per_material=self.config["max_facts_per_material"],
-                    query=query,
-                    semantic_indexing=True  # Enable semantic indexing for better organization
-                )
-                
-                if batch_entries:
-                    # Organize by material ID
-                    for entry in batch_entries:
-                        material_id = entry.get("material_id")
-                        if not material_id:
-                            continue
-                            
-                        if material_id not in knowledge_entries:
-                            knowledge_entries[material_id] = []
-                            
-                        knowledge_entries[material_id].append(entry)
-            except Exception as e:
-                logger.error(f"Error fetching knowledge entries: {str(e)}")
-        
-        # Step 2: Fetch relationship data in batch
-        relationships = {}
-        if self.config["include_relationships"] and self.knowledge_client:
-            try:
-                batch_relationships = await self.knowledge_client.get_material_relationships(
-                    material_ids=material_ids,
-                    relationship_types=self.config["relationship_types"],
-                    max_relationships=self.config["max_relationships_per_material"]
-                )
-                
-                if batch_relationships:
-                    # Organize by material ID
-                    for rel in batch_relationships:
-                        source_id = rel.get("source_id")
-                        if not source_id:
-                            continue
-                            
-                        if source_id not in relationships:
-                            relationships[source_id] = []
-                            
-                        relationships[source_id].append(rel)
-            except Exception as e:
-                logger.error(f"Error fetching relationships: {str(e)}")
+        # Steps 1-2: Fetch knowledge entries and relationships, one bulk query per
+        # table for the materials not cached yet
+        knowledge_entries, relationships = await self.prefetch_knowledge(material_ids)
         
         # Step 3: Enhance each material with knowledge and relationships
         for material in materials:
@@ -225,17 +194,80 @@ class ContextAssembler:
             enhanced_material = material.copy()
             
             # Add knowledge entries
-            if material_id in knowledge_entries:
+            if knowledge_entries.get(material_id):
                 enhanced_material["knowledge_entries"] = knowledge_entries[material_id]
             
             # Add relationships
-            if material_id in relationships:
+            if relationships.get(material_id):
                 enhanced_material["relationships"] = relationships[material_id]
             
             enhanced_materials.append(enhanced_material)
         
         return enhanced_materials
     
+    def _get_knowledge_hydrator(self) -> Optional[KnowledgeHydrator]:
+        """
+        Get the hydrator of the current knowledge client.
+        
+        Returns:
+            Knowledge hydrator, or None without a knowledge client
+        """
+        if not self.knowledge_client:
+            return None
+        if self._knowledge_hydrator is None or self._knowledge_hydrator.knowledge_client is not self.knowledge_client:
+            self._knowledge_hydrator = KnowledgeHydrator(self.knowledge_client, {
+                "quality_threshold": self.config["knowledge_entry_quality_threshold"],
+                "max_entries_per_material": self.config["max_facts_per_material"],
+                "relationship_types": self.config["relationship_types"],
+                "max_relationships_per_material": self.config["max_relationships_per_material"],
+                "ttl_seconds": self.config["knowledge_cache_ttl"],
+                "max_entries": self.config["knowledge_cache_size"],
+                "max_batch_size": self.config["knowledge_batch_size"]
+            })
+        return self._knowledge_hydrator
+    
+    async def prefetch_knowledge(
+        self,
+        material_ids: List[str]
+    ) -> Tuple[Dict[str, KnowledgeEntries], Dict[str, List[RelationshipData]]]:
+        """
+        Load knowledge entries and relationships of materials.
+        
+        Concurrent calls (e.g. the assemblies of one batch) are served by one
+        bulk query per table; repeated materials come from the cache. Calling
+        this with all material ids of a batch before assembling warms the cache.
+        
+        Args:
+            material_ids: Material IDs
+            
+        Returns:
+            Tuple of (entries by material ID, relationships by material ID)
+        """
+        hydrator = self._get_knowledge_hydrator()
+        if hydrator is None:
+            return {}, {}
+        
+        include_entries = self.config["include_knowledge_entries"]
+        include_relationships = self.config["include_relationships"]
+        knowledge_entries, relationships = {}, {}
+        
+        # Each table is loaded on its own so a failure of one keeps the other
+        results = await asyncio.gather(
+            hydrator.hydrate(material_ids, include_entries, False),
+            hydrator.hydrate(material_ids, False, include_relationships),
+            return_exceptions=True
+        )
+        if isinstance(results[0], Exception):
+            logger.error(f"Error fetching knowledge entries: {str(results[0])}")
+        else:
+            knowledge_entries = results[0][0]
+        if isinstance(results[1], Exception):
+            logger.error(f"Error fetching relationships: {str(results[1])}")
+        else:
+            relationships = results[1][1]
+        
+        return knowledge_entries, relationships
+    
     def _structure_context(
         self,
         materials: MaterialList,
@@ -604,7 +636,10 @@ class ContextAssembler:
         context: AssembledContext
     ) -> AssembledContext:
         """
-        Trim context to stay within size limits.
+        Pack context into the token budget.
+        
+        Materials, descriptions, properties, knowledge facts and relationships
+        are selected by relevance per token (see ContextPacker).
         
         Args:
             context: Assembled context data
@@ -612,72 +647,21 @@ class ContextAssembler:
         Returns:
             Trimmed context
         """
-        # JSON-encode to get approximate size
-        context_json = json.dumps(context)
-        current_size = len(context_json)
-        
-        # If within limits, return as is
-        if current_size <= self.config["max_context_length"]:
-            context["metadata"]["context_size"] = current_size
-            return context
-        
-        # Need to trim - start with knowledge facts
-        trimmed_context = context.copy()
-        knowledge_facts = trimmed_context.get("knowledge_facts", []).copy()
-        
-        # Sort by relevance and keep most relevant
-        if knowledge_facts:
-            knowledge_facts.sort(key=lambda x: x.get("relevance", 0), reverse=True)
-            trimmed_facts = knowledge_facts[:max(1, len(knowledge_facts) // 2)]
-            trimmed_context["knowledge_facts"] = trimmed_facts
-        
-        # Recheck size
-        context_json = json.dumps(trimmed_context)
-        current_size = len(context_json)
-        
-        if current_size <= self.config["max_context_length"]:
-            trimmed_context["metadata"]["context_size"] = current_size
-            trimmed_context["metadata"]["trimmed"] = True
-            return trimmed_context
-        
-        # Still too large - trim relationships
-        relationships = trimmed_context.get("relationships", []).copy()
-        if relationships:
-            # Sort by strength and keep strongest
-            relationships.sort(key=lambda x: x.get("strength", 0), reverse=True)
-            trimmed_relationships = relationships[:max(1, len(relationships) // 2)]
-            trimmed_context["relationships"] = trimmed_relationships
-        
-        # Recheck size
-        context_json = json.dumps(trimmed_context)
-        current_size = len(context_json)
-        
-        if current_size <= self.config["max_context_length"]:
-            trimmed_context["metadata"]["context_size"] = current_size
-            trimmed_context["metadata"]["trimmed"] = True
-            return trimmed_context
-        
-        # Still too large - trim material descriptions
-        materials = trimmed_context.get("materials", []).copy()
-        for material in materials:
-            if "description" in material:
-                # Truncate description to 100 chars
-                material["description"] = material["description"][:100] + "..."
-            
-            # Limit properties to 3 most important
-            if self.config["prioritize_properties"] and "properties" in material:
-                prioritized_props = {}
-                for prop_name in self.config["prioritize_properties"][:3]:
-                    if prop_name in material["properties"]:
-                        prioritized_props[prop_name] = material["properties"][prop_name]
-                
-                material["properties"] = prioritized_props
-        
-        trimmed_context["materials"] = materials
-        trimmed_context["metadata"]["context_size"] = len(json.dumps(trimmed_context))
-        trimmed_context["metadata"]["severely_trimmed"] = True
+        token_budget = self.config["max_context_tokens"] or self.config["max_context_length"] // 4
+        packed_context, stats = self.context_packer.pack(context, token_budget)
+        
+        packed_context["metadata"] = dict(context.get("metadata", {}))
+        packed_context["metadata"]["context_tokens"] = stats["tokens_after"]
+        packed_context["metadata"]["token_budget"] = token_budget
+        if stats["trimmed"]:
+            packed_context["metadata"]["trimmed"] = True
+            packed_context["metadata"]["packing"] = {
+                "tokens_before": stats["tokens_before"],
+                "dropped": stats["dropped"],
+                "truncated_descriptions": stats["truncated_descriptions"]
+            }
         
-        return trimmed_context
+        return packed_context
     
     def _format_as_natural_language(
         self,
@@ -889,22 +873,14 @@ class ContextAssembler:
             return {"entries": [], "relationships": []}
         
         try:
-            # Get knowledge entries
-            entries = await self.knowledge_client.get_entries_for_material(
-                material_id=material_id,
-                limit=limit,
-                query=query,
-                semantic_indexing=True
+            # Get knowledge entries and, if requested, relationships
+            entries_by_material, relationships_by_material = await self._get_knowledge_hydrator().hydrate(
+                [material_id],
+                include_entries=True,
+                include_relationships=include_relationships
             )
-            
-            # Get material relationships if requested
-            relationships = []
-            if include_relationships and self.knowledge_client:
-                relationships = await self.knowledge_client.get_material_relationships(
-                    material_ids=[material_id],
-                    relationship_types=self.config["relationship_types"],
-                    max_relationships=self.config["max_relationships_per_material"]
-                )
+            entries = entries_by_material.get(material_id, [])[:limit]
+            relationships = relationships_by_material.get(material_id, [])
             
             # Create response with both entries and relationships
             return {
@@ -1248,8 +1224,6 @@ def create_context_assembler(
 
 # Example usage
 if __name__ == "__main__":
-    import asyncio
-    
     async def main():
         # Example retrieved materials
         retrieved_materials = [
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Token-Budget Context Packer for RAG
+
+This module fits an assembled RAG context into an LLM token budget. Every
+piece of content (material core, description, property, knowledge fact,
+relationship) becomes an item scored by relevance and costed in tokens
+once; a greedy knapsack then selects the items with the best relevance per
+token and the packed context is built in a single pass, without
+re-serializing the whole context after each trimming step.
+
+Key features:
+1. Token counting with tiktoken when available, a fast estimate otherwise
+2. LRU cache of token counts for repeated content
+3. Relevance scoring of materials, descriptions, properties, facts and relationships
+4. Greedy relevance-per-token knapsack with dependency on the owning material
+5. Truncated description fallback and packing statistics
+
+Usage:
+    python context_packer.py --benchmark [--materials 50] [--budget 2000]
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger("context_packer")
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# Try to import tiktoken
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Words, numbers and single punctuation marks; long words count as several tokens
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+class TokenCounter:
+    """
+    Counts LLM tokens of text fragments, caching the counts.
+
+    Uses the tiktoken encoding of the model when tiktoken is installed and a
+    word/punctuation estimate (about four characters per token for words)
+    otherwise.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base", cache_size: int = 16384):
+        """
+        Initialize the counter.
+
+        Args:
+            encoding: tiktoken encoding name
+            cache_size: Number of fragment counts to keep
+        """
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding '{encoding}' unavailable ({e}), estimating token counts")
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+
+    def _count(self, text: str) -> int:
+        """Count the tokens of one fragment"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return sum(1 + (len(piece) - 1) // 4 for piece in _TOKEN_PATTERN.findall(text))
+
+
+_default_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the shared token counter"""
+    global _default_counter
+    if _default_counter is None:
+        _default_counter = TokenCounter()
+    return _default_counter
+
+
+def _score(value: Any, default: float) -> float:
+    """Read a numeric score column, using the default for NULL values"""
+    return default if value is None else float(value)
+
+
+class ContextPacker:
+    """
+    Packs an assembled context into a token budget.
+
+    Material cores (id, name, type, score) are selected first, by relevance,
+    within a share of the budget; descriptions, properties, facts and
+    relationships then compete by value per token. Items that belong to a
+    material that was not selected are dropped.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, token_counter: Optional[TokenCounter] = None):
+        """
+        Initialize the packer.
+
+        Args:
+            config: Configuration parameters
+            token_counter: Token counter (the shared one if None)
+        """
+        self.config = {
+            "prioritize_properties": [],
+            "description_truncate_chars": 100,
+            "material_budget_share": 0.5,   # Budget share available to material cores
+            "weights": {
+                "description": 1.0,
+                "property": 0.3,
+                "prioritized_property": 0.8,
+                "fact": 2.0,
+                "relationship": 0.8
+            }
+        }
+        if config:
+            self.config.update(config)
+
+        self.token_counter = token_counter or get_token_counter()
+
+    def _tokens(self, fragment: Any) -> int:
+        """Tokens of a JSON fragment"""
+        return self.token_counter.count(json.dumps(fragment, ensure_ascii=False))
+
+    def _entry_tokens(self, fragment: Any) -> int:
+        """Tokens of a JSON fragment stored as a list entry (with its separator)"""
+        return self._tokens(fragment) + 1
+
+    def pack(self, context: Dict[str, Any], token_budget: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Select the most relevant content that fits the token budget.
+
+        Args:
+            context: Structured context with materials, knowledge_facts and relationships
+            token_budget: Maximum tokens of the packed context
+
+        Returns:
+            Tuple of (packed context, packing statistics)
+        """
+        weights = self.config["weights"]
+        prioritized = set(self.config["prioritize_properties"])
+        materials = context.get("materials", [])
+        facts = context.get("knowledge_facts", [])
+        relationships = context.get("relationships", [])
+
+        # Everything except the packed lists is kept as is; the skeleton
+        # includes the list keys and brackets of the packed context
+        skeleton = {k: v for k, v in context.items() if k not in ("materials", "knowledge_facts", "relationships")}
+        skeleton.update({"materials": [], "knowledge_facts": [], "relationships": []})
+        fixed_tokens = self._tokens(skeleton)
+
+        # Material relevance in [0.5, 1] so unscored materials still rank their content
+        material_score = {
+            m.get("id"): 0.5 + 0.5 * min(1.0, max(0.0, _score(m.get("similarity_score"), 0.0)))
+            for m in materials
+        }
+
+        # Items: (value, cost, kind, owner index, key)
+        cores = []
+        items = []
+        for index, material in enumerate(materials):
+            core = {k: v for k, v in material.items() if k not in ("description", "properties")}
+            core["properties"] = {}
+            cores.append((material_score[material.get("id")], self._entry_tokens(core), index))
+
+            score = material_score[material.get("id")]
+            if material.get("description"):
+                items.append((weights["description"] * score,
+                              self._tokens({"description": material["description"]}), "description", index, None))
+            for name, value in (material.get("properties") or {}).items():
+                weight = weights["prioritized_property"] if name in prioritized else weights["property"]
+                items.append((weight * score, self._tokens({name: value}), "property", index, name))
+
+        material_index = {m.get("id"): i for i, m in enumerate(materials)}
+        for index, fact in enumerate(facts):
+            owner = material_index.get(fact.get("material_id"))
+            value = (weights["fact"] * _score(fact.get("relevance"), 1.0) * _score(fact.get("confidence"), 1.0)
+                     * material_score.get(fact.get("material_id"), 0.5))
+            items.append((value, self._entry_tokens(fact), "fact", owner, index))
+        for index, rel in enumerate(relationships):
+            owner = material_index.get(rel.get("source_id"))
+            value = weights["relationship"] * (0.5 + 0.5 * _score(rel.get("strength"), 0.0))
+            items.append((value, self._entry_tokens(rel), "relationship", owner, index))
+
+        total_tokens = fixed_tokens + sum(c[1] for c in cores) + sum(i[1] for i in items)
+        stats = {
+            "token_budget": token_budget,
+            "tokens_before": total_tokens,
+            "items_total": len(cores) + len(items)
+        }
+
+        if total_tokens <= token_budget:
+            stats.update({"tokens_after": total_tokens, "items_included": stats["items_total"], "trimmed": False})
+            return context, stats
+
+        # Material cores first, most relevant first
+        remaining = token_budget - fixed_tokens
+        core_budget = remaining * self.config["material_budget_share"]
+        included_materials = set()
+        for score, cost, index in sorted(cores, key=lambda c: -c[0]):
+            if cost <= core_budget:
+                included_materials.add(index)
+                core_budget -= cost
+                remaining -= cost
+
+        # Greedy knapsack over the remaining items by value per token
+        selected = set()
+        for item in sorted(items, key=lambda i: -i[0] / max(1, i[1])):
+            value, cost, kind, owner, key = item
+            if owner is not None and owner not in included_materials:
+                continue
+            if owner is None and kind in ("description", "property"):
+                continue
+            if cost <= remaining:
+                selected.add((kind, owner, key))
+                remaining -= cost
+
+        # Truncated descriptions for materials whose full description did not fit
+        truncated = {}
+        limit = self.config["description_truncate_chars"]
+        for index in sorted(included_materials, key=lambda i: -material_score[materials[i].get("id")]):
+            description = materials[index].get("description")
+            if not description or ("description", index, None) in selected or len(description) <= limit:
+                continue
+            short = description[:limit] + "..."
+            cost = self._tokens({"description": short})
+            if cost <= remaining:
+                truncated[index] = short
+                remaining -= cost
+
+        # Build the packed context in one pass, keeping the original order
+        packed_materials = []
+        for index, material in enumerate(materials):
+            if index not in included_materials:
+                continue
+            packed = {k: v for k, v in material.items() if k not in ("description", "properties")}
+            if ("description", index, None) in selected:
+                packed["description"] = material["description"]
+            elif index in truncated:
+                packed["description"] = truncated[index]
+            packed["properties"] = {
+                name: value for name, value in (material.get("properties") or {}).items()
+                if ("property", index, name) in selected
+            }
+            packed_materials.append(packed)
+
+        packed_context = dict(context)
+        packed_context["materials"] = packed_materials
+        packed_context["knowledge_facts"] = [f for i, f in enumerate(facts) if ("fact", material_index.get(f.get("material_id")), i) in selected]
+        packed_context["relationships"] = [r for i, r in enumerate(relationships) if ("relationship", material_index.get(r.get("source_id")), i) in selected]
+
+        stats.update({
+            "tokens_after": token_budget - remaining,
+            "items_included": len(included_materials) + len(selected) + len(truncated),
+            "trimmed": True,
+            "dropped": {
+                "materials": len(materials) - len(packed_materials),
+                "knowledge_facts": len(facts) - len(packed_context["knowledge_facts"]),
+                "relationships": len(relationships) - len(packed_context["relationships"])
+            },
+            "truncated_descriptions": len(truncated)
+        })
+        return packed_context, stats
+
+
+def run_benchmark(materials: int = 50, facts_per_material: int = 8, budget: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Time packing of a synthetic context.
+
+    Args:
+        materials: Number of materials
+        facts_per_material: Knowledge facts per material
+        budget: Token budget
+        seed: Random seed
+
+    Returns:
+        Dictionary with timings and packing statistics
+    """
+    rng = random.Random(seed)
+    context = {"query": "durable flooring for a commercial kitchen", "materials": [], "knowledge_facts": [],
+               "relationships": [], "metadata": {"material_count": materials}}
+    for i in range(materials):
+        context["materials"].append({
+            "id": f"m{i}", "name": f"Material {i}", "material_type": rng.choice(["wood", "tile", "stone"]),
+            "similarity_score": rng.random(),
+            "description": " ".join(rng.choice(["durable", "porous", "sealed", "glazed", "matte", "textured"]) for _ in range(60)),
+            "properties": {f"property_{p}": f"{rng.random():.3f} units" for p in range(12)}
+        })
+        for j in range(facts_per_material):
+            context["knowledge_facts"].append({
+                "id": f"k{i}_{j}", "material_id": f"m{i}", "fact": "Fact text " * rng.randint(5, 30),
+                "relevance": rng.random(), "confidence": rng.random(), "source": "benchmark"
+            })
+        context["relationships"].append({"source_id": f"m{i}", "target_id": f"m{(i + 1) % materials}",
+                                         "type": "similar_to", "strength": rng.random(), "description": ""})
+
+    packer = ContextPacker()
+    start = time.perf_counter()
+    _, stats = packer.pack(context, budget)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    packer.pack(context, budget)
+    cached = time.perf_counter() - start
+
+    return {"materials": materials, "budget": budget, "pack_seconds": first,
+            "pack_seconds_cached_counts": cached, "stats": stats, "tiktoken": TIKTOKEN_AVAILABLE}
+
+
+def main():
+    """Main function to run the context packer benchmark"""
+    parser = argparse.ArgumentParser(description="Token-budget context packer")
+    parser.add_argument("--benchmark", action="store_true", help="Pack a synthetic context and report timings")
+    parser.add_argument("--materials", type=int, default=50, help="Number of materials")
+    parser.add_argument("--facts", type=int, default=8, help="Knowledge facts per material")
+    parser.add_argument("--budget", type=int, default=2000, help="Token budget")
+
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    print(json.dumps(run_benchmark(args.materials, args.facts, args.budget), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
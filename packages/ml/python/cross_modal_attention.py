@@ -10,21 +10,49 @@ Key features:
 2. Cross-modal attention for better integration of visual and textual information
 3. Multi-modal embedding generation
 4. Visual feature extraction and integration
+5. Concurrent visual analyses cached by image content hash
+6. Batched cross-modal attention over feature matrices
 """
 
 import asyncio
 import base64
+import copy
+import hashlib
 import json
 import logging
 import os
 from io import BytesIO
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
+from llm_cache import LLMCompletionCache
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
+
+def _fit_width(features: np.ndarray, dim: int) -> np.ndarray:
+    """Truncate or zero-pad the last axis of features to dim"""
+    width = features.shape[-1]
+    if width >= dim:
+        return features[..., :dim]
+    return np.pad(features, [(0, 0)] * (features.ndim - 1) + [(0, dim - width)])
+
+
+class _ImageBytes(bytes):
+    """Decoded image whose content hash is computed once for the analyses of a request"""
+    
+    _digest: Optional[str] = None
+    
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the image content"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self).hexdigest()
+        return self._digest
+
+
 class CrossModalAttention:
     """
     Implements cross-modal attention mechanisms for visual-textual integration.
@@ -58,6 +86,15 @@ class CrossModalAttention:
         self.config.setdefault("attention_heads", 8)
         self.config.setdefault("vision_model_name", "clip")
         self.config.setdefault("text_model_name", "bert")
+        self.config.setdefault("visual_cache_size", 256)  # Cached analyses (5 per image)
+        self.config.setdefault("visual_cache_ttl", 3600)  # seconds
+        
+        # Visual analyses by image content hash; concurrent requests for the
+        # same image share one computation and failures are not cached
+        self.visual_cache = LLMCompletionCache({
+            "max_entries": self.config["visual_cache_size"],
+            "ttl_seconds": self.config["visual_cache_ttl"]
+        })
     
     async def process_multi_modal_query(
         self,
@@ -118,20 +155,21 @@ class CrossModalAttention:
         Returns:
             Processed query with cross-modal attention
         """
-        # Extract visual features
-        visual_features = await self._extract_visual_features(image_data)
-        
-        # Extract text features
-        text_features = await self._extract_text_features(text_query)
+        # Extract visual features, text features and visual context concurrently
+        image_bytes = self._decode_image_or_keep(image_data)
+        visual_features, text_features, visual_context = await asyncio.gather(
+            self._extract_visual_features(image_bytes),
+            self._extract_text_features(text_query),
+            self._extract_visual_context(image_bytes)
+        )
         
         # Apply cross-modal attention
         joint_features = self._apply_cross_modal_attention(text_features, visual_features)
         
         # Generate enhanced query
-        enhanced_query = await self._generate_enhanced_query(text_query, image_data, joint_features)
-        
-        # Extract visual context
-        visual_context = await self._extract_visual_context(image_data)
+        enhanced_query = await self._generate_enhanced_query(
+            text_query, image_bytes, joint_features, visual_context=visual_context
+        )
         
         return {
             "original_text_query": text_query,
@@ -181,11 +219,12 @@ class CrossModalAttention:
         Returns:
             Processed query with generated text description
         """
-        # Extract visual features
-        visual_features = await self._extract_visual_features(image_data)
-        
-        # Extract visual context
-        visual_context = await self._extract_visual_context(image_data)
+        # Extract visual features and visual context concurrently
+        image_bytes = self._decode_image_or_keep(image_data)
+        visual_features, visual_context = await asyncio.gather(
+            self._extract_visual_features(image_bytes),
+            self._extract_visual_context(image_bytes)
+        )
         
         # Generate text query from image
         generated_query = await self._generate_query_from_image(image_data, visual_context)
@@ -215,21 +254,91 @@ class CrossModalAttention:
             return np.zeros(self.config["visual_feature_dim"])
         
         try:
-            # Ensure image_data is bytes
-            if isinstance(image_data, str):
-                # Assume base64 string
-                image_bytes = base64.b64decode(image_data.split(",")[-1] if "," in image_data else image_data)
-            else:
-                image_bytes = image_data
+            image_bytes = self._decode_image(image_data)
+        except Exception as e:
+            logger.error(f"Error extracting visual features: {str(e)}")
+            return np.zeros(self.config["visual_feature_dim"])
+        
+        # Extract features using vision model
+        return await self._cached_visual_analysis(
+            image_bytes, "features", self.vision_model.extract_features,
+            np.zeros(self.config["visual_feature_dim"])
+        )
+    
+    def _decode_image(self, image_data: Union[str, bytes]) -> "_ImageBytes":
+        """
+        Get the bytes of an image.
+        
+        Args:
+            image_data: Image data (base64 string, optionally a data URL, or bytes)
             
-            # Extract features using vision model
-            features = await self.vision_model.extract_features(image_bytes)
+        Returns:
+            Image bytes
+        """
+        if isinstance(image_data, _ImageBytes):
+            return image_data
+        if isinstance(image_data, str):
+            # Assume base64 string
+            return _ImageBytes(base64.b64decode(image_data.split(",")[-1] if "," in image_data else image_data))
+        return _ImageBytes(image_data)
+    
+    def _decode_image_or_keep(self, image_data: Union[str, bytes]) -> Union[str, bytes]:
+        """
+        Decode an image once for all analyses of a request.
+        
+        Malformed data is returned unchanged, so each analysis fails on its own
+        and falls back to its default result.
+        
+        Args:
+            image_data: Image data
             
-            return features
+        Returns:
+            Image bytes, or the original data if it cannot be decoded
+        """
+        try:
+            return self._decode_image(image_data)
+        except Exception as e:
+            logger.error(f"Error decoding image: {str(e)}")
+            return image_data
+    
+    async def _cached_visual_analysis(
+        self,
+        image_bytes: bytes,
+        analysis: str,
+        compute: Callable[[bytes], Awaitable[Any]],
+        fallback: Any
+    ) -> Any:
+        """
+        Run a visual analysis once per image content.
+        
+        Every caller receives its own copy of the result, so changing it
+        does not alter the cached analysis seen by other requests.
+        
+        Args:
+            image_bytes: Image data
+            analysis: Analysis name, part of the cache key
+            compute: Coroutine function performing the analysis
+            fallback: Result returned (and not cached) when the analysis fails
             
+        Returns:
+            Analysis result
+        """
+        key = f"{analysis}:{self._decode_image(image_bytes).digest}"
+        try:
+            result = await self.visual_cache.get_or_create(key, lambda: compute(image_bytes))
         except Exception as e:
-            logger.error(f"Error extracting visual features: {str(e)}")
-            return np.zeros(self.config["visual_feature_dim"])
+            logger.error(f"Error in visual analysis '{analysis}': {str(e)}")
+            return fallback
+        return copy.deepcopy(result)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get visual analysis cache metrics.
+        
+        Returns:
+            Hits, misses, coalesced requests and size of the cache
+        """
+        return self.visual_cache.get_stats()
     
     async def _extract_text_features(self, text: str) -> np.ndarray:
         """
@@ -263,55 +372,54 @@ class CrossModalAttention:
         """
         Apply cross-modal attention between text and visual features.
         
+        Accepts single feature vectors or batches: an N x D matrix of text
+        features is paired row by row with an N x D matrix of visual
+        features, and a single vector (or 1-row matrix) on either side is
+        shared by every row of the other, e.g. several text refinements
+        against one image.
+        
         Args:
-            text_features: Text features
-            visual_features: Visual features
+            text_features: Text features (vector or matrix)
+            visual_features: Visual features (vector or matrix)
             
         Returns:
-            Joint features after cross-modal attention
+            Joint features after cross-modal attention, one row per pair
+            when either input is a matrix
+            
+        Raises:
+            ValueError: If the inputs are not vectors or matrices, or their
+                row counts cannot be paired
         """
+        text_dim = self.config["text_feature_dim"]
+        visual_dim = self.config["visual_feature_dim"]
+        joint_dim = self.config["joint_feature_dim"]
+        
+        text_matrix = np.atleast_2d(np.asarray(text_features, dtype=float))
+        visual_matrix = np.atleast_2d(np.asarray(visual_features, dtype=float))
+        if text_matrix.ndim > 2 or visual_matrix.ndim > 2:
+            raise ValueError("Features must be vectors or matrices")
+        batched = np.ndim(text_features) == 2 or np.ndim(visual_features) == 2
+        rows = max(len(text_matrix), len(visual_matrix))
+        if {len(text_matrix), len(visual_matrix)} - {1, rows}:
+            raise ValueError(
+                f"Cannot pair {len(text_matrix)} text rows with {len(visual_matrix)} visual rows"
+            )
+        
         try:
-            # Simple concatenation as fallback
-            if len(text_features.shape) == 1 and len(visual_features.shape) == 1:
-                # Resize if needed
-                text_feat_resized = text_features[:self.config["text_feature_dim"]]
-                visual_feat_resized = visual_features[:self.config["visual_feature_dim"]]
-                
-                # Pad if needed
-                if len(text_feat_resized) < self.config["text_feature_dim"]:
-                    text_feat_resized = np.pad(
-                        text_feat_resized,
-                        (0, self.config["text_feature_dim"] - len(text_feat_resized))
-                    )
-                
-                if len(visual_feat_resized) < self.config["visual_feature_dim"]:
-                    visual_feat_resized = np.pad(
-                        visual_feat_resized,
-                        (0, self.config["visual_feature_dim"] - len(visual_feat_resized))
-                    )
-                
-                # Concatenate
-                joint_features = np.concatenate([text_feat_resized, visual_feat_resized])
-                
-                # Resize to joint dimension
-                if len(joint_features) > self.config["joint_feature_dim"]:
-                    joint_features = joint_features[:self.config["joint_feature_dim"]]
-                elif len(joint_features) < self.config["joint_feature_dim"]:
-                    joint_features = np.pad(
-                        joint_features,
-                        (0, self.config["joint_feature_dim"] - len(joint_features))
-                    )
-                
-                return joint_features
+            # Simple concatenation of the resized features as fallback,
+            # for all rows at once
+            text_matrix = np.broadcast_to(_fit_width(text_matrix, text_dim), (rows, text_dim))
+            visual_matrix = np.broadcast_to(_fit_width(visual_matrix, visual_dim), (rows, visual_dim))
+            joint_features = _fit_width(np.concatenate([text_matrix, visual_matrix], axis=1), joint_dim)
             
             # More complex attention mechanism would be implemented here
             # This is a simplified version
             
-            return np.zeros(self.config["joint_feature_dim"])
+            return joint_features if batched else joint_features[0]
             
         except Exception as e:
             logger.error(f"Error applying cross-modal attention: {str(e)}")
-            return np.zeros(self.config["joint_feature_dim"])
+            return np.zeros((rows, joint_dim) if batched else joint_dim)
     
     async def _extract_visual_context(
         self,
@@ -330,24 +438,16 @@ class CrossModalAttention:
             return {"error": "No vision model or LLM client available"}
         
         try:
-            # Ensure image_data is bytes
-            if isinstance(image_data, str):
-                # Assume base64 string
-                image_bytes = base64.b64decode(image_data.split(",")[-1] if "," in image_data else image_data)
-            else:
-                image_bytes = image_data
-            
-            # Get image description
-            description = await self._generate_image_description(image_bytes)
-            
-            # Get material detection
-            materials = await self._detect_materials(image_bytes)
-            
-            # Get color analysis
-            colors = await self._analyze_colors(image_bytes)
-            
-            # Get texture analysis
-            textures = await self._analyze_textures(image_bytes)
+            image_bytes = self._decode_image(image_data)
+            
+            # Get image description, material detection, color and texture
+            # analysis concurrently; each is cached by image content
+            description, materials, colors, textures = await asyncio.gather(
+                self._generate_image_description(image_bytes),
+                self._detect_materials(image_bytes),
+                self._analyze_colors(image_bytes),
+                self._analyze_textures(image_bytes)
+            )
             
             return {
                 "description": description,
@@ -373,35 +473,41 @@ class CrossModalAttention:
         if not self.llm_client:
             return ""
         
-        try:
-            # Convert image to base64
-            base64_image = base64.b64encode(image_bytes).decode("utf-8")
-            
-            # Call vision-capable LLM
-            response = await self.llm_client.chat.completions.create(
-                model="gpt-4-vision-preview",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert in materials and interior design. Describe the materials visible in this image, focusing on textures, colors, and material types."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Describe the materials in this image in detail."},
-                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                        ]
-                    }
-                ],
-                max_tokens=300
-            )
-            
-            description = response.choices[0].message.content
-            return description
+        return await self._cached_visual_analysis(image_bytes, "description", self._describe_image, "")
+    
+    async def _describe_image(self, image_bytes: bytes) -> str:
+        """
+        Ask the vision-capable LLM for a description of an image.
+        
+        Args:
+            image_bytes: Image data
             
-        except Exception as e:
-            logger.error(f"Error generating image description: {str(e)}")
-            return ""
+        Returns:
+            Image description
+        """
+        # Convert image to base64
+        base64_image = base64.b64encode(image_bytes).decode("utf-8")
+        
+        # Call vision-capable LLM
+        response = await self.llm_client.chat.completions.create(
+            model="gpt-4-vision-preview",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert in materials and interior design. Describe the materials visible in this image, focusing on textures, colors, and material types."
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "Describe the materials in this image in detail."},
+                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                    ]
+                }
+            ],
+            max_tokens=300
+        )
+        
+        return response.choices[0].message.content
     
     async def _detect_materials(self, image_bytes: bytes) -> List[Dict[str, Any]]:
         """
@@ -416,14 +522,8 @@ class CrossModalAttention:
         if not self.vision_model:
             return []
         
-        try:
-            # Call material detection
-            materials = await self.vision_model.detect_materials(image_bytes)
-            return materials
-            
-        except Exception as e:
-            logger.error(f"Error detecting materials: {str(e)}")
-            return []
+        # Call material detection
+        return await self._cached_visual_analysis(image_bytes, "materials", self.vision_model.detect_materials, [])
     
     async def _analyze_colors(self, image_bytes: bytes) -> List[Dict[str, Any]]:
         """
@@ -438,14 +538,8 @@ class CrossModalAttention:
         if not self.vision_model:
             return []
         
-        try:
-            # Call color analysis
-            colors = await self.vision_model.analyze_colors(image_bytes)
-            return colors
-            
-        except Exception as e:
-            logger.error(f"Error analyzing colors: {str(e)}")
-            return []
+        # Call color analysis
+        return await self._cached_visual_analysis(image_bytes, "colors", self.vision_model.analyze_colors, [])
     
     async def _analyze_textures(self, image_bytes: bytes) -> List[Dict[str, Any]]:
         """
@@ -460,20 +554,15 @@ class CrossModalAttention:
         if not self.vision_model:
             return []
         
-        try:
-            # Call texture analysis
-            textures = await self.vision_model.analyze_textures(image_bytes)
-            return textures
-            
-        except Exception as e:
-            logger.error(f"Error analyzing textures: {str(e)}")
-            return []
+        # Call texture analysis
+        return await self._cached_visual_analysis(image_bytes, "textures", self.vision_model.analyze_textures, [])
     
     async def _generate_enhanced_query(
         self,
         text_query: str,
         image_data: Union[str, bytes],
-        joint_features: np.ndarray
+        joint_features: np.ndarray,
+        visual_context: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Generate an enhanced query using text, image, and joint features.
@@ -482,6 +571,7 @@ class CrossModalAttention:
             text_query: Original text query
             image_data: Image data
             joint_features: Joint features from cross-modal attention
+            visual_context: Visual context of the image (extracted if None)
             
         Returns:
             Enhanced query
@@ -491,7 +581,8 @@ class CrossModalAttention:
         
         try:
             # Extract visual context
-            visual_context = await self._extract_visual_context(image_data)
+            if visual_context is None:
+                visual_context = await self._extract_visual_context(image_data)
             
             # Create prompt for query enhancement
             system_prompt = """
@@ -6,7 +6,7 @@ This module provides distributed processing capabilities for neural OCR engines,
 enabling scaling across multiple machines and accelerators.
 
 Key features:
-1. Task distribution and load balancing
+1. Task distribution and load balancing (priority, size-aware, with backpressure)
 2. Worker management and health monitoring
 3. Results aggregation and error handling
 4. Resource optimization for GPU/CPU workloads
@@ -18,11 +18,14 @@ import sys
 import json
 import time
 import uuid
+import heapq
+import itertools
 import logging
 import socket
 import threading
 import queue
 import multiprocessing
+from collections import OrderedDict
 from typing import Dict, List, Any, Tuple, Optional, Union, Callable
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
@@ -51,6 +54,13 @@ except ImportError:
     TORCH_DISTRIBUTED_AVAILABLE = False
     logger.warning("PyTorch distributed not available")
 
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+    logger.warning("PyMuPDF not available, documents will not be split into page shards")
+
 try:
     from dask.distributed import Client, LocalCluster
     DASK_AVAILABLE = True
@@ -60,6 +70,288 @@ except ImportError:
     logger.warning("Dask not available")
 
 
+class PriorityTaskQueue:
+    """
+    Bounded, thread-safe priority queue for OCR tasks.
+    
+    Tasks are ordered by explicit priority first and, when size-aware
+    scheduling is enabled, by document size (largest first) so a batch does
+    not finish on one long straggler. Ties keep submission order. Producers
+    block when the queue is full and consumers block when it is empty, so
+    neither side has to poll.
+    """
+    
+    def __init__(self, maxsize: int = 0, size_aware: bool = True):
+        """
+        Initialize the queue
+        
+        Args:
+            maxsize: Maximum number of queued tasks (0 for unbounded)
+            size_aware: Whether to schedule larger documents first
+        """
+        self.maxsize = maxsize
+        self.size_aware = size_aware
+        self._heap = []
+        self._removed = set()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+    
+    def _sort_key(self, task: Dict[str, Any]) -> Tuple:
+        size = task.get('size', 0) if self.size_aware else 0
+        return (-task.get('priority', 0), -size, next(self._counter))
+    
+    def put(self, task: Dict[str, Any], block: bool = True, timeout: float = None,
+            force: bool = False):
+        """
+        Add a task to the queue
+        
+        Args:
+            task: Task dictionary
+            block: Whether to wait for free space when the queue is full
+            timeout: Maximum time to wait for free space (seconds)
+            force: Bypass the size bound (used for retries of accepted tasks)
+            
+        Raises:
+            queue.Full: If no space became available
+        """
+        with self._not_full:
+            if not force and self.maxsize > 0:
+                if not block:
+                    if len(self) >= self.maxsize:
+                        raise queue.Full
+                elif not self._not_full.wait_for(
+                        lambda: len(self) < self.maxsize or self._closed, timeout):
+                    raise queue.Full
+            heapq.heappush(self._heap, (self._sort_key(task), task))
+            self._not_empty.notify()
+    
+    def get(self, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Remove and return the highest-priority task
+        
+        Args:
+            timeout: Maximum time to wait for a task (seconds)
+            
+        Returns:
+            Task dictionary, or None if the queue was closed
+            
+        Raises:
+            queue.Empty: If no task arrived before the timeout
+        """
+        with self._not_empty:
+            while True:
+                if not self._not_empty.wait_for(lambda: self._heap or self._closed, timeout):
+                    raise queue.Empty
+                if not self._heap:
+                    return None
+                _, task = heapq.heappop(self._heap)
+                if task['task_id'] in self._removed:
+                    self._removed.discard(task['task_id'])
+                    continue
+                self._not_full.notify()
+                return task
+    
+    def remove(self, task_id: str) -> bool:
+        """
+        Lazily remove a queued task
+        
+        Args:
+            task_id: Task ID to remove
+            
+        Returns:
+            True if the task was queued, False otherwise
+        """
+        with self._lock:
+            if task_id in self._removed or not any(t['task_id'] == task_id for _, t in self._heap):
+                return False
+            self._removed.add(task_id)
+            self._not_full.notify()
+            return True
+    
+    def close(self):
+        """Wake up all waiting producers and consumers"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+    
+    def qsize(self) -> int:
+        """Number of queued tasks"""
+        with self._lock:
+            return len(self)
+    
+    def __len__(self) -> int:
+        return len(self._heap) - len(self._removed)
+
+
+# Engines loaded in this worker process, reused across tasks
+_WORKER_ENGINES: Dict[Tuple[str, str], Any] = {}
+
+
+def _run_ocr_task(task: Dict[str, Any], worker_id: int) -> Dict[str, Any]:
+    """
+    Process a task inside a local worker process
+    
+    Args:
+        task: Task dictionary (without callback)
+        worker_id: Worker slot ID
+        
+    Returns:
+        Task result dictionary
+    """
+    start_time = time.time()
+    
+    try:
+        # Extract task parameters
+        engine_type = task.get('engine_type', 'nougat')
+        document_path = task.get('document_path')
+        document_data = task.get('document_data')
+        processing_options = task.get('options', {})
+        
+        # Reuse a warm engine with the same configuration if available
+        engine_key = (engine_type, json.dumps(processing_options, sort_keys=True, default=str))
+        engine = _WORKER_ENGINES.get(engine_key)
+        
+        if engine is None:
+            if engine_type == 'nougat':
+                from nougat_engine import NougatEngine
+                engine = NougatEngine(processing_options)
+            elif engine_type == 'marker':
+                from marker_engine import MarkerEngine
+                engine = MarkerEngine(processing_options)
+            elif engine_type == 'thepipe':
+                from thepipe_engine import ThePipeEngine
+                engine = ThePipeEngine(processing_options)
+            else:
+                return {
+                    'task_id': task['task_id'],
+                    'status': 'failed',
+                    'error': f"Unknown engine type: {engine_type}",
+                    'worker_id': worker_id,
+                    'timestamp': time.time(),
+                    'processing_time': time.time() - start_time
+                }
+            _WORKER_ENGINES[engine_key] = engine
+        
+        # Process document
+        if document_path and task.get('page_range'):
+            # Page shard of a larger document
+            page_start, page_end = task['page_range']
+            result = _process_page_range(engine, document_path, page_start, page_end,
+                                         processing_options.get('dpi', 300))
+        elif document_path:
+            result = engine.process_file(document_path)
+        elif document_data:
+            result = engine.process_data(document_data)
+        else:
+            return {
+                'task_id': task['task_id'],
+                'status': 'failed',
+                'error': 'No document path or data provided',
+                'worker_id': worker_id,
+                'timestamp': time.time(),
+                'processing_time': time.time() - start_time
+            }
+        
+        return {
+            'task_id': task['task_id'],
+            'status': 'completed',
+            'result': result,
+            'worker_id': worker_id,
+            'timestamp': time.time(),
+            'processing_time': time.time() - start_time
+        }
+        
+    except Exception as e:
+        logger.error(f"Error processing task {task.get('task_id')}: {e}")
+        return {
+            'task_id': task['task_id'],
+            'status': 'failed',
+            'error': str(e),
+            'worker_id': worker_id,
+            'timestamp': time.time(),
+            'processing_time': time.time() - start_time
+        }
+
+
+def _process_page_range(engine: Any, document_path: str, page_start: int,
+                        page_end: int, dpi: int = 300) -> Dict[str, Any]:
+    """
+    OCR a contiguous range of PDF pages
+    
+    Args:
+        engine: Engine instance with a process_image method
+        document_path: Path to the PDF
+        page_start: First page index (inclusive, 0-based)
+        page_end: Last page index (exclusive)
+        dpi: Rasterization resolution
+        
+    Returns:
+        Dictionary with per-page results in page order
+    """
+    import tempfile
+    
+    pages = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        doc = fitz.open(document_path)
+        try:
+            for page_num in range(page_start, min(page_end, len(doc))):
+                image_path = os.path.join(temp_dir, f"page_{page_num + 1}.png")
+                doc[page_num].get_pixmap(dpi=dpi).save(image_path)
+                page_result = engine.process_image(image_path)
+                pages.append({'page_number': page_num + 1, 'result': page_result})
+                os.remove(image_path)
+        finally:
+            doc.close()
+    
+    return {'page_range': [page_start, page_end], 'pages': pages}
+
+
+def _merge_page_results(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine per-page engine results into one document result
+    
+    The result has the shape the engines return for a whole document:
+    text of all pages, structured content with the list entries of all
+    pages concatenated, and the mean confidence. The per-page results are
+    kept under 'pages'.
+    
+    Args:
+        pages: Page entries ({'page_number', 'result'}) in page order
+        
+    Returns:
+        Document result dictionary
+    """
+    texts = []
+    structured_content: Dict[str, Any] = {}
+    confidences = []
+    
+    for page in pages:
+        result = page.get('result') or {}
+        if result.get('text'):
+            texts.append(result['text'])
+        if 'confidence' in result:
+            confidences.append(result['confidence'])
+        
+        for key, value in (result.get('structured_content') or {}).items():
+            if isinstance(value, list):
+                structured_content.setdefault(key, []).extend(value)
+            elif isinstance(value, dict):
+                structured_content.setdefault(key, {}).update(value)
+            elif key not in structured_content:
+                structured_content[key] = value
+    
+    return {
+        'text': '\n\n'.join(texts),
+        'structured_content': structured_content,
+        'confidence': sum(confidences) / len(confidences) if confidences else 0.0,
+        'pages': pages
+    }
+
+
 class DistributedOCRManager:
     """Manages distributed OCR processing across multiple nodes"""
     
@@ -84,10 +376,12 @@ class DistributedOCRManager:
             'task_queue_size': 1000,
             'result_queue_size': 1000,
             'log_level': 'INFO',
-            'scheduler_type': 'dynamic',  # 'static', 'dynamic', 'priority'
+            'scheduler_type': 'dynamic',  # 'static' (FIFO), 'dynamic'/'priority' (size-aware)
             'priority_rules': {},  # Custom rules for priority scheduling
             'checkpoint_interval': 50,  # tasks
-            'checkpoint_dir': None
+            'checkpoint_dir': None,
+            'completed_result_ttl': 3600,  # seconds an unfetched result is kept
+            'max_completed_results': 1000  # unfetched results kept in memory
         }
         
         if config:
@@ -107,10 +401,16 @@ class DistributedOCRManager:
         # Initialize backend
         self.backend = None
         self.workers = []
-        self.tasks = queue.Queue(maxsize=self.config['task_queue_size'])
+        self.tasks = PriorityTaskQueue(
+            maxsize=self.config['task_queue_size'],
+            size_aware=self.config['scheduler_type'] != 'static'
+        )
         self.results = queue.Queue(maxsize=self.config['result_queue_size'])
         self.worker_status = {}
+        self.idle_workers = queue.Queue()  # Worker IDs ready for a task
         self.task_map = {}  # Maps task_id to task details
+        self.completed_results = OrderedDict()  # Maps task_id to (completion time, final result) until fetched
+        self.completed_lock = threading.Lock()
         self.shutdown_flag = threading.Event()
         
         # Initialize statistics
@@ -119,6 +419,8 @@ class DistributedOCRManager:
             'tasks_completed': 0,
             'tasks_failed': 0,
             'processing_time': 0,
+            'queue_wait_time': 0,
+            'max_queue_wait_time': 0,
             'worker_utilization': {},
             'start_time': time.time()
         }
@@ -288,6 +590,7 @@ class DistributedOCRManager:
                     'tasks_processed': 0,
                     'current_task': None
                 }
+                self.idle_workers.put(worker_idx)
             
             # Start task scheduler and result collector threads
             self._start_scheduler()
@@ -327,7 +630,7 @@ class DistributedOCRManager:
                                     if task.get('retries', 0) < self.config['max_retries']:
                                         task['retries'] = task.get('retries', 0) + 1
                                         logger.info(f"Requeueing task {task_id} for retry {task['retries']}/{self.config['max_retries']}")
-                                        self.tasks.put(task)
+                                        self.tasks.put(task, force=True)
                                     else:
                                         # Mark as failed
                                         logger.error(f"Task {task_id} failed after {self.config['max_retries']} retries")
@@ -374,36 +677,17 @@ class DistributedOCRManager:
         def task_scheduler():
             while not self.shutdown_flag.is_set():
                 try:
-                    # Get next task
-                    task = self.tasks.get(timeout=1.0)
+                    # Block until a worker is free, then until a task is queued
+                    worker_id = self.idle_workers.get()
+                    if worker_id is None or self.shutdown_flag.is_set():
+                        break
                     
-                    # Find available worker
-                    worker_id = self._find_available_worker()
+                    task = self.tasks.get()
+                    if task is None:
+                        break
                     
-                    if worker_id is not None:
-                        # Assign task to worker
-                        self.worker_status[worker_id]['status'] = 'busy'
-                        self.worker_status[worker_id]['current_task'] = task['task_id']
-                        self.worker_status[worker_id]['last_heartbeat'] = time.time()
-                        
-                        # Submit task to worker
-                        if self.config['backend'] == 'local':
-                            future = self.process_pool.submit(
-                                self._process_task,
-                                task,
-                                worker_id
-                            )
-                            
-                            # Add callback for result handling
-                            future.add_done_callback(self._handle_task_result)
-                    else:
-                        # No worker available, put task back in queue
-                        self.tasks.put(task)
-                        time.sleep(0.1)
+                    self._dispatch_task(task, worker_id)
                     
-                except queue.Empty:
-                    # No tasks in queue
-                    pass
                 except Exception as e:
                     logger.error(f"Error in scheduler thread: {e}")
         
@@ -411,6 +695,39 @@ class DistributedOCRManager:
         self.scheduler_thread = threading.Thread(target=task_scheduler, daemon=True)
         self.scheduler_thread.start()
     
+    def _dispatch_task(self, task: Dict[str, Any], worker_id: int):
+        """
+        Hand a task to a local worker
+        
+        Args:
+            task: Task dictionary
+            worker_id: ID of an idle worker
+        """
+        now = time.time()
+        task['status'] = 'running'
+        task['dispatch_time'] = now
+        queue_wait = now - task['submission_time']
+        self.stats['queue_wait_time'] += queue_wait
+        self.stats['max_queue_wait_time'] = max(self.stats['max_queue_wait_time'], queue_wait)
+        
+        # Assign task to worker
+        self.worker_status[worker_id]['status'] = 'busy'
+        self.worker_status[worker_id]['current_task'] = task['task_id']
+        self.worker_status[worker_id]['last_heartbeat'] = now
+        
+        # Callbacks stay in this process
+        payload = {k: v for k, v in task.items() if k != 'callback'}
+        
+        try:
+            future = self.process_pool.submit(_run_ocr_task, payload, worker_id)
+        except Exception as e:
+            self._handle_task_result(None, task, worker_id, error=e)
+            return
+        
+        future.add_done_callback(
+            lambda f, task=task, worker_id=worker_id: self._handle_task_result(f, task, worker_id)
+        )
+    
     def _start_result_collector(self):
         """Start result collector thread"""
         def result_collector():
@@ -426,15 +743,20 @@ class DistributedOCRManager:
                         
                         # Update task with result
                         task['result'] = result
+                        task['status'] = result.get('status', task.get('status'))
                         
                         # Remove from task map if complete
                         if result.get('status') in ['completed', 'failed']:
+                            self._store_completed_result(task_id, result)
                             del self.task_map[task_id]
+                    else:
+                        task = {}
                     
                     # Notify callback if provided
-                    if 'callback' in result and callable(result['callback']):
+                    callback = result.get('callback') or task.get('callback')
+                    if callable(callback):
                         try:
-                            result['callback'](result)
+                            callback(result)
                         except Exception as e:
                             logger.error(f"Error in result callback: {e}")
                     
@@ -458,120 +780,49 @@ class DistributedOCRManager:
         self.result_thread = threading.Thread(target=result_collector, daemon=True)
         self.result_thread.start()
     
-    def _find_available_worker(self) -> Optional[int]:
-        """Find an available worker"""
-        for worker_id, status in self.worker_status.items():
-            if status['status'] == 'idle':
-                return worker_id
-        return None
-    
-    def _process_task(self, task: Dict[str, Any], worker_id: int) -> Dict[str, Any]:
+    def _handle_task_result(self, future, task: Dict[str, Any], worker_id: int,
+                            error: Exception = None):
         """
-        Process a task (for local backend)
+        Handle task result from Future and release the worker
         
         Args:
+            future: Completed Future (None if submission failed)
             task: Task dictionary
-            worker_id: Worker ID
-            
-        Returns:
-            Task result dictionary
+            worker_id: ID of the worker that ran the task
+            error: Submission error, if any
         """
         try:
-            start_time = time.time()
-            
-            # Update worker status
-            self.worker_status[worker_id]['status'] = 'busy'
-            self.worker_status[worker_id]['current_task'] = task['task_id']
-            
-            # Extract task parameters
-            engine_type = task.get('engine_type', 'nougat')
-            document_path = task.get('document_path')
-            document_data = task.get('document_data')
-            processing_options = task.get('options', {})
-            
-            # Initialize appropriate engine
-            if engine_type == 'nougat':
-                # Import and initialize Nougat
-                from nougat_engine import NougatEngine
-                engine = NougatEngine(processing_options)
-            elif engine_type == 'marker':
-                # Import and initialize Marker
-                from marker_engine import MarkerEngine
-                engine = MarkerEngine(processing_options)
-            elif engine_type == 'thepipe':
-                # Import and initialize thepipe
-                from thepipe_engine import ThePipeEngine
-                engine = ThePipeEngine(processing_options)
-            else:
-                return {
-                    'task_id': task['task_id'],
-                    'status': 'failed',
-                    'error': f"Unknown engine type: {engine_type}",
-                    'worker_id': worker_id,
-                    'timestamp': time.time(),
-                    'processing_time': time.time() - start_time
-                }
-            
-            # Process document
-            if document_path:
-                # Process from file
-                result = engine.process_file(document_path)
-            elif document_data:
-                # Process from memory
-                result = engine.process_data(document_data)
-            else:
-                return {
+            if error is None:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+            if error is not None:
+                logger.error(f"Error handling task result: {error}")
+                result = {
                     'task_id': task['task_id'],
                     'status': 'failed',
-                    'error': 'No document path or data provided',
+                    'error': str(error),
                     'worker_id': worker_id,
                     'timestamp': time.time(),
-                    'processing_time': time.time() - start_time
+                    'processing_time': 0.0
                 }
             
-            # Update worker status
-            self.worker_status[worker_id]['status'] = 'idle'
-            self.worker_status[worker_id]['current_task'] = None
-            self.worker_status[worker_id]['tasks_processed'] += 1
-            self.worker_status[worker_id]['last_heartbeat'] = time.time()
+            # Per-task scheduling metrics
+            result['queue_wait_time'] = task['dispatch_time'] - task['submission_time']
+            result['run_time'] = result.get('processing_time', 0.0)
+            self.stats['processing_time'] += result['run_time']
             
-            # Return result
-            return {
-                'task_id': task['task_id'],
-                'status': 'completed',
-                'result': result,
-                'worker_id': worker_id,
-                'timestamp': time.time(),
-                'processing_time': time.time() - start_time
-            }
-            
-        except Exception as e:
-            logger.error(f"Error processing task {task.get('task_id')}: {e}")
-            
-            # Update worker status
-            self.worker_status[worker_id]['status'] = 'idle'
-            self.worker_status[worker_id]['current_task'] = None
-            self.worker_status[worker_id]['last_heartbeat'] = time.time()
-            
-            # Return error
-            return {
-                'task_id': task['task_id'],
-                'status': 'failed',
-                'error': str(e),
-                'worker_id': worker_id,
-                'timestamp': time.time(),
-                'processing_time': time.time() - start_time
-            }
-    
-    def _handle_task_result(self, future):
-        """Handle task result from Future"""
-        try:
-            result = future.result()
-            if result:
-                # Put result in queue
-                self.results.put(result)
-        except Exception as e:
-            logger.error(f"Error handling task result: {e}")
+            status = self.worker_status[worker_id]
+            status['tasks_processed'] += 1
+            self.results.put(result)
+        finally:
+            # Worker is free again - wake the scheduler
+            status = self.worker_status[worker_id]
+            status['status'] = 'idle'
+            status['current_task'] = None
+            status['last_heartbeat'] = time.time()
+            self.idle_workers.put(worker_id)
     
     def _save_checkpoint(self):
         """Save checkpoint of current state"""
@@ -602,19 +853,33 @@ class DistributedOCRManager:
     
     def submit_task(self, document_path: str = None, document_data: bytes = None, 
                   engine_type: str = 'nougat', options: Dict[str, Any] = None,
-                  callback: Callable = None) -> str:
+                  callback: Callable = None, priority: int = 0,
+                  block: bool = True, timeout: float = None,
+                  page_range: Tuple[int, int] = None, size: int = None) -> str:
         """
         Submit a document processing task
         
+        When the task queue is full this call blocks until a worker frees a
+        slot (backpressure), or raises queue.Full if block is False or the
+        timeout expires.
+        
         Args:
             document_path: Path to document file (optional)
             document_data: Raw document data (optional)
             engine_type: OCR engine to use ('nougat', 'marker', 'thepipe')
             options: Processing options specific to the engine
             callback: Optional callback function to call with result
+            priority: Higher priority tasks are scheduled first
+            block: Whether to wait for queue space
+            timeout: Maximum time to wait for queue space (seconds)
+            page_range: Optional (start, end) page indices to process
+            size: Scheduling weight, defaults to the document size in bytes
             
         Returns:
             Task ID string
+            
+        Raises:
+            queue.Full: If the task could not be queued
         """
         if not document_path and not document_data:
             raise ValueError("Either document_path or document_data must be provided")
@@ -622,6 +887,13 @@ class DistributedOCRManager:
         # Generate unique task ID
         task_id = str(uuid.uuid4())
         
+        # Document size drives size-aware scheduling
+        if size is None:
+            try:
+                size = os.path.getsize(document_path) if document_path else len(document_data)
+            except OSError:
+                size = 0
+        
         # Create task
         task = {
             'task_id': task_id,
@@ -632,14 +904,21 @@ class DistributedOCRManager:
             'callback': callback,
             'submission_time': time.time(),
             'status': 'submitted',
-            'retries': 0
+            'retries': 0,
+            'priority': priority,
+            'size': size,
+            'page_range': list(page_range) if page_range else None
         }
         
         # Add to task map
         self.task_map[task_id] = task
         
-        # Add to task queue
-        self.tasks.put(task)
+        # Add to task queue, waiting for space if needed
+        try:
+            self.tasks.put(task, block=block, timeout=timeout)
+        except queue.Full:
+            del self.task_map[task_id]
+            raise
         
         # Update stats
         self.stats['tasks_submitted'] += 1
@@ -658,6 +937,10 @@ class DistributedOCRManager:
             Result dictionary or None if timeout
         """
         # Check if already completed
+        result = self._pop_completed_result(task_id)
+        if result is not None:
+            return result
+        
         if task_id not in self.task_map:
             # Check if it was already processed
             task_result_file = os.path.join(
@@ -683,8 +966,48 @@ class DistributedOCRManager:
             
             time.sleep(0.1)
         
-        # Timeout reached
-        return None
+        # Result may have landed between checks
+        return self._pop_completed_result(task_id)
+    
+    def _store_completed_result(self, task_id: str, result: Dict[str, Any]):
+        """
+        Keep a final result until it is fetched, expired or evicted
+        
+        Args:
+            task_id: Task ID
+            result: Final result dictionary
+        """
+        now = time.time()
+        with self.completed_lock:
+            self.completed_results[task_id] = (now, result)
+            self.completed_results.move_to_end(task_id)
+            
+            # Drop expired results, then the oldest ones beyond the size bound
+            ttl = self.config['completed_result_ttl']
+            while self.completed_results:
+                oldest_id, (completed_at, _) = next(iter(self.completed_results.items()))
+                if now - completed_at <= ttl and len(self.completed_results) <= self.config['max_completed_results']:
+                    break
+                del self.completed_results[oldest_id]
+    
+    def _pop_completed_result(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Take a final result out of memory
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            Result dictionary or None if unknown, expired or already fetched
+        """
+        with self.completed_lock:
+            entry = self.completed_results.pop(task_id, None)
+        if entry is None:
+            return None
+        completed_at, result = entry
+        if time.time() - completed_at > self.config['completed_result_ttl']:
+            return None
+        return result
     
     def get_status(self, task_id: str = None) -> Dict[str, Any]:
         """
@@ -711,8 +1034,11 @@ class DistributedOCRManager:
                 return {'task_id': task_id, 'status': 'not_found'}
         
         # Get overall status
+        finished = max(1, self.stats['tasks_completed'] + self.stats['tasks_failed'])
         return {
             'stats': self.stats,
+            'avg_queue_wait_time': self.stats['queue_wait_time'] / finished,
+            'avg_run_time': self.stats['processing_time'] / finished,
             'tasks_queued': self.tasks.qsize(),
             'results_queued': self.results.qsize(),
             'active_tasks': len(self.task_map),
@@ -748,7 +1074,8 @@ class DistributedOCRManager:
                     
                     return False
             
-            # Remove from task map
+            # Drop from the queue and task map
+            self.tasks.remove(task_id)
             del self.task_map[task_id]
             
             # Add cancellation result
@@ -767,8 +1094,10 @@ class DistributedOCRManager:
         """Shutdown distributed processing"""
         logger.info("Shutting down distributed OCR processing")
         
-        # Set shutdown flag
+        # Set shutdown flag and wake the scheduler
         self.shutdown_flag.set()
+        self.tasks.close()
+        self.idle_workers.put(None)
         
         # Wait for threads to finish
         if hasattr(self, 'monitor_thread') and self.monitor_thread.is_alive():
@@ -797,24 +1126,41 @@ class DistributedOCRManager:
 
 
 class DistributedBatchProcessor:
-    """Processes batches of documents using distributed OCR"""
+    """
+    Processes batches of documents using distributed OCR
     
-    def __init__(self, distributed_manager: DistributedOCRManager):
+    PDFs are split into page-range shards so that a long document is spread
+    over all workers, and shard results are merged back in page order.
+    Completed shards are checkpointed to the manager's checkpoint directory,
+    so a batch interrupted by a crash can be resumed by calling
+    process_batch again with the same batch ID.
+    """
+    
+    def __init__(self, distributed_manager: DistributedOCRManager,
+                 pages_per_shard: Optional[int] = None, max_pages_per_shard: int = 16):
         """
         Initialize batch processor
         
         Args:
             distributed_manager: DistributedOCRManager instance
+            pages_per_shard: Fixed shard size in pages (None to size automatically)
+            max_pages_per_shard: Upper bound for automatic shard sizing
         """
         self.manager = distributed_manager
+        self.pages_per_shard = pages_per_shard
+        self.max_pages_per_shard = max_pages_per_shard
         self.batch_results = {}
         self.batch_stats = {}
+        self._lock = threading.Lock()
     
     def process_batch(self, document_paths: List[str], engine_type: str = 'nougat',
                     options: Dict[str, Any] = None, batch_id: str = None) -> str:
         """
         Process a batch of documents
         
+        If a checkpoint exists for batch_id, only the shards that have not
+        completed yet are submitted.
+        
         Args:
             document_paths: List of paths to documents
             engine_type: OCR engine to use
@@ -823,41 +1169,278 @@ class DistributedBatchProcessor:
             
         Returns:
             Batch ID string
+            
+        Raises:
+            ValueError: If batch_id has a checkpoint for different documents
         """
         # Generate batch ID if not provided
         if not batch_id:
             batch_id = f"batch_{str(uuid.uuid4())}"
         
+        # Reuse the shard plan of an interrupted batch if there is one
+        plan = self._load_batch_plan(batch_id)
+        if plan is not None and [doc['document_path'] for doc in plan] != list(document_paths):
+            raise ValueError(
+                f"Batch {batch_id} was started with different documents; "
+                f"resume it with the same document paths or use a new batch ID"
+            )
+        if plan is None:
+            plan = self._plan_shards(document_paths)
+            self._save_batch_plan(batch_id, plan, engine_type, options)
+        completed_shards = self._load_completed_shards(batch_id)
+        
         # Initialize batch tracking
-        self.batch_results[batch_id] = {
+        batch = {
             'status': 'in_progress',
-            'total': len(document_paths),
+            'total': len(plan),
             'completed': 0,
             'failed': 0,
             'results': {},
+            'documents': {},
+            'document_order': [doc['document_path'] for doc in plan],
             'task_ids': [],
+            'shards_total': sum(len(doc['shards']) for doc in plan),
+            'shards_resumed': 0,
             'start_time': time.time()
         }
+        self.batch_results[batch_id] = batch
         
-        # Submit each document as a task
-        for doc_path in document_paths:
-            # Create callback for tracking batch progress
-            def result_callback(result, batch_id=batch_id, doc_path=doc_path):
-                self._handle_batch_result(batch_id, doc_path, result)
-            
-            # Submit task
-            task_id = self.manager.submit_task(
-                document_path=doc_path,
-                engine_type=engine_type,
-                options=options,
-                callback=result_callback
-            )
-            
-            # Track task ID for this batch
-            self.batch_results[batch_id]['task_ids'].append(task_id)
+        for doc in plan:
+            batch['documents'][doc['document_path']] = {
+                'page_count': doc['page_count'],
+                'page_ranges': doc['shards'],
+                'shards': [None] * len(doc['shards'])
+            }
+        
+        # Restore checkpointed shard results
+        for doc_index, doc in enumerate(plan):
+            for shard_index in range(len(doc['shards'])):
+                result = completed_shards.get((doc_index, shard_index))
+                if result is not None:
+                    batch['shards_resumed'] += 1
+                    self._handle_shard_result(batch_id, doc_index, shard_index, result, save=False)
+        
+        if batch['shards_resumed']:
+            logger.info(f"Resuming batch {batch_id}: {batch['shards_resumed']}/{batch['shards_total']} shards already done")
+        
+        # Submit the remaining shards
+        for doc_index, doc in enumerate(plan):
+            doc_path = doc['document_path']
+            try:
+                file_size = os.path.getsize(doc_path)
+            except OSError:
+                file_size = 0
+            
+            for shard_index, page_range in enumerate(doc['shards']):
+                if (doc_index, shard_index) in completed_shards:
+                    continue
+                
+                # Create callback for tracking batch progress
+                def result_callback(result, batch_id=batch_id, doc_index=doc_index,
+                                    shard_index=shard_index):
+                    self._handle_shard_result(batch_id, doc_index, shard_index, result)
+                
+                if page_range is None:
+                    size = file_size
+                else:
+                    size = file_size * (page_range[1] - page_range[0]) // max(1, doc['page_count'])
+                
+                # Submit task
+                task_id = self.manager.submit_task(
+                    document_path=doc_path,
+                    engine_type=engine_type,
+                    options=options,
+                    callback=result_callback,
+                    page_range=page_range,
+                    size=size
+                )
+                
+                # Track task ID for this batch
+                batch['task_ids'].append(task_id)
         
         return batch_id
     
+    def _plan_shards(self, document_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Split documents into page-range shards
+        
+        The shard size targets several shards per worker over the whole
+        batch so that wall time follows total pages divided by workers.
+        
+        Args:
+            document_paths: List of paths to documents
+            
+        Returns:
+            List of per-document plans with their shard page ranges
+        """
+        page_counts = [self._count_pages(path) for path in document_paths]
+        
+        pages_per_shard = self.pages_per_shard
+        if not pages_per_shard:
+            total_pages = sum(count for count in page_counts if count)
+            target_shards = max(1, self.manager.config['num_workers'] * 4)
+            pages_per_shard = -(-total_pages // target_shards) if total_pages else 1
+            pages_per_shard = max(1, min(self.max_pages_per_shard, pages_per_shard))
+        
+        plan = []
+        for path, page_count in zip(document_paths, page_counts):
+            if page_count:
+                shards = [
+                    [start, min(start + pages_per_shard, page_count)]
+                    for start in range(0, page_count, pages_per_shard)
+                ]
+            else:
+                # Not a splittable document - process it whole
+                shards = [None]
+            plan.append({'document_path': path, 'page_count': page_count, 'shards': shards})
+        
+        return plan
+    
+    def _count_pages(self, document_path: str) -> int:
+        """
+        Count the pages of a PDF
+        
+        Args:
+            document_path: Path to the document
+            
+        Returns:
+            Page count, or 0 if the document cannot be split
+        """
+        if not FITZ_AVAILABLE or not document_path.lower().endswith('.pdf'):
+            return 0
+        try:
+            with fitz.open(document_path) as doc:
+                return len(doc)
+        except Exception as e:
+            logger.warning(f"Could not count pages of {document_path}: {e}")
+            return 0
+    
+    def _batch_checkpoint_dir(self, batch_id: str) -> str:
+        """Directory holding the shard plan and completed shards of a batch"""
+        return os.path.join(self.manager.config['checkpoint_dir'], batch_id)
+    
+    def _save_batch_plan(self, batch_id: str, plan: List[Dict[str, Any]],
+                         engine_type: str, options: Dict[str, Any]):
+        """Persist the shard plan so an interrupted batch can be resumed"""
+        try:
+            checkpoint_dir = self._batch_checkpoint_dir(batch_id)
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            with open(os.path.join(checkpoint_dir, 'plan.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'batch_id': batch_id,
+                    'engine_type': engine_type,
+                    'options': options or {},
+                    'documents': plan,
+                    'timestamp': time.time()
+                }, f, indent=2, default=str)
+        except Exception as e:
+            logger.error(f"Error saving plan for batch {batch_id}: {e}")
+    
+    def _load_batch_plan(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Load the shard plan of a previously started batch"""
+        plan_path = os.path.join(self._batch_checkpoint_dir(batch_id), 'plan.json')
+        if not os.path.exists(plan_path):
+            return None
+        try:
+            with open(plan_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['documents']
+        except Exception as e:
+            logger.error(f"Error loading plan for batch {batch_id}: {e}")
+            return None
+    
+    def _load_completed_shards(self, batch_id: str) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        """Load checkpointed results of completed shards"""
+        completed = {}
+        checkpoint_dir = self._batch_checkpoint_dir(batch_id)
+        if not os.path.isdir(checkpoint_dir):
+            return completed
+        
+        for filename in os.listdir(checkpoint_dir):
+            if not (filename.startswith('shard_') and filename.endswith('.json')):
+                continue
+            try:
+                _, doc_index, shard_index = filename[:-len('.json')].split('_')
+                with open(os.path.join(checkpoint_dir, filename), 'r', encoding='utf-8') as f:
+                    completed[(int(doc_index), int(shard_index))] = json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable shard checkpoint {filename}: {e}")
+        
+        return completed
+    
+    def _save_shard_result(self, batch_id: str, doc_index: int, shard_index: int,
+                           result: Dict[str, Any]):
+        """Checkpoint a completed shard"""
+        try:
+            checkpoint_dir = self._batch_checkpoint_dir(batch_id)
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            shard_path = os.path.join(checkpoint_dir, f"shard_{doc_index}_{shard_index}.json")
+            temp_path = f"{shard_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, default=str)
+            os.replace(temp_path, shard_path)
+        except Exception as e:
+            logger.error(f"Error saving shard checkpoint for batch {batch_id}: {e}")
+    
+    def _handle_shard_result(self, batch_id: str, doc_index: int, shard_index: int,
+                             result: Dict[str, Any], save: bool = True):
+        """Record a shard result and merge the document once all shards are in"""
+        with self._lock:
+            if batch_id not in self.batch_results:
+                return
+            batch = self.batch_results[batch_id]
+            doc_path = batch['document_order'][doc_index]
+            document = batch['documents'][doc_path]
+            
+            result = {k: v for k, v in result.items() if k != 'callback'}
+            document['shards'][shard_index] = result
+            
+            if save and result.get('status') == 'completed':
+                self._save_shard_result(batch_id, doc_index, shard_index, result)
+            
+            if any(shard is None for shard in document['shards']):
+                return
+            
+            merged = self._merge_shards(document['shards'], document['page_ranges'])
+        
+        self._handle_batch_result(batch_id, doc_path, merged)
+    
+    def _merge_shards(self, shards: List[Dict[str, Any]],
+                      page_ranges: List[Optional[List[int]]]) -> Dict[str, Any]:
+        """
+        Merge shard results of one document in page order
+        
+        The merged 'result' has the same shape as the result of an unsharded
+        document (see _merge_page_results).
+        
+        Args:
+            shards: Shard results ordered by shard index
+            page_ranges: Page range of each shard (None for unsharded documents)
+            
+        Returns:
+            Document-level result dictionary
+        """
+        if page_ranges == [None]:
+            # Unsharded document
+            return shards[0]
+        
+        failed = [i for i, shard in enumerate(shards) if shard.get('status') != 'completed']
+        pages = []
+        for shard in shards:
+            if shard.get('status') == 'completed':
+                pages.extend(shard.get('result', {}).get('pages', []))
+        
+        merged = {
+            'status': 'failed' if failed else 'completed',
+            'result': _merge_page_results(pages),
+            'shards': len(shards),
+            'processing_time': sum(shard.get('processing_time', 0) for shard in shards),
+            'timestamp': time.time()
+        }
+        if failed:
+            merged['error'] = '; '.join(str(shards[i].get('error')) for i in failed)
+            merged['failed_page_ranges'] = [page_ranges[i] for i in failed]
+        return merged
+    
     def _handle_batch_result(self, batch_id: str, doc_path: str, result: Dict[str, Any]):
         """Handle result from a batch task"""
         if batch_id in self.batch_results:
@@ -57,6 +57,16 @@ class DistributedRetrieval:
         self.store_stats = {i: {"queries": 0, "latency": 0} for i in range(len(self.vector_stores))}
         self.semaphore = asyncio.Semaphore(self.config["max_concurrent_requests"])
     
+    @property
+    def accepts_query_embedding(self) -> bool:
+        """
+        Whether a precomputed "_query_embedding" option is used.
+        
+        Stores that search by vector (find_similar_by_vector, as
+        VectorSearchClient) take the supplied embedding instead of the text.
+        """
+        return any(hasattr(store, "find_similar_by_vector") for store in self.vector_stores)
+    
     async def retrieve(
         self,
         query: str,
@@ -129,7 +139,8 @@ class DistributedRetrieval:
         # Create a string representation of the query and options
         key_data = {
             "query": query,
-            "options": {k: v for k, v in options.items() if k != "user_id"}  # Exclude user-specific data
+            # Exclude user-specific data and private per-request values (memos, embeddings)
+            "options": {k: v for k, v in options.items() if k != "user_id" and not k.startswith("_")}
         }
         
         # Generate a hash
@@ -312,13 +323,17 @@ class DistributedRetrieval:
         start_time = time.time()
         
         try:
+            # Use a precomputed query embedding when the store searches by vector
+            embedding = options.get("_query_embedding")
+            if embedding is not None and hasattr(store, "find_similar_by_vector"):
+                call = self._search_by_vector(store, embedding, options)
+            else:
+                call = store.retrieve(query, options)
+            
             # Acquire semaphore to limit concurrent requests
             async with self.semaphore:
                 # Call the store with timeout
-                result = await asyncio.wait_for(
-                    store.retrieve(query, options),
-                    timeout=self.config["timeout_seconds"]
-                )
+                result = await asyncio.wait_for(call, timeout=self.config["timeout_seconds"])
             
             # Update stats
             latency = time.time() - start_time
@@ -341,6 +356,37 @@ class DistributedRetrieval:
             logger.error(f"Error retrieving from store {store_idx}: {str(e)}")
             return {"materials": [], "metadata": {"error": str(e), "latency": time.time() - start_time}}
     
+    async def _search_by_vector(
+        self,
+        store: Any,
+        embedding: Any,
+        options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Search a vector store with a precomputed query embedding.
+        
+        Args:
+            store: Vector store client with find_similar_by_vector
+            embedding: Query embedding
+            options: Additional options (limit, threshold, material_type, filters)
+            
+        Returns:
+            Results from the store
+        """
+        if hasattr(embedding, "tolist"):
+            embedding = embedding.tolist()
+        
+        rows = await store.find_similar_by_vector(
+            list(embedding),
+            threshold=options.get("threshold", 0.5),
+            limit=options.get("limit", 10),
+            filters=options.get("filters"),
+            material_type=options.get("material_type")
+        )
+        
+        materials = [{**row, "score": row.get("similarity") or 0.0} for row in rows or []]
+        return {"materials": materials, "metadata": {"search": "vector"}}
+    
     def _select_store(self) -> int:
         """
         Select a store based on load balancing.
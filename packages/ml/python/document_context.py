@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Shared Document Context
+
+This module opens a document once and lazily caches the page images and the
+intermediate images every OCR component derives from them, so that the
+specialized OCR, form extraction, layout analysis and handwriting detection
+stages of the enhanced pipeline do not each rasterize and binarize the same
+pages.
+
+Key features:
+1. Single PDF open and one rasterization per page and DPI
+2. Cached grayscale, binarized and line-mask images
+3. Generic per-page cache for component-specific derived images
+4. Memory-bounded LRU eviction of cached images
+5. Lazily materialized page PNGs for path-based APIs
+6. Cached text-layer classification for routing born-digital pages
+"""
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Optional, Callable
+
+import cv2
+import numpy as np
+
+from text_layer import classify_page
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Try to import PyMuPDF (only required for PDF documents)
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+    logger.warning("PyMuPDF not available. PDF documents cannot be opened.")
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff']
+
+
+class DocumentContext:
+    """
+    Lazily rasterized, cached view of a document shared by the OCR components.
+
+    Every cached item is keyed by (page index, DPI, kind). Image documents
+    have a single page whose native resolution is used regardless of DPI.
+    The context is not tied to a component; create it once per document and
+    pass it to each stage, then close it (or use it as a context manager).
+    """
+
+    def __init__(self, path: str, dpi: int = 300, max_pages: int = None,
+                 cache_limit_mb: int = 1024):
+        """
+        Open a document
+
+        Args:
+            path: Path to a PDF or image file
+            dpi: Default rasterization DPI for PDF pages
+            max_pages: Maximum number of pages exposed (None for all)
+            cache_limit_mb: Upper bound for cached image memory
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found: {path}")
+
+        self.path = path
+        self.dpi = dpi
+        self.cache_limit = cache_limit_mb * 1024 * 1024
+
+        ext = os.path.splitext(path)[1].lower()
+        self.is_pdf = ext == '.pdf'
+        self.document = None
+        self._source_image = None
+
+        if self.is_pdf:
+            if not FITZ_AVAILABLE:
+                raise RuntimeError("PyMuPDF is required to open PDF documents")
+            self.document = fitz.open(path)
+            page_count = len(self.document)
+        elif ext in IMAGE_EXTENSIONS:
+            self._source_image = cv2.imread(path)
+            if self._source_image is None:
+                raise ValueError(f"Failed to load image: {path}")
+            page_count = 1
+        else:
+            raise ValueError(f"Unsupported file type: {ext}")
+
+        self.page_count = min(page_count, max_pages) if max_pages else page_count
+
+        self._cache = OrderedDict()  # (page, dpi, kind) -> value, in LRU order
+        self._cache_bytes = 0
+        self._lock = threading.RLock()
+        self._temp_dir = None
+        self._image_paths = {}
+
+        self.stats = {
+            'rasterizations': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'evictions': 0
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def page(self, page_index: int):
+        """
+        Get a PDF page object
+
+        Args:
+            page_index: Zero-based page index
+
+        Returns:
+            fitz.Page (None for image documents)
+        """
+        if not self.is_pdf:
+            return None
+        return self.document[page_index]
+
+    def pages(self) -> range:
+        """Indices of the pages exposed by the context"""
+        return range(self.page_count)
+
+    def get_or_compute(self, page_index: int, kind: str, compute: Callable[[], Any],
+                       dpi: int = None) -> Any:
+        """
+        Get a cached per-page item, computing it on first use
+
+        Components use this for their own derived images so that repeated
+        passes over the same page reuse them.
+
+        Args:
+            page_index: Zero-based page index
+            kind: Cache key for the item (e.g. 'layout_preprocessed')
+            compute: Function producing the item
+            dpi: Rasterization DPI the item belongs to
+
+        Returns:
+            The cached or newly computed item
+        """
+        key = (page_index, self._resolve_dpi(dpi), kind)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                return self._cache[key]
+
+        value = compute()
+
+        with self._lock:
+            self.stats['cache_misses'] += 1
+            if key not in self._cache:
+                self._cache[key] = value
+                self._cache_bytes += self._size_of(value)
+                self._evict()
+            return self._cache[key]
+
+    def image(self, page_index: int, dpi: int = None) -> np.ndarray:
+        """
+        Get a page as a BGR image
+
+        Args:
+            page_index: Zero-based page index
+            dpi: Rasterization DPI (defaults to the context DPI)
+
+        Returns:
+            BGR image as NumPy array
+        """
+        return self.get_or_compute(page_index, 'image', lambda: self._rasterize(page_index, dpi), dpi)
+
+    def gray(self, page_index: int, dpi: int = None) -> np.ndarray:
+        """
+        Get a page as a grayscale image
+
+        Args:
+            page_index: Zero-based page index
+            dpi: Rasterization DPI
+
+        Returns:
+            Grayscale image
+        """
+        return self.get_or_compute(
+            page_index, 'gray',
+            lambda: cv2.cvtColor(self.image(page_index, dpi), cv2.COLOR_BGR2GRAY),
+            dpi
+        )
+
+    def binary(self, page_index: int, dpi: int = None, blur: bool = True) -> np.ndarray:
+        """
+        Get the inverted adaptive-threshold image of a page
+
+        This is the binarization the OCR components share: Gaussian adaptive
+        threshold (block size 11, C 2) with text as foreground, optionally
+        after a 5x5 Gaussian blur.
+
+        Args:
+            page_index: Zero-based page index
+            dpi: Rasterization DPI
+            blur: Apply a 5x5 Gaussian blur before thresholding
+
+        Returns:
+            Binary image (foreground 255)
+        """
+        def compute():
+            gray = self.gray(page_index, dpi)
+            if blur:
+                gray = cv2.GaussianBlur(gray, (5, 5), 0)
+            return cv2.adaptiveThreshold(
+                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                cv2.THRESH_BINARY_INV, 11, 2
+            )
+
+        kind = 'binary_blur' if blur else 'binary'
+        return self.get_or_compute(page_index, kind, compute, dpi)
+
+    def line_masks(self, page_index: int, dpi: int = None, length: int = 40,
+                   blur: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get horizontal and vertical line masks of a page
+
+        Lines are extracted by opening the binary image with 1-pixel-thick
+        rectangular kernels (two iterations), as used for table detection.
+
+        Args:
+            page_index: Zero-based page index
+            dpi: Rasterization DPI
+            length: Kernel length in pixels
+            blur: Which binary image to use (see binary())
+
+        Returns:
+            Tuple of (horizontal lines, vertical lines)
+        """
+        def compute():
+            thresh = self.binary(page_index, dpi, blur)
+            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (length, 1))
+            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, length))
+            return (
+                cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2),
+                cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+            )
+
+        kind = f"line_masks_{length}_{'blur' if blur else 'raw'}"
+        return self.get_or_compute(page_index, kind, compute, dpi)
+
+    def text_dict(self, page_index: int) -> Dict[str, Any]:
+        """
+        Get the text layer of a PDF page as returned by page.get_text("dict")
+
+        Args:
+            page_index: Zero-based page index
+
+        Returns:
+            Text dictionary (empty for image documents)
+        """
+        if not self.is_pdf:
+            return {'blocks': []}
+        return self.get_or_compute(page_index, 'text_dict', lambda: self.page(page_index).get_text("dict"))
+
+    def text_layer(self, page_index: int, config: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Get the text-layer classification of a page
+
+        Args:
+            page_index: Zero-based page index
+            config: Classifier threshold overrides
+
+        Returns:
+            Classification from text_layer.classify_page; image documents
+            never have a text layer
+        """
+        if not self.is_pdf:
+            return {'has_text_layer': False, 'reason': 'image_document', 'image_regions': []}
+        # Classifications with different thresholds are cached separately
+        kind = 'text_layer'
+        if config:
+            kind += '_' + json.dumps(config, sort_keys=True, default=str)
+        return self.get_or_compute(
+            page_index, kind,
+            lambda: classify_page(self.page(page_index), config, self.text_dict(page_index))
+        )
+
+    def image_path(self, page_index: int, dpi: int = None) -> str:
+        """
+        Get a file path for a page image, writing it at most once
+
+        Args:
+            page_index: Zero-based page index
+            dpi: Rasterization DPI
+
+        Returns:
+            Path to a PNG of the page (the source file for image documents)
+        """
+        if not self.is_pdf:
+            return self.path
+
+        key = (page_index, self._resolve_dpi(dpi))
+        with self._lock:
+            path = self._image_paths.get(key)
+            if path is not None:
+                return path
+            if self._temp_dir is None:
+                self._temp_dir = tempfile.mkdtemp(prefix='document_context_')
+            path = os.path.join(self._temp_dir, f"page_{page_index + 1}_{key[1]}dpi.png")
+
+        cv2.imwrite(path, self.image(page_index, dpi))
+
+        with self._lock:
+            self._image_paths[key] = path
+        return path
+
+    def scale(self, page_index: int, dpi: int = None) -> Tuple[float, float]:
+        """
+        Get the factors converting image pixels to PDF points
+
+        Args:
+            page_index: Zero-based page index
+            dpi: Rasterization DPI
+
+        Returns:
+            Tuple of (scale_x, scale_y); (1.0, 1.0) for image documents
+        """
+        if not self.is_pdf:
+            return 1.0, 1.0
+
+        height, width = self.image(page_index, dpi).shape[:2]
+        rect = self.page(page_index).rect
+        return rect.width / width, rect.height / height
+
+    def release_page(self, page_index: int):
+        """
+        Drop every cached item of a page
+
+        Args:
+            page_index: Zero-based page index
+        """
+        with self._lock:
+            for key in [k for k in self._cache if k[0] == page_index]:
+                self._cache_bytes -= self._size_of(self._cache.pop(key))
+
+    def close(self):
+        """Release the document, the cache and any materialized page images"""
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+            self._image_paths = {}
+            if self._temp_dir:
+                shutil.rmtree(self._temp_dir, ignore_errors=True)
+                self._temp_dir = None
+            if self.document is not None:
+                self.document.close()
+                self.document = None
+
+    def _resolve_dpi(self, dpi: Optional[int]) -> int:
+        """Image documents have one native resolution"""
+        if not self.is_pdf:
+            return 0
+        return dpi or self.dpi
+
+    def _rasterize(self, page_index: int, dpi: Optional[int]) -> np.ndarray:
+        """Render a page (or return the source image) as BGR"""
+        if page_index < 0 or page_index >= self.page_count:
+            raise IndexError(f"Page {page_index + 1} out of range (1-{self.page_count})")
+
+        if not self.is_pdf:
+            return self._source_image
+
+        pix = self.document[page_index].get_pixmap(dpi=self._resolve_dpi(dpi), alpha=False)
+        samples = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+        with self._lock:
+            self.stats['rasterizations'] += 1
+
+        if pix.n == 1:
+            return cv2.cvtColor(samples, cv2.COLOR_GRAY2BGR)
+        return cv2.cvtColor(samples, cv2.COLOR_RGB2BGR)
+
+    @staticmethod
+    def _size_of(value: Any) -> int:
+        """Approximate memory held by a cached item"""
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (tuple, list)):
+            return sum(DocumentContext._size_of(v) for v in value)
+        return 0
+
+    def _evict(self):
+        """Drop least recently used items until the cache fits its limit"""
+        while self._cache_bytes > self.cache_limit and len(self._cache) > 1:
+            _, value = self._cache.popitem(last=False)
+            self._cache_bytes -= self._size_of(value)
+            self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with rasterization and cache counters
+        """
+        with self._lock:
+            return {
+                **self.stats,
+                'cached_items': len(self._cache),
+                'cached_mb': self._cache_bytes / (1024 * 1024)
+            }
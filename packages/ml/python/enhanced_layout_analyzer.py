@@ -23,6 +23,10 @@ import cv2
 from typing import Dict, List, Any, Tuple, Optional, Union
 from dataclasses import dataclass, field
 
+from layout_features import LayoutFeatureMap
+from box_geometry import STRtree, to_xyxy, coverage_matrix
+from layout_pyramid import build_coarse_level, refine_margin, refine_box, upscale_box, expand_box
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -86,6 +90,10 @@ class EnhancedLayoutAnalyzer:
             'material_specific_templates': True,
             'custom_layout_rules': None,
             'reading_order_analysis': True,
+            'coarse_to_fine': False,  # Find basic-mode regions on a downscaled level
+            'pyramid_scale': 0.5,
+            'pyramid_min_dimension': 400,
+            'refine_margin': None,
             'dpi': 300,
             'padding': 5,
             'material_regions': {
@@ -316,22 +324,32 @@ class EnhancedLayoutAnalyzer:
         # Initialize results
         elements = []
         
+        # Grayscale, binarization, line masks and contours are shared by the detectors
+        features = LayoutFeatureMap.from_image(image, color_order='RGB')
+        
         # Determine layout analysis approach
-        if self.config['layout_mode'] == 'deep' and LAYOUTPARSER_AVAILABLE:
-            elements = self._deep_layout_analysis(image)
-        elif self.config['layout_mode'] == 'custom' and self.config['custom_layout_rules']:
-            elements = self._custom_layout_analysis(image)
-        else:
-            elements = self._basic_layout_analysis(image)
+        with features.timed('layout'):
+            if self.config['layout_mode'] == 'deep' and LAYOUTPARSER_AVAILABLE:
+                elements = self._deep_layout_analysis(image)
+            elif self.config['layout_mode'] == 'custom' and self.config['custom_layout_rules']:
+                elements = self._custom_layout_analysis(image)
+            else:
+                elements = self._basic_layout_analysis(image, features)
         
         # Add material-specific region detection if enabled
         if self.config['material_specific_templates']:
-            material_elements = self._detect_material_specific_regions(image)
-            # Merge with existing elements
+            with features.timed('material_regions'):
+                material_elements = self._detect_material_specific_regions(image, features)
+            # Merge with existing elements, comparing each one only with the
+            # elements an R-tree finds around it and the ones merged before it
+            existing_index = STRtree([elem.bbox for elem in elements])
+            merged = []
             for elem in material_elements:
+                nearby = [elements[i] for i in existing_index.query(elem.bbox)] + merged
                 # Check if this element overlaps significantly with existing ones
-                if not self._has_significant_overlap(elem, elements):
-                    elements.append(elem)
+                if not self._has_significant_overlap(elem, nearby):
+                    merged.append(elem)
+            elements.extend(merged)
         
         # Assign page number to elements
         for elem in elements:
@@ -349,7 +367,8 @@ class EnhancedLayoutAnalyzer:
             'width': width,
             'height': height,
             'elements': element_dicts,
-            'element_count': len(element_dicts)
+            'element_count': len(element_dicts),
+            'timings': features.get_timings()
         }
     
     def _deep_layout_analysis(self, image: np.ndarray) -> List[LayoutElement]:
@@ -425,12 +444,14 @@ class EnhancedLayoutAnalyzer:
             # Fall back to basic analysis
             return self._basic_layout_analysis(image)
     
-    def _basic_layout_analysis(self, image: np.ndarray) -> List[LayoutElement]:
+    def _basic_layout_analysis(self, image: np.ndarray,
+                               features: LayoutFeatureMap = None) -> List[LayoutElement]:
         """
         Perform basic layout analysis using OpenCV
         
         Args:
             image: Numpy image array
+            features: Shared feature map of the image
             
         Returns:
             List of LayoutElement objects
@@ -438,19 +459,40 @@ class EnhancedLayoutAnalyzer:
         elements = []
         
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            # Grayscale and binarized (Otsu) image
+            if features is None:
+                features = LayoutFeatureMap.from_image(image, color_order='RGB')
+            gray = features.gray
+            height, width = features.height, features.width
             
-            # Binarize
-            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+            coarse = None
+            if self.config['coarse_to_fine']:
+                coarse = build_coarse_level(
+                    features, self.config['pyramid_scale'], self.config['pyramid_min_dimension']
+                )
             
-            # Find contours
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            if coarse is None:
+                # Find contours
+                boxes = [cv2.boundingRect(contour) for contour in features.external_contours()]
+                
+                # Line masks are opened once for the whole page and cropped per region
+                horizontal_mask = features.line_mask('horizontal', 20)
+                vertical_mask = features.line_mask('vertical', 20)
+            else:
+                # Find contours on the coarse level and snap them to the full-resolution ink
+                margin = refine_margin(coarse.scale, self.config['refine_margin'])
+                boxes = []
+                for contour in coarse.external_contours():
+                    candidate = upscale_box(cv2.boundingRect(contour), coarse.scale, width, height)
+                    window = expand_box(candidate, margin, width, height)
+                    boxes.append(refine_box(
+                        candidate, window,
+                        lambda wb: features.binary[wb[1]:wb[1]+wb[3], wb[0]:wb[0]+wb[2]]
+                    ))
+                horizontal_mask = vertical_mask = None
             
             # Filter and process contours
-            for i, contour in enumerate(contours):
-                x, y, w, h = cv2.boundingRect(contour)
-                
+            for i, (x, y, w, h) in enumerate(boxes):
                 # Filter out small regions
                 if w < 20 or h < 20:
                     continue
@@ -458,10 +500,17 @@ class EnhancedLayoutAnalyzer:
                 # Determine element type based on shape
                 element_type = "text"  # Default
                 
-                # Check if it might be a table (usually has grid lines)
-                roi = binary[y:y+h, x:x+w]
-                horizontal_lines = self._detect_horizontal_lines(roi)
-                vertical_lines = self._detect_vertical_lines(roi)
+                # Check if it might be a table (usually has grid lines); in coarse-to-fine
+                # mode only the candidate regions are opened at full resolution
+                if horizontal_mask is not None:
+                    region_horizontal = horizontal_mask[y:y+h, x:x+w]
+                    region_vertical = vertical_mask[y:y+h, x:x+w]
+                else:
+                    region_features = features.region((x, y, w, h))
+                    region_horizontal = region_features.line_mask('horizontal', 20)
+                    region_vertical = region_features.line_mask('vertical', 20)
+                horizontal_lines = self._detect_horizontal_lines(None, region_horizontal)
+                vertical_lines = self._detect_vertical_lines(None, region_vertical)
                 
                 if len(horizontal_lines) > 2 and len(vertical_lines) > 2:
                     element_type = "table"
@@ -515,11 +564,12 @@ class EnhancedLayoutAnalyzer:
         # Fall back to basic analysis for now
         return self._basic_layout_analysis(image)
     
-    def _detect_horizontal_lines(self, binary_image: np.ndarray) -> List:
-        """Detect horizontal lines in binary image"""
-        # Create structure element for extracting horizontal lines
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (20, 1))
-        detected_lines = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, kernel)
+    def _detect_horizontal_lines(self, binary_image: np.ndarray, detected_lines: np.ndarray = None) -> List:
+        """Detect horizontal lines in binary image (or in a precomputed horizontal line mask)"""
+        if detected_lines is None:
+            # Create structure element for extracting horizontal lines
+            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (20, 1))
+            detected_lines = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, kernel)
         
         # Find contours
         contours, _ = cv2.findContours(detected_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -533,11 +583,12 @@ class EnhancedLayoutAnalyzer:
         
         return sorted(lines)
     
-    def _detect_vertical_lines(self, binary_image: np.ndarray) -> List:
-        """Detect vertical lines in binary image"""
-        # Create structure element for extracting vertical lines
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 20))
-        detected_lines = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, kernel)
+    def _detect_vertical_lines(self, binary_image: np.ndarray, detected_lines: np.ndarray = None) -> List:
+        """Detect vertical lines in binary image (or in a precomputed vertical line mask)"""
+        if detected_lines is None:
+            # Create structure element for extracting vertical lines
+            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 20))
+            detected_lines = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, kernel)
         
         # Find contours
         contours, _ = cv2.findContours(detected_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -605,12 +656,14 @@ class EnhancedLayoutAnalyzer:
             'confidence': 0.8
         }
     
-    def _detect_material_specific_regions(self, image: np.ndarray) -> List[LayoutElement]:
+    def _detect_material_specific_regions(self, image: np.ndarray,
+                                          features: LayoutFeatureMap = None) -> List[LayoutElement]:
         """
         Detect material-specific regions based on templates
         
         Args:
             image: Numpy image array
+            features: Shared feature map of the image
             
         Returns:
             List of LayoutElement objects
@@ -619,7 +672,7 @@ class EnhancedLayoutAnalyzer:
         height, width = image.shape[:2]
         
         # Try to determine document type
-        template_type = self._detect_template_type(image)
+        template_type = self._detect_template_type(image, features.gray if features is not None else None)
         
         if template_type and template_type in self.material_templates:
             template = self.material_templates[template_type]
@@ -641,12 +694,13 @@ class EnhancedLayoutAnalyzer:
         
         return elements
     
-    def _detect_template_type(self, image: np.ndarray) -> Optional[str]:
+    def _detect_template_type(self, image: np.ndarray, gray: np.ndarray = None) -> Optional[str]:
         """
         Detect which template type matches the document
         
         Args:
             image: Document image
+            gray: Grayscale version of the image, if already computed
             
         Returns:
             Template type name or None if no match
@@ -655,7 +709,8 @@ class EnhancedLayoutAnalyzer:
         # Real implementation would use image features and ML classification
         
         # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
         
         # Simple heuristics for demo purposes
         height, width = gray.shape
@@ -799,26 +854,16 @@ class EnhancedLayoutAnalyzer:
         Returns:
             True if significant overlap exists
         """
-        x1, y1, x2, y2 = element.bbox
-        area1 = (x2 - x1) * (y2 - y1)
+        if not elements:
+            return False
         
-        for existing in elements:
-            ex1, ey1, ex2, ey2 = existing.bbox
-            
-            # Calculate intersection
-            ix1 = max(x1, ex1)
-            iy1 = max(y1, ey1)
-            ix2 = min(x2, ex2)
-            iy2 = min(y2, ey2)
-            
-            if ix1 < ix2 and iy1 < iy2:
-                intersection = (ix2 - ix1) * (iy2 - iy1)
-                overlap_ratio = intersection / area1
-                
-                if overlap_ratio > 0.7:  # 70% overlap threshold
-                    return True
+        # Fraction of the element covered by each existing element
+        overlap_ratio = coverage_matrix(
+            to_xyxy([element.bbox], 'xyxy'),
+            to_xyxy([existing.bbox for existing in elements], 'xyxy')
+        )
         
-        return False
+        return bool(np.any(overlap_ratio > 0.7))  # 70% overlap threshold
     
     def _determine_reading_order(self, elements: List[LayoutElement]) -> List[LayoutElement]:
         """
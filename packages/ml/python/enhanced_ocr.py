@@ -44,6 +44,7 @@ try:
     from handwriting_recognition import HandwritingDetector
     from form_field_extraction import FormFieldExtractor
     from ocr_confidence_scoring import OCRConfidenceScorer, RulesEngine
+    from document_context import DocumentContext
 except ImportError as e:
     print(f"Error importing required modules: {e}")
     print("Please ensure all required modules are installed and in your Python path.")
@@ -82,7 +83,8 @@ class EnhancedOCR:
             'output_format': 'json',
             'dpi': 300,
             'max_pages': 20,
-            'detailed_metrics': True
+            'detailed_metrics': True,
+            'use_text_layer': True  # Read born-digital PDF pages from their text layer instead of OCR
         }
         
         if config:
@@ -103,7 +105,8 @@ class EnhancedOCR:
             'min_confidence': self.config['confidence_threshold'],
             'dpi': self.config['dpi'],
             'preprocess_level': self.config['preprocessing_level'],
-            'dictionary_boost': True
+            'dictionary_boost': True,
+            'use_text_layer': self.config['use_text_layer']
         })
         
         # Layout analyzer for document structure
@@ -126,6 +129,8 @@ class EnhancedOCR:
         self.form_extractor = FormFieldExtractor({
             'enable_ocr': True,
             'ocr_language': lang_str,
+            'dpi': self.config['dpi'],
+            'use_text_layer': self.config['use_text_layer'],
             'extract_tables': self.config['enable_table_extraction'],
             'visualization_enabled': self.config['generate_visualizations'],
             'output_format': self.config['output_format']
@@ -147,6 +152,17 @@ class EnhancedOCR:
         
         logger.info("All OCR enhancement components initialized successfully")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Shut down the worker pools of the OCR components"""
+        self.specialized_ocr.close()
+        self.form_extractor.close()
+    
     def process_document(self, input_path: str, output_dir: str = None) -> Dict[str, Any]:
         """
         Process a document with enhanced OCR capabilities
@@ -223,23 +239,38 @@ class EnhancedOCR:
         """
         logger.info(f"Processing PDF document: {pdf_path}")
         
-        # Apply specialized OCR to handle material datasheets
-        specialized_results = self.specialized_ocr.process_file(
-            pdf_path, component_dirs['specialized']
-        )
-        
-        # Extract form fields if enabled
-        form_results = {}
-        if self.config['enable_form_extraction']:
-            form_results = self.form_extractor.process_document(
-                pdf_path, component_dirs['forms']
+        # Open and rasterize the PDF once for all components
+        with DocumentContext(pdf_path, dpi=self.config['dpi']) as context:
+            # Apply specialized OCR to handle material datasheets
+            specialized_results = self.specialized_ocr.process_file(
+                pdf_path, component_dirs['specialized'], context=context
             )
+            
+            # Extract form fields if enabled
+            form_results = {}
+            if self.config['enable_form_extraction']:
+                form_results = self.form_extractor.process_document(
+                    pdf_path, component_dirs['forms'], context=context
+                )
+            
+            logger.info(f"Document context stats: {context.get_stats()}")
+            
+            text_layer_pages = 0
+            if self.config['use_text_layer']:
+                text_layer_pages = sum(
+                    1 for page_index in context.pages() if context.text_layer(page_index)['has_text_layer']
+                )
+            page_count = context.page_count
         
         # Combine results
         combined_results = {
             'document_type': 'pdf',
             'filename': os.path.basename(pdf_path),
             'path': pdf_path,
+            'page_routing': {
+                'text_layer_pages': text_layer_pages,
+                'ocr_pages': page_count - text_layer_pages
+            },
             'specialized_ocr': specialized_results,
             'form_extraction': form_results
         }
@@ -281,22 +312,24 @@ class EnhancedOCR:
         """
         logger.info(f"Processing image document: {image_path}")
         
-        # Apply layout analysis to understand document structure
-        layout_results = self.layout_analyzer.analyze_document(
-            image_path, component_dirs['layout']
-        )
-        
-        # Apply specialized OCR for material datasheets
-        specialized_results = self.specialized_ocr.process_file(
-            image_path, component_dirs['specialized']
-        )
-        
-        # Detect handwriting if enabled
-        handwriting_results = {}
-        if self.config['enable_handwriting_detection']:
-            handwriting_results = self.handwriting_detector.process_document(
-                image_path, component_dirs['handwriting']
+        # Decode and binarize the image once for layout and handwriting analysis
+        with DocumentContext(image_path) as context:
+            # Apply layout analysis to understand document structure
+            layout_results = self.layout_analyzer.analyze_document(
+                image_path, component_dirs['layout'], context=context
+            )
+            
+            # Apply specialized OCR for material datasheets
+            specialized_results = self.specialized_ocr.process_file(
+                image_path, component_dirs['specialized']
             )
+            
+            # Detect handwriting if enabled
+            handwriting_results = {}
+            if self.config['enable_handwriting_detection']:
+                handwriting_results = self.handwriting_detector.process_document(
+                    image_path, component_dirs['handwriting'], context=context
+                )
         
         # Combine results
         combined_results = {
@@ -457,37 +490,35 @@ def batch_process_documents(
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     
-    # Create enhanced OCR processor
-    processor = EnhancedOCR(config)
-    
-    # Process each document
+    # Create enhanced OCR processor and process each document
     results = []
-    for input_path in input_paths:
-        try:
-            # Create document-specific output directory
-            doc_name = Path(input_path).stem
-            doc_output_dir = os.path.join(output_dir, doc_name)
-            os.makedirs(doc_output_dir, exist_ok=True)
-            
-            # Process document
-            logger.info(f"Processing {input_path}")
-            result = processor.process_document(input_path, doc_output_dir)
-            
-            # Add to results
-            results.append({
-                "filename": os.path.basename(input_path),
-                "output_dir": doc_output_dir,
-                "processing_time": result.get("processing_time", 0),
-                "status": "success"
-            })
-            
-        except Exception as e:
-            logger.error(f"Error processing {input_path}: {e}")
-            results.append({
-                "filename": os.path.basename(input_path),
-                "error": str(e),
-                "status": "error"
-            })
+    with EnhancedOCR(config) as processor:
+        for input_path in input_paths:
+            try:
+                # Create document-specific output directory
+                doc_name = Path(input_path).stem
+                doc_output_dir = os.path.join(output_dir, doc_name)
+                os.makedirs(doc_output_dir, exist_ok=True)
+                
+                # Process document
+                logger.info(f"Processing {input_path}")
+                result = processor.process_document(input_path, doc_output_dir)
+                
+                # Add to results
+                results.append({
+                    "filename": os.path.basename(input_path),
+                    "output_dir": doc_output_dir,
+                    "processing_time": result.get("processing_time", 0),
+                    "status": "success"
+                })
+                
+            except Exception as e:
+                logger.error(f"Error processing {input_path}: {e}")
+                results.append({
+                    "filename": os.path.basename(input_path),
+                    "error": str(e),
+                    "status": "error"
+                })
     
     # Create batch summary
     summary = {
@@ -576,8 +607,8 @@ def main():
                 return 1
         else:
             # Process single document
-            processor = EnhancedOCR(config)
-            result = processor.process_document(args.input_path, args.output_dir)
+            with EnhancedOCR(config) as processor:
+                result = processor.process_document(args.input_path, args.output_dir)
             
             # Print summary
             print(json.dumps({
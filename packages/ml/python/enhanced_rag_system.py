@@ -95,11 +95,20 @@ class EnhancedRAGSystem:
             vector_stores=self.vector_stores
         )
         
+        # Sub-query candidates are hydrated from the first store that loads materials by ID
+        material_loader = None
+        for store in [*self.vector_stores, self.base_retriever]:
+            if hasattr(store, "get_materials_by_ids"):
+                material_loader = store.get_materials_by_ids
+                break
+        
         # Create hierarchical retriever
         self.hierarchical_retriever = create_hierarchical_retriever(
             config=self.config.get("hierarchical_retriever_config", {}),
             base_retriever=self.distributed_retrieval or self.base_retriever,
-            llm_client=self.llm_client
+            llm_client=self.llm_client,
+            embedding_model=self.embedding_model,
+            material_loader=material_loader
         )
         
         # Create cross-modal attention
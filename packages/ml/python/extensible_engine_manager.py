@@ -11,17 +11,21 @@ Key features:
 3. Engine registry for dynamic model discovery and loading
 4. Resource management for multiple loaded models
 5. Engine chaining and pipeline construction
+6. Parallel voting across isolated engine worker processes
 """
 
 import os
 import sys
 import json
+import difflib
 import importlib
 import logging
 import inspect
+import multiprocessing
 import pkgutil
 import threading
 import time
+from multiprocessing.connection import wait as wait_for_connections
 from typing import Dict, List, Any, Tuple, Optional, Union, Type, Callable
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
@@ -150,6 +154,194 @@ class OCREngineInterface(ABC):
         pass
 
 
+def _engine_worker_main(engine_name: str, engine_class: Type[OCREngineInterface],
+                        engine_config: Dict[str, Any], conn):
+    """
+    Entry point for an engine worker process
+
+    Creates and initializes one engine instance, then serves
+    (document_path, options) requests from the pipe until it receives None
+    or the parent closes the connection.
+
+    Args:
+        engine_name: Name of the engine
+        engine_class: OCREngineInterface implementation class
+        engine_config: Engine-specific configuration
+        conn: Child end of the pipe to the engine manager
+    """
+    engine = None
+    init_error = None
+    try:
+        engine = engine_class()
+        engine.initialize(engine_config)
+    except Exception as e:
+        init_error = f"Engine initialization failed: {e}"
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        document_path, options = message
+        start_time = time.time()
+        if init_error:
+            result = EngineResult(
+                engine_name=engine_name,
+                success=False,
+                result_type="error",
+                data=None,
+                error=init_error
+            )
+        else:
+            try:
+                result = engine.process_document(document_path, options)
+            except Exception as e:
+                result = EngineResult(
+                    engine_name=engine_name,
+                    success=False,
+                    result_type="error",
+                    data=None,
+                    error=str(e)
+                )
+        result.processing_time = time.time() - start_time
+
+        try:
+            conn.send(result)
+        except Exception as e:
+            # Result data could not be pickled - report the failure instead
+            conn.send(EngineResult(
+                engine_name=engine_name,
+                success=False,
+                result_type="error",
+                data=None,
+                error=f"Could not return result from worker: {e}",
+                processing_time=result.processing_time
+            ))
+
+    if engine is not None:
+        try:
+            engine.release_resources()
+        except Exception:
+            pass
+    conn.close()
+
+
+class _EngineWorker:
+    """
+    Long-lived worker process hosting a single warm engine instance.
+
+    Engines are heavyweight and not thread-safe, so each one runs in its own
+    process and handles one document at a time. A worker that times out is
+    terminated and transparently respawned on next use. A worker whose
+    document is no longer needed (the vote was decided without it) keeps
+    running; its late result is discarded when it arrives.
+    """
+
+    def __init__(self, engine_name: str, engine_class: Type[OCREngineInterface],
+                 engine_config: Dict[str, Any], start_method: Optional[str] = None):
+        self.engine_name = engine_name
+        self.engine_class = engine_class
+        self.engine_config = engine_config
+        self.context = multiprocessing.get_context(start_method)
+        self.process = None
+        self.conn = None
+        self.busy = False
+        self.abandoned = 0  # Results of abandoned documents still to arrive
+
+    def is_alive(self) -> bool:
+        """Check whether the worker process is running"""
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        """Start the worker process if it is not already running"""
+        if self.is_alive():
+            return
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_engine_worker_main,
+            args=(self.engine_name, self.engine_class, self.engine_config, child_conn),
+            name=f"engine-worker-{self.engine_name}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.busy = False
+        self.abandoned = 0
+
+    def submit(self, document_path: str, options: Dict[str, Any] = None):
+        """
+        Send a document to the worker
+
+        Args:
+            document_path: Path to the document
+            options: Processing options
+        """
+        self.start()
+        self.conn.send((document_path, options))
+        self.busy = True
+
+    def abandon(self):
+        """Give up on the submitted document without stopping the worker"""
+        if self.busy:
+            self.abandoned += 1
+            self.busy = False
+
+    def receive(self) -> Optional[EngineResult]:
+        """
+        Read the next message from the worker
+
+        Call only when the connection is readable. Results of abandoned
+        documents arrive first and are discarded.
+
+        Returns:
+            EngineResult of the submitted document, None if the message was
+            a discarded late result, or an error result if the worker died
+        """
+        try:
+            result = self.conn.recv()
+            if self.abandoned:
+                self.abandoned -= 1
+                return None
+        except (EOFError, OSError) as e:
+            self.terminate()
+            result = EngineResult(
+                engine_name=self.engine_name,
+                success=False,
+                result_type="error",
+                data=None,
+                error=f"Engine worker exited unexpectedly: {e}"
+            )
+        self.busy = False
+        return result
+
+    def terminate(self):
+        """Kill the worker process, abandoning any in-flight document"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join(timeout=5)
+            self.process = None
+        self.busy = False
+        self.abandoned = 0
+
+    def stop(self):
+        """Ask the worker to shut down cleanly, terminating it if it does not"""
+        if self.is_alive() and not self.busy:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=5)
+            except Exception:
+                pass
+        self.terminate()
+
+
 class EngineManager:
     """
     Manages OCR and document understanding engines
@@ -174,7 +366,13 @@ class EngineManager:
             'cache_results': True,
             'cache_ttl': 3600,  # seconds
             'monitoring_enabled': True,
-            'plugin_directory': None
+            'plugin_directory': None,
+            'voting_parallel': True,
+            'voting_engine_timeout': 300,  # seconds per engine
+            'voting_quorum': 2,
+            'voting_min_confidence': 0.85,
+            'voting_agreement_threshold': 0.9,
+            'voting_start_method': 'spawn'
         }
         
         if config:
@@ -195,6 +393,12 @@ class EngineManager:
         # Result cache
         self.result_cache = {}
         
+        # Worker processes used for parallel voting
+        self.voting_workers = {}
+        
+        # Per-engine usage counters (when monitoring is enabled)
+        self.engine_usage = {}
+        
         # Register built-in engines
         if self.config['builtin_engines_enabled']:
             self._register_builtin_engines()
@@ -424,6 +628,7 @@ class EngineManager:
             cache_key = f"{document_path}:{engine_name}:{json.dumps(options or {})}"
             cached_result = self._get_cached_result(cache_key)
             if cached_result:
+                self._record_usage(engine_name, cached_result, cached=True)
                 return cached_result
         
         try:
@@ -444,13 +649,14 @@ class EngineManager:
                 if self.config['cache_results'] and cache_key and result.success:
                     self._cache_result(cache_key, result)
                 
+                self._record_usage(engine_name, result)
                 return result
                 
         except Exception as e:
             logger.error(f"Error processing document with engine {engine_name}: {e}")
             
             # Create error result
-            return EngineResult(
+            result = EngineResult(
                 engine_name=engine_name or "unknown",
                 success=False,
                 result_type="error",
@@ -458,6 +664,37 @@ class EngineManager:
                 error=str(e),
                 processing_time=0.0
             )
+            self._record_usage(engine_name, result)
+            return result
+    
+    def _record_usage(self, engine_name: Optional[str], result: EngineResult, cached: bool = False):
+        """
+        Record one engine call in the usage counters
+        
+        Args:
+            engine_name: Name of the engine, or None for default
+            result: Result of the call
+            cached: Whether the result was served from the cache
+        """
+        if not self.config['monitoring_enabled']:
+            return
+        
+        usage = self.engine_usage.setdefault(engine_name or self.config['default_engine'] or "unknown", {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'cache_hits': 0,
+            'total_processing_time': 0.0
+        })
+        usage['calls'] += 1
+        if cached:
+            usage['cache_hits'] += 1
+        elif result.success:
+            usage['successes'] += 1
+            usage['total_processing_time'] += result.processing_time
+        else:
+            usage['failures'] += 1
+            usage['total_processing_time'] += result.processing_time
     
     def process_with_fallback(self, document_path: str, options: Dict[str, Any] = None) -> EngineResult:
         """
@@ -505,6 +742,11 @@ class EngineManager:
         """
         Process a document with multiple engines and combine results
         
+        Engines run concurrently in isolated worker processes. Voting stops
+        early once `voting_quorum` results with at least
+        `voting_min_confidence` agree with each other, and any engine that
+        exceeds `voting_engine_timeout` is dropped from the vote.
+        
         Args:
             document_path: Path to the document
             engine_names: List of engine names to use
@@ -517,14 +759,10 @@ class EngineManager:
         if not engine_names:
             engine_names = list(self.engines.keys())
         
-        # Process with each engine
-        results = []
-        for engine_name in engine_names:
-            try:
-                result = self.process_document(document_path, engine_name, options)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error processing with engine {engine_name}: {e}")
+        if self.config['voting_parallel'] and len(engine_names) > 1:
+            results = self._run_voting_parallel(document_path, engine_names, options)
+        else:
+            results = self._run_voting_sequential(document_path, engine_names, options)
         
         # Check if we have any successful results
         successful_results = [r for r in results if r.success]
@@ -542,6 +780,240 @@ class EngineManager:
         combined_result = self._combine_results(successful_results)
         return combined_result
     
+    def _run_voting_sequential(self, document_path: str, engine_names: List[str],
+                               options: Dict[str, Any] = None) -> List[EngineResult]:
+        """
+        Run voting engines one after another in this process
+        
+        Args:
+            document_path: Path to the document
+            engine_names: List of engine names to use
+            options: Processing options
+            
+        Returns:
+            List of EngineResult objects
+        """
+        results = []
+        for engine_name in engine_names:
+            try:
+                result = self.process_document(document_path, engine_name, options)
+                results.append(result)
+            except Exception as e:
+                logger.error(f"Error processing with engine {engine_name}: {e}")
+        return results
+    
+    def _run_voting_parallel(self, document_path: str, engine_names: List[str],
+                             options: Dict[str, Any] = None) -> List[EngineResult]:
+        """
+        Run voting engines concurrently in worker processes
+        
+        Args:
+            document_path: Path to the document
+            engine_names: List of engine names to use
+            options: Processing options
+            
+        Returns:
+            List of EngineResult objects received before quorum or timeout
+        """
+        results = []
+        local_engines = []
+        queued = []
+        pending = {}
+        deadlines = {}
+        timeout = self.config['voting_engine_timeout']
+        
+        for engine_name in engine_names:
+            # Serve from cache when possible, exactly like process_document
+            if self.config['cache_results']:
+                cache_key = f"{document_path}:{engine_name}:{json.dumps(options or {})}"
+                cached_result = self._get_cached_result(cache_key)
+                if cached_result:
+                    self._record_usage(engine_name, cached_result, cached=True)
+                    results.append(cached_result)
+                    continue
+            
+            # Engines registered only as instances cannot be moved to a worker
+            if engine_name not in self.engine_classes:
+                local_engines.append(engine_name)
+                continue
+            
+            queued.append(engine_name)
+        
+        def dispatch():
+            # Keep at most max_concurrent_engines workers busy
+            while queued and len(pending) < self.config['max_concurrent_engines']:
+                engine_name = queued.pop(0)
+                try:
+                    worker = self._get_voting_worker(engine_name)
+                    worker.submit(document_path, options)
+                except Exception as e:
+                    # Keep the engine in the vote by running it in this process
+                    logger.warning(f"Error starting worker for engine {engine_name}, running it in-process: {e}")
+                    worker = self.voting_workers.pop(engine_name, None)
+                    if worker is not None:
+                        worker.terminate()
+                    local_engines.append(engine_name)
+                    continue
+                pending[worker.conn] = worker
+                # A worker still finishing an abandoned document starts this
+                # one afterwards; that time counts against the timeout
+                deadlines[worker.conn] = time.time() + timeout
+        
+        quorum_reached = self._find_quorum(results) is not None
+        if not quorum_reached:
+            dispatch()
+        
+        while pending and not quorum_reached:
+            now = time.time()
+            
+            # Drop engines that exceeded their timeout
+            for conn in [c for c, deadline in deadlines.items() if deadline <= now]:
+                worker = pending.pop(conn)
+                del deadlines[conn]
+                logger.warning(f"Engine {worker.engine_name} timed out after {timeout}s during voting")
+                worker.terminate()
+                result = EngineResult(
+                    engine_name=worker.engine_name,
+                    success=False,
+                    result_type="error",
+                    data=None,
+                    error=f"Timed out after {timeout} seconds",
+                    processing_time=float(timeout)
+                )
+                self._record_usage(worker.engine_name, result)
+                results.append(result)
+            dispatch()
+            if not pending:
+                break
+            
+            ready = wait_for_connections(list(pending.keys()), timeout=max(0.0, min(deadlines.values()) - now))
+            for conn in ready:
+                worker = pending[conn]
+                result = worker.receive()
+                if result is None:
+                    continue  # Late result of a document abandoned by an earlier vote
+                del pending[conn]
+                del deadlines[conn]
+                results.append(result)
+                
+                if self.config['cache_results'] and result.success:
+                    cache_key = f"{document_path}:{worker.engine_name}:{json.dumps(options or {})}"
+                    self._cache_result(cache_key, result)
+                self._record_usage(worker.engine_name, result)
+            
+            quorum_reached = self._find_quorum(results) is not None
+            if not quorum_reached:
+                dispatch()
+        
+        if quorum_reached:
+            # Stragglers cannot change the outcome; their workers stay warm
+            # and the late results are discarded when they arrive
+            for worker in pending.values():
+                logger.info(f"Quorum reached, not waiting for engine {worker.engine_name}")
+                worker.abandon()
+            return results
+        
+        # Engines that could not be offloaded run in this process
+        for engine_name in local_engines:
+            if self._find_quorum(results) is not None:
+                break
+            results.extend(self._run_voting_sequential(document_path, [engine_name], options))
+        
+        return results
+    
+    def _get_voting_worker(self, engine_name: str) -> _EngineWorker:
+        """
+        Get or create the worker process for an engine
+        
+        Args:
+            engine_name: Name of the engine
+            
+        Returns:
+            _EngineWorker for the engine
+        """
+        worker = self.voting_workers.get(engine_name)
+        if worker is None:
+            worker = _EngineWorker(
+                engine_name,
+                self.engine_classes[engine_name],
+                self.config['engine_configs'].get(engine_name, {}),
+                self.config['voting_start_method']
+            )
+            self.voting_workers[engine_name] = worker
+        return worker
+    
+    def _find_quorum(self, results: List[EngineResult]) -> Optional[List[EngineResult]]:
+        """
+        Find a group of high-confidence results that agree with each other
+        
+        Args:
+            results: Results received so far
+            
+        Returns:
+            The agreeing results if they reach the quorum, otherwise None
+        """
+        quorum = self.config['voting_quorum']
+        if not quorum or quorum < 1:
+            return None
+        
+        candidates = [
+            r for r in results
+            if r.success and r.confidence >= self.config['voting_min_confidence']
+        ]
+        if len(candidates) < quorum:
+            return None
+        
+        texts = [self._result_text(r) for r in candidates]
+        for i, anchor in enumerate(texts):
+            group = [candidates[i]]
+            for j, other in enumerate(texts):
+                if i != j and self._texts_agree(anchor, other):
+                    group.append(candidates[j])
+            if len(group) >= quorum:
+                return group
+        
+        return None
+    
+    def _texts_agree(self, text_a: str, text_b: str) -> bool:
+        """
+        Check whether two normalized result texts agree
+        
+        Args:
+            text_a: First text
+            text_b: Second text
+            
+        Returns:
+            True if the similarity reaches the agreement threshold
+        """
+        if text_a == text_b:
+            return True
+        matcher = difflib.SequenceMatcher(None, text_a, text_b, autojunk=False)
+        threshold = self.config['voting_agreement_threshold']
+        # Cheap upper bounds first, full ratio only when they pass
+        return (matcher.real_quick_ratio() >= threshold and
+                matcher.quick_ratio() >= threshold and
+                matcher.ratio() >= threshold)
+    
+    @staticmethod
+    def _result_text(result: EngineResult) -> str:
+        """
+        Get a normalized text representation of a result for comparison
+        
+        Args:
+            result: EngineResult object
+            
+        Returns:
+            Lowercased, whitespace-collapsed text
+        """
+        data = result.data
+        if isinstance(data, dict) and isinstance(data.get('text'), str):
+            text = data['text']
+        elif isinstance(data, str):
+            text = data
+        else:
+            text = json.dumps(data, sort_keys=True, default=str)
+        return " ".join(text.lower().split())
+    
     def _combine_results(self, results: List[EngineResult]) -> EngineResult:
         """
         Combine results from multiple engines
@@ -663,6 +1135,9 @@ class EngineManager:
             if metadata.performance_metrics:
                 engine_stats['performance'] = metadata.performance_metrics
             
+            if engine_name in self.engine_usage:
+                engine_stats['usage'] = dict(self.engine_usage[engine_name])
+            
             stats['engines'][engine_name] = engine_stats
         
         return stats
@@ -678,6 +1153,14 @@ class EngineManager:
         
         # Clear instances
         self.engine_instances = {}
+        
+        # Stop voting workers
+        for engine_name, worker in self.voting_workers.items():
+            try:
+                worker.stop()
+            except Exception as e:
+                logger.error(f"Error stopping voting worker for engine {engine_name}: {e}")
+        self.voting_workers = {}
 
 
 class CustomEngineLoader:
@@ -35,9 +35,14 @@ from typing import Dict, List, Any, Tuple, Optional, Union
 import logging
 from pathlib import Path
 import tempfile
+import multiprocessing
 import xml.etree.ElementTree as ET
 import pytesseract
 
+from fuzzy_vocabulary import FuzzyVocabularyIndex, get_vocabulary_index
+from document_context import DocumentContext
+from table_cell_ocr import TableCellOCR, detect_table_grid, grid_cells
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -131,7 +136,9 @@ class FormFieldExtractor:
             'confidence_scoring': True,  # Provide confidence scores for extracted text
             'form_structure_analysis': True,  # Analyze overall form structure
             'multi_language_support': True,  # Enable multi-language support
-            'domain_specific_correction': True  # Apply domain-specific corrections
+            'domain_specific_correction': True,  # Apply domain-specific corrections
+            'use_text_layer': True,  # Read field values from the PDF text layer when reliable
+            'table_ocr_workers': multiprocessing.cpu_count()  # Parallel table-cell recognition
         }
         
         if config:
@@ -140,6 +147,13 @@ class FormFieldExtractor:
         # Verify required libraries
         self._verify_dependencies()
         
+        # Table cells are recognized in parallel batches on the shared tesseract pool
+        self.table_ocr = TableCellOCR({
+            'max_workers': self.config['table_ocr_workers'],
+            'lang': self.config['ocr_language'],
+            'psm': 6
+        })
+        
         # Initialize language detector if multi-language support is enabled
         if self.config['multi_language_support'] and self.config['ocr_language_detection']:
             try:
@@ -149,6 +163,16 @@ class FormFieldExtractor:
                 logger.warning("langdetect not installed, falling back to default language")
                 self.config['ocr_language_detection'] = False
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Shut down the table-cell OCR workers"""
+        self.table_ocr.close()
+    
     def _verify_dependencies(self):
         """Verify required libraries are installed"""
         try:
@@ -166,13 +190,15 @@ class FormFieldExtractor:
                 logger.error(f"Tesseract OCR is not properly installed: {e}")
                 raise RuntimeError("Tesseract OCR is required but not properly installed.")
     
-    def process_document(self, pdf_path: str, output_dir: str = None) -> Dict[str, Any]:
+    def process_document(self, pdf_path: str, output_dir: str = None,
+                         context: DocumentContext = None) -> Dict[str, Any]:
         """
         Process a PDF document to extract form fields
         
         Args:
             pdf_path: Path to the PDF document
             output_dir: Directory to save extracted data
+            context: Shared document context (opened here if not given)
             
         Returns:
             Dictionary with extraction results
@@ -184,10 +210,14 @@ class FormFieldExtractor:
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
         
+        # Open the PDF document once; page rasters are shared through the context
+        owns_context = context is None
+        if owns_context:
+            context = DocumentContext(pdf_path, dpi=self.config['dpi'])
+        
         # Process based on PDF type
         try:
-            # Open the PDF document
-            pdf_document = fitz.open(pdf_path)
+            pdf_document = context.document
             
             # Check if the PDF has form fields
             has_form_fields = len(pdf_document.get_page_labels()) > 0 and pdf_document[0].first_widget
@@ -195,11 +225,11 @@ class FormFieldExtractor:
             if has_form_fields:
                 # Extract from interactive PDF form
                 logger.info("Processing interactive PDF form")
-                result = self._extract_interactive_form_fields(pdf_document)
+                result = self._extract_interactive_form_fields(pdf_document, context)
             else:
                 # Extract from scanned/non-interactive PDF
                 logger.info("Processing scanned/non-interactive PDF")
-                result = self._extract_scanned_form_fields(pdf_document)
+                result = self._extract_scanned_form_fields(pdf_document, context)
             
             # Add document metadata
             result['document_info'] = {
@@ -220,21 +250,24 @@ class FormFieldExtractor:
                     self._generate_visualization(pdf_document, result, visualization_path)
                     result['visualization_path'] = visualization_path
             
-            # Close the PDF document
-            pdf_document.close()
-            
             return result
             
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}")
             raise
+        finally:
+            # Close the PDF document unless it belongs to the caller
+            if owns_context:
+                context.close()
     
-    def _extract_interactive_form_fields(self, pdf_document: fitz.Document) -> Dict[str, Any]:
+    def _extract_interactive_form_fields(self, pdf_document: fitz.Document,
+                                         context: DocumentContext) -> Dict[str, Any]:
         """
         Extract form fields from an interactive PDF form
         
         Args:
             pdf_document: PyMuPDF document
+            context: Document context providing page rasters
             
         Returns:
             Dictionary with extraction results
@@ -288,7 +321,7 @@ class FormFieldExtractor:
         # Extract tables if enabled
         tables = []
         if self.config['extract_tables']:
-            tables = self._extract_tables(pdf_document)
+            tables = self._extract_tables(pdf_document, context)
         
         # Organize fields by page and type
         fields_by_page = self._organize_fields_by_page(form_fields, len(pdf_document))
@@ -303,60 +336,52 @@ class FormFieldExtractor:
             'filled_fields': sum(1 for field in form_fields if field['is_filled'])
         }
     
-    def _extract_scanned_form_fields(self, pdf_document: fitz.Document) -> Dict[str, Any]:
+    def _extract_scanned_form_fields(self, pdf_document: fitz.Document,
+                                     context: DocumentContext) -> Dict[str, Any]:
         """
         Extract form fields from a scanned PDF document
         
         Args:
             pdf_document: PyMuPDF document
+            context: Document context providing page rasters
             
         Returns:
             Dictionary with extraction results
         """
         form_fields = []
+        dpi = self.config['dpi']
         
         # Process each page
         for page_idx, page in enumerate(pdf_document):
-            # Convert page to image
-            pix = page.get_pixmap(dpi=self.config['dpi'])
+            # Detect form fields in the shared page raster and binarization
+            use_text_layer = self.config['use_text_layer'] and context.text_layer(page_idx)['has_text_layer']
+            detected_fields = self._detect_form_fields_in_image(
+                context.image(page_idx, dpi), page, thresh=context.binary(page_idx, dpi),
+                use_text_layer=use_text_layer
+            )
             
-            # Create a temporary file for the page image
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                pix_path = temp_file.name
-                pix.save(pix_path)
+            # Convert coordinates from image space to PDF space
+            scale_x, scale_y = context.scale(page_idx, dpi)
             
-            try:
-                # Detect form fields in the page image
-                detected_fields = self._detect_form_fields_in_image(pix_path, page)
-                
-                # Process each detected field
-                for field in detected_fields:
-                    # Convert coordinates from image space to PDF space
-                    x, y, w, h = field['bbox']
-                    pdf_rect = page.rect
-                    scale_x = pdf_rect.width / pix.width
-                    scale_y = pdf_rect.height / pix.height
-                    
-                    pdf_bbox = (
-                        x * scale_x,
-                        y * scale_y,
-                        w * scale_x,
-                        h * scale_y
-                    )
-                    
-                    # Add page information
-                    field['page'] = page_idx + 1
-                    field['bbox'] = pdf_bbox
-                    form_fields.append(field)
+            # Process each detected field
+            for field in detected_fields:
+                x, y, w, h = field['bbox']
+                pdf_bbox = (
+                    x * scale_x,
+                    y * scale_y,
+                    w * scale_x,
+                    h * scale_y
+                )
                 
-            finally:
-                # Clean up temporary file
-                os.unlink(pix_path)
+                # Add page information
+                field['page'] = page_idx + 1
+                field['bbox'] = pdf_bbox
+                form_fields.append(field)
         
         # Extract tables if enabled
         tables = []
         if self.config['extract_tables']:
-            tables = self._extract_tables(pdf_document)
+            tables = self._extract_tables(pdf_document, context)
         
         # Organize fields by page and type
         fields_by_page = self._organize_fields_by_page(form_fields, len(pdf_document))
@@ -371,33 +396,40 @@ class FormFieldExtractor:
             'filled_fields': sum(1 for field in form_fields if field['is_filled'])
         }
     
-    def _detect_form_fields_in_image(self, image_path: str, page: fitz.Page) -> List[Dict[str, Any]]:
+    def _detect_form_fields_in_image(self, image: Union[str, np.ndarray], page: fitz.Page,
+                                     thresh: np.ndarray = None,
+                                     use_text_layer: bool = False) -> List[Dict[str, Any]]:
         """
         Detect form fields in an image with enhanced detection
         
         Args:
-            image_path: Path to the page image
+            image: Page image as numpy array or path
             page: PyMuPDF page object
+            thresh: Precomputed inverted binarization of the page (blurred)
+            use_text_layer: Read field values from the page's text layer instead of OCR
             
         Returns:
             List of detected form fields
         """
         # Load the image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY_INV, 11, 2
-        )
+        if isinstance(image, str):
+            image_path = image
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError(f"Failed to load image: {image_path}")
+        
+        if thresh is None:
+            # Convert to grayscale
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            
+            # Apply Gaussian blur to reduce noise
+            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            
+            # Apply adaptive thresholding
+            thresh = cv2.adaptiveThreshold(
+                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+                cv2.THRESH_BINARY_INV, 11, 2
+            )
         
         # Analyze form structure if enabled
         form_regions = None
@@ -430,29 +462,42 @@ class FormFieldExtractor:
                     field['is_filled'] = self._is_checkbox_checked(field_region)
                     continue
                 
-                # For text fields, extract value using OCR
-                value_region = field_region.copy()
-                
-                # Create temporary file for OCR
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                    region_path = temp_file.name
-                    cv2.imwrite(region_path, value_region)
-                
-                try:
-                    # Perform OCR on the field region
-                    text = pytesseract.image_to_string(
-                        value_region,
-                        lang=self.config['ocr_language'],
-                        config='--psm 6'
-                    ).strip()
+                if use_text_layer:
+                    # Born-digital page: read the value from the text layer
+                    scale_x = page.rect.width / image.shape[1]
+                    scale_y = page.rect.height / image.shape[0]
+                    text = page.get_textbox(fitz.Rect(
+                        x * scale_x, y * scale_y, (x + w) * scale_x, (y + h) * scale_y
+                    )).strip()
                     
-                    # If text is found, mark as filled
                     field['value'] = text
                     field['is_filled'] = bool(text)
+                    field['value_source'] = 'text_layer'
+                else:
+                    # For text fields, extract value using OCR
+                    value_region = field_region.copy()
                     
-                finally:
-                    # Clean up temporary file
-                    os.unlink(region_path)
+                    # Create temporary file for OCR
+                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
+                        region_path = temp_file.name
+                        cv2.imwrite(region_path, value_region)
+                    
+                    try:
+                        # Perform OCR on the field region
+                        text = pytesseract.image_to_string(
+                            value_region,
+                            lang=self.config['ocr_language'],
+                            config='--psm 6'
+                        ).strip()
+                        
+                        # If text is found, mark as filled
+                        field['value'] = text
+                        field['is_filled'] = bool(text)
+                        field['value_source'] = 'ocr'
+                        
+                    finally:
+                        # Clean up temporary file
+                        os.unlink(region_path)
                 
                 # Try to find field label nearby
                 field['label'] = self._find_field_label(image, field['bbox'])
@@ -1150,156 +1195,120 @@ class FormFieldExtractor:
         words = text.split()
         corrected_words = []
         
+        # If domain type specified, only check that vocabulary
+        vocabularies = [domain_type] if domain_type and domain_type in DOMAIN_VOCABULARIES else list(DOMAIN_VOCABULARIES.keys())
+        index = self._get_vocabulary_index(vocabularies)
+        
+        candidates = [word for word in words if len(word) > 1 and not word.isdigit()]
+        matches = dict(zip(candidates, index.lookup_batch(candidates, min_similarity=0.8)))
+        
         for word in words:
             # Skip short words or numbers
             if len(word) <= 1 or word.isdigit():
                 corrected_words.append(word)
                 continue
             
-            # Check if word is close to any domain-specific term
+            # Take the most similar domain term that is not too different in length
             best_match = None
-            best_ratio = 0.0
-            
-            # If domain type specified, only check that vocabulary
-            vocabularies = [domain_type] if domain_type and domain_type in DOMAIN_VOCABULARIES else DOMAIN_VOCABULARIES.keys()
-            
-            for vocab_name in vocabularies:
-                for term in DOMAIN_VOCABULARIES[vocab_name]:
-                    # Skip terms too different in length
-                    if abs(len(word) - len(term)) > min(3, len(term) // 2):
-                        continue
-                    
-                    # Calculate string similarity
-                    ratio = self._string_similarity(word.lower(), term.lower())
-                    
-                    # Update best match if better than current
-                    if ratio > 0.8 and ratio > best_ratio:
-                        best_match = term
-                        best_ratio = ratio
+            for term, _ in matches[word]:
+                if abs(len(word) - len(term)) <= min(3, len(term) // 2):
+                    best_match = term
+                    break
             
             # Use the closest match if good enough, otherwise keep original
             corrected_words.append(best_match if best_match else word)
         
         return ' '.join(corrected_words)
     
-    def _string_similarity(self, s1: str, s2: str) -> float:
+    def _get_vocabulary_index(self, vocabularies: List[str]) -> FuzzyVocabularyIndex:
         """
-        Calculate string similarity using Levenshtein distance
+        Get the shared fuzzy index over one or more domain vocabularies
+        
+        Terms keep their vocabulary order so ties resolve as before. All terms
+        are at most 12 characters and words may differ by at most 3, so a 0.8
+        similarity never allows more than 2 edits.
         
         Args:
-            s1: First string
-            s2: Second string
+            vocabularies: Names of DOMAIN_VOCABULARIES entries
             
         Returns:
-            Similarity ratio (0.0 to 1.0)
+            FuzzyVocabularyIndex instance
         """
-        # Simple implementation of Levenshtein distance
-        if s1 == s2:
-            return 1.0
-        
-        if len(s1) == 0 or len(s2) == 0:
-            return 0.0
-        
-        if len(s1) < len(s2):
-            s1, s2 = s2, s1
-            
-        distances = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            distances_ = [i + 1]
-            for j, c2 in enumerate(s2):
-                if c1 == c2:
-                    distances_.append(distances[j])
-                else:
-                    distances_.append(1 + min((distances[j], distances[j + 1], distances_[-1])))
-            distances = distances_
-            
-        # Convert to similarity ratio
-        max_len = max(len(s1), len(s2))
-        return 1.0 - (distances[-1] / max_len)
+        terms = [term for name in vocabularies for term in DOMAIN_VOCABULARIES[name]]
+        return get_vocabulary_index(terms, max_edit_distance=2)
     
-    def _extract_tables(self, pdf_document: fitz.Document) -> List[Dict[str, Any]]:
+    def _extract_tables(self, pdf_document: fitz.Document,
+                        context: DocumentContext) -> List[Dict[str, Any]]:
         """
         Extract tables from the document
         
         Args:
             pdf_document: PyMuPDF document
+            context: Document context providing page rasters
             
         Returns:
             List of extracted tables
         """
         tables = []
+        dpi = self.config['dpi']
         
         # Process each page
         for page_idx, page in enumerate(pdf_document):
-            # Convert page to image
-            pix = page.get_pixmap(dpi=self.config['dpi'])
+            # Detect tables in the shared page raster, binarization and line masks
+            page_tables = self._detect_tables_in_image(
+                context.image(page_idx, dpi),
+                thresh=context.binary(page_idx, dpi),
+                line_masks=context.line_masks(page_idx, dpi)
+            )
             
-            # Create a temporary file for the page image
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                pix_path = temp_file.name
-                pix.save(pix_path)
+            # Convert coordinates from image space to PDF space
+            scale_x, scale_y = context.scale(page_idx, dpi)
             
-            try:
-                # Load the image
-                image = cv2.imread(pix_path)
-                if image is None:
-                    logger.warning(f"Failed to load image for page {page_idx + 1}")
-                    continue
-                
-                # Detect tables in the image
-                page_tables = self._detect_tables_in_image(image)
-                
-                # Convert coordinates from image space to PDF space
-                pdf_rect = page.rect
-                scale_x = pdf_rect.width / pix.width
-                scale_y = pdf_rect.height / pix.height
+            for table in page_tables:
+                # Scale table bbox
+                x, y, w, h = table['bbox']
+                pdf_bbox = (
+                    x * scale_x,
+                    y * scale_y,
+                    w * scale_x,
+                    h * scale_y
+                )
                 
-                for table in page_tables:
-                    # Scale table bbox
-                    x, y, w, h = table['bbox']
-                    pdf_bbox = (
-                        x * scale_x,
-                        y * scale_y,
-                        w * scale_x,
-                        h * scale_y
+                # Scale cell coordinates
+                scaled_cells = []
+                for cell in table['cells']:
+                    cell_x, cell_y, cell_w, cell_h = cell['bbox']
+                    pdf_cell_bbox = (
+                        cell_x * scale_x,
+                        cell_y * scale_y,
+                        cell_w * scale_x,
+                        cell_h * scale_y
                     )
-                    
-                    # Scale cell coordinates
-                    scaled_cells = []
-                    for cell in table['cells']:
-                        cell_x, cell_y, cell_w, cell_h = cell['bbox']
-                        pdf_cell_bbox = (
-                            cell_x * scale_x,
-                            cell_y * scale_y,
-                            cell_w * scale_x,
-                            cell_h * scale_y
-                        )
-                        scaled_cells.append({
-                            **cell,
-                            'bbox': pdf_cell_bbox
-                        })
-                    
-                    tables.append({
-                        'page': page_idx + 1,
-                        'bbox': pdf_bbox,
-                        'rows': table['rows'],
-                        'columns': table['columns'],
-                        'cells': scaled_cells,
-                        'data': table['data']
+                    scaled_cells.append({
+                        **cell,
+                        'bbox': pdf_cell_bbox
                     })
                 
-            finally:
-                # Clean up temporary file
-                os.unlink(pix_path)
+                tables.append({
+                    'page': page_idx + 1,
+                    'bbox': pdf_bbox,
+                    'rows': table['rows'],
+                    'columns': table['columns'],
+                    'cells': scaled_cells,
+                    'data': table['data']
+                })
         
         return tables
     
-    def _detect_tables_in_image(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def _detect_tables_in_image(self, image: np.ndarray, thresh: np.ndarray = None,
+                                line_masks: Tuple[np.ndarray, np.ndarray] = None) -> List[Dict[str, Any]]:
         """
         Detect tables in an image
         
         Args:
             image: Image to analyze
+            thresh: Precomputed inverted binarization of the image (blurred)
+            line_masks: Precomputed (horizontal, vertical) line masks
             
         Returns:
             List of detected tables
@@ -1307,21 +1316,25 @@ class FormFieldExtractor:
         # Convert to grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY_INV, 11, 2
-        )
-        
-        # Detect lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+        if thresh is None:
+            # Apply Gaussian blur to reduce noise
+            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            
+            # Apply adaptive thresholding
+            thresh = cv2.adaptiveThreshold(
+                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+                cv2.THRESH_BINARY_INV, 11, 2
+            )
         
-        horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-        vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+        if line_masks is not None:
+            horizontal_lines, vertical_lines = line_masks
+        else:
+            # Detect lines
+            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+            
+            horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
+            vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
         
         # Combine horizontal and vertical lines
         table_mask = cv2.add(horizontal_lines, vertical_lines)
@@ -1372,109 +1385,28 @@ class FormFieldExtractor:
         Returns:
             Dictionary with table structure information
         """
-        height, width = table_image.shape[:2]
-        
-        # Detect horizontal and vertical lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 10, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 10))
-        
-        horizontal_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-        vertical_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
-        
-        # Find row positions (horizontal lines)
-        h_projection = np.sum(horizontal_lines, axis=1) // 255
-        row_positions = [i for i, val in enumerate(h_projection) if val > width * 0.3]
-        
-        # Group adjacent positions to find row boundaries
-        row_boundaries = []
-        if row_positions:
-            row_start = row_positions[0]
-            for i in range(1, len(row_positions)):
-                if row_positions[i] > row_positions[i-1] + 2:  # Gap in projection
-                    row_boundaries.append((row_start, row_positions[i-1]))
-                    row_start = row_positions[i]
-            row_boundaries.append((row_start, row_positions[-1]))
-        
-        # Find column positions (vertical lines)
-        v_projection = np.sum(vertical_lines, axis=0) // 255
-        col_positions = [i for i, val in enumerate(v_projection) if val > height * 0.3]
-        
-        # Group adjacent positions to find column boundaries
-        col_boundaries = []
-        if col_positions:
-            col_start = col_positions[0]
-            for i in range(1, len(col_positions)):
-                if col_positions[i] > col_positions[i-1] + 2:  # Gap in projection
-                    col_boundaries.append((col_start, col_positions[i-1]))
-                    col_start = col_positions[i]
-            col_boundaries.append((col_start, col_positions[-1]))
-        
-        # Create row and column edges
-        if not row_boundaries:
-            row_boundaries = [(0, 0), (height, height)]
-        else:
-            # Add top and bottom edges if not already present
-            if row_boundaries[0][0] > 10:
-                row_boundaries.insert(0, (0, 0))
-            if row_boundaries[-1][1] < height - 10:
-                row_boundaries.append((height, height))
-        
-        if not col_boundaries:
-            col_boundaries = [(0, 0), (width, width)]
-        else:
-            # Add left and right edges if not already present
-            if col_boundaries[0][0] > 10:
-                col_boundaries.insert(0, (0, 0))
-            if col_boundaries[-1][1] < width - 10:
-                col_boundaries.append((width, width))
-        
-        # Create cell coordinates
-        cells = []
-        table_data = []
+        # Detect the grid once from the line projections
+        row_boundaries, col_boundaries = detect_table_grid(table_image)
         
         # Initialize empty table data
         rows = len(row_boundaries) - 1
         cols = len(col_boundaries) - 1
         table_data = [["" for _ in range(cols)] for _ in range(rows)]
         
-        for i in range(len(row_boundaries) - 1):
-            row_data = []
-            for j in range(len(col_boundaries) - 1):
-                # Get cell coordinates
-                cell_x = col_boundaries[j][1]
-                cell_y = row_boundaries[i][1]
-                cell_width = col_boundaries[j+1][0] - cell_x
-                cell_height = row_boundaries[i+1][0] - cell_y
-                
-                # Skip cells that are too small
-                if cell_width < 5 or cell_height < 5:
-                    continue
-                
-                # Extract cell image
-                cell_image = original_region[cell_y:cell_y+cell_height, cell_x:cell_x+cell_width]
-                
-                # Perform OCR on the cell
-                cell_text = ""
-                if cell_image.size > 0:
-                    cell_text = pytesseract.image_to_string(
-                        cell_image,
-                        lang=self.config['ocr_language'],
-                        config='--psm 6'
-                    ).strip()
-                
-                cells.append({
-                    'row': i,
-                    'column': j,
-                    'bbox': (cell_x, cell_y, cell_width, cell_height),
-                    'text': cell_text
-                })
-                
-                # Add to table data
-                table_data[i][j] = cell_text
+        # Crop the cells in memory and recognize the non-empty ones in parallel batches
+        cells = grid_cells(row_boundaries, col_boundaries)
+        self.table_ocr.recognize_cells(original_region, cells, binary=table_image)
+        
+        for cell in cells:
+            cell.pop('confidence', None)
+            cell.pop('empty', None)
+            
+            # Add to table data
+            table_data[cell['row']][cell['column']] = cell['text']
         
         return {
-            'rows': len(row_boundaries) - 1,
-            'columns': len(col_boundaries) - 1,
+            'rows': rows,
+            'columns': cols,
             'cells': cells,
             'data': table_data
         }
@@ -1789,12 +1721,10 @@ def main():
             'visualization_enabled': args.visualize
         }
         
-        # Create extractor
-        extractor = FormFieldExtractor(config)
-        
-        # Process document
+        # Create extractor and process document
         output_dir = args.output_dir or os.path.join(os.path.dirname(args.input_path), "form_data")
-        result = extractor.process_document(args.input_path, output_dir)
+        with FormFieldExtractor(config) as extractor:
+            result = extractor.process_document(args.input_path, output_dir)
         
         # Print summary
         print(json.dumps({
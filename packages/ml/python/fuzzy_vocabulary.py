@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Vocabulary Index
+
+This module provides a SymSpell-style deletion index for correcting OCR
+words against domain vocabularies. Instead of computing the edit distance
+between a word and every vocabulary term, candidate terms are found through
+shared delete-variants and only those candidates are verified.
+
+Key features:
+1. Deletion dictionary built once per vocabulary
+2. Bounded Levenshtein verification of candidates only
+3. Similarity ratios compatible with the OCR correction code
+4. Batch lookup with de-duplication
+5. Shared, cached indexes per vocabulary
+"""
+
+import logging
+import threading
+from typing import Dict, List, Tuple, Optional, Iterable, Set
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Lookup results kept per index before the cache is reset
+MAX_CACHED_LOOKUPS = 50000
+
+
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Levenshtein distance that stops early once it exceeds max_distance
+
+    Args:
+        s1: First string
+        s2: Second string
+        max_distance: Largest distance of interest
+
+    Returns:
+        The edit distance, or max_distance + 1 if it is larger
+    """
+    if s1 == s2:
+        return 0
+    if abs(len(s1) - len(s2)) > max_distance:
+        return max_distance + 1
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return len(s1)
+
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current = [i + 1]
+        row_min = i + 1
+        for j, c2 in enumerate(s2):
+            if c1 == c2:
+                cost = previous[j]
+            else:
+                cost = 1 + min(previous[j], previous[j + 1], current[-1])
+            current.append(cost)
+            if cost < row_min:
+                row_min = cost
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return previous[-1]
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All variants of a word with up to max_distance characters deleted"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for variant in frontier:
+            if not variant:
+                continue
+            for i in range(len(variant)):
+                next_frontier.add(variant[:i] + variant[i + 1:])
+        next_frontier -= result
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+class FuzzyVocabularyIndex:
+    """
+    SymSpell deletion index over a vocabulary.
+
+    Two strings within edit distance d always share a variant obtained by
+    deleting at most d characters from each, so looking up the deletes of a
+    word yields every term within that distance. Candidates are then verified
+    with a bounded Levenshtein distance. Matching is case-insensitive and
+    returns terms in their original spelling.
+    """
+
+    def __init__(self, terms: Iterable[str], max_edit_distance: int = 2):
+        """
+        Build the index
+
+        Args:
+            terms: Vocabulary terms (order is used to break ties)
+            max_edit_distance: Largest edit distance supported by lookups
+        """
+        self.max_edit_distance = max_edit_distance
+        self.terms = []            # Original spelling, first occurrence wins
+        self._term_index = {}      # Lowercased term -> position in self.terms
+        self._deletes = {}         # Delete variant -> set of term positions
+        self._cache = {}
+
+        for term in terms:
+            key = term.lower()
+            if key in self._term_index:
+                continue
+            position = len(self.terms)
+            self._term_index[key] = position
+            self.terms.append(term)
+            for variant in _deletes(key, max_edit_distance):
+                self._deletes.setdefault(variant, set()).add(position)
+
+        self.max_term_length = max((len(t) for t in self.terms), default=0)
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self._term_index
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def lookup(self, word: str, min_similarity: float = 0.0,
+               max_distance: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Find vocabulary terms similar to a word
+
+        Similarity is 1 - distance / max(len(word), len(term)).
+
+        Args:
+            word: Word to look up
+            min_similarity: Only return terms with a strictly higher similarity
+                (0.0 returns every term within max_distance)
+            max_distance: Largest edit distance (defaults to the index maximum)
+
+        Returns:
+            List of (term, similarity), best first, ties in vocabulary order
+        """
+        key = word.lower()
+        if not key:
+            return []
+
+        distance = self.max_edit_distance if max_distance is None else min(max_distance, self.max_edit_distance)
+        if min_similarity > 0:
+            # Largest distance that can still beat the similarity threshold
+            longest = max(len(key), self.max_term_length)
+            needed = int((1.0 - min_similarity) * longest)
+            if needed == (1.0 - min_similarity) * longest:
+                needed -= 1
+            distance = min(distance, max(0, needed))
+
+        cache_key = (key, min_similarity, distance)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        candidates = set()
+        for variant in _deletes(key, distance):
+            positions = self._deletes.get(variant)
+            if positions:
+                candidates |= positions
+
+        matches = []
+        for position in candidates:
+            term = self.terms[position]
+            term_key = term.lower()
+            edit_distance = bounded_levenshtein(key, term_key, distance)
+            if edit_distance > distance:
+                continue
+            similarity = 1.0 - edit_distance / max(len(key), len(term_key))
+            if min_similarity > 0 and similarity <= min_similarity:
+                continue
+            matches.append((position, term, similarity))
+
+        matches.sort(key=lambda m: (-m[2], m[0]))
+        result = [(term, similarity) for _, term, similarity in matches]
+        if len(self._cache) >= MAX_CACHED_LOOKUPS:
+            self._cache.clear()
+        self._cache[cache_key] = result
+        return result
+
+    def best_match(self, word: str, min_similarity: float = 0.0) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar vocabulary term
+
+        Args:
+            word: Word to look up
+            min_similarity: Minimum (exclusive) similarity
+
+        Returns:
+            (term, similarity) or None
+        """
+        matches = self.lookup(word, min_similarity)
+        return matches[0] if matches else None
+
+    def lookup_batch(self, words: List[str], min_similarity: float = 0.0) -> List[List[Tuple[str, float]]]:
+        """
+        Look up several words at once
+
+        Args:
+            words: Words to look up
+            min_similarity: Minimum (exclusive) similarity
+
+        Returns:
+            Matches for each word in input order
+        """
+        results = {}
+        for word in set(words):
+            results[word] = self.lookup(word, min_similarity)
+        return [results[word] for word in words]
+
+
+# Indexes shared across components, keyed by vocabulary content
+_index_cache: Dict[Tuple[Tuple[str, ...], int], FuzzyVocabularyIndex] = {}
+_index_lock = threading.Lock()
+
+
+def get_vocabulary_index(terms: Iterable[str], max_edit_distance: int = 2) -> FuzzyVocabularyIndex:
+    """
+    Get or build the shared index for a vocabulary
+
+    Args:
+        terms: Vocabulary terms
+        max_edit_distance: Largest edit distance supported by lookups
+
+    Returns:
+        FuzzyVocabularyIndex instance
+    """
+    key = (tuple(terms), max_edit_distance)
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is None:
+            index = FuzzyVocabularyIndex(key[0], max_edit_distance)
+            _index_cache[key] = index
+    return index
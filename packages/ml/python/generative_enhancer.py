@@ -8,6 +8,8 @@ This module provides LLM-powered enhancement of retrieved content, using:
 3. Material similarity explanations with supporting evidence
 4. Application recommendations with reasoning based on material properties
 5. Streaming interface for progressive result delivery
+6. Concurrent enhancement generation under a shared LLM concurrency limit
+7. Prompt-hash keyed completion cache for repeated prompts
 
 It works with the Context Assembly System to provide factually-grounded,
 enhanced responses for the RAG (Retrieval Augmented Generation) system.
@@ -22,6 +24,7 @@ from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple, U
 
 # Import material-specific prompts
 from material_specific_prompts import build_material_specific_prompt, get_material_system_prompt
+from llm_cache import LLMCompletionCache, get_completion_cache
 
 # Set up logging
 logger = logging.getLogger("generative_enhancer")
@@ -34,6 +37,53 @@ PromptTemplate = str
 StreamCallback = Callable[[str], None]
 
 
+class _EnhancementStream:
+    """
+    Forwards the output of concurrently running enhancements to one stream
+    handler without interleaving them.
+
+    The first enhancement to produce output streams live; output of the
+    others is buffered and flushed, in completion order, once the current
+    one finishes.
+    """
+
+    def __init__(self, handler: StreamCallback):
+        self.handler = handler
+        self.owner: Optional[str] = None
+        self.buffers: Dict[str, List[str]] = {}
+        self.finished: List[str] = []
+
+    def writer(self, name: str) -> StreamCallback:
+        """Stream callback for one enhancement"""
+        def write(chunk: str):
+            if self.owner is None:
+                self.owner = name
+            if self.owner == name:
+                self.handler(chunk)
+            else:
+                self.buffers.setdefault(name, []).append(chunk)
+        return write
+
+    def finish(self, name: str):
+        """Mark an enhancement as done and hand the stream to the next one"""
+        if self.owner not in (None, name):
+            self.finished.append(name)
+            return
+
+        self.owner = None
+        # Flush enhancements that completed while another one was streaming
+        for done in self.finished:
+            for chunk in self.buffers.pop(done, []):
+                self.handler(chunk)
+        self.finished.clear()
+
+        # Hand the stream to a running enhancement that already has output
+        if self.buffers:
+            self.owner = next(iter(self.buffers))
+            for chunk in self.buffers.pop(self.owner):
+                self.handler(chunk)
+
+
 class GenerativeEnhancer:
     """
     Generative Enhancement Layer for the RAG pipeline.
@@ -45,7 +95,8 @@ class GenerativeEnhancer:
     def __init__(
         self,
         llm_client=None,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        completion_cache: Optional[LLMCompletionCache] = None
     ):
         """
         Initialize the Generative Enhancer.
@@ -53,6 +104,8 @@ class GenerativeEnhancer:
         Args:
             llm_client: Client for LLM interactions
             config: Configuration parameters
+            completion_cache: Cache for non-streamed completions (the shared
+                process-wide cache if None and caching is enabled)
         """
         # Default configuration
         self.config = {
@@ -81,7 +134,18 @@ class GenerativeEnhancer:
 
             # Progressive enhancement
             "prioritize_speed": False,
-            "max_parallel_requests": 2
+            "max_parallel_requests": 4,      # Concurrent LLM calls across all enhance() calls
+            "enhancement_timeout": 60.0,     # Seconds per enhancement type
+            "enhancement_timeouts": {},      # Per-type overrides, e.g. {"similarity": 20}
+            "stream_section_headers": {      # Prefix for streamed non-explanation output
+                "similarity": "\n\nMaterial comparison:\n",
+                "application": "\n\nApplication recommendations:\n"
+            },
+
+            # Completion cache (non-streamed calls at or below the cache's max_temperature,
+            # so sampled answers at the default temperature are not replayed)
+            "llm_cache_enabled": True,
+            "llm_cache": {}              # LLMCompletionCache configuration
         }
 
         # Update with provided configuration
@@ -98,6 +162,14 @@ class GenerativeEnhancer:
             except ImportError:
                 logger.error("OpenAI package not available. Please provide an LLM client or install openai package")
 
+        self.completion_cache = None
+        if self.config["llm_cache_enabled"]:
+            self.completion_cache = completion_cache or get_completion_cache(self.config["llm_cache"])
+
+        # Limits concurrent LLM calls; created on first use in the running loop
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
+        self._llm_semaphore_loop = None
+
         logger.info("Generative Enhancer initialized with configuration: %s", self.config)
 
     async def enhance(
@@ -153,19 +225,51 @@ class GenerativeEnhancer:
                 "similarity_score": material.get("similarity_score", 0)
             })
 
-        # Apply each enhancement type
-        try:
-            if "explanation" in active_enhancements:
-                explanations = await self._generate_explanations(context, query, stream_handler)
-                response["enhancements"]["explanations"] = explanations
+        # Build the context block shared by all prompts once
+        sections = self._build_context_sections(context)
+        streaming = self.config["streaming_enabled"] and stream_handler is not None
+        stream = _EnhancementStream(stream_handler) if streaming else None
 
-            if "similarity" in active_enhancements:
-                similarities = await self._generate_similarity_analysis(context, query)
-                response["enhancements"]["similarities"] = similarities
+        generators = {
+            "explanation": ("explanations", self._generate_explanations),
+            "similarity": ("similarities", self._generate_similarity_analysis),
+            "application": ("applications", self._generate_application_recommendations)
+        }
+        scheduled = [name for name in generators if name in active_enhancements]
 
-            if "application" in active_enhancements:
-                applications = await self._generate_application_recommendations(context, query)
-                response["enhancements"]["applications"] = applications
+        async def run(name: str):
+            writer = stream.writer(name) if stream else None
+            timeout = self.config["enhancement_timeouts"].get(name, self.config["enhancement_timeout"])
+            try:
+                return await asyncio.wait_for(
+                    generators[name][1](context, query, writer, sections),
+                    timeout=timeout
+                )
+            finally:
+                if stream:
+                    stream.finish(name)
+
+        # Run the enhancement types concurrently; LLM calls share the global limit
+        try:
+            results = await asyncio.gather(*[run(name) for name in scheduled], return_exceptions=True)
+
+            errors = {}
+            for name, result in zip(scheduled, results):
+                key = generators[name][0]
+                if isinstance(result, asyncio.TimeoutError):
+                    logger.warning("Enhancement '%s' timed out", name)
+                    errors[name] = "timeout"
+                    response["enhancements"][key] = []
+                elif isinstance(result, Exception):
+                    logger.error(f"Error generating {name} enhancement: {str(result)}")
+                    errors[name] = str(result)
+                    response["enhancements"][key] = []
+                else:
+                    response["enhancements"][key] = result
+
+            if errors:
+                response["metadata"]["enhancement_errors"] = errors
+                response["metadata"]["completion_status"] = "partial" if len(errors) < len(scheduled) else "error"
 
             # Always process citations if any other enhancement is active
             if active_enhancements:
@@ -186,11 +290,87 @@ class GenerativeEnhancer:
             response["metadata"]["completion_status"] = "error"
             return response
 
+    def _build_context_sections(self, context: ContextData) -> Dict[str, str]:
+        """
+        Format the context blocks shared by the enhancement prompts.
+
+        Args:
+            context: Assembled context data
+
+        Returns:
+            Dictionary with materials_text, facts_text, relationships_text
+            and primary_material_type
+        """
+        materials = context.get("materials", [])
+        knowledge_facts = context.get("knowledge_facts", [])
+        relationships = context.get("relationships", [])
+
+        # Format materials data
+        materials_text = ""
+        for i, material in enumerate(materials[:5]):  # Limit to top 5 materials
+            material_text = f"""
+Material {i+1}: {material.get('name', 'Unknown Material')} ({material.get('material_type', 'Unknown Type')})
+"""
+
+            if "description" in material:
+                material_text += f"Description: {material['description']}\n"
+
+            if material.get("properties"):
+                props_text = "\n".join([
+                    f"- {prop}: {value}"
+                    for prop, value in material["properties"].items()
+                ])
+                material_text += f"Properties:\n{props_text}\n"
+
+            materials_text += material_text
+
+        # Format knowledge facts
+        facts_text = ""
+        if knowledge_facts:
+            facts_text = "Relevant Facts:\n"
+
+            for i, fact in enumerate(knowledge_facts):
+                material_name = fact.get("material_name", "")
+                fact_content = fact.get("fact", "")
+                source = fact.get("source", "")
+
+                facts_text += f"{i+1}. [{material_name}] {fact_content}"
+                if source:
+                    facts_text += f" (Source: {source})"
+                facts_text += "\n"
+
+        # Format relationships data
+        relationships_text = ""
+        if relationships:
+            relationships_text = "Known Relationships:\n"
+
+            for i, rel in enumerate(relationships):
+                source = rel.get("source_name", "")
+                target = rel.get("target_name", "")
+                rel_type = rel.get("type", "related to")
+                desc = rel.get("description", "")
+
+                relationships_text += f"{i+1}. {source} is {rel_type} {target}"
+                if desc:
+                    relationships_text += f": {desc}"
+                relationships_text += "\n"
+
+        # Use the material type of the first (highest-ranked) material
+        primary_material_type = materials[0].get("material_type", "other") if materials else "other"
+
+        return {
+            "materials_text": materials_text,
+            "facts_text": facts_text,
+            "relationships_text": relationships_text,
+            "primary_material_type": primary_material_type
+        }
+
     async def _generate_explanations(
         self,
         context: ContextData,
         query: str,
-        stream_handler: Optional[StreamCallback] = None
+        stream_handler: Optional[StreamCallback] = None,
+        sections: Optional[Dict[str, str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate explanations for materials based on the context.
@@ -199,6 +379,7 @@ class GenerativeEnhancer:
             context: Assembled context data
             query: User query
             stream_handler: Optional callback for streaming responses
+            sections: Shared context sections from _build_context_sections
 
         Returns:
             List of material explanations
@@ -211,7 +392,7 @@ class GenerativeEnhancer:
         streaming = self.config["streaming_enabled"] and stream_handler is not None
 
         # Build the prompt for explanations
-        prompt = self._build_explanation_prompt(context, query)
+        prompt = self._build_explanation_prompt(context, query, sections)
 
         # Generate content
         if streaming:
@@ -227,7 +408,8 @@ class GenerativeEnhancer:
     def _build_explanation_prompt(
         self,
         context: ContextData,
-        query: str
+        query: str,
+        sections: Optional[Dict[str, str]] = None
     ) -> Dict[str, Any]:
         """
         Build a prompt for generating material explanations.
@@ -235,47 +417,15 @@ class GenerativeEnhancer:
         Args:
             context: Assembled context data
             query: User query
+            sections: Shared context sections from _build_context_sections
 
         Returns:
             Formatted prompt
         """
-        # Get materials and knowledge facts
-        materials = context.get("materials", [])
-        knowledge_facts = context.get("knowledge_facts", [])
-
-        # Format materials data
-        materials_text = ""
-        for i, material in enumerate(materials[:5]):  # Limit to top 5 materials
-            material_text = f"""
-Material {i+1}: {material.get('name', 'Unknown Material')} ({material.get('material_type', 'Unknown Type')})
-"""
-
-            if "description" in material:
-                material_text += f"Description: {material['description']}\n"
-
-            if material.get("properties"):
-                props_text = "\n".join([
-                    f"- {prop}: {value}"
-                    for prop, value in material["properties"].items()
-                ])
-                material_text += f"Properties:\n{props_text}\n"
-
-            materials_text += material_text
-
-        # Format knowledge facts
-        facts_text = ""
-        if knowledge_facts:
-            facts_text = "Relevant Facts:\n"
-
-            for i, fact in enumerate(knowledge_facts):
-                material_name = fact.get("material_name", "")
-                fact_content = fact.get("fact", "")
-                source = fact.get("source", "")
-
-                facts_text += f"{i+1}. [{material_name}] {fact_content}"
-                if source:
-                    facts_text += f" (Source: {source})"
-                facts_text += "\n"
+        # Shared context sections (built once per enhance call)
+        sections = sections or self._build_context_sections(context)
+        materials_text = sections["materials_text"]
+        facts_text = sections["facts_text"]
 
         # Create the context section
         context_text = f"""
@@ -287,11 +437,8 @@ Retrieved Materials:
 {facts_text}
 """
 
-        # Determine the primary material type from the materials
-        primary_material_type = "other"
-        if materials:
-            # Use the material type of the first (highest-ranked) material
-            primary_material_type = materials[0].get("material_type", "other")
+        # Primary material type of the first (highest-ranked) material
+        primary_material_type = sections["primary_material_type"]
 
         # Use material-specific prompt if available
         try:
@@ -460,7 +607,9 @@ Based on the provided information, explain each material's suitability for: {que
     async def _generate_similarity_analysis(
         self,
         context: ContextData,
-        query: str
+        query: str,
+        stream_handler: Optional[StreamCallback] = None,
+        sections: Optional[Dict[str, str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate similarity analysis between materials.
@@ -468,6 +617,8 @@ Based on the provided information, explain each material's suitability for: {que
         Args:
             context: Assembled context data
             query: User query
+            stream_handler: Optional callback receiving the generated text
+            sections: Shared context sections from _build_context_sections
 
         Returns:
             Similarity analysis data
@@ -479,10 +630,12 @@ Based on the provided information, explain each material's suitability for: {que
             return []  # Need at least 2 materials for comparison
 
         # Build the prompt for similarity analysis
-        prompt = self._build_similarity_prompt(context, query)
+        prompt = self._build_similarity_prompt(context, query, sections)
 
         # Generate content
         similarity_text, _ = await self._get_llm_response(prompt)
+        if stream_handler:
+            stream_handler(self.config["stream_section_headers"].get("similarity", "") + similarity_text)
 
         # Process similarity analysis
         structured_similarities = self._process_similarities(similarity_text, materials, relationships)
@@ -492,7 +645,8 @@ Based on the provided information, explain each material's suitability for: {que
     def _build_similarity_prompt(
         self,
         context: ContextData,
-        query: str
+        query: str,
+        sections: Optional[Dict[str, str]] = None
     ) -> Dict[str, Any]:
         """
         Build a prompt for generating similarity analysis.
@@ -500,48 +654,15 @@ Based on the provided information, explain each material's suitability for: {que
         Args:
             context: Assembled context data
             query: User query
+            sections: Shared context sections from _build_context_sections
 
         Returns:
             Formatted prompt
         """
-        # Get materials and relationships
-        materials = context.get("materials", [])
-        relationships = context.get("relationships", [])
-
-        # Format materials data
-        materials_text = ""
-        for i, material in enumerate(materials[:5]):  # Limit to top 5 materials
-            material_text = f"""
-Material {i+1}: {material.get('name', 'Unknown Material')} ({material.get('material_type', 'Unknown Type')})
-"""
-
-            if "description" in material:
-                material_text += f"Description: {material['description']}\n"
-
-            if material.get("properties"):
-                props_text = "\n".join([
-                    f"- {prop}: {value}"
-                    for prop, value in material["properties"].items()
-                ])
-                material_text += f"Properties:\n{props_text}\n"
-
-            materials_text += material_text
-
-        # Format relationships data
-        relationships_text = ""
-        if relationships:
-            relationships_text = "Known Relationships:\n"
-
-            for i, rel in enumerate(relationships):
-                source = rel.get("source_name", "")
-                target = rel.get("target_name", "")
-                rel_type = rel.get("type", "related to")
-                desc = rel.get("description", "")
-
-                relationships_text += f"{i+1}. {source} is {rel_type} {target}"
-                if desc:
-                    relationships_text += f": {desc}"
-                relationships_text += "\n"
+        # Shared context sections (built once per enhance call)
+        sections = sections or self._build_context_sections(context)
+        materials_text = sections["materials_text"]
+        relationships_text = sections["relationships_text"]
 
         # Create context section
         context_text = f"""
@@ -553,11 +674,8 @@ Retrieved Materials:
 {relationships_text}
 """
 
-        # Determine the primary material type from the materials
-        primary_material_type = "other"
-        if materials:
-            # Use the material type of the first (highest-ranked) material
-            primary_material_type = materials[0].get("material_type", "other")
+        # Primary material type of the first (highest-ranked) material
+        primary_material_type = sections["primary_material_type"]
 
         # Use material-specific prompt if available
         try:
@@ -714,7 +832,9 @@ Provide a comparative analysis focusing on how these similarities and difference
     async def _generate_application_recommendations(
         self,
         context: ContextData,
-        query: str
+        query: str,
+        stream_handler: Optional[StreamCallback] = None,
+        sections: Optional[Dict[str, str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate application recommendations for materials.
@@ -722,6 +842,8 @@ Provide a comparative analysis focusing on how these similarities and difference
         Args:
             context: Assembled context data
             query: User query
+            stream_handler: Optional callback receiving the generated text
+            sections: Shared context sections from _build_context_sections
 
         Returns:
             Application recommendations data
@@ -731,10 +853,12 @@ Provide a comparative analysis focusing on how these similarities and difference
             return []
 
         # Build the prompt for application recommendations
-        prompt = self._build_application_prompt(context, query)
+        prompt = self._build_application_prompt(context, query, sections)
 
         # Generate content
         applications_text, _ = await self._get_llm_response(prompt)
+        if stream_handler:
+            stream_handler(self.config["stream_section_headers"].get("application", "") + applications_text)
 
         # Process application recommendations
         structured_applications = self._process_applications(applications_text, materials)
@@ -744,7 +868,8 @@ Provide a comparative analysis focusing on how these similarities and difference
     def _build_application_prompt(
         self,
         context: ContextData,
-        query: str
+        query: str,
+        sections: Optional[Dict[str, str]] = None
     ) -> Dict[str, Any]:
         """
         Build a prompt for generating application recommendations.
@@ -752,47 +877,15 @@ Provide a comparative analysis focusing on how these similarities and difference
         Args:
             context: Assembled context data
             query: User query
+            sections: Shared context sections from _build_context_sections
 
         Returns:
             Formatted prompt
         """
-        # Get materials and knowledge facts
-        materials = context.get("materials", [])
-        knowledge_facts = context.get("knowledge_facts", [])
-
-        # Format materials data
-        materials_text = ""
-        for i, material in enumerate(materials[:5]):  # Limit to top 5 materials
-            material_text = f"""
-Material {i+1}: {material.get('name', 'Unknown Material')} ({material.get('material_type', 'Unknown Type')})
-"""
-
-            if "description" in material:
-                material_text += f"Description: {material['description']}\n"
-
-            if material.get("properties"):
-                props_text = "\n".join([
-                    f"- {prop}: {value}"
-                    for prop, value in material["properties"].items()
-                ])
-                material_text += f"Properties:\n{props_text}\n"
-
-            materials_text += material_text
-
-        # Format knowledge facts
-        facts_text = ""
-        if knowledge_facts:
-            facts_text = "Relevant Facts:\n"
-
-            for i, fact in enumerate(knowledge_facts):
-                material_name = fact.get("material_name", "")
-                fact_content = fact.get("fact", "")
-                source = fact.get("source", "")
-
-                facts_text += f"{i+1}. [{material_name}] {fact_content}"
-                if source:
-                    facts_text += f" (Source: {source})"
-                facts_text += "\n"
+        # Shared context sections (built once per enhance call)
+        sections = sections or self._build_context_sections(context)
+        materials_text = sections["materials_text"]
+        facts_text = sections["facts_text"]
 
         # Create context section
         context_text = f"""
@@ -804,11 +897,8 @@ Retrieved Materials:
 {facts_text}
 """
 
-        # Determine the primary material type from the materials
-        primary_material_type = "other"
-        if materials:
-            # Use the material type of the first (highest-ranked) material
-            primary_material_type = materials[0].get("material_type", "other")
+        # Primary material type of the first (highest-ranked) material
+        primary_material_type = sections["primary_material_type"]
 
         # Use material-specific prompt if available
         try:
@@ -1072,6 +1162,14 @@ For each material, provide practical recommendations with reasoning based on its
 
         return citations
 
+    def _get_llm_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent LLM calls"""
+        loop = asyncio.get_running_loop()
+        if self._llm_semaphore is None or self._llm_semaphore_loop is not loop:
+            self._llm_semaphore = asyncio.Semaphore(max(1, int(self.config["max_parallel_requests"])))
+            self._llm_semaphore_loop = loop
+        return self._llm_semaphore
+
     async def _get_llm_response(
         self,
         prompt: Dict[str, str]
@@ -1089,19 +1187,31 @@ For each material, provide practical recommendations with reasoning based on its
             raise ValueError("LLM client not available")
 
         try:
-            # Call the LLM
-            response = await self.llm_client.chat.completions.create(
-                model=self.config["model"],
-                messages=[
-                    {"role": "system", "content": prompt["system"]},
-                    {"role": "user", "content": prompt["user"]}
-                ],
-                temperature=self.config["temperature"],
-                max_tokens=self.config["max_tokens"]
-            )
-
-            # Extract response text
-            response_text = response.choices[0].message.content
+            # Call the LLM; cache hits skip the call and the concurrency limit
+            if self.completion_cache:
+                response_text = await self.completion_cache.complete(
+                    self.llm_client,
+                    model=self.config["model"],
+                    system_prompt=prompt["system"],
+                    user_prompt=prompt["user"],
+                    temperature=self.config["temperature"],
+                    max_tokens=self.config["max_tokens"],
+                    limiter=self._get_llm_semaphore()
+                )
+            else:
+                async with self._get_llm_semaphore():
+                    response = await self.llm_client.chat.completions.create(
+                        model=self.config["model"],
+                        messages=[
+                            {"role": "system", "content": prompt["system"]},
+                            {"role": "user", "content": prompt["user"]}
+                        ],
+                        temperature=self.config["temperature"],
+                        max_tokens=self.config["max_tokens"]
+                    )
+
+                # Extract response text
+                response_text = response.choices[0].message.content
 
             # Extract citations
             citations = []
@@ -1150,29 +1260,30 @@ For each material, provide practical recommendations with reasoning based on its
             raise ValueError("LLM client not available")
 
         try:
-            # Call the LLM with streaming
-            stream = await self.llm_client.chat.completions.create(
-                model=self.config["model"],
-                messages=[
-                    {"role": "system", "content": prompt["system"]},
-                    {"role": "user", "content": prompt["user"]}
-                ],
-                temperature=self.config["temperature"],
-                max_tokens=self.config["max_tokens"],
-                stream=True
-            )
+            # Call the LLM with streaming; the slot is held until the stream ends
+            async with self._get_llm_semaphore():
+                stream = await self.llm_client.chat.completions.create(
+                    model=self.config["model"],
+                    messages=[
+                        {"role": "system", "content": prompt["system"]},
+                        {"role": "user", "content": prompt["user"]}
+                    ],
+                    temperature=self.config["temperature"],
+                    max_tokens=self.config["max_tokens"],
+                    stream=True
+                )
 
-            # Process the stream
-            collected_response = ""
+                # Process the stream
+                collected_response = ""
 
-            async for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    collected_response += content
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content = chunk.choices[0].delta.content
+                        collected_response += content
 
-                    # Call the stream handler
-                    if stream_handler:
-                        stream_handler(content)
+                        # Call the stream handler
+                        if stream_handler:
+                            stream_handler(content)
 
             # Extract citations
             citations = []
@@ -1258,7 +1369,8 @@ For each material, provide practical recommendations with reasoning based on its
 # Factory function to create a generative enhancer
 def create_generative_enhancer(
     llm_client=None,
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[Dict[str, Any]] = None,
+    completion_cache: Optional[LLMCompletionCache] = None
 ) -> GenerativeEnhancer:
     """
     Create a GenerativeEnhancer with specified LLM client and configuration.
@@ -1266,13 +1378,15 @@ def create_generative_enhancer(
     Args:
         llm_client: Client for LLM interaction
         config: Configuration parameters
+        completion_cache: Cache for non-streamed completions
 
     Returns:
         Configured GenerativeEnhancer instance
     """
     return GenerativeEnhancer(
         llm_client=llm_client,
-        config=config
+        config=config,
+        completion_cache=completion_cache
     )
 
 
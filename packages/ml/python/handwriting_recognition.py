@@ -36,6 +36,10 @@ from typing import Dict, List, Any, Tuple, Optional, Union
 import logging
 from pathlib import Path
 
+from tesseract_pool import get_tesseract_pool
+from box_geometry import nms
+from document_context import DocumentContext
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -98,6 +102,9 @@ class HandwritingDetector:
         
         # Verify Tesseract is installed
         self._verify_tesseract_setup()
+        
+        # Warm tesseract handles shared with SpecializedOCR
+        self.tesseract_pool = get_tesseract_pool()
     
     def _verify_tesseract_setup(self):
         """Verify Tesseract is properly installed and configured"""
@@ -113,18 +120,22 @@ class HandwritingDetector:
         if self.config['language'] not in available_langs:
             logger.warning(f"Language '{self.config['language']}' is not available in Tesseract")
     
-    def process_document(self, image_path: str, output_dir: str = None) -> Dict[str, Any]:
+    def process_document(self, image_path: str, output_dir: str = None,
+                         context: DocumentContext = None, page_index: int = 0) -> Dict[str, Any]:
         """
         Process a document image to detect and recognize handwritten text
         
         Args:
             image_path: Path to the document image
             output_dir: Directory to save results
+            context: Shared document context to take the page image and
+                binarization from instead of loading image_path
+            page_index: Page of the context to process
             
         Returns:
             Dictionary with detection and recognition results
         """
-        if not os.path.exists(image_path):
+        if context is None and not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
         
         # Create output directory if specified
@@ -132,15 +143,20 @@ class HandwritingDetector:
             os.makedirs(output_dir, exist_ok=True)
         
         # Load the image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+        thresh = None
+        if context is not None:
+            image = context.image(page_index)
+            thresh = context.binary(page_index)
+        else:
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError(f"Failed to load image: {image_path}")
         
         # Get image properties
         height, width = image.shape[:2]
         
         # Detect handwritten regions
-        handwritten_regions = self._detect_handwritten_regions(image)
+        handwritten_regions = self._detect_handwritten_regions(image, thresh)
         logger.info(f"Detected {len(handwritten_regions)} handwritten regions")
         
         # Process each handwritten region
@@ -194,12 +210,13 @@ class HandwritingDetector:
         
         return result
     
-    def _detect_handwritten_regions(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def _detect_handwritten_regions(self, image: np.ndarray, thresh: np.ndarray = None) -> List[Dict[str, Any]]:
         """
         Detect regions containing handwritten text
         
         Args:
             image: Input image as NumPy array
+            thresh: Precomputed inverted binarization of the image (blurred)
             
         Returns:
             List of detected handwritten regions
@@ -207,14 +224,15 @@ class HandwritingDetector:
         # Convert to grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY_INV, 11, 2
-        )
+        if thresh is None:
+            # Apply Gaussian blur to reduce noise
+            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            
+            # Apply adaptive thresholding
+            thresh = cv2.adaptiveThreshold(
+                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+                cv2.THRESH_BINARY_INV, 11, 2
+            )
         
         # Detect unique characteristics of handwriting
         
@@ -224,77 +242,33 @@ class HandwritingDetector:
         eroded = cv2.erode(thresh, kernel, iterations=1)
         stroke_var = cv2.absdiff(dilated, eroded)
         
-        # 2. Connected components analysis
+        # 2. Connected components analysis, with every feature computed for all
+        # components at once
+        features = self._component_features(thresh, stroke_var)
+        
         # Set minimum area for a handwriting component
         min_area = 100
         max_area = gray.shape[0] * gray.shape[1] * 0.2  # Max 20% of image
         
-        # Find contours
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Candidate regions for handwriting
-        candidate_regions = []
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            
-            # Filter by area
-            if area < min_area or area > max_area:
-                continue
-            
-            # Get bounding rectangle
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            # Calculate aspect ratio
-            aspect_ratio = w / h if h > 0 else 0
-            
-            # Calculate region statistics
-            region = stroke_var[y:y+h, x:x+w]
-            
-            # Check region characteristics
-            # Handwriting typically has:
-            # - Medium stroke width variation
-            # - Irregular contour with low circularity
-            # - Reasonable aspect ratio (not too wide or tall)
-            
-            # Calculate average stroke width variation
-            stroke_variation = np.mean(region)
-            
-            # Calculate contour regularity
-            perimeter = cv2.arcLength(contour, True)
-            circularity = 4 * np.pi * area / (perimeter * perimeter) if perimeter > 0 else 0
-            
-            # Calculate region density
-            region_thresh = thresh[y:y+h, x:x+w]
-            density = np.count_nonzero(region_thresh) / (w * h) if w * h > 0 else 0
-            
-            # Rule-based classification of handwriting
-            is_handwriting = (
-                stroke_variation > 20 and  # High stroke variation
-                circularity < 0.5 and      # Low circularity (irregular shape)
-                0.1 < aspect_ratio < 10 and  # Reasonable aspect ratio
-                0.05 < density < 0.5       # Medium density
-            )
-            
-            if is_handwriting:
-                # Calculate handwriting confidence based on features
-                hw_confidence = (
-                    min(1.0, stroke_variation / 50) * 0.4 +
-                    (1.0 - min(1.0, circularity * 2)) * 0.3 +
-                    min(1.0, density * 3.0) * 0.3
-                )
-                
-                candidate_regions.append({
-                    'bbox': (x, y, w, h),
-                    'area': area,
-                    'stroke_variation': float(stroke_variation),
-                    'circularity': float(circularity),
-                    'density': float(density),
-                    'detection_confidence': float(hw_confidence)
-                })
+        area = features['area']
+        is_handwriting, hw_confidence = self._classify_components(features)
+        selected = np.flatnonzero(is_handwriting & (area >= min_area) & (area <= max_area))
         
         # Sort regions by detection confidence
-        candidate_regions.sort(key=lambda r: r['detection_confidence'], reverse=True)
+        selected = selected[np.argsort(-hw_confidence[selected], kind='stable')]
+        
+        # Candidate regions for handwriting
+        candidate_regions = [
+            {
+                'bbox': tuple(int(v) for v in features['bbox'][i]),
+                'area': float(area[i]),
+                'stroke_variation': float(features['stroke_variation'][i]),
+                'circularity': float(features['circularity'][i]),
+                'density': float(features['density'][i]),
+                'detection_confidence': float(hw_confidence[i])
+            }
+            for i in selected
+        ]
         
         # Apply additional filtering for overlapping regions
         filtered_regions = self._filter_overlapping_regions(candidate_regions)
@@ -308,6 +282,113 @@ class HandwritingDetector:
         
         return final_regions
     
+    def _component_features(self, thresh: np.ndarray, stroke_var: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Compute the handwriting features of every outer connected component
+        
+        Components are the regions enclosed by the external contours, as with
+        cv2.findContours(RETR_EXTERNAL): holes are filled before labelling,
+        so components nested inside another one belong to it. Features are
+        arrays indexed by component (background excluded): bounding box,
+        enclosed area, aspect ratio, ink density within the box, mean stroke
+        width variation within the box and circularity.
+        
+        Args:
+            thresh: Inverted binarization of the image
+            stroke_var: Stroke width variation map (dilation minus erosion)
+            
+        Returns:
+            Dictionary of feature arrays
+        """
+        ink = (thresh > 0).astype(np.uint8)
+        
+        # Fill holes: background not 4-connected to the image border
+        outside = np.pad(1 - ink, 1, constant_values=1)
+        mask = np.zeros((outside.shape[0] + 2, outside.shape[1] + 2), np.uint8)
+        cv2.floodFill(outside, mask, (0, 0), 2, flags=4)
+        filled = np.where(outside[1:-1, 1:-1] == 2, 0, 1).astype(np.uint8)
+        
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(filled, connectivity=8)
+        
+        stats = stats[1:].astype(np.int64)
+        x, y = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+        w, h = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+        filled_area = stats[:, cv2.CC_STAT_AREA].astype(np.float64)
+        box_area = (w * h).astype(np.float64)
+        
+        def box_sums(image: np.ndarray) -> np.ndarray:
+            integral = cv2.integral(image, sdepth=cv2.CV_64F)
+            return (integral[y + h, x + w] - integral[y, x + w]
+                    - integral[y + h, x] + integral[y, x])
+        
+        # The external contour runs through the pixels with a 4-connected
+        # background neighbour: one step per boundary pixel, of length 1
+        # between 4-adjacent boundary pixels and sqrt(2) otherwise (as
+        # cv2.arcLength measures it)
+        cross = cv2.getStructuringElement(cv2.MORPH_CROSS, (3, 3))
+        boundary = cv2.subtract(filled, cv2.erode(filled, cross, iterations=1)) > 0
+        boundary_pixels = np.bincount(labels[boundary], minlength=count)[1:].astype(np.float64)
+        horizontal = boundary[:, 1:] & boundary[:, :-1]
+        vertical = boundary[1:, :] & boundary[:-1, :]
+        straight_steps = (np.bincount(labels[:, 1:][horizontal], minlength=count)
+                          + np.bincount(labels[1:, :][vertical], minlength=count))[1:].astype(np.float64)
+        perimeter = straight_steps + np.sqrt(2) * np.maximum(boundary_pixels - straight_steps, 0.0)
+        
+        # Area of the polygon through the boundary pixel centres (Pick's theorem),
+        # which is what cv2.contourArea measures for the external contour
+        area = np.maximum(filled_area - boundary_pixels / 2.0 - 1.0, 0.0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            circularity = np.where(perimeter > 0, 4 * np.pi * area / (perimeter * perimeter), 0.0)
+            aspect_ratio = np.where(h > 0, w / h, 0.0)
+        
+        return {
+            'bbox': np.stack([x, y, w, h], axis=1),
+            'area': area,
+            'aspect_ratio': aspect_ratio,
+            'density': box_sums(ink) / box_area,
+            'stroke_variation': box_sums(stroke_var) / box_area,
+            'circularity': np.minimum(circularity, 1.0)
+        }
+    
+    def _classify_components(self, features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify components as handwriting from their feature arrays
+        
+        Handwriting typically has:
+        - Medium stroke width variation
+        - Irregular contour with low circularity
+        - Reasonable aspect ratio (not too wide or tall)
+        - Medium density
+        
+        Args:
+            features: Feature arrays from _component_features
+            
+        Returns:
+            Tuple of (boolean handwriting mask, detection confidence) arrays
+        """
+        stroke_variation = features['stroke_variation']
+        circularity = features['circularity']
+        aspect_ratio = features['aspect_ratio']
+        density = features['density']
+        
+        # Rule-based classification of handwriting
+        is_handwriting = (
+            (stroke_variation > 20) &            # High stroke variation
+            (circularity < 0.5) &                # Low circularity (irregular shape)
+            (aspect_ratio > 0.1) & (aspect_ratio < 10) &  # Reasonable aspect ratio
+            (density > 0.05) & (density < 0.5)   # Medium density
+        )
+        
+        # Calculate handwriting confidence based on features
+        hw_confidence = (
+            np.minimum(1.0, stroke_variation / 50) * 0.4 +
+            (1.0 - np.minimum(1.0, circularity * 2)) * 0.3 +
+            np.minimum(1.0, density * 3.0) * 0.3
+        )
+        
+        return is_handwriting, hw_confidence
+    
     def _filter_overlapping_regions(self, regions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Filter out highly overlapping regions
@@ -316,52 +397,19 @@ class HandwritingDetector:
             regions: List of detected regions
             
         Returns:
-            Filtered list of regions
+            Filtered list of regions, by descending detection confidence
         """
         if not regions:
             return []
         
-        # Sort regions by detection confidence
-        regions = sorted(regions, key=lambda r: r['detection_confidence'], reverse=True)
-        
-        # Function to calculate IoU (Intersection over Union)
-        def calculate_iou(bbox1, bbox2):
-            x1, y1, w1, h1 = bbox1
-            x2, y2, w2, h2 = bbox2
-            
-            # Calculate coordinates of intersection
-            x_left = max(x1, x2)
-            y_top = max(y1, y2)
-            x_right = min(x1 + w1, x2 + w2)
-            y_bottom = min(y1 + h1, y2 + h2)
-            
-            # Check if there is an intersection
-            if x_right < x_left or y_bottom < y_top:
-                return 0.0
-            
-            # Calculate areas
-            intersection_area = (x_right - x_left) * (y_bottom - y_top)
-            bbox1_area = w1 * h1
-            bbox2_area = w2 * h2
-            union_area = bbox1_area + bbox2_area - intersection_area
-            
-            # Calculate IoU
-            return intersection_area / union_area if union_area > 0 else 0.0
-        
-        # Filter out overlapping regions
-        filtered_regions = []
-        for region in regions:
-            should_include = True
-            for selected_region in filtered_regions:
-                iou = calculate_iou(region['bbox'], selected_region['bbox'])
-                if iou > 0.5:  # If more than 50% overlap
-                    should_include = False
-                    break
-            
-            if should_include:
-                filtered_regions.append(region)
-        
-        return filtered_regions
+        # Keep regions by detection confidence, dropping those overlapping a kept one by more than 50%
+        kept = nms(
+            [r['bbox'] for r in regions],
+            [r['detection_confidence'] for r in regions],
+            iou_threshold=0.5
+        )
+        
+        return [regions[i] for i in kept]
     
     def _process_handwritten_region(self, image: np.ndarray, region: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -462,17 +510,13 @@ class HandwritingDetector:
         Returns:
             Dictionary with recognition results
         """
-        # Define tesseract configuration for handwriting
-        config = r'--psm 6 --oem 3'
-        
         # Add language configuration
         lang = self.config['language']
         
         try:
-            # Perform OCR optimized for handwriting
-            ocr_data = pytesseract.image_to_data(
-                image, lang=lang, config=config,
-                output_type=pytesseract.Output.DICT
+            # Perform OCR optimized for handwriting on a pooled tesseract handle
+            ocr_data = self.tesseract_pool.image_to_data(
+                image, lang=lang, psm=6, oem=3
             )
             
             # Extract text and confidence values
@@ -10,14 +10,20 @@ Key features:
 2. Hierarchical retrieval for multi-faceted queries
 3. Result reranking based on query relevance
 4. Support for both dense and sparse retrieval methods
+5. Cached LLM query decomposition for repeated queries
+6. Concurrent sub-query retrieval with batched embeddings and shared hydration
 """
 
 import asyncio
+import inspect
 import json
 import logging
 import re
+import time
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+from llm_cache import LLMCompletionCache, get_completion_cache
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -30,7 +36,10 @@ class HierarchicalRetriever:
         self,
         config: Dict[str, Any],
         base_retriever=None,
-        llm_client=None
+        llm_client=None,
+        completion_cache: Optional[LLMCompletionCache] = None,
+        embedding_model=None,
+        material_loader=None
     ):
         """
         Initialize the hierarchical retriever.
@@ -39,10 +48,19 @@ class HierarchicalRetriever:
             config: Configuration for the retriever
             base_retriever: Base retriever for executing sub-queries
             llm_client: LLM client for query decomposition
+            completion_cache: Cache for decomposition completions (the shared
+                process-wide cache if None and caching is enabled)
+            embedding_model: Optional embedding generator with batch_generate(texts)
+                used to embed all sub-queries in one call when the base retriever
+                accepts precomputed embeddings (accepts_query_embedding)
+            material_loader: Optional async function mapping material IDs to full
+                material records, used to hydrate sub-query candidates
         """
         self.config = config
         self.base_retriever = base_retriever
         self.llm_client = llm_client
+        self.embedding_model = embedding_model
+        self.material_loader = material_loader
         
         # Set default configuration values
         self.config.setdefault("max_sub_queries", 3)
@@ -50,6 +68,14 @@ class HierarchicalRetriever:
         self.config.setdefault("reranking_enabled", True)
         self.config.setdefault("combine_strategy", "weighted")
         self.config.setdefault("query_decomposition_model", "gpt-3.5-turbo")
+        self.config.setdefault("llm_cache_enabled", True)
+        self.config.setdefault("llm_cache", {})
+        self.config.setdefault("sub_query_deadline_seconds", 10.0)
+        
+        # Decomposition at low temperature is repeatable, so completions are cached
+        self.completion_cache = None
+        if self.config["llm_cache_enabled"]:
+            self.completion_cache = completion_cache or get_completion_cache(self.config["llm_cache"])
     
     async def retrieve(
         self,
@@ -83,12 +109,8 @@ class HierarchicalRetriever:
             
             logger.info(f"Decomposed query into {len(sub_queries)} sub-queries")
             
-            # Retrieve results for each sub-query
-            sub_results = []
-            for sub_query in sub_queries:
-                sub_result = await self._simple_retrieve(sub_query["query"], options)
-                sub_result["sub_query"] = sub_query
-                sub_results.append(sub_result)
+            # Retrieve results for all sub-queries concurrently
+            sub_results = await self._retrieve_sub_queries(sub_queries, options)
             
             # Combine results
             combined_results = self._combine_results(query, sub_results)
@@ -176,19 +198,29 @@ Please break down this complex query about materials into simpler sub-queries:
 Return only the JSON array with no additional text.
 """
             
-            # Call the LLM
-            response = await self.llm_client.chat.completions.create(
-                model=self.config["query_decomposition_model"],
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.2,
-                max_tokens=500
-            )
+            # Call the LLM (through the completion cache when enabled)
+            if self.completion_cache:
+                response_text = await self.completion_cache.complete(
+                    self.llm_client,
+                    model=self.config["query_decomposition_model"],
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    temperature=0.2,
+                    max_tokens=500
+                )
+            else:
+                response = await self.llm_client.chat.completions.create(
+                    model=self.config["query_decomposition_model"],
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=500
+                )
+                response_text = response.choices[0].message.content
             
             # Extract and parse response
-            response_text = response.choices[0].message.content
             
             # Extract JSON from response
             json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
@@ -279,6 +311,142 @@ Return only the JSON array with no additional text.
             "aspect": "Original query"
         }]
     
+    async def _retrieve_sub_queries(
+        self,
+        sub_queries: List[Dict[str, Any]],
+        options: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve all sub-queries concurrently under one deadline.
+        
+        When the base retriever accepts precomputed embeddings, sub-query
+        embeddings are computed in one batch and passed to it as the
+        "_query_embedding" option. A per-request memo makes each candidate
+        hydrate once across sub-queries. Sub-queries still running at the
+        deadline are cancelled and return no materials.
+        
+        Args:
+            sub_queries: Sub-queries with weights
+            options: Additional options for retrieval
+            
+        Returns:
+            Results per sub-query, in sub-query order
+        """
+        deadline = time.monotonic() + self.config["sub_query_deadline_seconds"]
+        memo: Dict[str, Any] = {}
+        
+        embeddings = None
+        if getattr(self.base_retriever, "accepts_query_embedding", False):
+            embeddings = await self._embed_sub_queries([sq["query"] for sq in sub_queries])
+        
+        tasks = []
+        for i, sub_query in enumerate(sub_queries):
+            sub_options = dict(options)
+            if embeddings is not None:
+                sub_options["_query_embedding"] = embeddings[i]
+            tasks.append(asyncio.ensure_future(self._retrieve_sub_query(sub_query["query"], sub_options, memo)))
+        
+        done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+        for task in pending:
+            task.cancel()
+        
+        sub_results = []
+        for sub_query, task in zip(sub_queries, tasks):
+            if task in done:
+                sub_result = task.result()
+            else:
+                logger.warning(f"Sub-query timed out: {sub_query['query']}")
+                sub_result = {"materials": [], "metadata": {"error": "Timeout"}}
+            sub_result["sub_query"] = sub_query
+            sub_results.append(sub_result)
+        
+        return sub_results
+    
+    async def _retrieve_sub_query(
+        self,
+        query: str,
+        options: Dict[str, Any],
+        memo: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Retrieve one sub-query and hydrate its candidates"""
+        result = await self._simple_retrieve(query, options)
+        if self.material_loader and result.get("materials"):
+            await self._hydrate_candidates(result["materials"], memo)
+        return result
+    
+    async def _embed_sub_queries(self, queries: List[str]) -> Optional[List[Any]]:
+        """
+        Embed all sub-queries with one batch call.
+        
+        Args:
+            queries: Sub-query texts
+            
+        Returns:
+            Embedding per query, or None without an embedding model
+        """
+        if not self.embedding_model or not hasattr(self.embedding_model, "batch_generate"):
+            return None
+        
+        try:
+            if inspect.iscoroutinefunction(self.embedding_model.batch_generate):
+                embeddings = await self.embedding_model.batch_generate(queries)
+            else:
+                # Embedding is CPU-bound; keep it off the event loop
+                embeddings = await asyncio.to_thread(self.embedding_model.batch_generate, queries)
+            return list(embeddings)
+        except Exception as e:
+            logger.error(f"Error embedding sub-queries: {str(e)}")
+            return None
+    
+    async def _hydrate_candidates(
+        self,
+        materials: List[Dict[str, Any]],
+        memo: Dict[str, Any]
+    ) -> None:
+        """
+        Fill candidate materials with their full records.
+        
+        Each material ID is loaded at most once per request: IDs already
+        loaded or being loaded for another sub-query reuse that lookup
+        through the request memo.
+        
+        Args:
+            materials: Candidate materials of one sub-query
+            memo: Per-request memo
+        """
+        lookups = memo.setdefault("material_lookups", {})  # ID -> task loading its batch
+        
+        missing = []
+        for material in materials:
+            material_id = material.get("id")
+            if material_id and material_id not in lookups and material_id not in missing:
+                missing.append(material_id)
+        
+        if missing:
+            lookup = asyncio.ensure_future(self._load_materials(missing))
+            for material_id in missing:
+                lookups[material_id] = lookup
+        
+        for material in materials:
+            lookup = lookups.get(material.get("id"))
+            if lookup is None:
+                continue
+            # Shielded so a cancelled sub-query does not cancel a shared lookup
+            record = (await asyncio.shield(lookup)).get(material["id"])
+            if record:
+                # Retrieval fields (scores, sub-query data) take precedence
+                for key, value in record.items():
+                    material.setdefault(key, value)
+    
+    async def _load_materials(self, material_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load full material records by ID"""
+        try:
+            records = await self.material_loader(material_ids) or []
+            return {record["id"]: record for record in records if record.get("id")}
+        except Exception as e:
+            logger.error(f"Error hydrating candidates: {str(e)}")
+            return {}
+    
     async def _simple_retrieve(
         self,
         query: str,
@@ -464,7 +632,10 @@ Return only the JSON array with no additional text.
 def create_hierarchical_retriever(
     config: Dict[str, Any],
     base_retriever=None,
-    llm_client=None
+    llm_client=None,
+    completion_cache: Optional[LLMCompletionCache] = None,
+    embedding_model=None,
+    material_loader=None
 ) -> HierarchicalRetriever:
     """
     Create a HierarchicalRetriever with specified configuration and dependencies.
@@ -473,6 +644,9 @@ def create_hierarchical_retriever(
         config: Configuration for the retriever
         base_retriever: Base retriever for executing sub-queries
         llm_client: LLM client for query decomposition
+        completion_cache: Cache for decomposition completions
+        embedding_model: Embedding generator for batched sub-query embeddings
+        material_loader: Async function loading full material records by ID
         
     Returns:
         Configured HierarchicalRetriever
@@ -480,5 +654,8 @@ def create_hierarchical_retriever(
     return HierarchicalRetriever(
         config=config,
         base_retriever=base_retriever,
-        llm_client=llm_client
+        llm_client=llm_client,
+        completion_cache=completion_cache,
+        embedding_model=embedding_model,
+        material_loader=material_loader
     )
@@ -16,7 +16,10 @@ to provide more accurate and relevant material search results.
 import os
 import json
 import time
+import asyncio
 import logging
+import threading
+import concurrent.futures
 import numpy as np
 from typing import Dict, List, Tuple, Union, Optional, Any, Callable
 from collections import defaultdict, Counter
@@ -46,6 +49,47 @@ except ImportError:
     logger.warning("knowledge_client module not available. Knowledge base integration will be limited.")
     KNOWLEDGE_CLIENT_AVAILABLE = False
 
+if KNOWLEDGE_CLIENT_AVAILABLE:
+    from knowledge_hydrator import KnowledgeHydrator
+
+
+class _BackgroundLoop:
+    """
+    Event loop running in a daemon thread for the synchronous classes.
+    
+    The knowledge client's pooled HTTP connections and the hydrator's cache
+    stay bound to this one loop, instead of a new loop per call.
+    """
+    
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+    
+    def run(self, coroutine, timeout: Optional[float] = None):
+        """
+        Run a coroutine on the background loop and wait for its result
+        
+        Args:
+            coroutine: Coroutine to run
+            timeout: Seconds to wait (None waits until it finishes)
+            
+        Returns:
+            The coroutine's result
+        """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="hybrid-retriever-loop", daemon=True).start()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+_background_loop = _BackgroundLoop()
+
 
 # ---- Hybrid Retriever Core ----
 
@@ -664,9 +708,14 @@ class ContextAssembler:
         
         # Initialize knowledge base client if available
         self.knowledge_client = None
+        self.knowledge_hydrator = None
         if KNOWLEDGE_CLIENT_AVAILABLE:
             try:
                 self.knowledge_client = KnowledgeClient(**self.knowledge_base_config)
+                # Relationships of all results in one query, cached per item
+                self.knowledge_hydrator = KnowledgeHydrator(self.knowledge_client, {
+                    "max_relationships_per_material": 10
+                })
             except Exception as e:
                 logger.error(f"Error initializing knowledge base client: {e}")
     
@@ -704,6 +753,11 @@ class ContextAssembler:
             }
         }
         
+        # Fetch the relationships of all results at once
+        relationships = {}
+        if include_relationships and self.knowledge_client:
+            relationships = self._get_relationships_batch([result.get("id") for result in top_results])
+        
         # Process each result
         for i, result in enumerate(top_results):
             context_item = {
@@ -718,14 +772,9 @@ class ContextAssembler:
                 context_item["metadata"] = result["metadata"]
             
             # Add relationships if requested and available
-            if include_relationships and self.knowledge_client:
-                try:
-                    # Get related items from knowledge base
-                    related_items = self._get_relationships(result.get("id"))
-                    if related_items:
-                        context_item["relationships"] = related_items
-                except Exception as e:
-                    logger.error(f"Error fetching relationships: {e}")
+            related_items = relationships.get(result.get("id"))
+            if related_items:
+                context_item["relationships"] = related_items
             
             context["context_items"].append(context_item)
         
@@ -748,14 +797,37 @@ class ContextAssembler:
         Returns:
             Dictionary of relationship types and related items
         """
-        if not self.knowledge_client:
+        return self._get_relationships_batch([item_id]).get(item_id, {})
+    
+    def _get_relationships_batch(self, item_ids: List[str]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """
+        Get relationships for several items with one knowledge base query
+        
+        Args:
+            item_ids: IDs of the items
+            
+        Returns:
+            Dictionary mapping item IDs to relationship types and related items
+        """
+        if not self.knowledge_hydrator:
             return {}
         
         try:
-            return self.knowledge_client.get_relationships(item_id)
+            _, relationships = _background_loop.run(
+                self.knowledge_hydrator.hydrate(item_ids, include_entries=False)
+            )
         except Exception as e:
-            logger.error(f"Error getting relationships for {item_id}: {e}")
+            logger.error(f"Error getting relationships for {len(item_ids)} items: {e}")
             return {}
+        
+        by_item = {}
+        for item_id, rels in relationships.items():
+            by_type = defaultdict(list)
+            for rel in rels:
+                by_type[rel.get("type", "related")].append(rel)
+            if by_type:
+                by_item[item_id] = dict(by_type)
+        return by_item
     
     def _get_knowledge_graph_context(self, query: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -34,6 +34,8 @@ from skimage import measure
 from skimage.segmentation import slic, felzenszwalb
 from sklearn.cluster import KMeans
 
+from box_geometry import nms
+
 
 class TileSegmenter:
     """Class for detecting and segmenting multiple tiles in an image"""
@@ -477,51 +479,14 @@ class TileSegmenter:
         # Sort segments by area (descending)
         segments.sort(key=lambda x: x["area"], reverse=True)
         
-        # Function to calculate IoU
-        def calculate_iou(bbox1, bbox2):
-            x1, y1, w1, h1 = bbox1
-            x2, y2, w2, h2 = bbox2
-            
-            # Calculate coordinates of intersection
-            x_left = max(x1, x2)
-            y_top = max(y1, y2)
-            x_right = min(x1 + w1, x2 + w2)
-            y_bottom = min(y1 + h1, y2 + h2)
-            
-            # No intersection
-            if x_right < x_left or y_bottom < y_top:
-                return 0.0
-            
-            # Calculate areas
-            intersection_area = (x_right - x_left) * (y_bottom - y_top)
-            bbox1_area = w1 * h1
-            bbox2_area = w2 * h2
-            union_area = bbox1_area + bbox2_area - intersection_area
-            
-            # Calculate IoU
-            return intersection_area / union_area if union_area > 0 else 0.0
-        
-        # Keep track of which segments to keep
-        keep = [True] * len(segments)
-        
-        # Check each pair of segments
-        for i in range(len(segments)):
-            if not keep[i]:
-                continue
-            
-            for j in range(i + 1, len(segments)):
-                if not keep[j]:
-                    continue
-                
-                # Calculate IoU
-                iou = calculate_iou(segments[i]["bbox"], segments[j]["bbox"])
-                
-                # If overlap is significant, remove the smaller segment
-                if iou > iou_threshold:
-                    keep[j] = False
+        # Keep the larger of two significantly overlapping segments
+        keep = nms(
+            [segment["bbox"] for segment in segments],
+            [segment["area"] for segment in segments],
+            iou_threshold=iou_threshold
+        )
         
-        # Filter segments based on keep flags
-        return [segment for i, segment in enumerate(segments) if keep[i]]
+        return [segments[i] for i in keep]
     
     def _calculate_regularity(self, contour: np.ndarray) -> float:
         """
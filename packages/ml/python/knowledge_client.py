@@ -3,23 +3,28 @@
 Knowledge Base Client for Supabase
 
 This module provides a client class to interact with Supabase tables
-containing knowledge base entries and material relationships.
+containing knowledge base entries and material relationships. Queries go
+through the pooled async PostgREST client, so lookups from concurrent
+requests do not block the event loop.
 """
 
 import os
+import json
+import asyncio
+import argparse
+import importlib.util
 import logging
 from typing import Dict, List, Any, Optional
 
+from postgrest_async import create_data_client, HTTPX_AVAILABLE
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('knowledge_client')
 
-# Try to import supabase-py
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
+# Check for supabase-py (fallback transport when httpx is missing)
+SUPABASE_AVAILABLE = importlib.util.find_spec("supabase") is not None
+if not SUPABASE_AVAILABLE and not HTTPX_AVAILABLE:
     logger.error("supabase-py library not found. Please install it: pip install supabase")
 
 # Type Aliases (can be refined with TypedDict or dataclasses if needed)
@@ -31,15 +36,17 @@ RelationshipList = List[MaterialRelationship]
 class KnowledgeClient:
     """Client for interacting with the knowledge base stored in Supabase."""
 
-    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None):
+    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None,
+                 client_config: Optional[Dict[str, Any]] = None):
         """
         Initialize the KnowledgeClient.
 
         Args:
             supabase_url: Supabase project URL. Reads from SUPABASE_URL env var if None.
             supabase_key: Supabase service role key. Reads from SUPABASE_KEY env var if None.
+            client_config: Data client settings (timeout, pool size, request coalescing).
         """
-        if not SUPABASE_AVAILABLE:
+        if not HTTPX_AVAILABLE and not SUPABASE_AVAILABLE:
             raise ImportError("Supabase client library is not installed.")
 
         url = supabase_url or os.environ.get('SUPABASE_URL')
@@ -49,19 +56,24 @@ class KnowledgeClient:
             raise ValueError("Supabase URL and Key must be provided or set as environment variables (SUPABASE_URL, SUPABASE_KEY).")
 
         try:
-            self.supabase: Client = create_client(url, key)
-            logger.info("KnowledgeClient: Supabase client initialized successfully.")
+            self.db = create_data_client(url, key, client_config)
+            logger.info(f"KnowledgeClient: {type(self.db).__name__} initialized successfully.")
         except Exception as e:
             logger.error(f"KnowledgeClient: Failed to initialize Supabase client: {e}")
             raise
 
+    async def close(self):
+        """Release pooled connections."""
+        await self.db.aclose()
+
     async def get_entries_for_materials(
         self,
         material_ids: List[str],
         max_entries_per_material: int = 5,
         quality_threshold: float = 0.7,
         query: Optional[str] = None, # For potential semantic filtering
-        semantic_indexing: bool = False # Flag for future use
+        semantic_indexing: bool = False, # Flag for future use
+        timeout: Optional[float] = None
     ) -> KnowledgeList:
         """
         Retrieve knowledge entries associated with a list of material IDs.
@@ -72,6 +84,7 @@ class KnowledgeClient:
             quality_threshold: Minimum quality score for entries.
             query: Optional query text for semantic relevance filtering (requires RPC).
             semantic_indexing: Flag indicating if semantic organization is needed (handled by caller).
+            timeout: Seconds before the lookup fails (client default if None).
 
         Returns:
             List of knowledge entries.
@@ -79,24 +92,24 @@ class KnowledgeClient:
         if not material_ids:
             return []
         try:
-            # Base query
-            query_builder = self.supabase.table("knowledge_entries") \
-                .select("*") \
-                .in_("material_id", material_ids) \
-                .gte("confidence", quality_threshold) # Assuming a 'confidence' column
-
             # TODO: Implement semantic filtering based on 'query' if needed.
             # This might require an RPC function that takes the query embedding
             # and compares it against knowledge entry embeddings.
             # For now, we just filter by material_id and quality.
 
-            # Execute query
-            response = query_builder.execute()
+            rows = await self.db.select(
+                "knowledge_entries",
+                filters=[
+                    ("material_id", "in", material_ids),
+                    ("confidence", "gte", quality_threshold) # Assuming a 'confidence' column
+                ],
+                timeout=timeout
+            )
 
-            if response.data:
+            if rows:
                 # Group by material_id and limit
                 entries_by_material: Dict[str, List[KnowledgeEntry]] = {}
-                for entry in response.data:
+                for entry in rows:
                     mat_id = entry.get("material_id")
                     if mat_id:
                         if mat_id not in entries_by_material:
@@ -108,10 +121,7 @@ class KnowledgeClient:
                 # Flatten the results
                 all_entries = [entry for entries in entries_by_material.values() for entry in entries]
                 return all_entries
-            else:
-                if hasattr(response, 'error') and response.error:
-                    logger.error(f"Error getting knowledge entries: {response.error}")
-                return []
+            return []
         except Exception as e:
             logger.error(f"Error in get_entries_for_materials: {e}")
             raise
@@ -121,7 +131,8 @@ class KnowledgeClient:
         embedding: List[float],
         max_entries: int = 5,
         threshold: float = 0.6,
-        material_type: Optional[str] = None # For potential filtering
+        material_type: Optional[str] = None, # For potential filtering
+        timeout: Optional[float] = None
     ) -> KnowledgeList:
         """
         Retrieve knowledge entries based on semantic similarity using embeddings.
@@ -131,6 +142,7 @@ class KnowledgeClient:
             max_entries: Maximum number of entries to return.
             threshold: Similarity threshold.
             material_type: Optional material type filter.
+            timeout: Seconds before the lookup fails (client default if None).
 
         Returns:
             List of knowledge entries.
@@ -148,15 +160,8 @@ class KnowledgeClient:
             #     rpc_params['material_type_filter'] = material_type
 
             logger.debug(f"Calling RPC '{rpc_function}'")
-            response = self.supabase.rpc(rpc_function, rpc_params).execute()
-
-            if response.data:
-                # Assuming RPC returns full knowledge entry structure + similarity
-                return response.data
-            else:
-                if hasattr(response, 'error') and response.error:
-                    logger.error(f"RPC '{rpc_function}' error: {response.error}")
-                return []
+            # Assuming RPC returns full knowledge entry structure + similarity
+            return await self.db.rpc(rpc_function, rpc_params, timeout=timeout) or []
         except Exception as e:
             logger.error(f"Error in get_entries_by_embedding: {e}")
             raise
@@ -165,7 +170,9 @@ class KnowledgeClient:
         self,
         material_ids: List[str],
         relationship_types: Optional[List[str]] = None,
-        max_relationships: int = 10
+        max_relationships: int = 10,
+        timeout: Optional[float] = None,
+        max_relationships_per_material: Optional[int] = None
     ) -> RelationshipList:
         """
         Retrieve relationships for a list of materials.
@@ -174,30 +181,65 @@ class KnowledgeClient:
             material_ids: List of source material IDs.
             relationship_types: Optional list of relationship types to filter by.
             max_relationships: Maximum total relationships to return.
+            timeout: Seconds before the lookup fails (client default if None).
+            max_relationships_per_material: Keep the strongest relationships of each
+                material instead of a total limit, so one bulk query (capped at this
+                many rows per material) serves every material.
 
         Returns:
-            List of material relationships.
+            List of material relationships, strongest first.
         """
         if not material_ids:
             return []
         try:
-            query_builder = self.supabase.table("material_relationships") \
-                .select("*") \
-                .in_("source_id", material_ids) \
-                .order("strength", desc=True) # Order by strength to get most relevant
-                .limit(max_relationships)
-
+            filters = [("source_id", "in", material_ids)]
             if relationship_types:
-                query_builder = query_builder.in_("type", relationship_types)
-
-            response = query_builder.execute()
-
-            if response.data:
-                return response.data
-            else:
-                if hasattr(response, 'error') and response.error:
-                    logger.error(f"Error getting material relationships: {response.error}")
-                return []
+                filters.append(("type", "in", relationship_types))
+
+            if not max_relationships_per_material:
+                return await self.db.select(
+                    "material_relationships",
+                    filters=filters,
+                    order="strength", desc=True, # Order by strength to get most relevant
+                    limit=max_relationships,
+                    timeout=timeout
+                )
+
+            # One bulk query, capped at what every material can use
+            per_material = max_relationships_per_material
+            cap = per_material * len(material_ids)
+            rows = await self.db.select(
+                "material_relationships",
+                filters=filters,
+                order="strength", desc=True,
+                limit=cap,
+                timeout=timeout
+            )
+
+            grouped: Dict[str, RelationshipList] = {}
+            for rel in rows:
+                grouped.setdefault(rel.get("source_id"), []).append(rel)
+
+            # A truncated result may have starved materials with weaker relationships;
+            # fetch those separately, each with its own limit
+            if len(rows) >= cap:
+                short = [m for m in dict.fromkeys(material_ids) if len(grouped.get(m, [])) < per_material]
+                if short:
+                    topped_up = await asyncio.gather(*(
+                        self.db.select(
+                            "material_relationships",
+                            filters=[("source_id", "eq", material_id)] + filters[1:],
+                            order="strength", desc=True,
+                            limit=per_material,
+                            timeout=timeout
+                        )
+                        for material_id in short
+                    ))
+                    grouped.update(zip(short, topped_up))
+
+            limited = [rel for rels in grouped.values() for rel in rels[:per_material]]
+            limited.sort(key=lambda rel: rel.get("strength") or 0, reverse=True)
+            return limited
         except Exception as e:
             logger.error(f"Error in get_material_relationships: {e}")
             raise
@@ -206,7 +248,8 @@ class KnowledgeClient:
         self,
         query: str,
         material_type: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        timeout: Optional[float] = None
     ) -> KnowledgeList:
         """
         Perform text search directly on the knowledge base.
@@ -215,6 +258,7 @@ class KnowledgeClient:
             query: The text query string.
             material_type: Optional material type filter.
             limit: Maximum number of results.
+            timeout: Seconds before the search fails (client default if None).
 
         Returns:
             List of relevant knowledge entries.
@@ -223,30 +267,26 @@ class KnowledgeClient:
             # Use Supabase's textSearch feature on 'knowledge_entries' table
             # Assuming 'fts' column exists on knowledge_entries
             fts_column = 'fts'
-            query_builder = self.supabase.table("knowledge_entries") \
-                .select('*, similarity: fts <=> websearch_to_tsquery(\'english\', query)') # Calculate similarity
+            filters = []
 
             # Apply material_type filter if provided
             if material_type:
                 # This assumes knowledge entries have a material_type column or relation
                 # Adjust filter as per actual schema
-                query_builder = query_builder.eq('material_type', material_type)
+                filters.append(('material_type', 'eq', material_type))
 
-            # Apply text search
-            query_builder = query_builder.text_search(fts_column, f"'{query}'", config='english', type='websearch')
-
-            # Order by similarity and limit
-            query_builder = query_builder.order('similarity', desc=True).limit(limit)
+            # Apply text search (websearch_to_tsquery)
+            filters.append((fts_column, 'wfts', ('english', query)))
 
             logger.debug(f"Executing knowledge base text search for query: {query}")
-            response = query_builder.execute()
-
-            if response.data:
-                return response.data
-            else:
-                if hasattr(response, 'error') and response.error:
-                    logger.error(f"Knowledge base text search error: {response.error}")
-                return []
+            return await self.db.select(
+                "knowledge_entries",
+                columns='*, similarity: fts <=> websearch_to_tsquery(\'english\', query)', # Calculate similarity
+                filters=filters,
+                order='similarity', desc=True, # Order by similarity and limit
+                limit=limit,
+                timeout=timeout
+            )
         except Exception as e:
             logger.error(f"Error in search_knowledge_base: {e}")
             raise
@@ -279,6 +319,8 @@ async def main_test(args):
         results = await client.search_knowledge_base(args.query, material_type=args.material_type, limit=args.limit)
         print(json.dumps(results, indent=2))
 
+    await client.close()
+
     # Add test for get_entries_by_embedding if needed, requires generating an embedding first
 
 if __name__ == "__main__":
@@ -304,7 +346,6 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if hasattr(args, 'command') and args.command:
-        import asyncio
         asyncio.run(main_test(args))
     else:
         parser.print_help()
\ No newline at end of file
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Batched Knowledge Base Hydration
+
+This module loads the knowledge entries and relationships of retrieved
+materials. Instead of one query per material, all material ids requested
+during one event loop iteration (a response, or all responses of a batch)
+are collected and fetched with a single bulk query per table, and every
+material's rows are kept in a short-lived per-material cache so repeated
+materials do not hit the knowledge tables again.
+
+Key features:
+1. Dataloader-style batching: loads issued in the same loop iteration share one query
+2. Bulk `in` queries per table, split into chunks of max_batch_size ids
+3. Per-material TTL cache with LRU bound, including materials without rows
+4. Deduplication of ids already being fetched by another request
+5. Query, batch and cache metrics
+
+Usage:
+    python knowledge_hydrator.py --benchmark [--requests 50] [--materials 5] [--latency-ms 20]
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("knowledge_hydrator")
+
+# Rows of one material
+Rows = List[Dict[str, Any]]
+BatchFunction = Callable[[List[str]], Awaitable[Dict[str, Rows]]]
+
+
+class BatchLoader:
+    """
+    Loads rows per key, batching and caching the lookups.
+
+    Keys requested in the same event loop iteration (or within
+    `batch_wait_ms`) are fetched together by one call of the batch
+    function. Results, including empty ones, are cached per key for
+    `ttl_seconds`; failed fetches are not cached. Every caller receives
+    its own copy of the rows, so changing them does not alter the cache.
+    The loader can be used from several event loops, each batching its own
+    requests.
+    """
+
+    def __init__(self, name: str, batch_function: BatchFunction, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the loader.
+
+        Args:
+            name: Name used in logs and metrics
+            batch_function: Coroutine function mapping a list of keys to {key: rows}
+            config: Configuration parameters
+        """
+        self.name = name
+        self.batch_function = batch_function
+        self.config = {
+            "ttl_seconds": 60.0,
+            "max_entries": 4096,
+            "max_batch_size": 100,   # Keys per query, bounded by the URL length of `in` filters
+            "batch_wait_ms": 0.0     # 0 batches the loads of one loop iteration
+        }
+        if config:
+            self.config.update(config)
+
+        self._entries: "OrderedDict[str, Tuple[float, Rows]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queues: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]] = {}
+        self._tasks = set()  # Running fetches, referenced until done
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "loads": 0,
+            "hits": 0,
+            "coalesced": 0,
+            "fetched": 0,
+            "batches": 0,
+            "errors": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "fetch_time": 0.0
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get loader metrics.
+
+        Returns:
+            Counters, hit rate and current cache size
+        """
+        with self._lock:
+            size = len(self._entries)
+        served = self.stats["hits"] + self.stats["coalesced"]
+        return {**self.stats, "hit_rate": served / self.stats["loads"] if self.stats["loads"] else 0.0, "size": size}
+
+    def _get_cached(self, key: str) -> Tuple[bool, Rows]:
+        """Look up a cached, unexpired result"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, []
+        expires_at, rows = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            return False, []
+        self._entries.move_to_end(key)
+        return True, rows
+
+    def prime(self, key: str, rows: Rows):
+        """
+        Store the rows of a key.
+
+        The loader keeps the rows as given; they must not be changed
+        afterwards.
+
+        Args:
+            key: Key to store
+            rows: Rows of the key
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.config["ttl_seconds"], rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config["max_entries"]:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self, keys: Optional[Iterable[str]] = None):
+        """
+        Drop cached results.
+
+        Args:
+            keys: Keys to drop (all if None)
+        """
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+            else:
+                for key in keys:
+                    self._entries.pop(key, None)
+
+    async def load(self, key: str) -> Rows:
+        """
+        Load the rows of one key.
+
+        Args:
+            key: Key to load
+
+        Returns:
+            Rows of the key
+        """
+        return (await self.load_many([key]))[key]
+
+    async def load_many(self, keys: Iterable[str]) -> Dict[str, Rows]:
+        """
+        Load the rows of several keys.
+
+        Args:
+            keys: Keys to load
+
+        Returns:
+            Dictionary mapping each key to a copy of its rows
+        """
+        loop = asyncio.get_running_loop()
+        results: Dict[str, Rows] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key is None:
+                    continue
+                self.stats["loads"] += 1
+                found, rows = self._get_cached(key)
+                if found:
+                    self.stats["hits"] += 1
+                    results[key] = rows
+                    continue
+
+                future = self._inflight.get(key)
+                if future is not None and future.get_loop() is loop:
+                    self.stats["coalesced"] += 1
+                else:
+                    future = loop.create_future()
+                    self._inflight[key] = future
+                    queue = self._queues.get(loop)
+                    if queue is None:
+                        queue = self._queues[loop] = {}
+                        if self.config["batch_wait_ms"] > 0:
+                            loop.call_later(self.config["batch_wait_ms"] / 1000.0, self._dispatch, loop)
+                        else:
+                            loop.call_soon(self._dispatch, loop)
+                    queue[key] = future
+                waiting[key] = future
+
+        if waiting:
+            # Shielded so a cancelled caller does not fail the other waiters
+            values = await asyncio.gather(*(asyncio.shield(f) for f in waiting.values()))
+            results.update(zip(waiting.keys(), values))
+        return copy.deepcopy(results)
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop):
+        """Start the fetches of the keys queued on this loop"""
+        with self._lock:
+            queue = self._queues.pop(loop, {})
+        items = list(queue.items())
+        size = max(1, int(self.config["max_batch_size"]))
+        for start in range(0, len(items), size):
+            task = loop.create_task(self._fetch(dict(items[start:start + size])))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, futures: Dict[str, asyncio.Future]):
+        """Fetch one batch of keys and resolve their futures"""
+        keys = list(futures)
+        self.stats["batches"] += 1
+        self.stats["fetched"] += len(keys)
+        start = time.perf_counter()
+        try:
+            rows_by_key = await self.batch_function(keys)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error loading {self.name} for {len(keys)} materials: {e}")
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in futures.items():
+                rows = rows_by_key.get(key, [])
+                self.prime(key, rows)
+                if not future.done():
+                    future.set_result(rows)
+        finally:
+            self.stats["fetch_time"] += time.perf_counter() - start
+            with self._lock:
+                for key, future in futures.items():
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+
+
+def group_rows(rows: Optional[Rows], key_field: str, limit: Optional[int] = None) -> Dict[str, Rows]:
+    """
+    Group rows by a key column, keeping their order.
+
+    Args:
+        rows: Rows to group
+        key_field: Column holding the key
+        limit: Maximum rows per key
+
+    Returns:
+        Dictionary mapping keys to their rows
+    """
+    grouped: Dict[str, Rows] = {}
+    for row in rows or []:
+        key = row.get(key_field)
+        if key is None:
+            continue
+        group = grouped.setdefault(key, [])
+        if limit is None or len(group) < limit:
+            group.append(row)
+    return grouped
+
+
+class KnowledgeHydrator:
+    """
+    Batched, cached loader of knowledge entries and relationships per material.
+
+    One hydrator serves one set of lookup parameters (quality threshold,
+    relationship types, per-material limits); components with different
+    parameters use separate hydrators.
+    """
+
+    def __init__(self, knowledge_client, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the hydrator.
+
+        Args:
+            knowledge_client: KnowledgeClient (get_entries_for_materials, get_material_relationships)
+            config: Configuration parameters
+        """
+        self.config = {
+            "quality_threshold": 0.7,
+            "max_entries_per_material": 8,
+            "relationship_types": None,
+            "max_relationships_per_material": 3,
+            "timeout": None,
+            "ttl_seconds": 60.0,
+            "max_entries": 4096,
+            "max_batch_size": 100,
+            "batch_wait_ms": 0.0
+        }
+        if config:
+            self.config.update(config)
+
+        self.knowledge_client = knowledge_client
+        loader_config = {k: self.config[k] for k in ("ttl_seconds", "max_entries", "max_batch_size", "batch_wait_ms")}
+        self.entries = BatchLoader("knowledge entries", self._fetch_entries, loader_config)
+        self.relationships = BatchLoader("relationships", self._fetch_relationships, loader_config)
+
+    async def _fetch_entries(self, material_ids: List[str]) -> Dict[str, Rows]:
+        """Fetch the knowledge entries of a batch of materials in one query"""
+        rows = await self.knowledge_client.get_entries_for_materials(
+            material_ids=material_ids,
+            max_entries_per_material=self.config["max_entries_per_material"],
+            quality_threshold=self.config["quality_threshold"],
+            timeout=self.config["timeout"]
+        )
+        return group_rows(rows, "material_id", self.config["max_entries_per_material"])
+
+    async def _fetch_relationships(self, material_ids: List[str]) -> Dict[str, Rows]:
+        """Fetch the relationships of a batch of materials in one query"""
+        rows = await self.knowledge_client.get_material_relationships(
+            material_ids=material_ids,
+            relationship_types=self.config["relationship_types"],
+            max_relationships_per_material=self.config["max_relationships_per_material"],
+            timeout=self.config["timeout"]
+        )
+        return group_rows(rows, "source_id", self.config["max_relationships_per_material"])
+
+    async def hydrate(
+        self,
+        material_ids: Iterable[str],
+        include_entries: bool = True,
+        include_relationships: bool = True
+    ) -> Tuple[Dict[str, Rows], Dict[str, Rows]]:
+        """
+        Load entries and relationships of materials, both tables concurrently.
+
+        Args:
+            material_ids: Material ids
+            include_entries: Whether to load knowledge entries
+            include_relationships: Whether to load relationships
+
+        Returns:
+            Tuple of ({material id: entries}, {material id: relationships})
+        """
+        material_ids = [m for m in dict.fromkeys(material_ids) if m]
+
+        async def nothing() -> Dict[str, Rows]:
+            return {}
+
+        entries, relationships = await asyncio.gather(
+            self.entries.load_many(material_ids) if include_entries else nothing(),
+            self.relationships.load_many(material_ids) if include_relationships else nothing()
+        )
+        return entries, relationships
+
+    def invalidate(self, material_ids: Optional[Iterable[str]] = None):
+        """
+        Drop cached rows, e.g. after a material's knowledge changed.
+
+        Args:
+            material_ids: Materials to drop (all if None)
+        """
+        material_ids = list(material_ids) if material_ids is not None else None
+        self.entries.clear(material_ids)
+        self.relationships.clear(material_ids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hydration metrics.
+
+        Returns:
+            Loader metrics per table
+        """
+        return {"entries": self.entries.get_stats(), "relationships": self.relationships.get_stats()}
+
+
+class _SimulatedKnowledgeClient:
+    """Knowledge client with fixed per-query latency, counting queries"""
+
+    def __init__(self, latency: float, materials: int, seed: int = 0):
+        rng = random.Random(seed)
+        self.latency = latency
+        self.queries = 0
+        self.entries = {f"m{i}": [{"id": f"k{i}_{j}", "material_id": f"m{i}", "confidence": rng.random()}
+                                  for j in range(rng.randint(0, 10))] for i in range(materials)}
+        self.relationships = {f"m{i}": [{"source_id": f"m{i}", "target_id": f"m{rng.randrange(materials)}",
+                                         "type": "similar_to", "strength": rng.random()}
+                                        for _ in range(rng.randint(0, 5))] for i in range(materials)}
+
+    async def get_entries_for_materials(self, material_ids, max_entries_per_material=5, quality_threshold=0.7, **kwargs):
+        self.queries += 1
+        await asyncio.sleep(self.latency)
+        return [e for m in material_ids for e in self.entries.get(m, []) if e["confidence"] >= quality_threshold]
+
+    async def get_material_relationships(self, material_ids, relationship_types=None,
+                                         max_relationships_per_material=None, **kwargs):
+        self.queries += 1
+        await asyncio.sleep(self.latency)
+        return [r for m in material_ids for r in self.relationships.get(m, [])]
+
+
+def run_benchmark(requests: int = 50, materials_per_request: int = 5, catalog: int = 100,
+                  latency_ms: float = 20.0, seed: int = 0) -> Dict[str, Any]:
+    """
+    Compare per-material lookups with batched, cached hydration.
+
+    Concurrent requests each hydrate a few materials drawn from a skewed
+    popularity distribution over the catalog.
+
+    Args:
+        requests: Number of concurrent requests
+        materials_per_request: Materials retrieved per request
+        catalog: Number of distinct materials
+        latency_ms: Latency of one knowledge base query
+        seed: Random seed
+
+    Returns:
+        Dictionary with query counts and timings of both strategies
+    """
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(catalog)]
+    batches = [[f"m{i}" for i in rng.choices(range(catalog), weights=weights, k=materials_per_request)]
+               for _ in range(requests)]
+
+    async def per_material() -> Tuple[int, float]:
+        client = _SimulatedKnowledgeClient(latency_ms / 1000.0, catalog, seed)
+
+        async def hydrate(ids):
+            for material_id in ids:
+                await client.get_entries_for_materials([material_id])
+                await client.get_material_relationships([material_id])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(hydrate(ids) for ids in batches))
+        return client.queries, time.perf_counter() - start
+
+    async def batched() -> Tuple[int, float, Dict[str, Any]]:
+        client = _SimulatedKnowledgeClient(latency_ms / 1000.0, catalog, seed)
+        hydrator = KnowledgeHydrator(client)
+        start = time.perf_counter()
+        await asyncio.gather(*(hydrator.hydrate(ids) for ids in batches))
+        # A second wave is served from the cache
+        await asyncio.gather(*(hydrator.hydrate(ids) for ids in batches))
+        return client.queries, time.perf_counter() - start, hydrator.get_stats()
+
+    naive_queries, naive_seconds = asyncio.run(per_material())
+    batched_queries, batched_seconds, stats = asyncio.run(batched())
+    return {
+        "requests": requests,
+        "materials_per_request": materials_per_request,
+        "latency_ms": latency_ms,
+        "per_material": {"queries": naive_queries, "seconds": naive_seconds},
+        "batched_two_waves": {"queries": batched_queries, "seconds": batched_seconds, "stats": stats}
+    }
+
+
+def main():
+    """Main function to run the hydration benchmark"""
+    parser = argparse.ArgumentParser(description="Batched knowledge base hydration")
+    parser.add_argument("--benchmark", action="store_true", help="Compare per-material and batched hydration")
+    parser.add_argument("--requests", type=int, default=50, help="Concurrent requests")
+    parser.add_argument("--materials", type=int, default=5, help="Materials per request")
+    parser.add_argument("--catalog", type=int, default=100, help="Distinct materials")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latency of one query")
+
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    print(json.dumps(run_benchmark(args.requests, args.materials, args.catalog, args.latency_ms), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,6 +35,13 @@ from pathlib import Path
 from typing import Dict, List, Any, Tuple, Optional, Union
 import logging
 
+from document_context import DocumentContext
+from layout_features import LayoutFeatureMap
+from layout_pyramid import (
+    build_coarse_level, refine_margin, refine_box, upscale_box, downscale_box,
+    expand_box, scale_length
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -87,24 +94,32 @@ class LayoutAnalyzer:
             'multi_column_detection': True,
             'table_detection_mode': 'advanced',
             'line_detection_sensitivity': 0.7,
-            'export_images': True
+            'export_images': True,
+            'coarse_to_fine': False,       # Find tables, diagrams and text blocks on a downscaled level
+            'pyramid_scale': 0.5,          # Scale of the coarse level
+            'pyramid_min_dimension': 400,  # Pages whose coarse level would be smaller stay at full resolution
+            'refine_margin': None          # Full-resolution search margin around candidates (None: 2 coarse pixels)
         }
         
         if config:
             self.config.update(config)
     
-    def analyze_document(self, image_path: str, output_dir: str = None) -> Dict[str, Any]:
+    def analyze_document(self, image_path: str, output_dir: str = None,
+                         context: DocumentContext = None, page_index: int = 0) -> Dict[str, Any]:
         """
         Analyze the layout of a document image
         
         Args:
             image_path: Path to the document image
             output_dir: Directory to save analysis outputs
+            context: Shared document context to take the page image and
+                binarization from instead of loading image_path
+            page_index: Page of the context to analyze
             
         Returns:
             Dictionary with analysis results
         """
-        if not os.path.exists(image_path):
+        if context is None and not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
         
         # Create output directory if specified
@@ -112,55 +127,140 @@ class LayoutAnalyzer:
             os.makedirs(output_dir, exist_ok=True)
         
         # Load the image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+        if context is not None:
+            image = context.image(page_index)
+        else:
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError(f"Failed to load image: {image_path}")
+        
+        # Preprocess the image for analysis
+        if context is not None:
+            preprocessed = context.get_or_compute(
+                page_index, 'layout_preprocessed',
+                lambda: self._preprocess_image(image, thresh=context.binary(page_index))
+            )
+        else:
+            preprocessed = self._preprocess_image(image)
+        
+        document_structure, detections = self._analyze_layout(image, preprocessed)
+        tables = detections['tables']
+        diagrams = detections['diagrams']
+        form_fields = detections['form_fields']
+        text_blocks = detections['text_blocks']
+        
+        # Generate visualization if output_dir is specified
+        if output_dir:
+            output_path = os.path.join(output_dir, f"{Path(image_path).stem}_analysis.png")
+            self._generate_visualization(image, document_structure, output_path)
+            document_structure['visualization_path'] = output_path
+            
+            # Save document structure as JSON
+            json_path = os.path.join(output_dir, f"{Path(image_path).stem}_structure.json")
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(document_structure, f, indent=2, ensure_ascii=False)
+            
+            # Export region images if enabled
+            if self.config['export_images']:
+                regions_dir = os.path.join(output_dir, 'regions')
+                os.makedirs(regions_dir, exist_ok=True)
+                
+                self._export_region_images(image, tables, os.path.join(regions_dir, 'tables'))
+                self._export_region_images(image, diagrams, os.path.join(regions_dir, 'diagrams'))
+                self._export_region_images(image, form_fields, os.path.join(regions_dir, 'form_fields'))
+                self._export_region_images(image, text_blocks, os.path.join(regions_dir, 'text_blocks'))
         
+        return document_structure
+    
+    def analyze_image(self, image: np.ndarray) -> Dict[str, Any]:
+        """
+        Analyze the layout of an in-memory page image
+        
+        Args:
+            image: BGR page image
+            
+        Returns:
+            Dictionary with analysis results (as analyze_document)
+        """
+        return self._analyze_layout(image, self._preprocess_image(image))[0]
+    
+    def _analyze_layout(self, image: np.ndarray,
+                        preprocessed: np.ndarray) -> Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]]]:
+        """
+        Run the layout detectors on a preprocessed page
+        
+        Args:
+            image: Original page image
+            preprocessed: Preprocessed (binarized) page image
+            
+        Returns:
+            Tuple of (document structure, detected regions by detector)
+        """
         # Get image properties
         height, width = image.shape[:2]
         
-        # Preprocess the image for analysis
-        preprocessed = self._preprocess_image(image)
+        # Line masks, contours and components are computed once and shared by the detectors
+        features = LayoutFeatureMap(preprocessed)
         
         # Detect document orientation and correct if needed
-        rotated, angle = self._correct_orientation(preprocessed)
+        with features.timed('orientation'):
+            rotated, angle = self._correct_orientation(preprocessed, features)
         if abs(angle) > 1.0:
             logger.info(f"Corrected document orientation by {angle:.2f} degrees")
             preprocessed = rotated
+            
+            # Features of the unrotated image no longer apply
+            timings = features.timings
+            features = LayoutFeatureMap(preprocessed)
+            features.timings.update(timings)
+        
+        # In coarse-to-fine mode tables, diagrams and text blocks are searched on a
+        # downscaled level and only refined at full resolution
+        coarse = None
+        if self.config['coarse_to_fine']:
+            coarse = build_coarse_level(
+                features, self.config['pyramid_scale'], self.config['pyramid_min_dimension']
+            )
         
         # Detect columns
         columns = []
         if self.config['multi_column_detection']:
-            columns = self._detect_columns(preprocessed)
+            with features.timed('columns'):
+                columns = self._detect_columns(preprocessed)
             logger.info(f"Detected {len(columns)} columns")
         
         # Detect tables
-        tables = self._detect_tables(preprocessed)
+        with features.timed('tables'):
+            tables = self._detect_tables(preprocessed, features, coarse)
         logger.info(f"Detected {len(tables)} tables")
         
         # Detect diagrams if enabled
         diagrams = []
         if self.config['enable_diagram_detection']:
-            diagrams = self._detect_diagrams(preprocessed)
+            with features.timed('diagrams'):
+                diagrams = self._detect_diagrams(preprocessed, features, coarse)
             logger.info(f"Detected {len(diagrams)} diagrams")
         
         # Detect form fields if enabled
         form_fields = []
         if self.config['enable_form_field_detection']:
-            form_fields = self._detect_form_fields(preprocessed)
+            with features.timed('form_fields'):
+                form_fields = self._detect_form_fields(preprocessed, features)
             logger.info(f"Detected {len(form_fields)} form fields")
         
         # Detect general text blocks
-        text_blocks = self._detect_text_blocks(preprocessed, [
-            *tables, *diagrams, *form_fields
-        ])
+        with features.timed('text_blocks'):
+            text_blocks = self._detect_text_blocks(preprocessed, [
+                *tables, *diagrams, *form_fields
+            ], features, coarse)
         logger.info(f"Detected {len(text_blocks)} text blocks")
         
         # Classify text blocks (headings, body text, etc.)
-        for block in text_blocks:
-            block['type'] = self._classify_text_block(
-                preprocessed, block['bbox'], width, height
-            )
+        with features.timed('classification'):
+            for block in text_blocks:
+                block['type'] = self._classify_text_block(
+                    preprocessed, block['bbox'], width, height
+                )
         
         # Group regions by type
         regions_by_type = {}
@@ -196,53 +296,43 @@ class LayoutAnalyzer:
                 'form_fields': len(form_fields),
                 'text_blocks': len(text_blocks),
                 'columns': len(columns)
-            }
+            },
+            'analysis_mode': 'coarse_to_fine' if coarse is not None else 'full_resolution',
+            'timings': features.get_timings()
         }
         
-        # Generate visualization if output_dir is specified
-        if output_dir:
-            output_path = os.path.join(output_dir, f"{Path(image_path).stem}_analysis.png")
-            self._generate_visualization(image, document_structure, output_path)
-            document_structure['visualization_path'] = output_path
-            
-            # Save document structure as JSON
-            json_path = os.path.join(output_dir, f"{Path(image_path).stem}_structure.json")
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(document_structure, f, indent=2, ensure_ascii=False)
-            
-            # Export region images if enabled
-            if self.config['export_images']:
-                regions_dir = os.path.join(output_dir, 'regions')
-                os.makedirs(regions_dir, exist_ok=True)
-                
-                self._export_region_images(image, tables, os.path.join(regions_dir, 'tables'))
-                self._export_region_images(image, diagrams, os.path.join(regions_dir, 'diagrams'))
-                self._export_region_images(image, form_fields, os.path.join(regions_dir, 'form_fields'))
-                self._export_region_images(image, text_blocks, os.path.join(regions_dir, 'text_blocks'))
+        detections = {
+            'tables': tables,
+            'diagrams': diagrams,
+            'form_fields': form_fields,
+            'text_blocks': text_blocks
+        }
         
-        return document_structure
+        return document_structure, detections
     
-    def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
+    def _preprocess_image(self, image: np.ndarray, thresh: np.ndarray = None) -> np.ndarray:
         """
         Preprocess the image for layout analysis
         
         Args:
             image: Input image as NumPy array
+            thresh: Precomputed inverted binarization of the image (blurred)
             
         Returns:
             Preprocessed image
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY_INV, 11, 2
-        )
+        if thresh is None:
+            # Convert to grayscale
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            
+            # Apply Gaussian blur to reduce noise
+            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            
+            # Apply adaptive thresholding
+            thresh = cv2.adaptiveThreshold(
+                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+                cv2.THRESH_BINARY_INV, 11, 2
+            )
         
         # Apply morphological operations to clean up the image
         kernel = np.ones((2, 2), np.uint8)
@@ -250,18 +340,23 @@ class LayoutAnalyzer:
         
         return morph
     
-    def _correct_orientation(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+    def _correct_orientation(self, image: np.ndarray,
+                             features: LayoutFeatureMap = None) -> Tuple[np.ndarray, float]:
         """
         Detect and correct document orientation
         
         Args:
             image: Input image as NumPy array
+            features: Shared feature map of the image
             
         Returns:
             Tuple of (rotated image, rotation angle)
         """
-        # Find contours in the image
-        contours, _ = cv2.findContours(image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        if features is None:
+            features = LayoutFeatureMap(image)
+        
+        # Find contours in the image (outer borders and holes)
+        contours = features.contours()
         
         # Find text lines using contours
         min_line_length = self.config['min_line_length']
@@ -389,69 +484,117 @@ class LayoutAnalyzer:
         
         return columns
     
-    def _detect_tables(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def _detect_tables(self, image: np.ndarray, features: LayoutFeatureMap = None,
+                       coarse: LayoutFeatureMap = None) -> List[Dict[str, Any]]:
         """
         Detect tables in a document
         
         Args:
             image: Preprocessed image
+            features: Shared feature map of the image
+            coarse: Feature map of a downscaled level to search candidates on
             
         Returns:
             List of table regions
         """
         height, width = image.shape[:2]
+        if features is None:
+            features = LayoutFeatureMap(image)
         
-        # Detect horizontal and vertical lines with different kernels to capture various table styles
-        # Standard kernel for regular tables
-        horizontal_kernel_std = cv2.getStructuringElement(cv2.MORPH_RECT, (min(width // 10, 100), 1))
-        vertical_kernel_std = cv2.getStructuringElement(cv2.MORPH_RECT, (1, min(height // 10, 100)))
-        
-        # Smaller kernel for detecting finer lines in complex tables
-        horizontal_kernel_fine = cv2.getStructuringElement(cv2.MORPH_RECT, (min(width // 20, 50), 1))
-        vertical_kernel_fine = cv2.getStructuringElement(cv2.MORPH_RECT, (1, min(height // 20, 50)))
-        
-        # Larger kernel for detecting table boundaries in complex layouts
-        horizontal_kernel_large = cv2.getStructuringElement(cv2.MORPH_RECT, (min(width // 5, 200), 1))
-        vertical_kernel_large = cv2.getStructuringElement(cv2.MORPH_RECT, (1, min(height // 5, 200)))
+        if coarse is None:
+            boxes = self._find_table_boxes(features, width, height)
+        else:
+            # Snap coarse candidates to the full-resolution table lines around them
+            line_lengths = self._table_line_lengths(width, height)
+            margin = refine_margin(coarse.scale, self.config['refine_margin'])
+            boxes = []
+            for box in self._find_table_boxes(coarse, width, height):
+                candidate = upscale_box(box, coarse.scale, width, height)
+                window = expand_box(candidate, margin, width, height)
+                boxes.append(refine_box(
+                    candidate, window,
+                    lambda w: self._table_lines(features.region(w), line_lengths)
+                ))
+        
+        return self._build_tables(image, boxes, features)
+    
+    def _table_line_lengths(self, page_width: int, page_height: int) -> List[Tuple[int, int]]:
+        """
+        Kernel lengths (horizontal, vertical) used to find table lines on a page
         
-        # Detect lines with each kernel
-        horizontal_lines_std = cv2.morphologyEx(image, cv2.MORPH_OPEN, horizontal_kernel_std, iterations=2)
-        vertical_lines_std = cv2.morphologyEx(image, cv2.MORPH_OPEN, vertical_kernel_std, iterations=2)
+        Standard kernels find regular tables, fine kernels thin lines in complex
+        tables and large kernels table boundaries in complex layouts.
+        """
+        return [
+            (min(page_width // 10, 100), min(page_height // 10, 100)),  # Standard
+            (min(page_width // 20, 50), min(page_height // 20, 50)),    # Fine
+            (min(page_width // 5, 200), min(page_height // 5, 200))     # Large
+        ]
+    
+    def _table_lines(self, features: LayoutFeatureMap, line_lengths: List[Tuple[int, int]]) -> np.ndarray:
+        """
+        Combine the horizontal and vertical line masks of all table kernels
         
-        horizontal_lines_fine = cv2.morphologyEx(image, cv2.MORPH_OPEN, horizontal_kernel_fine, iterations=2)
-        vertical_lines_fine = cv2.morphologyEx(image, cv2.MORPH_OPEN, vertical_kernel_fine, iterations=2)
+        Args:
+            features: Feature map of the image or region
+            line_lengths: Kernel lengths (horizontal, vertical)
+            
+        Returns:
+            Mask of table lines
+        """
+        horizontal_lines = None
+        vertical_lines = None
+        for h_length, v_length in line_lengths:
+            h_lines = features.line_mask('horizontal', h_length, iterations=2)
+            v_lines = features.line_mask('vertical', v_length, iterations=2)
+            horizontal_lines = h_lines if horizontal_lines is None else cv2.bitwise_or(horizontal_lines, h_lines)
+            vertical_lines = v_lines if vertical_lines is None else cv2.bitwise_or(vertical_lines, v_lines)
         
-        horizontal_lines_large = cv2.morphologyEx(image, cv2.MORPH_OPEN, horizontal_kernel_large, iterations=2)
-        vertical_lines_large = cv2.morphologyEx(image, cv2.MORPH_OPEN, vertical_kernel_large, iterations=2)
+        # Combine horizontal and vertical lines for table detection
+        return cv2.add(horizontal_lines, vertical_lines)
+    
+    def _find_table_boxes(self, features: LayoutFeatureMap, page_width: int,
+                          page_height: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Find the boxes of groups of table lines
         
-        # Combine all horizontal and vertical lines
-        horizontal_lines = cv2.bitwise_or(horizontal_lines_std, 
-                            cv2.bitwise_or(horizontal_lines_fine, horizontal_lines_large))
-        vertical_lines = cv2.bitwise_or(vertical_lines_std, 
-                          cv2.bitwise_or(vertical_lines_fine, vertical_lines_large))
+        Args:
+            features: Feature map of the page or of a pyramid level of it
+            page_width: Full-resolution page width
+            page_height: Full-resolution page height
+            
+        Returns:
+            Boxes (x, y, width, height) in the coordinates of the feature map
+        """
+        scale = features.scale
         
-        # Combine horizontal and vertical lines for table detection
-        table_lines = cv2.add(horizontal_lines, vertical_lines)
+        # Detect horizontal and vertical lines with different kernels to capture various table styles
+        line_lengths = [
+            (scale_length(h_length, scale), scale_length(v_length, scale))
+            for h_length, v_length in self._table_line_lengths(page_width, page_height)
+        ]
+        table_lines = features.get(('table_lines',), lambda: self._table_lines(features, line_lengths))
         
         # Find contours of the lines
-        contours, _ = cv2.findContours(table_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = features.mask_contours(table_lines, ('table_lines',))
         
         # Group nearby contours to identify table regions
-        min_distance = min(width, height) // 20
-        grouped_contours = []
+        min_distance = int(min(page_width, page_height) // 20 * scale)
         
         # Sort contours by position (top to bottom, left to right)
-        contours = sorted(contours, key=lambda c: (cv2.boundingRect(c)[1], cv2.boundingRect(c)[0]))
+        boxes = sorted((cv2.boundingRect(c) for c in contours), key=lambda b: (b[1], b[0]))
         
-        # Group contours that are likely part of the same table
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            
+        # Group contours that are likely part of the same table; each group keeps the
+        # union of its members' bounding boxes as [x0, y0, x1, y1]
+        groups = []
+        
+        for x, y, w, h in boxes:
             # Check if this contour should be grouped with existing groups
             grouped = False
             
-            for group in grouped_contours:
-                gx, gy, gw, gh = cv2.boundingRect(np.vstack(group))
+            for group in groups:
+                gx, gy = group[0], group[1]
+                gw, gh = group[2] - gx, group[3] - gy
                 
                 # Check if contour is near this group
                 if (abs(x - (gx + gw)) < min_distance or 
@@ -461,32 +604,49 @@ class LayoutAnalyzer:
                     (x >= gx and x + w <= gx + gw and y >= gy and y + h <= gy + gh) or
                     (gx >= x and gx + gw <= x + w and gy >= y and gy + gh <= y + h)):
                     # Add to this group
-                    group.append(contour)
+                    group[0] = min(gx, x)
+                    group[1] = min(gy, y)
+                    group[2] = max(group[2], x + w)
+                    group[3] = max(group[3], y + h)
                     grouped = True
                     break
             
             if not grouped:
                 # Create a new group
-                grouped_contours.append([contour])
+                groups.append([x, y, x + w, y + h])
+        
+        return [(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in groups]
+    
+    def _build_tables(self, image: np.ndarray, boxes: List[Tuple[int, int, int, int]],
+                      features: LayoutFeatureMap) -> List[Dict[str, Any]]:
+        """
+        Analyze table candidates at full resolution
+        
+        Args:
+            image: Preprocessed image
+            boxes: Candidate table boxes
+            features: Shared feature map of the image
+            
+        Returns:
+            List of table regions
+        """
+        height, width = image.shape[:2]
         
         # Extract table regions from grouped contours
         tables = []
         
-        for group in grouped_contours:
-            # Combine all contours in the group
-            combined_contour = np.vstack(group)
-            x, y, w, h = cv2.boundingRect(combined_contour)
-            
+        for x, y, w, h in boxes:
             # Filter out small regions and lines
             if w < width * 0.05 or h < height * 0.02:
                 continue
             
             # Check for nested tables or complex table structures
             table_region = image[y:y+h, x:x+w]
-            is_complex = self._is_complex_table(table_region)
+            region_features = features.region((x, y, w, h))
+            is_complex = self._is_complex_table(table_region, region_features)
             
             # Analyze table structure to identify rows and columns
-            table_structure = self._analyze_table_structure(table_region, is_complex)
+            table_structure = self._analyze_table_structure(table_region, is_complex, region_features)
             
             # Only include if it has enough rows and columns
             min_rows = self.config['min_table_rows']
@@ -510,24 +670,24 @@ class LayoutAnalyzer:
         
         return tables
     
-    def _is_complex_table(self, table_image: np.ndarray) -> bool:
+    def _is_complex_table(self, table_image: np.ndarray, features: LayoutFeatureMap = None) -> bool:
         """
         Determine if a table has complex structure
         
         Args:
             table_image: Image of the table region
+            features: Shared feature map of the table region
             
         Returns:
             True if the table has complex structure, False otherwise
         """
         height, width = table_image.shape[:2]
+        if features is None:
+            features = LayoutFeatureMap(table_image)
         
         # Detect horizontal and vertical lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 5, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 5))
-        
-        horizontal_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-        vertical_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+        horizontal_lines = features.line_mask('horizontal', width // 5, iterations=2)
+        vertical_lines = features.line_mask('vertical', height // 5, iterations=2)
         
         # Analyze line patterns for complex structures
         # 1. Check for irregular or broken lines
@@ -559,57 +719,46 @@ class LayoutAnalyzer:
         
         return is_complex
     
-    def _analyze_table_structure(self, table_image: np.ndarray, is_complex: bool = False) -> Dict[str, Any]:
+    def _analyze_table_structure(self, table_image: np.ndarray, is_complex: bool = False,
+                                 features: LayoutFeatureMap = None) -> Dict[str, Any]:
         """
         Analyze the structure of a table
         
         Args:
             table_image: Image of the table region
             is_complex: Flag indicating if this is a complex table
+            features: Shared feature map of the table region
             
         Returns:
             Dictionary with table structure information
         """
         height, width = table_image.shape[:2]
+        if features is None:
+            features = LayoutFeatureMap(table_image)
         
         # Use different kernel sizes for complex tables
         if is_complex:
-            # Multiple kernel sizes to capture both fine and coarse structures
-            h_kernels = [
-                cv2.getStructuringElement(cv2.MORPH_RECT, (width // 20, 1)),  # Fine
-                cv2.getStructuringElement(cv2.MORPH_RECT, (width // 10, 1)),  # Medium
-                cv2.getStructuringElement(cv2.MORPH_RECT, (width // 5, 1)),   # Coarse
-            ]
-            v_kernels = [
-                cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 20)), # Fine
-                cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 10)), # Medium
-                cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 5)),  # Coarse
-            ]
-            
-            # Apply each kernel and combine results
+            # Multiple kernel sizes (fine, medium, coarse) to capture both fine and coarse structures
             horizontal_lines = None
             vertical_lines = None
             
-            for kernel in h_kernels:
-                h_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, kernel, iterations=2)
+            for divisor in (20, 10, 5):
+                h_lines = features.line_mask('horizontal', width // divisor, iterations=2)
                 if horizontal_lines is None:
                     horizontal_lines = h_lines
                 else:
                     horizontal_lines = cv2.bitwise_or(horizontal_lines, h_lines)
             
-            for kernel in v_kernels:
-                v_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, kernel, iterations=2)
+            for divisor in (20, 10, 5):
+                v_lines = features.line_mask('vertical', height // divisor, iterations=2)
                 if vertical_lines is None:
                     vertical_lines = v_lines
                 else:
                     vertical_lines = cv2.bitwise_or(vertical_lines, v_lines)
         else:
             # Standard kernels for regular tables
-            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 5, 1))
-            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 5))
-            
-            horizontal_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-            vertical_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+            horizontal_lines = features.line_mask('horizontal', width // 5, iterations=2)
+            vertical_lines = features.line_mask('vertical', height // 5, iterations=2)
         
         # Find row boundaries from horizontal lines
         h_projection = np.sum(horizontal_lines, axis=1) // 255
@@ -655,7 +804,7 @@ class LayoutAnalyzer:
         # For complex tables, detect merged cells
         merged_cells = []
         if is_complex:
-            merged_cells = self._detect_merged_cells(table_image, rows, columns)
+            merged_cells = self._detect_merged_cells(table_image, rows, columns, features)
         
         # Check for nested tables
         has_nested_tables = False
@@ -735,7 +884,8 @@ class LayoutAnalyzer:
         self, 
         table_image: np.ndarray, 
         rows: List[Tuple[int, int]], 
-        columns: List[Tuple[int, int]]
+        columns: List[Tuple[int, int]],
+        features: LayoutFeatureMap = None
     ) -> List[Tuple[int, int, int, int]]:
         """
         Detect merged cells in complex tables
@@ -744,22 +894,22 @@ class LayoutAnalyzer:
             table_image: Image of the table region
             rows: List of row boundaries
             columns: List of column boundaries
+            features: Shared feature map of the table region
             
         Returns:
             List of merged cell definitions as (min_row, max_row, min_col, max_col)
         """
         height, width = table_image.shape[:2]
         merged_cells = []
+        if features is None:
+            features = LayoutFeatureMap(table_image)
         
         # Create a grid representation of the table
         grid = np.zeros((len(rows), len(columns)), dtype=np.uint8)
         
-        # Detect horizontal and vertical lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 5, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 5))
-        
-        horizontal_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-        vertical_lines = cv2.morphologyEx(table_image, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+        # Detect horizontal and vertical lines (shared with the structure analysis)
+        horizontal_lines = features.line_mask('horizontal', width // 5, iterations=2)
+        vertical_lines = features.line_mask('vertical', height // 5, iterations=2)
         
         # For each cell, check if there are lines dividing it
         for i in range(len(rows) - 1):
@@ -856,41 +1006,38 @@ class LayoutAnalyzer:
         
         return nested_tables, len(nested_tables) > 0
     
-    def _detect_diagrams(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def _detect_diagrams(self, image: np.ndarray, features: LayoutFeatureMap = None,
+                         coarse: LayoutFeatureMap = None) -> List[Dict[str, Any]]:
         """
         Detect diagrams and figures in a document
         
         Args:
             image: Preprocessed image
+            features: Shared feature map of the image
+            coarse: Feature map of a downscaled level to search candidates on
             
         Returns:
             List of diagram regions
         """
         height, width = image.shape[:2]
+        if features is None:
+            features = LayoutFeatureMap(image)
         
-        # Invert the image (diagrams typically have more white space)
-        inverted = cv2.bitwise_not(image)
-        
-        # Apply morphological operations to isolate diagram regions
-        kernel = np.ones((15, 15), np.uint8)
-        dilated = cv2.dilate(inverted, kernel, iterations=1)
-        eroded = cv2.erode(dilated, kernel, iterations=1)
-        
-        # Find contours of potential diagram regions
-        contours, _ = cv2.findContours(eroded, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Filter contours to find diagram regions
+        if coarse is None:
+            candidates = self._find_diagram_candidates(features)
+        else:
+            margin = refine_margin(coarse.scale, self.config['refine_margin'])
+            candidates = []
+            for box, area in self._find_diagram_candidates(coarse):
+                candidate = upscale_box(box, coarse.scale, width, height)
+                window = expand_box(candidate, margin, width, height)
+                refined = refine_box(candidate, window, lambda w: self._diagram_mask(features.region(w), 15))
+                candidates.append((refined, area / (coarse.scale ** 2)))
+        
+        # Filter candidates to find diagram regions
         diagrams = []
-        min_area = width * height * 0.01  # Minimum 1% of page area
         
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            
-            if area < min_area:
-                continue
-            
-            x, y, w, h = cv2.boundingRect(contour)
-            
+        for (x, y, w, h), area in candidates:
             # Calculate region density and complexity
             region = image[y:y+h, x:x+w]
             pixel_count = np.sum(region > 0)
@@ -913,24 +1060,72 @@ class LayoutAnalyzer:
         
         return diagrams
     
-    def _detect_form_fields(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def _diagram_mask(self, features: LayoutFeatureMap, kernel_size: int) -> np.ndarray:
+        """
+        Isolate diagram regions: the inverted image (diagrams typically have more
+        white space) closed with a square kernel
+        
+        Args:
+            features: Feature map of the image or region
+            kernel_size: Side of the square kernel
+            
+        Returns:
+            Diagram mask
+        """
+        kernel = np.ones((kernel_size, kernel_size), np.uint8)
+        dilated = cv2.dilate(features.inverted(), kernel, iterations=1)
+        return cv2.erode(dilated, kernel, iterations=1)
+    
+    def _find_diagram_candidates(self, features: LayoutFeatureMap) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """
+        Find boxes of potential diagram regions
+        
+        Args:
+            features: Feature map of the page or of a pyramid level of it
+            
+        Returns:
+            List of (box, contour area) in the coordinates of the feature map
+        """
+        kernel_size = scale_length(15, features.scale, minimum=3)
+        eroded = features.get(('diagram_mask', kernel_size), lambda: self._diagram_mask(features, kernel_size))
+        
+        # Find contours of potential diagram regions
+        contours = features.mask_contours(eroded, ('diagram_mask', kernel_size))
+        
+        candidates = []
+        min_area = features.width * features.height * 0.01  # Minimum 1% of page area
+        
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            
+            if area < min_area:
+                continue
+            
+            candidates.append((cv2.boundingRect(contour), area))
+        
+        return candidates
+    
+    def _detect_form_fields(self, image: np.ndarray, features: LayoutFeatureMap = None) -> List[Dict[str, Any]]:
         """
         Detect form fields in a document
         
         Args:
             image: Preprocessed image
+            features: Shared feature map of the image
             
         Returns:
             List of form field regions
         """
         height, width = image.shape[:2]
+        if features is None:
+            features = LayoutFeatureMap(image)
         
         # Apply morphological operations to isolate form field regions
         kernel = np.ones((3, 3), np.uint8)
-        dilated = cv2.dilate(image, kernel, iterations=1)
+        dilated = features.get(('form_field_mask',), lambda: cv2.dilate(image, kernel, iterations=1))
         
         # Find contours of potential form fields
-        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = features.mask_contours(dilated, ('form_field_mask',))
         
         # Filter contours to find form fields
         form_fields = []
@@ -949,13 +1144,17 @@ class LayoutAnalyzer:
                 
                 # Form fields typically have specific aspect ratios
                 if 1 < aspect_ratio < 10 and w > 20 and h > 10:
-                    # Check if it's empty inside (form fields are usually empty)
-                    mask = np.zeros(image.shape, dtype=np.uint8)
-                    cv2.drawContours(mask, [contour], 0, 255, -1)
+                    # Check if it's empty inside (form fields are usually empty); the mask only
+                    # covers the field's box plus a 1px margin so that the erosion matches a
+                    # full-page mask
+                    x0, y0 = max(x - 1, 0), max(y - 1, 0)
+                    x1, y1 = min(x + w + 1, width), min(y + h + 1, height)
+                    mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+                    cv2.drawContours(mask, [contour], 0, 255, -1, offset=(-x0, -y0))
                     mask = cv2.erode(mask, kernel, iterations=1)
                     
                     # Count non-zero pixels inside the contour
-                    inside_pixels = cv2.countNonZero(cv2.bitwise_and(image, mask))
+                    inside_pixels = cv2.countNonZero(cv2.bitwise_and(image[y0:y1, x0:x1], mask))
                     total_pixels = cv2.countNonZero(mask)
                     
                     if total_pixels > 0 and inside_pixels / total_pixels < 0.1:
@@ -977,7 +1176,9 @@ class LayoutAnalyzer:
     def _detect_text_blocks(
         self, 
         image: np.ndarray, 
-        existing_regions: List[Dict[str, Any]]
+        existing_regions: List[Dict[str, Any]],
+        features: LayoutFeatureMap = None,
+        coarse: LayoutFeatureMap = None
     ) -> List[Dict[str, Any]]:
         """
         Detect text blocks in a document
@@ -985,6 +1186,8 @@ class LayoutAnalyzer:
         Args:
             image: Preprocessed image
             existing_regions: List of already detected regions to exclude
+            features: Shared feature map of the image
+            coarse: Feature map of a downscaled level to search candidates on
             
         Returns:
             List of text block regions
@@ -1001,25 +1204,30 @@ class LayoutAnalyzer:
         # Remove existing regions from the image
         masked_image = cv2.bitwise_and(image, image, mask=cv2.bitwise_not(mask))
         
-        # Clean up the image to merge text lines into blocks
-        kernel = np.ones((5, 20), np.uint8)
-        cleaned = cv2.morphologyEx(masked_image, cv2.MORPH_CLOSE, kernel)
-        
-        # Find contours of potential text blocks
-        contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Filter contours to find text blocks
+        if coarse is None:
+            candidates = self._find_text_block_candidates(masked_image, 1.0)
+        else:
+            # Remove existing regions from the coarse level too
+            coarse_masked = coarse.binary.copy()
+            for region in existing_regions:
+                x, y, w, h = downscale_box(region['bbox'], coarse.scale)
+                cv2.rectangle(coarse_masked, (x, y), (x + w, y + h), 0, -1)
+            
+            margin = refine_margin(coarse.scale, self.config['refine_margin'])
+            candidates = []
+            for box, area in self._find_text_block_candidates(coarse_masked, coarse.scale):
+                candidate = upscale_box(box, coarse.scale, width, height)
+                window = expand_box(candidate, margin, width, height)
+                refined = refine_box(
+                    candidate, window,
+                    lambda w: self._merge_text_lines(masked_image[w[1]:w[1]+w[3], w[0]:w[0]+w[2]], 1.0)
+                )
+                candidates.append((refined, area / (coarse.scale ** 2)))
+        
+        # Filter candidates to find text blocks
         text_blocks = []
-        min_area = 100  # Minimum area for a text block
         
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            
-            if area < min_area:
-                continue
-            
-            x, y, w, h = cv2.boundingRect(contour)
-            
+        for (x, y, w, h), area in candidates:
             # Calculate region density
             region = masked_image[y:y+h, x:x+w]
             pixel_count = np.sum(region > 0)
@@ -1038,6 +1246,42 @@ class LayoutAnalyzer:
         
         return text_blocks
     
+    def _merge_text_lines(self, image: np.ndarray, scale: float) -> np.ndarray:
+        """Close the image to merge text lines into blocks"""
+        kernel = np.ones((scale_length(5, scale), scale_length(20, scale)), np.uint8)
+        return cv2.morphologyEx(image, cv2.MORPH_CLOSE, kernel)
+    
+    def _find_text_block_candidates(self, masked_image: np.ndarray,
+                                    scale: float) -> List[Tuple[Tuple[int, int, int, int], float]]:
+        """
+        Find boxes of potential text blocks
+        
+        Args:
+            masked_image: Image with already detected regions removed
+            scale: Scale of the image relative to the page
+            
+        Returns:
+            List of (box, contour area) in the coordinates of the image
+        """
+        # Clean up the image to merge text lines into blocks
+        cleaned = self._merge_text_lines(masked_image, scale)
+        
+        # Find contours of potential text blocks
+        contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        candidates = []
+        min_area = 100 * scale * scale  # Minimum area for a text block
+        
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            
+            if area < min_area:
+                continue
+            
+            candidates.append((cv2.boundingRect(contour), area))
+        
+        return candidates
+    
     def _classify_text_block(
         self, 
         image: np.ndarray, 
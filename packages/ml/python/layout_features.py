@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Shared Layout Feature Stage
+
+This module computes the image features that the layout detectors have in
+common - binarizations, morphological line masks, contours with their
+hierarchy and connected components - once per page, and hands them out
+through a cached feature map. Detectors ask the map for what they need
+instead of re-running thresholding, openings and contour searches on the
+same image.
+
+Key features:
+1. Lazily computed, cached features keyed by their parameters
+2. Horizontal/vertical line masks for any kernel length and iteration count
+3. One contour hierarchy from which list and external contours are derived
+4. Connected components with statistics and centroids
+5. Per-stage timing of feature extraction and of the detectors themselves
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Tuple, List
+
+import numpy as np
+import cv2
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class LayoutFeatureMap:
+    """
+    Cached features of one binary (white-on-black) page or region image.
+
+    Every feature is computed on first request and reused afterwards. The
+    time spent in each feature, and in any stage wrapped with timed(), is
+    accumulated in 'timings' (seconds).
+    """
+
+    def __init__(self, binary: np.ndarray, gray: np.ndarray = None, scale: float = 1.0):
+        """
+        Initialize the feature map
+
+        Args:
+            binary: Binary image with foreground pixels set to 255
+            gray: Grayscale source image, if the detectors need it
+            scale: Scale of the image relative to the page (below 1 for
+                downscaled pyramid levels)
+        """
+        self.binary = binary
+        self.gray = gray
+        self.scale = scale
+        self.height, self.width = binary.shape[:2]
+        self.timings: Dict[str, float] = {}
+        self._features: Dict[Tuple, Any] = {}
+
+    @classmethod
+    def from_image(cls, image: np.ndarray, color_order: str = 'BGR') -> 'LayoutFeatureMap':
+        """
+        Build a feature map from a color image with an Otsu binarization
+
+        Args:
+            image: Color (or grayscale) image
+            color_order: 'BGR' or 'RGB' channel order of the image
+
+        Returns:
+            LayoutFeatureMap with 'gray' set
+        """
+        start = time.perf_counter()
+        if image.ndim == 3:
+            code = cv2.COLOR_RGB2GRAY if color_order == 'RGB' else cv2.COLOR_BGR2GRAY
+            gray = cv2.cvtColor(image, code)
+        else:
+            gray = image
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        features = cls(binary, gray)
+        features.timings['binarize'] = time.perf_counter() - start
+        return features
+
+    @contextmanager
+    def timed(self, stage: str):
+        """
+        Accumulate the time spent in a block under a stage name
+
+        Args:
+            stage: Stage name (e.g. 'tables')
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def get(self, key: Tuple, compute: Callable[[], Any], stage: str = None) -> Any:
+        """
+        Get a cached feature, computing it on first use
+
+        Args:
+            key: Cache key, including every parameter of the feature
+            compute: Function producing the feature
+            stage: Timing stage name (defaults to the first key element)
+
+        Returns:
+            The feature
+        """
+        if key not in self._features:
+            with self.timed(stage or str(key[0])):
+                self._features[key] = compute()
+        return self._features[key]
+
+    def line_mask(self, orientation: str, length: int, iterations: int = 1) -> np.ndarray:
+        """
+        Get the mask of horizontal or vertical strokes at least 'length' long
+
+        Args:
+            orientation: 'horizontal' or 'vertical'
+            length: Structuring element length in pixels
+            iterations: Number of opening iterations
+
+        Returns:
+            Binary line mask
+        """
+        length = max(1, int(length))
+
+        def compute():
+            size = (length, 1) if orientation == 'horizontal' else (1, length)
+            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, size)
+            return cv2.morphologyEx(self.binary, cv2.MORPH_OPEN, kernel, iterations=iterations)
+
+        return self.get(('line_mask', orientation, length, iterations), compute)
+
+    def inverted(self) -> np.ndarray:
+        """Get the inverted binary image"""
+        return self.get(('inverted',), lambda: cv2.bitwise_not(self.binary))
+
+    def contour_hierarchy(self) -> Tuple[List[np.ndarray], np.ndarray]:
+        """
+        Get all contours of the binary image with their hierarchy
+
+        Returns:
+            Tuple of (contours, hierarchy) as returned by cv2.findContours
+            with RETR_TREE; hierarchy is None when there are no contours
+        """
+        return self.get(
+            ('contour_hierarchy',),
+            lambda: cv2.findContours(self.binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)[:2],
+            stage='contours'
+        )
+
+    def contours(self) -> List[np.ndarray]:
+        """Get every contour (outer borders and holes) of the binary image"""
+        return list(self.contour_hierarchy()[0])
+
+    def external_contours(self) -> List[np.ndarray]:
+        """
+        Get the outer contours of the binary image
+
+        Derived from the contour hierarchy when it has been computed already,
+        otherwise found directly.
+        """
+        def compute():
+            if ('contour_hierarchy',) in self._features:
+                contours, hierarchy = self._features[('contour_hierarchy',)]
+                if hierarchy is None:
+                    return []
+                return [c for c, h in zip(contours, hierarchy[0]) if h[3] < 0]
+            return list(cv2.findContours(self.binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+
+        return self.get(('external_contours',), compute, stage='contours')
+
+    def mask_contours(self, mask: np.ndarray, key: Tuple) -> List[np.ndarray]:
+        """
+        Get the external contours of a derived mask
+
+        Args:
+            mask: Binary mask (e.g. a line mask)
+            key: Cache key identifying the mask
+
+        Returns:
+            External contours of the mask
+        """
+        return self.get(
+            ('mask_contours',) + tuple(key),
+            lambda: list(cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]),
+            stage='contours'
+        )
+
+    def connected_components(self, connectivity: int = 8) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the connected components of the binary image
+
+        Args:
+            connectivity: 4 or 8
+
+        Returns:
+            Tuple of (label count, labels, stats, centroids) as returned by
+            cv2.connectedComponentsWithStats
+        """
+        return self.get(
+            ('connected_components', connectivity),
+            lambda: cv2.connectedComponentsWithStats(self.binary, connectivity=connectivity),
+            stage='connected_components'
+        )
+
+    def region(self, bbox: Tuple[int, int, int, int]) -> 'LayoutFeatureMap':
+        """
+        Get the feature map of a region (x, y, width, height)
+
+        Region maps are cached, so the detectors analyzing the same table or
+        block share their features too. Their timings are merged into this
+        map under 'region_features'.
+
+        Args:
+            bbox: Region bounding box
+
+        Returns:
+            LayoutFeatureMap of the cropped region
+        """
+        x, y, w, h = (int(v) for v in bbox)
+
+        def compute():
+            gray = self.gray[y:y+h, x:x+w] if self.gray is not None else None
+            return LayoutFeatureMap(self.binary[y:y+h, x:x+w], gray)
+
+        return self.get(('region', x, y, w, h), compute, stage='region_features')
+
+    def get_timings(self) -> Dict[str, float]:
+        """
+        Get the accumulated stage timings in milliseconds
+
+        Returns:
+            Dictionary mapping stage names to milliseconds, including the
+            feature time spent inside region maps
+        """
+        timings = dict(self.timings)
+        for key, value in self._features.items():
+            if key[0] == 'region':
+                for stage, seconds in value.timings.items():
+                    name = f'region_{stage}'
+                    timings[name] = timings.get(name, 0.0) + seconds
+        return {stage: round(seconds * 1000.0, 2) for stage, seconds in timings.items()}
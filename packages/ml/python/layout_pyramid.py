@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-Fine Layout Pyramid
+
+This module supports the coarse-to-fine layout analysis mode: region
+candidates (tables, diagrams, text blocks) are searched on a downscaled
+level of the page, and only the boxes of those candidates are revisited at
+full resolution to refine their boundaries and compute their features.
+It also contains the accuracy/latency benchmark that compares the mode with
+the full-resolution path.
+
+Key features:
+1. Ink-preserving downscaling of binary page images
+2. Mapping of boxes between pyramid levels
+3. Boundary refinement inside candidate windows at full resolution
+4. Benchmark on synthetic datasheet pages or a directory of page images
+
+Usage:
+    python layout_pyramid.py --benchmark [--pages N] [--images DIR] [--scale 0.5]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import logging
+from typing import Dict, List, Any, Tuple, Callable, Optional
+
+import numpy as np
+import cv2
+
+from layout_features import LayoutFeatureMap
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]  # x, y, width, height
+
+
+def downscale_binary(binary: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Downscale a binary image without losing thin strokes
+
+    Area interpolation averages each block of pixels; any ink in a block
+    keeps the coarse pixel set, so one-pixel table rules survive.
+
+    Args:
+        binary: Binary image with foreground pixels set to 255
+        scale: Scale factor (0 < scale <= 1)
+
+    Returns:
+        Downscaled binary image
+    """
+    height, width = binary.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    coarse = cv2.resize(binary, size, interpolation=cv2.INTER_AREA)
+    return np.where(coarse > 0, 255, 0).astype(np.uint8)
+
+
+def build_coarse_level(features: LayoutFeatureMap, scale: float,
+                       min_dimension: int = 400) -> Optional[LayoutFeatureMap]:
+    """
+    Build the coarse pyramid level of a page
+
+    Args:
+        features: Full-resolution feature map of the page
+        scale: Scale factor of the coarse level
+        min_dimension: Smallest allowed shorter side of the coarse level
+
+    Returns:
+        Feature map of the coarse level, or None if the page is too small
+        to be downscaled by this factor
+    """
+    if not 0 < scale < 1 or min(features.width, features.height) * scale < min_dimension:
+        return None
+
+    with features.timed('pyramid'):
+        gray = None
+        if features.gray is not None:
+            size = (max(1, int(round(features.width * scale))), max(1, int(round(features.height * scale))))
+            gray = cv2.resize(features.gray, size, interpolation=cv2.INTER_AREA)
+        return LayoutFeatureMap(downscale_binary(features.binary, scale), gray, scale=scale)
+
+
+def refine_margin(scale: float, margin: Optional[int] = None) -> int:
+    """
+    Full-resolution margin searched around a candidate box
+
+    Args:
+        scale: Scale factor of the coarse level
+        margin: Explicit margin in pixels (None for two coarse pixels)
+
+    Returns:
+        Margin in pixels
+    """
+    if margin is not None:
+        return int(margin)
+    return int(math.ceil(2.0 / scale))
+
+
+def scale_length(length: float, scale: float, minimum: int = 1) -> int:
+    """Scale a pixel length to a pyramid level"""
+    return max(minimum, int(round(length * scale)))
+
+
+def upscale_box(bbox: Box, scale: float, width: int, height: int) -> Box:
+    """
+    Map a box from a pyramid level back to full resolution
+
+    The box is rounded outwards so it covers every full-resolution pixel
+    that contributed to it, and clipped to the image.
+
+    Args:
+        bbox: Box on the pyramid level
+        scale: Scale factor of the level
+        width: Full-resolution image width
+        height: Full-resolution image height
+
+    Returns:
+        Full-resolution box
+    """
+    x, y, w, h = bbox
+    x0 = max(0, int(math.floor(x / scale)))
+    y0 = max(0, int(math.floor(y / scale)))
+    x1 = min(width, int(math.ceil((x + w) / scale)))
+    y1 = min(height, int(math.ceil((y + h) / scale)))
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def downscale_box(bbox: Box, scale: float) -> Box:
+    """Map a full-resolution box to a pyramid level"""
+    x, y, w, h = bbox
+    x0, y0 = int(math.floor(x * scale)), int(math.floor(y * scale))
+    x1, y1 = int(math.ceil((x + w) * scale)), int(math.ceil((y + h) * scale))
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def expand_box(bbox: Box, margin: int, width: int, height: int) -> Box:
+    """Grow a box by a margin on every side, clipped to the image"""
+    x, y, w, h = bbox
+    x0, y0 = max(0, x - margin), max(0, y - margin)
+    x1, y1 = min(width, x + w + margin), min(height, y + h + margin)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def refine_box(bbox: Box, window: Box, mask_fn: Callable[[Box], np.ndarray]) -> Box:
+    """
+    Refine a candidate box at full resolution
+
+    The detector's mask is computed inside the window only. The refined box
+    is the union of the mask components that touch the candidate box, so
+    boundaries snap to where the mask actually ends at full resolution.
+
+    Args:
+        bbox: Candidate box mapped to full resolution
+        window: Candidate box plus refinement margin
+        mask_fn: Function computing the detector's binary mask for a window
+
+    Returns:
+        Refined box (the candidate box if the window has no mask pixels)
+    """
+    wx, wy, ww, wh = window
+    if ww <= 0 or wh <= 0:
+        return bbox
+
+    mask = mask_fn(window)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if count <= 1:
+        return bbox
+
+    # Candidate box in window coordinates
+    cx0, cy0 = bbox[0] - wx, bbox[1] - wy
+    cx1, cy1 = cx0 + bbox[2], cy0 + bbox[3]
+
+    x0 = y0 = None
+    x1 = y1 = None
+    for label in range(1, count):
+        sx, sy, sw, sh = (int(v) for v in stats[label, :4])
+        if sx >= cx1 or sx + sw <= cx0 or sy >= cy1 or sy + sh <= cy0:
+            continue
+        x0 = sx if x0 is None else min(x0, sx)
+        y0 = sy if y0 is None else min(y0, sy)
+        x1 = sx + sw if x1 is None else max(x1, sx + sw)
+        y1 = sy + sh if y1 is None else max(y1, sy + sh)
+
+    if x0 is None:
+        return bbox
+    return (wx + x0, wy + y0, x1 - x0, y1 - y0)
+
+
+def _iou(a: Box, b: Box) -> float:
+    """Intersection over union of two (x, y, width, height) boxes"""
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    intersection = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def match_regions(reference: List[Box], candidates: List[Box], threshold: float = 0.5) -> Dict[str, Any]:
+    """
+    Greedily match candidate boxes to reference boxes by IoU
+
+    Args:
+        reference: Boxes of the reference (full-resolution) path
+        candidates: Boxes of the evaluated path
+        threshold: Minimum IoU for a match
+
+    Returns:
+        Dictionary with precision, recall, f1 and the mean IoU of matches
+    """
+    pairs = sorted(
+        ((_iou(r, c), i, j) for i, r in enumerate(reference) for j, c in enumerate(candidates)),
+        reverse=True
+    )
+    used_ref, used_cand, ious = set(), set(), []
+    for iou, i, j in pairs:
+        if iou < threshold:
+            break
+        if i in used_ref or j in used_cand:
+            continue
+        used_ref.add(i)
+        used_cand.add(j)
+        ious.append(iou)
+
+    precision = len(ious) / len(candidates) if candidates else (1.0 if not reference else 0.0)
+    recall = len(ious) / len(reference) if reference else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'reference': len(reference),
+        'candidates': len(candidates),
+        'matched': len(ious),
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'mean_iou': float(np.mean(ious)) if ious else 0.0
+    }
+
+
+def generate_fixture_page(seed: int, width: int = 1190, height: int = 1684) -> np.ndarray:
+    """
+    Render a synthetic datasheet page (2x zoom A4) with text, tables and diagrams
+
+    Args:
+        seed: Random seed
+        width: Page width in pixels
+        height: Page height in pixels
+
+    Returns:
+        BGR page image
+    """
+    rng = random.Random(seed)
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    margin = 80
+    y = margin
+
+    # Title
+    cv2.putText(page, f"PRODUCT DATASHEET {seed}", (margin, y + 40),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3)
+    y += 90
+
+    while y < height - 250:
+        kind = rng.choice(['text', 'text', 'table', 'diagram'])
+        if kind == 'text':
+            for _ in range(rng.randint(3, 7)):
+                x = margin
+                while x < width - margin - 80:
+                    word = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9)))
+                    cv2.putText(page, word, (x, y + 24), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+                    x += 18 * len(word) + 14
+                y += 34
+            y += 30
+        elif kind == 'table':
+            rows, cols = rng.randint(3, 8), rng.randint(2, 5)
+            row_h, table_w = 36, rng.randint(width // 2, width - 2 * margin)
+            col_w = table_w // cols
+            for r in range(rows + 1):
+                cv2.line(page, (margin, y + r * row_h), (margin + cols * col_w, y + r * row_h), (0, 0, 0), 2)
+            for c in range(cols + 1):
+                cv2.line(page, (margin + c * col_w, y), (margin + c * col_w, y + rows * row_h), (0, 0, 0), 2)
+            for r in range(rows):
+                for c in range(cols):
+                    cv2.putText(page, f"{rng.randint(1, 999)} mm", (margin + c * col_w + 8, y + r * row_h + 25),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+            y += rows * row_h + 50
+        else:
+            size = rng.randint(180, 300)
+            x = rng.randint(margin, width - margin - size)
+            cv2.rectangle(page, (x, y), (x + size, y + size), (0, 0, 0), 2)
+            cv2.circle(page, (x + size // 2, y + size // 2), size // 3, (0, 0, 0), 2)
+            cv2.line(page, (x, y + size), (x + size, y), (0, 0, 0), 1)
+            y += size + 50
+
+    return page
+
+
+def _best_time(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """Run a function several times and return the best time and last result"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(images: List[np.ndarray], scale: float = 0.5, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Compare coarse-to-fine layout analysis with the full-resolution path
+
+    Args:
+        images: BGR page images
+        scale: Pyramid scale of the coarse level
+        repeat: Timing repetitions per page (best is reported)
+
+    Returns:
+        Dictionary with per-analyzer latency, speedup and region agreement
+    """
+    from layout_analysis import LayoutAnalyzer
+    from enhanced_layout_analyzer import EnhancedLayoutAnalyzer
+
+    base_config = {'export_images': False}
+    full = LayoutAnalyzer(base_config)
+    coarse = LayoutAnalyzer({**base_config, 'coarse_to_fine': True, 'pyramid_scale': scale})
+
+    enhanced_config = {'layout_mode': 'basic', 'material_specific_templates': False,
+                       'reading_order_analysis': False}
+    enhanced_full = EnhancedLayoutAnalyzer(enhanced_config)
+    enhanced_coarse = EnhancedLayoutAnalyzer({**enhanced_config, 'coarse_to_fine': True, 'pyramid_scale': scale})
+
+    timings = {'layout_full': 0.0, 'layout_coarse': 0.0, 'enhanced_full': 0.0, 'enhanced_coarse': 0.0}
+    agreement = {'tables': [], 'diagrams': [], 'text_blocks': [], 'enhanced_elements': []}
+
+    def boxes(structure, region_types):
+        return [tuple(r['bbox']) for t in region_types for r in structure['regions'].get(t, [])]
+
+    table_types = ['table', 'complex_table', 'nested_table']
+    text_types = ['text', 'heading', 'footer', 'header', 'page_number', 'caption',
+                  'bullet_list', 'specification']
+
+    for image in images:
+        elapsed, reference = _best_time(lambda: full.analyze_image(image), repeat)
+        timings['layout_full'] += elapsed
+        elapsed, result = _best_time(lambda: coarse.analyze_image(image), repeat)
+        timings['layout_coarse'] += elapsed
+
+        agreement['tables'].append(match_regions(boxes(reference, table_types), boxes(result, table_types)))
+        agreement['diagrams'].append(match_regions(boxes(reference, ['diagram']), boxes(result, ['diagram'])))
+        agreement['text_blocks'].append(match_regions(boxes(reference, text_types), boxes(result, text_types)))
+
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        elapsed, reference = _best_time(lambda: enhanced_full._analyze_image_array(rgb), repeat)
+        timings['enhanced_full'] += elapsed
+        elapsed, result = _best_time(lambda: enhanced_coarse._analyze_image_array(rgb), repeat)
+        timings['enhanced_coarse'] += elapsed
+
+        def xyxy_to_xywh(elements):
+            return [(e['bbox'][0], e['bbox'][1], e['bbox'][2] - e['bbox'][0], e['bbox'][3] - e['bbox'][1])
+                    for e in elements]
+
+        agreement['enhanced_elements'].append(
+            match_regions(xyxy_to_xywh(reference['elements']), xyxy_to_xywh(result['elements']))
+        )
+
+    def summarize(matches):
+        return {
+            key: float(np.mean([m[key] for m in matches])) if matches else 0.0
+            for key in ('precision', 'recall', 'f1', 'mean_iou')
+        }
+
+    pages = len(images)
+    return {
+        'pages': pages,
+        'scale': scale,
+        'latency_ms_per_page': {k: v * 1000.0 / pages for k, v in timings.items()} if pages else {},
+        'speedup': {
+            'layout': timings['layout_full'] / timings['layout_coarse'] if timings['layout_coarse'] else None,
+            'enhanced': timings['enhanced_full'] / timings['enhanced_coarse'] if timings['enhanced_coarse'] else None
+        },
+        'agreement_with_full_resolution': {k: summarize(v) for k, v in agreement.items()}
+    }
+
+
+def main():
+    """Main function to run the coarse-to-fine layout benchmark"""
+    parser = argparse.ArgumentParser(description="Coarse-to-fine layout analysis benchmark")
+    parser.add_argument("--benchmark", action="store_true", help="Run the benchmark")
+    parser.add_argument("--pages", type=int, default=10, help="Number of synthetic fixture pages")
+    parser.add_argument("--images", help="Directory of page images to use instead of synthetic pages")
+    parser.add_argument("--scale", type=float, default=0.5, help="Scale of the coarse pyramid level")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per page")
+
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    if args.images:
+        images = []
+        for name in sorted(os.listdir(args.images)):
+            if name.lower().endswith(('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')):
+                image = cv2.imread(os.path.join(args.images, name))
+                if image is not None:
+                    images.append(image)
+    else:
+        images = [generate_fixture_page(seed) for seed in range(args.pages)]
+
+    print(json.dumps(run_benchmark(images, args.scale, args.repeat), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
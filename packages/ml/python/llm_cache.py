@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+LLM Completion Cache
+
+This module caches chat completions of the RAG components. Completions are
+keyed by a hash of (model, system prompt, user prompt, temperature,
+max_tokens), so repeated prompts such as the decomposition of popular
+queries are answered from memory instead of another LLM round trip.
+
+Key features:
+1. Prompt-hash keyed completion cache with LRU size and TTL bounds
+2. Single-flight deduplication of concurrent identical prompts
+3. Hit-rate and latency metrics
+4. Deterministic local fake LLM client for offline runs and benchmarks
+
+Usage:
+    python llm_cache.py --benchmark [--queries 200] [--distinct 10] [--latency-ms 50]
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("llm_cache")
+
+
+def completion_cache_key(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int
+) -> str:
+    """
+    Build the cache key of a chat completion request.
+
+    Args:
+        model: Model name
+        system_prompt: System message content
+        user_prompt: User message content
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(
+        [model, system_prompt, user_prompt, round(float(temperature), 4), int(max_tokens)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCompletionCache:
+    """
+    Bounded completion cache with single-flight request deduplication.
+
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    evicted beyond `max_entries`. Concurrent requests for the same key in one
+    event loop share a single LLM call; failed calls are not cached. The
+    cache can be shared by components running in different threads.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            config: Configuration parameters
+        """
+        self.config = {
+            "max_entries": 1024,
+            "ttl_seconds": 3600.0,
+            "max_temperature": 0.3    # Completions sampled above this are not cached
+        }
+        if config:
+            self.config.update(config)
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "errors": 0,
+            "bypassed": 0,
+            "llm_time": 0.0
+        }
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered without a new LLM call"""
+        served = self.stats["hits"] + self.stats["coalesced"]
+        total = served + self.stats["misses"]
+        return served / total if total else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Counters, hit rate and current size
+        """
+        with self._lock:
+            size = len(self._entries)
+        return {**self.stats, "hit_rate": self.hit_rate, "size": size}
+
+    def cacheable(self, temperature: float) -> bool:
+        """Check whether completions at this temperature are cached"""
+        return temperature <= self.config["max_temperature"]
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a cached completion.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (found, value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key: str, value: Any):
+        """
+        Store a completion.
+
+        Args:
+            key: Cache key
+            value: Completion to cache
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.config["ttl_seconds"], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config["max_entries"]:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop all cached completions"""
+        with self._lock:
+            self._entries.clear()
+
+    async def get_or_create(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached completion or compute it once.
+
+        Args:
+            key: Cache key
+            factory: Coroutine function performing the LLM call on a miss
+
+        Returns:
+            The completion
+        """
+        found, value = self.get(key)
+        if found:
+            self.stats["hits"] += 1
+            return value
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is not None and shared.get_loop() is not loop:
+                shared = None  # In flight on another event loop
+            if shared is None:
+                shared = loop.create_task(self._create(key, factory))
+                self._inflight[key] = shared
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        # Shielded so a cancelled caller does not cancel the call others wait for
+        return await asyncio.shield(shared)
+
+    async def _create(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Perform the LLM call and cache its result"""
+        start = time.perf_counter()
+        try:
+            value = await factory()
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        else:
+            self.put(key, value)
+            return value
+        finally:
+            self.stats["llm_time"] += time.perf_counter() - start
+            with self._lock:
+                if self._inflight.get(key) is asyncio.current_task():
+                    del self._inflight[key]
+
+    async def complete(
+        self,
+        llm_client,
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        limiter: Optional[asyncio.Semaphore] = None
+    ) -> str:
+        """
+        Get a chat completion text through the cache.
+
+        Args:
+            llm_client: OpenAI-style client (chat.completions.create)
+            model: Model name
+            system_prompt: System message content
+            user_prompt: User message content
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            limiter: Optional semaphore held during the LLM call
+
+        Returns:
+            Completion text
+        """
+        async def call_llm() -> str:
+            if limiter is not None:
+                async with limiter:
+                    return await self._call(llm_client, model, system_prompt, user_prompt, temperature, max_tokens)
+            return await self._call(llm_client, model, system_prompt, user_prompt, temperature, max_tokens)
+
+        if not self.cacheable(temperature):
+            self.stats["bypassed"] += 1
+            return await call_llm()
+
+        key = completion_cache_key(model, system_prompt, user_prompt, temperature, max_tokens)
+        return await self.get_or_create(key, call_llm)
+
+    @staticmethod
+    async def _call(llm_client, model: str, system_prompt: str, user_prompt: str,
+                    temperature: float, max_tokens: int) -> str:
+        """Perform one chat completion"""
+        response = await llm_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+
+_shared_caches: Dict[str, LLMCompletionCache] = {}
+_shared_cache_lock = threading.Lock()
+
+
+def get_completion_cache(config: Optional[Dict[str, Any]] = None) -> LLMCompletionCache:
+    """
+    Get the process-wide completion cache for a configuration.
+
+    Components passing the same configuration share one cache.
+
+    Args:
+        config: Cache configuration
+
+    Returns:
+        The shared LLMCompletionCache
+    """
+    key = json.dumps(config or {}, sort_keys=True, default=str)
+    with _shared_cache_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = _shared_caches[key] = LLMCompletionCache(config)
+        return cache
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.message = _Message(content)
+        self.delta = _Message(content)
+
+
+class _Completion:
+    def __init__(self, content: str, model: str):
+        self.model = model
+        self.choices = [_Choice(content)]
+
+
+class FakeLLMClient:
+    """
+    Deterministic stand-in for an OpenAI-style async client.
+
+    The same messages always produce the same completion. Decomposition
+    prompts (asking for a JSON array) get sub-queries split on the query's
+    conjunctions; other prompts get a short text naming the materials of the
+    prompt with a citation. Each call waits `latency` seconds.
+    """
+
+    def __init__(self, latency: float = 0.0, responder: Optional[Callable[[List[Dict[str, str]]], str]] = None):
+        """
+        Initialize the fake client.
+
+        Args:
+            latency: Seconds per completion
+            responder: Optional function mapping messages to completion text
+        """
+        self.latency = latency
+        self.responder = responder or self.default_response
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    @staticmethod
+    def default_response(messages: List[Dict[str, str]]) -> str:
+        """Build a deterministic completion for the messages"""
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+
+        if "JSON array" in system or "JSON array" in user:
+            quoted = re.search(r'"(.+?)"', user, re.DOTALL)
+            query = quoted.group(1) if quoted else user.strip()
+            parts = [p.strip(" ?.") for p in re.split(r"\b(?:and|or|versus|vs|compared to|as well as)\b", query)]
+            parts = [p for p in parts if p] or [query]
+            return json.dumps([
+                {"query": part, "weight": round(1.0 / len(parts), 4), "aspect": part.split()[0].lower()}
+                for part in parts
+            ])
+
+        names = re.findall(r"Material \d+: ([^(\n]+)", user)
+        digest = hashlib.sha256((system + user).encode("utf-8")).hexdigest()[:8]
+        lines = [f"{name.strip()}:\nSuitable for the request [Source: fake-{digest}]" for name in names]
+        return "\n\n".join(lines) or f"No materials in context [Source: fake-{digest}]"
+
+    async def create(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.0,
+                     max_tokens: int = 0, stream: bool = False, **kwargs):
+        """Return a completion (or an async chunk stream) for the messages"""
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        content = self.responder(messages)
+
+        if not stream:
+            return _Completion(content, model)
+
+        async def chunks():
+            for word in re.findall(r"\S+\s*", content):
+                yield _Completion(word, model)
+        return chunks()
+
+
+def run_benchmark(queries: int = 200, distinct: int = 10, latency_ms: float = 50.0,
+                  concurrency: int = 20, seed: int = 0) -> Dict[str, Any]:
+    """
+    Benchmark query decomposition with and without the completion cache.
+
+    Queries are drawn from a skewed popularity distribution over `distinct`
+    complex queries and decomposed in waves of `concurrency` concurrent
+    requests against the fake LLM client.
+
+    Args:
+        queries: Number of decompositions
+        distinct: Number of distinct queries
+        latency_ms: Fake LLM latency per call
+        concurrency: Decompositions running at the same time
+        seed: Random seed for the query stream
+
+    Returns:
+        Dictionary with timings, LLM call counts and cache metrics
+    """
+    from hierarchical_retriever import HierarchicalRetriever
+
+    rng = random.Random(seed)
+    pool = [f"durable tile {i} and low maintenance stone for kitchens" for i in range(distinct)]
+    weights = [1.0 / (rank + 1) for rank in range(distinct)]
+    stream = rng.choices(pool, weights=weights, k=queries)
+
+    async def run(cache_enabled: bool) -> Dict[str, Any]:
+        client = FakeLLMClient(latency=latency_ms / 1000.0)
+        retriever = HierarchicalRetriever(
+            {"llm_cache_enabled": cache_enabled},
+            llm_client=client,
+            completion_cache=LLMCompletionCache() if cache_enabled else None
+        )
+        start = time.perf_counter()
+        for i in range(0, len(stream), concurrency):
+            await asyncio.gather(*[retriever._decompose_query(q) for q in stream[i:i + concurrency]])
+        result = {"seconds": time.perf_counter() - start, "llm_calls": client.calls}
+        if retriever.completion_cache is not None:
+            result["cache"] = retriever.completion_cache.get_stats()
+        return result
+
+    return {
+        "queries": queries,
+        "distinct": distinct,
+        "latency_ms": latency_ms,
+        "uncached": asyncio.run(run(False)),
+        "cached": asyncio.run(run(True))
+    }
+
+
+def main():
+    """Main function to run the completion cache benchmark"""
+    parser = argparse.ArgumentParser(description="LLM completion cache")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark cached query decomposition")
+    parser.add_argument("--queries", type=int, default=200, help="Number of decompositions")
+    parser.add_argument("--distinct", type=int, default=10, help="Number of distinct queries")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake LLM latency per call")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent decompositions")
+
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    print(json.dumps(run_benchmark(args.queries, args.distinct, args.latency_ms, args.concurrency), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,15 +11,23 @@ The Material RAG Service serves as the main entry point for the RAG system.
 """
 
 import asyncio
+import copy
+import inspect
 import json
 import logging
+import re
 import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional, Union, AsyncGenerator
 
 # Import components
-from enhanced_text_embeddings import TextEmbeddingGenerator
+try:
+    from enhanced_text_embeddings import TextEmbeddingGenerator
+except ImportError:
+    # No default embedding generator in this build; one must be passed in
+    TextEmbeddingGenerator = None
 from hybrid_retriever import HybridRetriever
 from context_assembler import ContextAssembler
 from generative_enhancer import GenerativeEnhancer
@@ -35,6 +43,141 @@ StreamCallback = Callable[[str], None]
 MaterialData = Dict[str, Any]
 
 
+# Citation markers written by the LLM, e.g. [Source: Technical Datasheet]
+CITATION_PATTERN = re.compile(r"\[(?:Source|Ref|Citation):\s*([^\]]+)\]")
+
+
+class _CitationTracker:
+    """
+    Finds citations in streamed text as soon as they are complete.
+    
+    A marker can be split across chunks, so the text after the last
+    complete marker is kept and scanned again with the next chunk.
+    Citation ids are numbered per source in order of first appearance, so
+    a source keeps the id it was streamed with when the final response
+    cites it again.
+    """
+    
+    def __init__(self):
+        self._pending = ""
+        self._citations: Dict[str, Dict[str, Any]] = {}  # By source
+        
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Add a chunk of streamed text.
+        
+        Args:
+            chunk: Text received from the LLM
+            
+        Returns:
+            Citations completed by this chunk that were not seen before
+        """
+        self._pending += chunk
+        found = []
+        end = 0
+        for match in CITATION_PATTERN.finditer(self._pending):
+            end = match.end()
+            citation = self.add({"source": match.group(1).strip()})
+            if citation:
+                found.append(citation)
+        # Keep only a possibly unfinished marker, markers are short
+        tail = self._pending[end:]
+        bracket = tail.rfind("[")
+        self._pending = tail[bracket:] if 0 <= bracket and len(tail) - bracket <= 256 else ""
+        return found
+    
+    def add(self, citation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Record a citation under the id of its source.
+        
+        Fields of a source seen before (e.g. the material it was cited for)
+        are added to its recorded citation.
+        
+        Args:
+            citation: Citation with a "source" field
+            
+        Returns:
+            A copy of the citation with its id if its source was not seen
+            before, otherwise None
+        """
+        source = citation.get("source")
+        fields = {key: value for key, value in citation.items() if key != "id"}
+        if source in self._citations:
+            self._citations[source].update(fields)
+            return None
+        self._citations[source] = {"id": f"cit-{len(self._citations) + 1}", **fields}
+        return dict(self._citations[source])
+    
+    @property
+    def citations(self) -> List[Dict[str, Any]]:
+        """All recorded citations in id order"""
+        return [dict(citation) for citation in self._citations.values()]
+
+
+class _StageMeter:
+    """
+    Throughput metrics of one batch pipeline stage.
+    
+    Busy time counts the wall time during which at least one item was in
+    the stage, so throughput reflects the stage's concurrency.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.calls = 0
+        self.errors = 0
+        self.item_time = 0.0
+        self.busy_time = 0.0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._busy_since = 0.0
+        
+    @contextmanager
+    def track(self, items: int = 1):
+        """
+        Measure one call of the stage.
+        
+        Args:
+            items: Number of items processed by the call
+        """
+        now = time.perf_counter()
+        if self._in_flight == 0:
+            self._busy_since = now
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            end = time.perf_counter()
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self.busy_time += end - self._busy_since
+            self.calls += 1
+            self.items += items
+            self.item_time += end - now
+            
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the stage metrics.
+        
+        Returns:
+            Items, calls, errors, timings and throughput
+        """
+        return {
+            "items": self.items,
+            "calls": self.calls,
+            "errors": self.errors,
+            "busy_time": self.busy_time,
+            "avg_call_time": self.item_time / self.calls if self.calls else 0,
+            "max_in_flight": self.max_in_flight,
+            "throughput_per_second": self.items / self.busy_time if self.busy_time > 0 else 0
+        }
+
+
 class MaterialRAGService:
     """
     Unified RAG Service for materials data.
@@ -46,7 +189,7 @@ class MaterialRAGService:
     def __init__(
         self,
         config: Optional[Dict[str, Any]] = None,
-        embedding_generator: Optional[TextEmbeddingGenerator] = None,
+        embedding_generator: Optional["TextEmbeddingGenerator"] = None,
         retriever: Optional[HybridRetriever] = None,
         context_assembler: Optional[ContextAssembler] = None,
         generative_enhancer: Optional[GenerativeEnhancer] = None
@@ -98,6 +241,17 @@ class MaterialRAGService:
                 "enhancement_types": ["explanation", "similarity", "application"]
             },
             
+            "streaming": {
+                "card_description_chars": 200
+            },
+            "batch": {
+                "embedding_batch_size": 64,     # Queries per embedding call
+                "embedding_concurrency": 2,     # Embedding calls in flight
+                "retrieval_concurrency": 16,
+                "assembly_concurrency": 16,
+                "generation_concurrency": 4
+            },
+            
             # Tracking configuration
             "tracking_enabled": True,
             "log_level": "info",
@@ -115,6 +269,7 @@ class MaterialRAGService:
         # Initialize usage tracking
         self.usage_stats = {
             "total_requests": 0,
+            "completed_requests": 0,  # Processed (uncached) requests in avg_response_time
             "cache_hits": 0,
             "cache_misses": 0,
             "errors": 0,
@@ -128,7 +283,14 @@ class MaterialRAGService:
             }
         }
         
+        # Per-stage throughput of batch processing
+        self.stage_metrics = {
+            stage: _StageMeter(stage) for stage in ("embedding", "retrieval", "assembly", "generation")
+        }
+        
         # Initialize components
+        if embedding_generator is None and TextEmbeddingGenerator is None:
+            raise ImportError("enhanced_text_embeddings provides no TextEmbeddingGenerator; pass an embedding_generator")
         self.embedding_generator = embedding_generator or TextEmbeddingGenerator(self.config["embedding"])
         self.retriever = retriever or HybridRetriever(self.config["retrieval"])
         self.context_assembler = context_assembler or ContextAssembler(self.config["assembly"])
@@ -199,11 +361,7 @@ class MaterialRAGService:
                 self.usage_stats["cache_hits"] += 1
                 
                 # Add tracking info
-                cached_response["metadata"]["from_cache"] = True
-                cached_response["metadata"]["request_id"] = request_id
-                cached_response["metadata"]["session_id"] = session_id
-                
-                return cached_response
+                return self._from_cache(cached_response, request_id, session_id)
             
             self.usage_stats["cache_misses"] += 1
         
@@ -223,29 +381,13 @@ class MaterialRAGService:
             
             # 2. Retrieve relevant materials
             retrieval_start = time.time()
-            retrieved_materials = await self.retriever.retrieve(
-                query_text=query_text,
-                query_embedding=query_embedding,
-                filters=filters,
-                limit=query_options.get("limit", self.config["retrieval"]["max_results"])
-            )
+            retrieved_materials = await self._retrieve_materials(query_text, query_embedding, filters, query_options)
             retrieval_time = time.time() - retrieval_start
             self.usage_stats["component_times"]["retrieval"] += retrieval_time
             
             # 3. Assemble context from retrieved materials
             assembly_start = time.time()
-            assembled_context = await self.context_assembler.assemble(
-                query=query_text,
-                materials=retrieved_materials,
-                include_relationships=query_options.get(
-                    "include_relationships", 
-                    self.config["assembly"]["include_relationships"]
-                ),
-                include_properties=query_options.get(
-                    "include_properties",
-                    self.config["assembly"]["include_properties"]
-                )
-            )
+            assembled_context = await self._assemble_context(query_text, retrieved_materials, query_options)
             assembly_time = time.time() - assembly_start
             self.usage_stats["component_times"]["assembly"] += assembly_time
             
@@ -268,34 +410,19 @@ class MaterialRAGService:
             # 5. Construct the final response
             total_time = time.time() - start_time
             
-            response = {
-                "query": query_text,
-                "materials": enhanced_response.get("materials", []),
-                "enhancements": enhanced_response.get("enhancements", {}),
-                "citations": enhanced_response.get("citations", []),
-                "metadata": {
-                    "request_id": request_id,
-                    "session_id": session_id,
-                    "timestamp": time.time(),
-                    "processing_time": total_time,
-                    "component_times": {
-                        "embedding": embedding_time,
-                        "retrieval": retrieval_time,
-                        "assembly": assembly_time,
-                        "generation": generation_time
-                    },
-                    "from_cache": False,
-                    "enhancement_types": enhancement_types,
-                    "material_count": len(retrieved_materials)
-                }
-            }
+            response = self._build_response(
+                query_text, enhanced_response, request_id, session_id, total_time,
+                {
+                    "embedding": embedding_time,
+                    "retrieval": retrieval_time,
+                    "assembly": assembly_time,
+                    "generation": generation_time
+                },
+                enhancement_types, len(retrieved_materials)
+            )
             
             # Update usage statistics
-            self.usage_stats["component_times"]["total"] += total_time
-            self.usage_stats["avg_response_time"] = (
-                (self.usage_stats["avg_response_time"] * (self.usage_stats["total_requests"] - 1) + total_time)
-                / self.usage_stats["total_requests"]
-            )
+            self._record_response_time(total_time)
             
             # Cache the response
             if self.config["enable_cache"]:
@@ -333,149 +460,211 @@ class MaterialRAGService:
         """
         Process a RAG query with streaming response.
         
+        Yields the events of stream_events as NDJSON lines.
+        
         Args:
             query_text: The user's query text
             filters: Optional filters for material retrieval
             options: Optional query options
             session_id: Optional session identifier for tracking
-            
+        
         Yields:
-            Incremental parts of the response
+            One JSON encoded event per line
         """
-        # Generate a session ID if not provided
+        async for event in self.stream_events(query_text, filters, options, session_id):
+            yield json.dumps(event) + "\n"
+    
+    async def stream_events(
+        self,
+        query_text: str,
+        filters: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Process a RAG query as a stream of typed events.
+        
+        Material cards are sent as soon as retrieval finishes, LLM tokens as
+        they arrive and citations as soon as their closing bracket is seen,
+        so the first content is available after the retrieval latency
+        instead of after the full generation.
+        
+        Every event has "event", "request_id", "seq" and "timestamp" fields.
+        Event types:
+            start: Request accepted ("session_id")
+            status: Pipeline stage started ("stage", "message")
+            materials: Retrieved material cards ("count", "materials")
+            content: Generated text as it arrives ("chunk")
+            citation: A citation seen for the first time ("citation")
+            complete: Final response, same shape as query() ("response")
+            error: Processing failed ("error")
+        
+        Args:
+            query_text: The user's query text
+            filters: Optional filters for material retrieval
+            options: Optional query options
+            session_id: Optional session identifier for tracking
+        
+        Yields:
+            Event dictionaries
+        """
+        start_time = time.time()
         if not session_id:
             session_id = str(uuid.uuid4())
-        
-        # Initialize request tracking
         request_id = str(uuid.uuid4())
         self.usage_stats["total_requests"] += 1
+        query_options = dict(options or {})
+        seq = 0
         
+        def event(event_type: str, **fields) -> Dict[str, Any]:
+            nonlocal seq
+            seq += 1
+            return {"event": event_type, "request_id": request_id, "seq": seq, "timestamp": time.time(), **fields}
+        
+        enhance_task = None
         try:
             logger.info(f"Processing streaming query: {query_text}")
+            yield event("start", session_id=session_id)
             
-            # Initialize streaming response structure
-            yield json.dumps({
-                "event": "start",
-                "request_id": request_id,
-                "session_id": session_id,
-                "timestamp": time.time()
-            }) + "\n"
+            # A cached response is replayed as materials and complete
+            cache_key = self._generate_cache_key(query_text, filters, query_options)
+            if self.config["enable_cache"]:
+                cached_response = self._check_cache(cache_key)
+                if cached_response:
+                    self.usage_stats["cache_hits"] += 1
+                    cached_response = self._from_cache(cached_response, request_id, session_id)
+                    cards = [self._material_card(m) for m in cached_response.get("materials", [])]
+                    yield event("materials", count=len(cards), materials=cards)
+                    yield event("complete", response=cached_response)
+                    return
+                self.usage_stats["cache_misses"] += 1
             
             # 1. Generate embeddings for the query
-            yield json.dumps({
-                "event": "status",
-                "message": "Generating embeddings..."
-            }) + "\n"
-            
+            yield event("status", stage="embedding", message="Generating embeddings...")
+            stage_start = time.time()
             query_embedding = await self.embedding_generator.generate_embeddings(
                 query_text,
                 include_dense=True,
                 include_sparse=self.config["embedding"]["sparse_enabled"]
             )
+            embedding_time = time.time() - stage_start
+            self.usage_stats["component_times"]["embedding"] += embedding_time
             
-            # 2. Retrieve relevant materials
-            yield json.dumps({
-                "event": "status",
-                "message": "Retrieving relevant materials..."
-            }) + "\n"
-            
-            retrieved_materials = await self.retriever.retrieve(
-                query_text=query_text,
-                query_embedding=query_embedding,
-                filters=filters,
-                limit=options.get("limit", self.config["retrieval"]["max_results"])
-            )
+            # 2. Retrieve relevant materials and send their cards right away
+            yield event("status", stage="retrieval", message="Retrieving relevant materials...")
+            stage_start = time.time()
+            retrieved_materials = await self._retrieve_materials(query_text, query_embedding, filters, query_options)
+            retrieval_time = time.time() - stage_start
+            self.usage_stats["component_times"]["retrieval"] += retrieval_time
             
-            # Send initial material list
-            yield json.dumps({
-                "event": "materials",
-                "count": len(retrieved_materials),
-                "materials": [
-                    {
-                        "id": m.get("id", ""),
-                        "name": m.get("name", ""),
-                        "material_type": m.get("material_type", ""),
-                        "similarity_score": m.get("similarity_score", 0)
-                    } for m in retrieved_materials[:3]  # Send top 3 initially
-                ]
-            }) + "\n"
+            cards = [self._material_card(m) for m in retrieved_materials]
+            yield event("materials", count=len(cards), materials=cards)
+            time_to_materials = time.time() - start_time
             
             # 3. Assemble context from retrieved materials
-            yield json.dumps({
-                "event": "status",
-                "message": "Assembling context..."
-            }) + "\n"
-            
-            assembled_context = await self.context_assembler.assemble(
-                query=query_text,
-                materials=retrieved_materials,
-                include_relationships=options.get(
-                    "include_relationships", 
-                    self.config["assembly"]["include_relationships"]
-                ),
-                include_properties=options.get(
-                    "include_properties",
-                    self.config["assembly"]["include_properties"]
-                )
-            )
-            
-            # 4. Generate enhanced content with streaming
-            yield json.dumps({
-                "event": "status",
-                "message": "Generating enhanced content..."
-            }) + "\n"
+            yield event("status", stage="assembly", message="Assembling context...")
+            stage_start = time.time()
+            assembled_context = await self._assemble_context(query_text, retrieved_materials, query_options)
+            assembly_time = time.time() - stage_start
+            self.usage_stats["component_times"]["assembly"] += assembly_time
             
-            enhancement_types = options.get(
+            # 4. Generate enhanced content; the stream handler runs on this loop
+            # and hands chunks over through a queue, None marks the end
+            yield event("status", stage="generation", message="Generating enhanced content...")
+            stage_start = time.time()
+            enhancement_types = query_options.get(
                 "enhancement_types",
                 self.config["generation"]["enhancement_types"]
             )
             
-            # Create a buffer for content chunks
-            content_buffer = []
-            async def stream_callback(content):
-                content_buffer.append(content)
-                if len(content_buffer) >= 5:  # Send in batches
-                    chunk = "".join(content_buffer)
-                    yield json.dumps({
-                        "event": "content",
-                        "chunk": chunk
-                    }) + "\n"
-                    content_buffer.clear()
-            
-            # Use enhanced response with streaming
-            enhanced_response = await self.generative_enhancer.enhance(
+            chunks: asyncio.Queue = asyncio.Queue()
+            enhance_task = asyncio.ensure_future(self.generative_enhancer.enhance(
                 context=assembled_context,
                 query=query_text,
                 enhancement_types=enhancement_types,
-                stream_handler=stream_callback
+                stream_handler=chunks.put_nowait
+            ))
+            enhance_task.add_done_callback(lambda _: chunks.put_nowait(None))
+            
+            citations = _CitationTracker()
+            time_to_first_token = None
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                if not chunk:
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = time.time() - start_time
+                yield event("content", chunk=chunk)
+                for citation in citations.feed(chunk):
+                    yield event("citation", citation=citation)
+            
+            enhanced_response = await enhance_task
+            generation_time = time.time() - stage_start
+            self.usage_stats["component_times"]["generation"] += generation_time
+            
+            # Citations only found while post-processing the full text; the
+            # final response lists every citation under its streamed id
+            for citation in enhanced_response.get("citations", []):
+                citation = citations.add(citation)
+                if citation:
+                    yield event("citation", citation=citation)
+            enhanced_response = {**enhanced_response, "citations": citations.citations}
+            
+            # 5. Send the final response
+            total_time = time.time() - start_time
+            response = self._build_response(
+                query_text, enhanced_response, request_id, session_id, total_time,
+                {
+                    "embedding": embedding_time,
+                    "retrieval": retrieval_time,
+                    "assembly": assembly_time,
+                    "generation": generation_time
+                },
+                enhancement_types, len(retrieved_materials)
             )
+            response["metadata"]["time_to_materials"] = time_to_materials
+            response["metadata"]["time_to_first_token"] = time_to_first_token
             
-            # Send any remaining buffered content
-            if content_buffer:
-                chunk = "".join(content_buffer)
-                yield json.dumps({
-                    "event": "content",
-                    "chunk": chunk
-                }) + "\n"
-            
-            # 5. Send final complete response
-            yield json.dumps({
-                "event": "complete",
-                "response": enhanced_response,
-                "timestamp": time.time()
-            }) + "\n"
+            self._record_response_time(total_time)
+            if self.config["enable_cache"]:
+                self._add_to_cache(cache_key, response)
             
+            yield event("complete", response=response)
+        
         except Exception as e:
             logger.error(f"Error in streaming query: {str(e)}")
             self.usage_stats["errors"] += 1
-            
-            # Send error response
-            yield json.dumps({
-                "event": "error",
-                "error": str(e),
-                "timestamp": time.time()
-            }) + "\n"
+            yield event("error", error=str(e))
+        finally:
+            # The consumer went away before generation finished
+            if enhance_task is not None and not enhance_task.done():
+                enhance_task.cancel()
     
+    def _material_card(self, material: MaterialData) -> Dict[str, Any]:
+        """
+        Build the compact card of a material sent before generation.
+        
+        Args:
+            material: Retrieved material
+        
+        Returns:
+            Card with id, name, type, score, short description and image
+        """
+        limit = self.config["streaming"]["card_description_chars"]
+        description = material.get("description") or ""
+        if len(description) > limit:
+            description = description[:limit].rstrip() + "..."
+        return {
+            "id": material.get("id", ""),
+            "name": material.get("name", ""),
+            "material_type": material.get("material_type", ""),
+            "similarity_score": material.get("similarity_score", 0),
+            "description": description,
+            "image_url": material.get("thumbnail_url") or material.get("image_url")
+        }
+
     async def batch_query(
         self,
         queries: List[Dict[str, Any]],
@@ -485,13 +674,20 @@ class MaterialRAGService:
         """
         Process multiple RAG queries in batch.
         
+        The batch runs as a staged pipeline instead of one query() per item:
+        query texts are embedded in batches (one model call per chunk of
+        embedding_batch_size), then each query moves on to retrieval,
+        assembly and generation as soon as its chunk is embedded. Every stage
+        has its own concurrency limit, so cheap stages are not throttled by
+        the LLM stage; stage throughput is reported by get_usage_statistics.
+        
         Args:
             queries: List of query objects
             session_id: Optional session identifier for tracking
-            max_concurrent: Maximum number of concurrent requests
-            
+            max_concurrent: Optional cap on the concurrency of every stage
+        
         Returns:
-            List of RAG responses
+            List of RAG responses, in query order
         """
         if not queries:
             return []
@@ -500,47 +696,294 @@ class MaterialRAGService:
         if not session_id:
             session_id = str(uuid.uuid4())
         
-        # Set max concurrent requests
-        max_workers = max_concurrent or self.config["max_concurrent_requests"]
+        batch_config = self.config["batch"]
         
-        # Create a semaphore to limit concurrent requests
-        semaphore = asyncio.Semaphore(max_workers)
+        def limiter(stage: str) -> asyncio.Semaphore:
+            limit = batch_config[f"{stage}_concurrency"]
+            return asyncio.Semaphore(min(limit, max_concurrent) if max_concurrent else limit)
         
-        async def process_query(query_obj):
-            async with semaphore:
-                query_text = query_obj.get("query", "")
-                filters = query_obj.get("filters")
-                options = query_obj.get("options")
-                
-                # Use the shared session_id but with unique request_id
-                return await self.query(
-                    query_text=query_text,
-                    filters=filters,
-                    options=options,
-                    session_id=session_id
-                )
+        embedding_slots = limiter("embedding")
+        retrieval_slots = limiter("retrieval")
+        assembly_slots = limiter("assembly")
+        generation_slots = limiter("generation")
+        
+        results: List[Optional[RAGResponse]] = [None] * len(queries)
+        pending = []  # (index, query text, filters, options, cache key)
+        duplicates: Dict[str, List[int]] = {}  # Cache key -> indices of repeated queries
+        for index, query_obj in enumerate(queries):
+            self.usage_stats["total_requests"] += 1
+            query_text = query_obj.get("query", "")
+            filters = query_obj.get("filters")
+            query_options = dict(query_obj.get("options") or {})
+            cache_key = self._generate_cache_key(query_text, filters, query_options)
+            
+            if self.config["enable_cache"]:
+                cached_response = self._check_cache(cache_key)
+                if cached_response:
+                    self.usage_stats["cache_hits"] += 1
+                    results[index] = self._from_cache(cached_response, str(uuid.uuid4()), session_id)
+                    continue
+                self.usage_stats["cache_misses"] += 1
+            
+            # Identical queries of the batch are processed once
+            if cache_key in duplicates:
+                duplicates[cache_key].append(index)
+                continue
+            duplicates[cache_key] = []
+            pending.append((index, query_text, filters, query_options, cache_key))
+        
+        # Stage 1: one embedding call per chunk of distinct query texts
+        texts = list(dict.fromkeys(item[1] for item in pending))
+        chunk_size = max(1, batch_config["embedding_batch_size"])
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        
+        async def embed_chunk(chunk: List[str]) -> Dict[str, Any]:
+            async with embedding_slots:
+                with self.stage_metrics["embedding"].track(len(chunk)):
+                    embeddings = await self._embed_queries(chunk)
+            return dict(zip(chunk, embeddings))
         
-        # Process all queries concurrently
-        tasks = [process_query(query) for query in queries]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        chunk_tasks = [asyncio.ensure_future(embed_chunk(chunk)) for chunk in chunks]
+        chunk_of_text = {text: chunk_tasks[i // chunk_size] for i, text in enumerate(texts)}
+        
+        async def process(index: int, query_text: str, filters: Optional[Dict[str, Any]],
+                          query_options: Dict[str, Any], cache_key: str) -> RAGResponse:
+            start_time = time.time()
+            request_id = str(uuid.uuid4())
+            
+            # Shielded: the chunk is shared with the other queries in it
+            query_embedding = (await asyncio.shield(chunk_of_text[query_text]))[query_text]
+            embedding_time = time.time() - start_time
+            self.usage_stats["component_times"]["embedding"] += embedding_time
+            
+            # Stage 2: retrieval
+            async with retrieval_slots:
+                stage_start = time.time()
+                with self.stage_metrics["retrieval"].track():
+                    retrieved_materials = await self._retrieve_materials(query_text, query_embedding, filters, query_options)
+                retrieval_time = time.time() - stage_start
+            
+            # Stage 3: assembly
+            async with assembly_slots:
+                stage_start = time.time()
+                with self.stage_metrics["assembly"].track():
+                    assembled_context = await self._assemble_context(query_text, retrieved_materials, query_options)
+                assembly_time = time.time() - stage_start
+            
+            # Stage 4: generation
+            enhancement_types = query_options.get(
+                "enhancement_types",
+                self.config["generation"]["enhancement_types"]
+            )
+            async with generation_slots:
+                stage_start = time.time()
+                with self.stage_metrics["generation"].track():
+                    enhanced_response = await self.generative_enhancer.enhance(
+                        context=assembled_context,
+                        query=query_text,
+                        enhancement_types=enhancement_types
+                    )
+                generation_time = time.time() - stage_start
+            
+            for component, seconds in (("retrieval", retrieval_time), ("assembly", assembly_time),
+                                       ("generation", generation_time)):
+                self.usage_stats["component_times"][component] += seconds
+            
+            total_time = time.time() - start_time
+            response = self._build_response(
+                query_text, enhanced_response, request_id, session_id, total_time,
+                {
+                    "embedding": embedding_time,
+                    "retrieval": retrieval_time,
+                    "assembly": assembly_time,
+                    "generation": generation_time
+                },
+                enhancement_types, len(retrieved_materials)
+            )
+            self._record_response_time(total_time)
+            if self.config["enable_cache"]:
+                self._add_to_cache(cache_key, response)
+            return response
+        
+        outcomes = await asyncio.gather(*(process(*item) for item in pending), return_exceptions=True)
         
         # Process results and handle any exceptions
-        processed_results = []
-        for result in results:
-            if isinstance(result, Exception):
-                processed_results.append({
-                    "error": str(result),
+        for (index, query_text, *_), outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error processing batch query '{query_text}': {str(outcome)}")
+                self.usage_stats["errors"] += 1
+                results[index] = {
+                    "query": query_text,
+                    "error": str(outcome),
                     "metadata": {
                         "session_id": session_id,
                         "timestamp": time.time(),
                         "error": True
                     }
-                })
+                }
             else:
-                processed_results.append(result)
+                results[index] = outcome
+        
+        for index, _, _, _, cache_key in pending:
+            for duplicate in duplicates[cache_key]:
+                response = copy.deepcopy(results[index])
+                response["metadata"]["request_id"] = str(uuid.uuid4())
+                if "error" not in response:
+                    response["metadata"]["from_cache"] = True
+                results[duplicate] = response
+        
+        return results
+    
+    async def _embed_queries(self, texts: List[str]) -> List[Any]:
+        """
+        Embed several query texts with one model call.
+        
+        Uses the same embedding contract as query() and stream_events():
+        the generator's batch_generate_embeddings, called with the same
+        include_dense/include_sparse arguments as generate_embeddings and
+        returning one generate_embeddings result per text. Generators
+        without it get concurrent generate_embeddings calls.
+        
+        Args:
+            texts: Query texts
+        
+        Returns:
+            Embedding per text
+        """
+        include_sparse = self.config["embedding"]["sparse_enabled"]
+        batch_generate = getattr(self.embedding_generator, "batch_generate_embeddings", None)
+        if batch_generate is None:
+            return await asyncio.gather(*(
+                self.embedding_generator.generate_embeddings(text, include_dense=True, include_sparse=include_sparse)
+                for text in texts
+            ))
+        
+        if inspect.iscoroutinefunction(batch_generate):
+            embeddings = await batch_generate(texts, include_dense=True, include_sparse=include_sparse)
+        else:
+            # Embedding is CPU-bound; keep it off the event loop
+            embeddings = await asyncio.to_thread(
+                batch_generate, texts, include_dense=True, include_sparse=include_sparse
+            )
+        
+        embeddings = list(embeddings)
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings from batch_generate_embeddings, got {len(embeddings)}")
+        return embeddings
+    
+    async def _retrieve_materials(
+        self,
+        query_text: str,
+        query_embedding: Any,
+        filters: Optional[Dict[str, Any]],
+        query_options: Dict[str, Any]
+    ) -> List[MaterialData]:
+        """
+        Retrieve the materials of a query.
+        
+        Args:
+            query_text: The query text
+            query_embedding: Embedding of the query
+            filters: Optional filters for material retrieval
+            query_options: Query options
         
-        return processed_results
+        Returns:
+            Retrieved materials
+        """
+        return await self.retriever.retrieve(
+            query_text=query_text,
+            query_embedding=query_embedding,
+            filters=filters,
+            limit=query_options.get("limit", self.config["retrieval"]["max_results"])
+        )
     
+    async def _assemble_context(
+        self,
+        query_text: str,
+        materials: List[MaterialData],
+        query_options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Assemble the context of retrieved materials.
+        
+        Args:
+            query_text: The query text
+            materials: Retrieved materials
+            query_options: Query options
+        
+        Returns:
+            Assembled context
+        """
+        return await self.context_assembler.assemble(
+            query=query_text,
+            materials=materials,
+            include_relationships=query_options.get(
+                "include_relationships",
+                self.config["assembly"]["include_relationships"]
+            ),
+            include_properties=query_options.get(
+                "include_properties",
+                self.config["assembly"]["include_properties"]
+            )
+        )
+    
+    def _build_response(
+        self,
+        query_text: str,
+        enhanced_response: Dict[str, Any],
+        request_id: str,
+        session_id: str,
+        total_time: float,
+        component_times: Dict[str, float],
+        enhancement_types: List[str],
+        material_count: int
+    ) -> RAGResponse:
+        """
+        Build the response of a processed query.
+        
+        Args:
+            query_text: The query text
+            enhanced_response: Output of the generative enhancer
+            request_id: Request identifier
+            session_id: Session identifier
+            total_time: Processing time in seconds
+            component_times: Seconds per pipeline component
+            enhancement_types: Generated enhancement types
+            material_count: Number of retrieved materials
+        
+        Returns:
+            RAG response
+        """
+        return {
+            "query": query_text,
+            "materials": enhanced_response.get("materials", []),
+            "enhancements": enhanced_response.get("enhancements", {}),
+            "citations": enhanced_response.get("citations", []),
+            "metadata": {
+                "request_id": request_id,
+                "session_id": session_id,
+                "timestamp": time.time(),
+                "processing_time": total_time,
+                "component_times": component_times,
+                "from_cache": False,
+                "enhancement_types": enhancement_types,
+                "material_count": material_count
+            }
+        }
+    
+    def _record_response_time(self, total_time: float) -> None:
+        """
+        Add a processed query's time to the usage statistics.
+        
+        Args:
+            total_time: Processing time in seconds
+        """
+        self.usage_stats["component_times"]["total"] += total_time
+        self.usage_stats["completed_requests"] += 1
+        self.usage_stats["avg_response_time"] += (
+            (total_time - self.usage_stats["avg_response_time"]) / self.usage_stats["completed_requests"]
+        )
+
     def _generate_cache_key(
         self,
         query_text: str,
@@ -591,6 +1034,32 @@ class MaterialRAGService:
         
         return self.cache[cache_key]
     
+    def _from_cache(self, cached_response: RAGResponse, request_id: str,
+                    session_id: Optional[str]) -> RAGResponse:
+        """
+        Get a cached response for a new request.
+        
+        The cached entry is shared by every hit, so the tracking info goes
+        into a copy with its own metadata.
+        
+        Args:
+            cached_response: Response from the cache
+            request_id: ID of the request served from the cache
+            session_id: Session of the request
+            
+        Returns:
+            Shallow copy of the response with updated metadata
+        """
+        return {
+            **cached_response,
+            "metadata": {
+                **cached_response["metadata"],
+                "from_cache": True,
+                "request_id": request_id,
+                "session_id": session_id
+            }
+        }
+    
     def _add_to_cache(self, cache_key: str, response: RAGResponse) -> None:
         """
         Add a response to the cache.
@@ -649,6 +1118,9 @@ class MaterialRAGService:
         # Calculate error rate
         stats["error_rate"] = stats["errors"] / stats["total_requests"] if stats["total_requests"] > 0 else 0
         
+        # Batch pipeline stages
+        stats["batch_stages"] = {name: meter.get_stats() for name, meter in self.stage_metrics.items()}
+        
         return stats
     
     def get_health_status(self) -> Dict[str, Any]:
@@ -729,7 +1201,7 @@ class MaterialRAGService:
 # Factory function to create a Material RAG Service
 def create_material_rag_service(
     config: Optional[Dict[str, Any]] = None,
-    embedding_generator: Optional[TextEmbeddingGenerator] = None,
+    embedding_generator: Optional["TextEmbeddingGenerator"] = None,
     retriever: Optional[HybridRetriever] = None,
     context_assembler: Optional[ContextAssembler] = None,
     generative_enhancer: Optional[GenerativeEnhancer] = None
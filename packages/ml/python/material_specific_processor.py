@@ -25,6 +25,8 @@ from typing import Dict, List, Any, Tuple, Optional, Union, Set
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from fuzzy_vocabulary import get_vocabulary_index
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,6 +34,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Common variations of standard field names
+FIELD_NAME_VARIATIONS = {
+    'width': ['width', 'wide', 'w', 'w.'],
+    'length': ['length', 'long', 'l', 'l.'],
+    'thickness': ['thickness', 'thick', 't', 't.', 'depth'],
+    'height': ['height', 'high', 'h', 'h.'],
+    'product_code': ['product_code', 'code', 'item_code', 'reference', 'ref', 'ref.', 'sku'],
+    'water_absorption': ['water_absorption', 'absorption', 'water_abs', 'abs'],
+    'slip_resistance': ['slip_resistance', 'slip', 'coefficient_of_friction', 'cof', 'dcof']
+}
+
+FIELD_NAME_LOOKUP = {
+    variation: standard
+    for standard, variations in FIELD_NAME_VARIATIONS.items()
+    for variation in variations
+}
+
+# Only longer variations are fuzzy-matched; short ones like 'w' or 'cof' are too ambiguous
+MIN_FUZZY_FIELD_LENGTH = 5
+
 
 @dataclass
 class MaterialField:
@@ -564,19 +586,17 @@ class MaterialSpecificProcessor:
         normalized = field_name.lower().replace(' ', '_')
         
         # Handle common variations
-        mapping = {
-            'width': ['width', 'wide', 'w', 'w.'],
-            'length': ['length', 'long', 'l', 'l.'],
-            'thickness': ['thickness', 'thick', 't', 't.', 'depth'],
-            'height': ['height', 'high', 'h', 'h.'],
-            'product_code': ['product_code', 'code', 'item_code', 'reference', 'ref', 'ref.', 'sku'],
-            'water_absorption': ['water_absorption', 'absorption', 'water_abs', 'abs'],
-            'slip_resistance': ['slip_resistance', 'slip', 'coefficient_of_friction', 'cof', 'dcof']
-        }
+        if normalized in FIELD_NAME_LOOKUP:
+            return FIELD_NAME_LOOKUP[normalized]
         
-        for standard, variations in mapping.items():
-            if normalized in variations:
-                return standard
+        # Tolerate OCR damage in longer labels ("thickn3ss", "absorpt1on")
+        if len(normalized) >= MIN_FUZZY_FIELD_LENGTH:
+            index = get_vocabulary_index(
+                [v for v in FIELD_NAME_LOOKUP if len(v) >= MIN_FUZZY_FIELD_LENGTH]
+            )
+            match = index.best_match(normalized, min_similarity=0.8)
+            if match:
+                return FIELD_NAME_LOOKUP[match[0]]
         
         return normalized
     
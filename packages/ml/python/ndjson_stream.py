@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+NDJSON Record Streaming
+
+This module writes newline-delimited JSON records as they are produced, so
+that long-running extraction and OCR scripts can emit one record per page
+instead of serializing a whole-document result at the end. A consumer (e.g.
+the Node.js script runner) can parse and index each line as soon as it
+arrives, and the producer never holds more than one page in memory.
+
+Record envelope:
+    {"type": "document" | "page" | "summary" | "error", "seq": <n>, ...}
+
+Key features:
+1. Line-buffered writing to stdout or a file, flushed per record
+2. Sequence numbers for ordering and gap detection
+3. Error records so consumers can tell failures from truncated streams
+"""
+
+import sys
+import json
+import logging
+import threading
+from typing import Dict, Any, Optional, TextIO
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class NDJSONWriter:
+    """
+    Writes one JSON object per line and flushes after every record.
+
+    Usable as a context manager; files opened by the writer are closed on
+    exit, stdout and streams passed in are left open. Writes are serialized,
+    so one writer can be shared by several threads.
+    """
+
+    def __init__(self, output: Optional[str] = None, stream: Optional[TextIO] = None):
+        """
+        Initialize the writer
+
+        Args:
+            output: File path to write to; None or '-' for stdout
+            stream: Already open text stream to write to instead (e.g. a
+                socket file); left open on close
+        """
+        if stream is not None:
+            self._stream = stream
+            self._owns_stream = False
+        elif output and output != '-':
+            self._stream: TextIO = open(output, 'w', encoding='utf-8')
+            self._owns_stream = True
+        else:
+            self._stream = sys.stdout
+            self._owns_stream = False
+
+        self._lock = threading.Lock()
+        self.records_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, record_type: str, record: Dict[str, Any] = None):
+        """
+        Write a record
+
+        Args:
+            record_type: Record type ('document', 'page', 'summary', 'error')
+            record: Record fields
+        """
+        payload = {'type': record_type}
+        with self._lock:
+            payload['seq'] = self.records_written
+            if record:
+                payload.update(record)
+            self._stream.write(json.dumps(payload, ensure_ascii=False, default=str) + '\n')
+            self._stream.flush()
+            self.records_written += 1
+
+    def write_error(self, error: Exception, **context):
+        """
+        Write an error record
+
+        Args:
+            error: The exception
+            **context: Additional fields (e.g. page number)
+        """
+        self.write('error', {'error': str(error), 'error_type': type(error).__name__, **context})
+
+    def close(self):
+        """Close the underlying file if the writer opened it"""
+        if self._owns_stream:
+            self._stream.close()
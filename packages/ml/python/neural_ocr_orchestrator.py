@@ -23,12 +23,15 @@ import sys
 import json
 import logging
 import tempfile
-from typing import Dict, List, Any, Tuple, Optional, Union
+from typing import Dict, List, Any, Tuple, Optional, Union, Iterator
 from pathlib import Path
 import time
 import numpy as np
 import cv2
 
+from text_layer import classify_page, extract_text_blocks, extract_tables
+from ndjson_stream import NDJSONWriter
+
 # Import OCR engines (with fallback to Tesseract)
 try:
     # Standard OCR (always available)
@@ -40,8 +43,8 @@ try:
     from marker_engine import MarkerEngine
     from thepipe_engine import ThePipeEngine
 except ImportError as e:
-    print(f"Warning: Some OCR engines could not be imported: {e}")
-    print("Neural OCR orchestrator will use only available engines.")
+    print(f"Warning: Some OCR engines could not be imported: {e}", file=sys.stderr)
+    print("Neural OCR orchestrator will use only available engines.", file=sys.stderr)
 
 # Configure logging
 logging.basicConfig(
@@ -50,6 +53,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Zoom used when rasterizing PDF pages; text-layer coordinates use the same space
+PAGE_ZOOM = 2
+
 
 class RegionType:
     """Enum-like class for document region types"""
@@ -170,6 +176,11 @@ class NeuralOCROrchestrator:
             'content_classification_mode': 'hybrid',
             'min_region_size': 100,  # Minimum region size in pixels
             
+            # Born-digital pages are read from the PDF text layer instead of OCR
+            'use_text_layer': True,
+            'text_layer_confidence': 0.99,
+            'text_layer_config': {},  # Classifier threshold overrides (see text_layer.py)
+            
             # Engine-specific configuration
             'tesseract_config': {
                 'languages': ['eng'],
@@ -253,6 +264,18 @@ class NeuralOCROrchestrator:
         except Exception as e:
             logger.warning(f"Failed to initialize thepipe engine: {e}")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Shut down the worker pools of the engines that have one"""
+        for engine in self.engines.values():
+            if hasattr(engine, 'close'):
+                engine.close()
+    
     def process_document(self, document_path: str, output_dir: str = None) -> Dict[str, Any]:
         """
         Process a document with the orchestrated OCR engines
@@ -581,9 +604,6 @@ class NeuralOCROrchestrator:
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
         
-        # Process the PDF document
-        import fitz  # PyMuPDF
-        
         results = {
             "document": {
                 "path": document_path,
@@ -613,63 +633,24 @@ class NeuralOCROrchestrator:
             }
         }
         
-        # Open the PDF document
-        doc = fitz.open(document_path)
-        
         # Process each page separately
-        for page_idx in range(doc.page_count):
-            logger.info(f"Processing page {page_idx+1}/{doc.page_count}")
-            
-            # Create a temporary image file for this page
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-                tmp_path = tmp.name
-            
-            # Convert page to image
-            page = doc[page_idx]
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
-            pix.save(tmp_path)
-            
-            # Create page-specific output directory
-            page_output_dir = None
-            if output_dir:
-                page_output_dir = os.path.join(output_dir, f"page_{page_idx+1}")
-                os.makedirs(page_output_dir, exist_ok=True)
-            
-            # Process the page as a single document
-            page_result = self.process_document(tmp_path, page_output_dir)
-            
-            # Clean up temporary file
-            try:
-                os.unlink(tmp_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file: {e}")
-            
-            # Add page info to results
-            page_info = {
-                "page_number": page_idx + 1,
-                "page_size": {"width": page.rect.width, "height": page.rect.height},
-                "regions": page_result["regions"],
-                "text": page_result["result"]["text"],
-                "statistics": page_result["result"]["statistics"]
-            }
-            
+        for page_info in self.iter_pages(document_path, output_dir):
+            page_idx = page_info["page_number"] - 1
+            structured_content = page_info.pop("structured_content")
             results["document"]["pages"].append(page_info)
             
             # Aggregate page results into full document result
-            results["result"]["text"] += f"\n--- Page {page_idx+1} ---\n\n" + page_result["result"]["text"]
+            results["result"]["text"] += f"\n--- Page {page_idx+1} ---\n\n" + page_info["text"]
             
             # Aggregate structured content
             for content_type in ["headings", "paragraphs", "tables", "forms", "technical_content"]:
-                for item in page_result["result"]["structured_content"][content_type]:
-                    # Add page number to item
-                    item["page"] = page_idx + 1
-                    results["result"]["structured_content"][content_type].append(item)
+                results["result"]["structured_content"][content_type].extend(structured_content[content_type])
             
             # Update statistics
-            results["result"]["statistics"]["region_count"] += page_result["result"]["statistics"]["region_count"]
+            results["result"]["statistics"]["region_count"] += page_info["statistics"]["region_count"]
             
             # Update engine usage
-            for engine, count in page_result["result"]["statistics"]["engine_usage"].items():
+            for engine, count in page_info["statistics"]["engine_usage"].items():
                 if engine not in results["result"]["statistics"]["engine_usage"]:
                     results["result"]["statistics"]["engine_usage"][engine] = 0
                 results["result"]["statistics"]["engine_usage"][engine] += count
@@ -696,6 +677,265 @@ class NeuralOCROrchestrator:
         
         return results
 
+    def iter_pages(self, document_path: str, output_dir: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process a PDF page by page, yielding each page as it completes
+        
+        Only one page is held in memory at a time, so callers can forward
+        page results (e.g. as NDJSON) while later pages are still processed.
+        
+        Args:
+            document_path: Path to the PDF document
+            output_dir: Output directory for per-page results
+            
+        Yields:
+            Page info dictionaries (as in the 'pages' list of
+            process_multi_page_document) with the page's 'structured_content'
+        """
+        import fitz  # PyMuPDF
+        
+        # Open the PDF document
+        doc = fitz.open(document_path)
+        
+        try:
+            # Process each page separately
+            for page_idx in range(doc.page_count):
+                logger.info(f"Processing page {page_idx+1}/{doc.page_count}")
+                page = doc[page_idx]
+                
+                # Create page-specific output directory
+                page_output_dir = None
+                if output_dir:
+                    page_output_dir = os.path.join(output_dir, f"page_{page_idx+1}")
+                    os.makedirs(page_output_dir, exist_ok=True)
+                
+                # Decide whether the page can be read from its text layer
+                text_layer = None
+                if self.config['use_text_layer']:
+                    text_layer = classify_page(page, self.config['text_layer_config'])
+                
+                if text_layer and text_layer['has_text_layer']:
+                    # Born-digital page: only embedded images still go to OCR engines
+                    page_result = self._process_text_layer_page(
+                        document_path, page, text_layer, page_output_dir
+                    )
+                    extraction_method = 'text_layer'
+                else:
+                    # Create a temporary image file for this page
+                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+                        tmp_path = tmp.name
+                    
+                    # Convert page to image
+                    pix = page.get_pixmap(matrix=fitz.Matrix(PAGE_ZOOM, PAGE_ZOOM))  # 2x zoom for better quality
+                    pix.save(tmp_path)
+                    pix = None
+                    
+                    # Process the page as a single document
+                    page_result = self.process_document(tmp_path, page_output_dir)
+                    extraction_method = 'ocr'
+                    
+                    # Clean up temporary file
+                    try:
+                        os.unlink(tmp_path)
+                    except Exception as e:
+                        logger.warning(f"Failed to delete temporary file: {e}")
+                
+                # Add page number to structured content items
+                structured_content = page_result["result"]["structured_content"]
+                for content_type in ["headings", "paragraphs", "tables", "forms", "technical_content"]:
+                    for item in structured_content[content_type]:
+                        item["page"] = page_idx + 1
+                
+                yield {
+                    "page_number": page_idx + 1,
+                    "page_size": {"width": page.rect.width, "height": page.rect.height},
+                    "extraction_method": extraction_method,
+                    "text_layer_reason": text_layer['reason'] if text_layer else None,
+                    "regions": page_result["regions"],
+                    "text": page_result["result"]["text"],
+                    "statistics": page_result["result"]["statistics"],
+                    "structured_content": structured_content
+                }
+        finally:
+            doc.close()
+    
+    def stream_document(self, document_path: str, output: str = None,
+                        output_dir: str = None) -> Dict[str, Any]:
+        """
+        Process a document and write the results as NDJSON
+        
+        PDFs produce a 'document' record, one 'page' record per page and a
+        closing 'summary' record; other documents produce a single 'page'
+        record with the full result before the summary.
+        
+        Args:
+            document_path: Path to the document
+            output: NDJSON output path, or None for stdout
+            output_dir: Output directory for per-page results
+            
+        Returns:
+            The summary record
+        """
+        start_time = time.time()
+        
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        summary = {
+            "page_count": 0,
+            "region_count": 0,
+            "average_confidence": 0.0,
+            "engine_usage": {},
+            "text_layer_pages": 0
+        }
+        total_confidence = 0.0
+        
+        with NDJSONWriter(output) as writer:
+            writer.write("document", {
+                "path": document_path,
+                "filename": os.path.basename(document_path),
+                "type": "pdf" if document_path.lower().endswith('.pdf') else "image",
+                "engines_used": list(self.engines.keys())
+            })
+            
+            try:
+                if document_path.lower().endswith('.pdf'):
+                    pages = self.iter_pages(document_path, output_dir)
+                else:
+                    result = self.process_document(document_path, output_dir)
+                    pages = [{
+                        "page_number": 1,
+                        "extraction_method": "ocr",
+                        "regions": result["regions"],
+                        "text": result["result"]["text"],
+                        "statistics": result["result"]["statistics"],
+                        "structured_content": result["result"]["structured_content"]
+                    }]
+                
+                for page_info in pages:
+                    writer.write("page", page_info)
+                    
+                    statistics = page_info["statistics"]
+                    summary["page_count"] += 1
+                    summary["region_count"] += statistics["region_count"]
+                    summary["text_layer_pages"] += int(page_info["extraction_method"] == "text_layer")
+                    total_confidence += statistics["average_confidence"] * len(page_info["regions"])
+                    for engine, count in statistics["engine_usage"].items():
+                        summary["engine_usage"][engine] = summary["engine_usage"].get(engine, 0) + count
+            except Exception as e:
+                writer.write_error(e, page=summary["page_count"] + 1)
+                raise
+            
+            if summary["region_count"] > 0:
+                summary["average_confidence"] = total_confidence / summary["region_count"]
+            summary["time"] = time.time() - start_time
+            writer.write("summary", summary)
+        
+        return summary
+    
+    def _process_text_layer_page(
+        self,
+        document_path: str,
+        page,
+        text_layer: Dict[str, Any],
+        output_dir: str = None
+    ) -> Dict[str, Any]:
+        """
+        Process a born-digital PDF page from its embedded text layer
+        
+        Text blocks and tables are taken from the text layer; embedded images
+        large enough to carry text are rendered and processed by the OCR
+        engines as usual. Coordinates use the same 2x pixel space as
+        rasterized pages.
+        
+        Args:
+            document_path: Path to the document
+            page: PyMuPDF page
+            text_layer: Classification from text_layer.classify_page
+            output_dir: Output directory for region images
+            
+        Returns:
+            Dictionary with "regions" and "result" like process_document
+        """
+        import fitz  # PyMuPDF
+        
+        confidence = self.config['text_layer_confidence']
+        regions = []
+        
+        # Tables from the text layer
+        tables = extract_tables(page, scale=PAGE_ZOOM) or []
+        for table in tables:
+            region = DocumentRegion(
+                region_type=RegionType.TABLE,
+                coordinates=tuple(int(round(v)) for v in table['bbox']),
+                content={
+                    'text': '\n'.join(' | '.join(row) for row in table['data']),
+                    'table_data': table['data'],
+                    'confidence': confidence
+                },
+                confidence=confidence
+            )
+            region.processed_by.append('text_layer')
+            regions.append(region)
+        
+        # Text blocks not already covered by a table
+        def inside_table(bbox):
+            cx, cy = bbox[0] + bbox[2] / 2, bbox[1] + bbox[3] / 2
+            return any(
+                t[0] <= cx <= t[0] + t[2] and t[1] <= cy <= t[1] + t[3]
+                for t in (table['bbox'] for table in tables)
+            )
+        
+        for block in extract_text_blocks(page, scale=PAGE_ZOOM):
+            if inside_table(block['bbox']):
+                continue
+            
+            region = DocumentRegion(
+                region_type=RegionType.HEADING if block['is_heading'] else RegionType.TEXT,
+                coordinates=tuple(int(round(v)) for v in block['bbox']),
+                content={'text': block['text'], 'confidence': confidence},
+                confidence=confidence
+            )
+            region.processed_by.append('text_layer')
+            regions.append(region)
+        
+        # Embedded images go to the OCR engines
+        image_regions = []
+        if text_layer['image_regions']:
+            if output_dir:
+                region_dir = os.path.join(output_dir, "regions")
+                os.makedirs(region_dir, exist_ok=True)
+            else:
+                region_dir = tempfile.mkdtemp(prefix="ocr_regions_")
+            
+            for idx, (x0, y0, x1, y1) in enumerate(text_layer['image_regions']):
+                region_image_path = os.path.join(
+                    region_dir,
+                    f"{Path(document_path).stem}_page_{page.number + 1}_image_{idx}.png"
+                )
+                pix = page.get_pixmap(
+                    matrix=fitz.Matrix(PAGE_ZOOM, PAGE_ZOOM),
+                    clip=fitz.Rect(x0, y0, x1, y1)
+                )
+                pix.save(region_image_path)
+                
+                image_regions.append(DocumentRegion(
+                    region_type=RegionType.TEXT,
+                    coordinates=(
+                        int(x0 * PAGE_ZOOM), int(y0 * PAGE_ZOOM),
+                        int((x1 - x0) * PAGE_ZOOM), int((y1 - y0) * PAGE_ZOOM)
+                    ),
+                    image_path=region_image_path
+                ))
+        
+        if image_regions:
+            regions.extend(self._process_regions(image_regions, output_dir))
+        
+        return {
+            "regions": [region.to_dict() for region in regions],
+            "result": self._aggregate_results(regions, document_path)
+        }
+    
     def _get_optimal_engine(self, region: DocumentRegion) -> str:
         """
         Determine the optimal engine for a document region
@@ -942,6 +1182,9 @@ def main():
     parser.add_argument("--engines", help="Comma-separated list of engines to use")
     parser.add_argument("--confidence", type=float, default=0.6, 
                        help="Minimum confidence threshold (0-1)")
+    parser.add_argument("--stream", action="store_true",
+                       help="Write NDJSON page records as pages complete instead of a summary")
+    parser.add_argument("--stream-output", help="Write the NDJSON stream to this file instead of stdout")
     
     args = parser.parse_args()
     
@@ -956,10 +1199,14 @@ def main():
         config['engine_priority'] = engines
     
     # Create orchestrator
-    orchestrator = NeuralOCROrchestrator(config)
-    
-    # Process document
-    result = orchestrator.process_document(args.document_path, args.output_dir)
+    with NeuralOCROrchestrator(config) as orchestrator:
+        # Stream page records if requested
+        if args.stream:
+            orchestrator.stream_document(args.document_path, args.stream_output, args.output_dir)
+            return
+        
+        # Process document
+        result = orchestrator.process_document(args.document_path, args.output_dir)
     
     # Print summary
     print(json.dumps({
@@ -28,13 +28,13 @@ import sys
 import json
 import re
 import argparse
-import numpy as np
-from typing import Dict, List, Any, Tuple, Optional, Union
+from typing import Dict, List, Any, Optional
 import logging
-from pathlib import Path
 import difflib
 import enchant
-from collections import Counter
+
+from compiled_rules import CompiledRuleSet
+from fuzzy_vocabulary import get_vocabulary_index
 
 # Configure logging
 logging.basicConfig(
@@ -93,6 +93,73 @@ except ImportError:
     lang_dicts = None
 
 
+# Script families used by the language model confidence
+LATIN_SCRIPT_LANGUAGES = frozenset(['eng', 'fra', 'deu', 'spa', 'ita', 'por', 'nld', 'dan', 'swe', 'fin', 'ces', 'hun', 'pol', 'ron'])
+CYRILLIC_SCRIPT_LANGUAGES = frozenset(['rus', 'ukr'])
+ASIAN_SCRIPT_LANGUAGES = frozenset(['jpn', 'kor', 'chi_sim', 'chi_tra'])
+RTL_SCRIPT_LANGUAGES = frozenset(['ara', 'heb'])
+
+# Hashed n-gram tables per language (bigrams and the single words that count as half a match)
+_ENGLISH_BIGRAMS = frozenset([
+    "of the", "in the", "to the", "on the", "for the",
+    "with the", "at the", "from the", "by the", "as the",
+    "is a", "is the", "for a", "with a", "on a",
+    "to be", "can be", "will be", "has been", "have been"
+])
+_ROMANCE_BIGRAMS = frozenset([
+    "de la", "dans le", "pour le", "sur le", "avec le",
+    "est un", "est une", "de los", "en el", "con la",
+    "della", "nella", "sono", "para", "como"
+])
+_GERMANIC_BIGRAMS = frozenset([
+    "in der", "auf der", "mit dem", "von dem", "ist ein",
+    "ist eine", "kann sein", "wird sein", "hat ein"
+])
+_DEFAULT_LATIN_BIGRAMS = frozenset([
+    "in the", "of the", "on the", "with the", "for the",
+    "is a", "is the", "to be", "can be", "will be"
+])
+_CYRILLIC_BIGRAMS = frozenset([
+    "в", "на", "с", "для", "из", "по", "от", "к", "о"
+])
+COMMON_BIGRAMS = {
+    'eng': _ENGLISH_BIGRAMS,
+    'fra': _ROMANCE_BIGRAMS, 'ita': _ROMANCE_BIGRAMS, 'por': _ROMANCE_BIGRAMS, 'spa': _ROMANCE_BIGRAMS,
+    'deu': _GERMANIC_BIGRAMS, 'nld': _GERMANIC_BIGRAMS,
+    'rus': _CYRILLIC_BIGRAMS, 'ukr': _CYRILLIC_BIGRAMS
+}
+
+# Hashed character tables for scripts without word boundaries
+_CHINESE_COMMON_CHARS = frozenset("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严首底液官德调随病苏失尔死讲配女黄推显谈罪神艺呢席含企望密批营项防举球英氧势告李台落木帮轮破亚师围注远字材排供河态封另施减树溶怎止案言士均武固叶鱼波视仅费紧爱左章早朝害续轻服试食充兵源判护司足某练差致板田降黑犯负击范继兴似余坚曲输修的故城夫够送笑船占右财吃富春职觉汉画功巴跟虽杂飞检吸助升阳互初创抗考投坏策古径换未跑留钢曾端责站简述钱副尽帝射草冲承独令限阿宣环双请超微让控州良轴找否纪益依优顶础载倒房突坐粉敌略客袁冷胜绝析块剂测丝协重诉念陈仍罗盐友洋错苦夜刑移频逐靠混母短皮终聚汽村云哪既距卫停烈央察烧迅行境若印洲刻括激孔搞甚室待核校散侵句征味护壳志扬忽股探\"`马午。，：；？！")
+_JAPANESE_COMMON_CHARS = frozenset("のはをにたがでしいるもあるからなとでこめくをにまざはよれつそじちかけふぬむゆゐせえてねへめれすうゅうりおきゃょっあいうえおパピプペポカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワガギグゲゴザジズゼゾダヂヅデドバビブベボァィゥェォャュョッ「」。、・")
+_ARABIC_CHARS = frozenset("ابتثجحخدذرزسشصضطظعغفقكلمنهويءآأؤإئةَُِّْٰىًٌٍ٠١٢٣٤٥٦٧٨٩")
+_HEBREW_CHARS = frozenset("אבגדהוזחטיכךלמםנןסעפףצץקרשת")
+COMMON_CHARS = {
+    'chi_sim': _CHINESE_COMMON_CHARS,
+    'chi_tra': _CHINESE_COMMON_CHARS,
+    'jpn': _JAPANESE_COMMON_CHARS,
+    'ara': _ARABIC_CHARS,
+    'heb': _HEBREW_CHARS
+}
+
+# Domain-specific material property corrections
+MATERIAL_PROPERTY_RULES = {
+    'tile': [
+        {'id': 'tile_dimensions', 'pattern': r'(\d+)\s*[xX×]\s*(\d+)(\s*)(mm|cm)?', 'replacement': r'\1×\2\3\4'},
+        {'id': 'tile_pei_rating', 'pattern': r'PEI\s+([I1-5]+)', 'replacement': r'PEI \1'},
+        {'id': 'tile_slip_resistance', 'pattern': r'(?i)slip\s+resistance\s*:?\s*R?(\d+)', 'replacement': r'Slip Resistance: R\1'}
+    ],
+    'stone': [
+        {'id': 'stone_density', 'pattern': r'(?i)density\s*:?\s*(\d+\.?\d*)', 'replacement': r'Density: \1'},
+        {'id': 'stone_absorption', 'pattern': r'(?i)absorption\s*:?\s*(\d+\.?\d*)', 'replacement': r'Absorption: \1'}
+    ],
+    'wood': [
+        {'id': 'wood_moisture', 'pattern': r'(?i)moisture\s*:?\s*(\d+\.?\d*)%?', 'replacement': r'Moisture: \1%'},
+        {'id': 'wood_plank_dimensions', 'pattern': r'(\d+)\s*[xX×]\s*(\d+)\s*[xX×]\s*(\d+)(\s*)(mm|cm)?', 'replacement': r'\1×\2×\3\4\5'}
+    ]
+}
+
+
 class OCRConfidenceScorer:
     """Class for evaluating OCR quality and improving results"""
     
@@ -112,6 +179,7 @@ class OCRConfidenceScorer:
             'multi_language_support': True,  # Enable multi-language support
             'language_detection': True,  # Auto-detect language from content
             'visualization_enabled': True,  # Enable confidence visualization
+            'domain_fuzzy_similarity': 0.8,  # Credit near-miss domain terms above this similarity
             'rule_weights': {
                 'char_confidence': 0.3,
                 'word_recognition': 0.2,
@@ -147,7 +215,14 @@ class OCRConfidenceScorer:
         
         # Load domain-specific dictionaries and rules
         self.domain_dict = self._load_domain_dictionary(self.config['domain'])
+        self.domain_index = get_vocabulary_index(list(self.domain_dict.keys()))
         self.rules = self._load_post_processing_rules(self.config['domain'])
+        
+        # Precompile rules once so only candidate rules run per element
+        self.compiled_rules = CompiledRuleSet(self.rules)
+        self.compiled_property_rules = CompiledRuleSet(
+            MATERIAL_PROPERTY_RULES.get(self.config['domain'], [])
+        )
     
     def _load_domain_dictionary(self, domain: str) -> Dict[str, float]:
         """
@@ -350,16 +425,18 @@ class OCRConfidenceScorer:
         # Extract text elements from OCR data
         text_elements = self._extract_text_elements(ocr_data)
         
+        # Apply post-processing rules to all elements in one batch
+        processed_texts = self._apply_post_processing_rules_batch(
+            [element.get('text', '') for element in text_elements]
+        )
+        
         # Process each text element
         processed_elements = []
         
-        for element in text_elements:
+        for element, processed_text in zip(text_elements, processed_texts):
             # Calculate detailed confidence metrics
             confidence_metrics = self._calculate_confidence_metrics(element)
             
-            # Apply post-processing rules
-            processed_text = self._apply_post_processing_rules(element['text'])
-            
             # Update element
             processed_element = {
                 'text': processed_text,
@@ -728,14 +805,8 @@ class OCRConfidenceScorer:
         if len(text) < 10:
             return 0.7
         
-        # Handle different language families differently
-        latin_script = ['eng', 'fra', 'deu', 'spa', 'ita', 'por', 'nld', 'dan', 'swe', 'fin', 'ces', 'hun', 'pol', 'ron']
-        cyrillic_script = ['rus', 'ukr']
-        asian_script = ['jpn', 'kor', 'chi_sim', 'chi_tra']
-        rtl_script = ['ara', 'heb']
-        
         # Split into words for languages with clear word boundaries
-        if language in latin_script or language in cyrillic_script:
+        if language in LATIN_SCRIPT_LANGUAGES or language in CYRILLIC_SCRIPT_LANGUAGES:
             words = text.lower().split()
             
             # Skip if too few words
@@ -743,42 +814,7 @@ class OCRConfidenceScorer:
                 return 0.7
             
             # Common bigrams by language family
-            common_bigrams = []
-            
-            if language in latin_script:
-                # English and other Latin-script languages
-                if language == 'eng':
-                    common_bigrams = [
-                        "of the", "in the", "to the", "on the", "for the",
-                        "with the", "at the", "from the", "by the", "as the",
-                        "is a", "is the", "for a", "with a", "on a",
-                        "to be", "can be", "will be", "has been", "have been"
-                    ]
-                elif language in ['fra', 'ita', 'por', 'spa']:
-                    # Romance languages
-                    common_bigrams = [
-                        "de la", "dans le", "pour le", "sur le", "avec le",
-                        "est un", "est une", "de los", "en el", "con la",
-                        "della", "nella", "sono", "para", "como"
-                    ]
-                elif language in ['deu', 'nld']:
-                    # Germanic languages
-                    common_bigrams = [
-                        "in der", "auf der", "mit dem", "von dem", "ist ein",
-                        "ist eine", "kann sein", "wird sein", "hat ein"
-                    ]
-                else:
-                    # Default Latin script bigrams as fallback
-                    common_bigrams = [
-                        "in the", "of the", "on the", "with the", "for the",
-                        "is a", "is the", "to be", "can be", "will be"
-                    ]
-                    
-            elif language in cyrillic_script:
-                # Russian and Ukrainian
-                common_bigrams = [
-                    "в", "на", "с", "для", "из", "по", "от", "к", "о"
-                ]
+            common_bigrams = COMMON_BIGRAMS.get(language, _DEFAULT_LATIN_BIGRAMS)
             
             # Count bigrams in text
             bigram_count = 0
@@ -797,69 +833,21 @@ class OCRConfidenceScorer:
             # Text with more common bigrams is more likely to be correct
             return 0.6 + (bigram_ratio * 0.4)  # Base confidence of 0.6, up to 0.4 additional
             
-        # For character-based languages without clear word boundaries
-        elif language in asian_script:
-            # Count common characters instead of bigrams for Asian languages
-            # Simplified implementation - a real system would use language-specific models
-            
-            # Common character patterns
-            if language == 'chi_sim' or language == 'chi_tra':
-                # Common Chinese characters that often appear in formal documents
-                common_chars = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严首底液官德调随病苏失尔死讲配女黄推显谈罪神艺呢席含企望密批营项防举球英氧势告李台落木帮轮破亚师围注远字材排供河态封另施减树溶怎止案言士均武固叶鱼波视仅费紧爱左章早朝害续轻服试食充兵源判护司足某练差致板田降黑犯负击范继兴似余坚曲输修的故城夫够送笑船占右财吃富春职觉汉画功巴跟虽杂飞检吸助升阳互初创抗考投坏策古径换未跑留钢曾端责站简述钱副尽帝射草冲承独令限阿宣环双请超微让控州良轴找否纪益依优顶础载倒房突坐粉敌略客袁冷胜绝析块剂测丝协重诉念陈仍罗盐友洋错苦夜刑移频逐靠混母短皮终聚汽村云哪既距卫停烈央察烧迅行境若印洲刻括激孔搞甚室待核校散侵句征味护壳志扬忽股探"`马午。，：；？！"""
-                
-                # Count common characters and calculate density
+        # For character-based and right-to-left scripts, score by common character density
+        elif language in ASIAN_SCRIPT_LANGUAGES or language in RTL_SCRIPT_LANGUAGES:
+            if language == 'kor':
+                # For Korean, check for Hangul syllable distribution
+                common_count = sum(1 for char in text if '\uac00' <= char <= '\ud7a3')
+            elif language in COMMON_CHARS:
+                common_chars = COMMON_CHARS[language]
                 common_count = sum(1 for char in text if char in common_chars)
-                char_density = common_count / max(1, len(text))
-                
-                # Return confidence based on character density
-                return 0.5 + (char_density * 0.5) 
-                
-            elif language == 'jpn':
-                # Common Japanese characters
-                common_chars = "のはをにたがでしいるもあるからなとでこめくをにまざはよれつそじちかけふぬむゆゐせえてねへめれすうゅうりおきゃょっあいうえおパピプペポカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワガギグゲゴザジズゼゾダヂヅデドバビブベボァィゥェォャュョッ「」。、・"
-                
-                # Count common characters and calculate density
-                common_count = sum(1 for char in text if char in common_chars)
-                char_density = common_count / max(1, len(text))
-                
-                # Return confidence based on character density
-                return 0.5 + (char_density * 0.5) 
-                
-            elif language == 'kor':
-                # For Korean, check for Hangul character distribution
-                hangul_chars = [chr(c) for c in range(0xAC00, 0xD7A4)]
-                
-                # Count Hangul characters and calculate density
-                hangul_count = sum(1 for char in text if char in hangul_chars)
-                char_density = hangul_count / max(1, len(text))
-                
-                # Return confidence based on character density
-                return 0.5 + (char_density * 0.5)
-                
-        # For right-to-left languages
-        elif language in rtl_script:
-            # Check for appropriate character sets
-            if language == 'ara':
-                # Arabic characters
-                arabic_chars = "ابتثجحخدذرزسشصضطظعغفقكلمنهويءآأؤإئةَُِّْٰىًٌٍ٠١٢٣٤٥٦٧٨٩"
-                
-                # Count Arabic characters and calculate density
-                arabic_count = sum(1 for char in text if char in arabic_chars)
-                char_density = arabic_count / max(1, len(text))
-                
-                # Return confidence based on character density  
-                return 0.5 + (char_density * 0.5)
-                
-            elif language == 'heb':
-                # Hebrew characters
-                hebrew_chars = "אבגדהוזחטיכךלמםנןסעפףצץקרשת"
-                
-                # Count Hebrew characters and calculate density
-                hebrew_count = sum(1 for char in text if char in hebrew_chars)
-                char_density = hebrew_count / max(1, len(text))
-                
-                # Return confidence based on character density
-                return 0.5 + (char_density * 0.5)
+            else:
+                return 0.65
+            
+            char_density = common_count / max(1, len(text))
+            
+            # Return confidence based on character density
+            return 0.5 + (char_density * 0.5)
         
         # Default fallback for unsupported languages
         return 0.65
@@ -889,10 +877,22 @@ class OCRConfidenceScorer:
         domain_term_count = 0
         domain_term_weight = 0.0
         
+        # Words that are not exact terms are matched against the fuzzy index,
+        # so OCR-damaged terms ("porce1ain") still count, scaled by similarity
+        near_misses = [word for word in words if word not in self.domain_dict and len(word) > 3]
+        fuzzy_matches = dict(zip(
+            near_misses,
+            self.domain_index.lookup_batch(near_misses, min_similarity=self.config['domain_fuzzy_similarity'])
+        ))
+        
         for word in words:
             if word in self.domain_dict:
                 domain_term_count += 1
                 domain_term_weight += self.domain_dict[word]
+            elif fuzzy_matches.get(word):
+                term, similarity = fuzzy_matches[word][0]
+                domain_term_count += 1
+                domain_term_weight += self.domain_dict[term] * similarity
         
         # Calculate domain term ratio
         domain_ratio = domain_term_count / len(words)
@@ -913,95 +913,87 @@ class OCRConfidenceScorer:
         Returns:
             Processed text
         """
-        if not text:
-            return ""
-        
-        processed_text = text
+        return self._apply_post_processing_rules_batch([text])[0]
+    
+    def _apply_post_processing_rules_batch(self, texts: List[str]) -> List[str]:
+        """
+        Apply post-processing rules to a batch of texts
         
-        # Apply each rule in order
-        for rule in self.rules:
-            pattern = rule['pattern']
-            replacement = rule['replacement']
+        Args:
+            texts: Texts to process
             
-            # Apply the rule
-            processed_text = re.sub(pattern, replacement, processed_text)
+        Returns:
+            Processed texts in input order
+        """
+        processed_texts = [
+            processed for processed, _ in self.compiled_rules.apply_batch(texts)
+        ]
         
         # Apply spell checking corrections for domain-specific terms
         if self.config['spellcheck_enabled']:
-            words = processed_text.split()
-            corrected_words = []
-            
-            for word in words:
-                # Skip short words, numbers, and punctuation
-                if len(word) <= 2 or word.isdigit() or re.match(r'^[.,;:!?]+$', word):
-                    corrected_words.append(word)
-                    continue
-                
-                # Check if word is in domain dictionary
-                if word.lower() in self.domain_dict:
-                    corrected_words.append(word)
-                    continue
-                
-                # Simple spell check
-                if english_dict and not english_dict.check(word):
-                    # Get suggestions
-                    suggestions = english_dict.suggest(word)
-                    
-                    # Use closest suggestion if available
-                    if suggestions:
-                        # Check for close match
-                        match = difflib.get_close_matches(word, suggestions, n=1, cutoff=0.8)
-                        if match:
-                            corrected_words.append(match[0])
-                            continue
-                
-                corrected_words.append(word)
-            
-            processed_text = ' '.join(corrected_words)
+            processed_texts = [self._apply_spelling_corrections(text) for text in processed_texts]
         
         # Check for known material property patterns
-        processed_text = self._fix_material_properties(processed_text)
-        
-        return processed_text
+        return [
+            processed for processed, _ in self.compiled_property_rules.apply_batch(processed_texts)
+        ]
     
-    def _fix_material_properties(self, text: str) -> str:
+    def _apply_spelling_corrections(self, text: str) -> str:
         """
-        Apply corrections to common material property patterns
+        Correct misspelled words that are not domain terms
         
         Args:
             text: Text to process
             
         Returns:
-            Processed text
+            Corrected text
         """
-        # Format depends on domain
-        domain = self.config['domain']
+        if not text:
+            return ""
         
-        if domain == 'tile':
-            # Fix dimension patterns
-            text = re.sub(r'(\d+)\s*[xX×]\s*(\d+)(\s*)(mm|cm)?', r'\1×\2\3\4', text)
-            
-            # Fix PEI ratings
-            text = re.sub(r'PEI\s+([I1-5]+)', r'PEI \1', text)
-            
-            # Fix slip resistance ratings
-            text = re.sub(r'(?i)slip\s+resistance\s*:?\s*R?(\d+)', r'Slip Resistance: R\1', text)
-            
-        elif domain == 'stone':
-            # Fix density values
-            text = re.sub(r'(?i)density\s*:?\s*(\d+\.?\d*)', r'Density: \1', text)
+        english_dict = lang_dicts.get('eng') if lang_dicts else None
+        words = text.split()
+        corrected_words = []
+        
+        for word in words:
+            # Skip short words, numbers, and punctuation
+            if len(word) <= 2 or word.isdigit() or re.match(r'^[.,;:!?]+$', word):
+                corrected_words.append(word)
+                continue
             
-            # Fix absorption values
-            text = re.sub(r'(?i)absorption\s*:?\s*(\d+\.?\d*)', r'Absorption: \1', text)
+            # Check if word is in domain dictionary
+            if word.lower() in self.domain_dict:
+                corrected_words.append(word)
+                continue
             
-        elif domain == 'wood':
-            # Fix moisture content values
-            text = re.sub(r'(?i)moisture\s*:?\s*(\d+\.?\d*)%?', r'Moisture: \1%', text)
+            # Simple spell check
+            if english_dict and not english_dict.check(word):
+                # Get suggestions
+                suggestions = english_dict.suggest(word)
+                
+                # Use closest suggestion if available
+                if suggestions:
+                    # Check for close match
+                    match = difflib.get_close_matches(word, suggestions, n=1, cutoff=0.8)
+                    if match:
+                        corrected_words.append(match[0])
+                        continue
             
-            # Fix plank dimensions
-            text = re.sub(r'(\d+)\s*[xX×]\s*(\d+)\s*[xX×]\s*(\d+)(\s*)(mm|cm)?', r'\1×\2×\3\4\5', text)
+            corrected_words.append(word)
         
-        return text
+        return ' '.join(corrected_words)
+    
+    def _fix_material_properties(self, text: str) -> str:
+        """
+        Apply corrections to common material property patterns
+        
+        Args:
+            text: Text to process
+            
+        Returns:
+            Processed text
+        """
+        return self.compiled_property_rules.apply(text)[0]
     
     def _calculate_document_statistics(self, elements: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -1122,6 +1114,12 @@ class RulesEngine:
         # User rules from file
         if self.config['user_rules_enabled'] and self.config['rules_file']:
             self.rules.extend(self._load_user_rules(self.config['rules_file']))
+        
+        # Compile enabled rules once
+        self.compiled_rules = CompiledRuleSet(
+            self.rules,
+            flags=0 if self.config['case_sensitive'] else re.IGNORECASE
+        )
     
     def _load_system_rules(self) -> List[Dict[str, Any]]:
         """
@@ -1276,24 +1274,13 @@ class RulesEngine:
         while iteration < self.config['max_iterations']:
             text_before = processed_text
             
-            # Apply enabled rules
-            for rule in self.rules:
-                if not rule['enabled']:
-                    continue
-                
-                pattern = rule['pattern']
-                replacement = rule['replacement']
-                flags = 0 if self.config['case_sensitive'] else re.IGNORECASE
-                
-                # Apply the rule
-                new_text = re.sub(pattern, replacement, processed_text, flags=flags)
-                
-                # If text changed, record the rule
-                if new_text != processed_text:
-                    if rule['id'] not in applied_rules:
-                        applied_rules.append(rule['id'])
-                    
-                    processed_text = new_text
+            # Apply enabled candidate rules
+            processed_text, fired_rules = self.compiled_rules.apply(processed_text)
+            
+            # Record rules that changed the text
+            for rule_id in fired_rules:
+                if rule_id not in applied_rules:
+                    applied_rules.append(rule_id)
             
             # If no changes in this iteration, stop
             if processed_text == text_before:
@@ -1310,6 +1297,24 @@ class RulesEngine:
             'applied_rules': applied_rules,
             'changes': changes
         }
+    
+    def process_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Process a batch of texts using rules
+        
+        Args:
+            texts: Texts to process
+            
+        Returns:
+            List of result dictionaries in input order
+        """
+        cache = {}
+        results = []
+        for text in texts:
+            if text not in cache:
+                cache[text] = self.process_text(text)
+            results.append(dict(cache[text]))
+        return results
 
 
 def process_file(input_path: str, output_path: str = None, config: Dict[str, Any] = None) -> Dict[str, Any]:
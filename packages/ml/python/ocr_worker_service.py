@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+"""
+Persistent OCR Worker Service
+
+This module runs the OCR and extraction commands in one long-lived Python
+process, so that requests from the Node.js server no longer pay for a new
+interpreter, the OpenCV/torch imports and model loading every time. Requests
+and responses are JSON lines exchanged over stdin/stdout or a local socket.
+
+Protocol (one JSON object per line):
+    request:  {"id": "r1", "command": "specialized_ocr", "params": {...}}
+    response: {"type": "response", "seq": n, "id": "r1", "status": "ok" | "error"
+               | "cancelled" | "rejected", "result": ..., "error": ...}
+
+Control commands ("health", "cancel" with params.target, "shutdown") are
+answered immediately; all other commands run in a bounded thread pool.
+Only queued requests can be cancelled: each command is one call into an OCR
+component that cannot be interrupted, so a running request always completes.
+
+Key features:
+1. "run_script" runs the main() of an allow-listed OCR script in-process with
+   the same arguments and returns its exit code and stdout
+2. Warm engine instances from EngineManager (optionally loaded at startup) and
+   pooled SpecializedOCR, EnhancedOCR and OCRConfidenceScorer instances
+3. Bounded concurrency with a pending-request limit
+4. Cancellation of queued requests
+5. Health reporting
+6. In stdio mode the protocol streams are moved off file descriptors 0 and 1,
+   so child processes (engine workers, tesseract) cannot read requests or
+   corrupt responses
+
+Usage:
+    python ocr_worker_service.py [--socket PATH | --port PORT] [--max-workers N] [--warm-engines a,b]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import logging
+import importlib
+import threading
+import traceback
+import dataclasses
+import multiprocessing
+import socketserver
+from io import StringIO
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Any, Callable, Optional
+
+from ndjson_stream import NDJSONWriter
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTROL_COMMANDS = ('health', 'cancel', 'shutdown')
+
+# OCR command-line entry points run_script may execute. Each exposes main()
+# and parses sys.argv, so it can share the worker's per-thread stdout and argv;
+# other scripts are run by the caller in their own process.
+SCRIPT_ENTRY_POINTS = (
+    'ocr_confidence_scoring',
+    'specialized_ocr',
+    'enhanced_ocr',
+    'handwriting_recognition',
+    'form_field_extraction'
+)
+
+
+class _ThreadLocalStream:
+    """
+    Stand-in for sys.stdout that sends each thread's output to its own buffer
+    while that thread runs a script, and everything else to a fallback stream
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    @contextmanager
+    def capture(self):
+        """Collect the output of the current thread in a buffer"""
+        buffer = StringIO()
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def _target(self):
+        return getattr(self._local, 'buffer', None) or self._fallback
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._fallback, name)
+
+
+class _ThreadLocalArgv(list):
+    """
+    Stand-in for sys.argv that returns per-thread arguments while a thread
+    runs a script, so concurrent argparse calls see their own command line
+    """
+
+    def __init__(self, default: List[str]):
+        super().__init__(default)
+        self._local = threading.local()
+
+    def _current(self) -> Optional[List[str]]:
+        return getattr(self._local, 'argv', None)
+
+    @contextmanager
+    def use(self, argv: List[str]):
+        """Set the arguments seen by the current thread"""
+        self._local.argv = list(argv)
+        try:
+            yield
+        finally:
+            self._local.argv = None
+
+    def __getitem__(self, index):
+        current = self._current()
+        return current[index] if current is not None else super().__getitem__(index)
+
+    def __len__(self) -> int:
+        current = self._current()
+        return len(current) if current is not None else super().__len__()
+
+    def __iter__(self):
+        current = self._current()
+        return iter(current) if current is not None else super().__iter__()
+
+
+@dataclasses.dataclass
+class _Request:
+    """A request accepted by the service"""
+    request_id: Any
+    command: str
+    writer: NDJSONWriter
+    future: Optional[Future] = None
+    started: Optional[float] = None
+    received: float = dataclasses.field(default_factory=time.time)
+
+
+class OCRWorkerService:
+    """
+    Long-lived worker executing OCR commands for many requests.
+
+    Handlers receive the request parameters and return a JSON-serializable
+    result. A request can be cancelled while it is queued; once a handler
+    has started, the request runs to completion and is answered normally.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the service
+
+        Args:
+            config: Configuration dictionary
+        """
+        self.config = {
+            'max_workers': max(1, multiprocessing.cpu_count() // 2),
+            'max_pending': 64,           # Running plus queued requests
+            'script_dir': SCRIPT_DIR,    # Directory of the run_script entry points
+            'scripts': SCRIPT_ENTRY_POINTS,
+            'engine_manager_config': {},
+            'warm_engines': []           # EngineManager engines loaded at startup
+        }
+
+        if config:
+            self.config.update(config)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config['max_workers'],
+            thread_name_prefix='ocr-worker'
+        )
+        self._lock = threading.Lock()
+        self._requests: Dict[Any, _Request] = {}
+        self._idle_instances: Dict[tuple, queue.Queue] = {}
+        self._instance_counts: Dict[tuple, int] = {}
+        self._engine_manager = None
+        self._closed = threading.Event()
+        self.started_at = time.time()
+
+        self.stats = {
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'rejected': 0
+        }
+
+        self.commands: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            'run_script': self._run_script,
+            'engine': self._run_engine,
+            'specialized_ocr': self._run_specialized_ocr,
+            'enhanced_ocr': self._run_enhanced_ocr,
+            'confidence_scoring': self._run_confidence_scoring
+        }
+
+        if self.config['script_dir'] not in sys.path:
+            sys.path.insert(0, self.config['script_dir'])
+
+    def handle_line(self, line: str, writer: NDJSONWriter):
+        """
+        Handle one request line
+
+        Args:
+            line: JSON request
+            writer: Writer for the responses of this connection
+        """
+        if not line.strip():
+            return
+
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            command = request['command']
+            params = request.get('params') or {}
+        except (ValueError, KeyError, AttributeError) as e:
+            writer.write('response', {'id': None, 'status': 'error', 'error': f"Invalid request: {e}"})
+            return
+
+        if command == 'health':
+            writer.write('response', {'id': request_id, 'status': 'ok', 'result': self.health()})
+        elif command == 'cancel':
+            cancelled = self.cancel(params.get('target'))
+            writer.write('response', {'id': request_id, 'status': 'ok', 'result': {'cancelled': cancelled}})
+        elif command == 'shutdown':
+            writer.write('response', {'id': request_id, 'status': 'ok', 'result': {'shutting_down': True}})
+            self._closed.set()
+        elif command not in self.commands:
+            writer.write('response', {'id': request_id, 'status': 'error', 'error': f"Unknown command: {command}"})
+        else:
+            self.submit(request_id, command, params, writer)
+
+    def submit(self, request_id: Any, command: str, params: Dict[str, Any], writer: NDJSONWriter):
+        """
+        Queue a command for execution
+
+        Args:
+            request_id: Caller's request id
+            command: Command name
+            params: Command parameters
+            writer: Writer for the response
+        """
+        with self._lock:
+            if self._closed.is_set() or len(self._requests) >= self.config['max_pending']:
+                self.stats['rejected'] += 1
+                writer.write('response', {'id': request_id, 'status': 'rejected',
+                                          'error': 'Worker is busy or shutting down'})
+                return
+            if request_id in self._requests:
+                writer.write('response', {'id': request_id, 'status': 'error',
+                                          'error': 'Duplicate request id'})
+                return
+
+            request = _Request(request_id, command, writer)
+            self._requests[request_id] = request
+            request.future = self._executor.submit(self._execute, request, params)
+
+    def _execute(self, request: _Request, params: Dict[str, Any]):
+        """Run a request and write its response"""
+        request.started = time.time()
+        response = {'id': request.request_id}
+
+        try:
+            response['result'] = self.commands[request.command](params)
+            response['status'] = 'ok'
+        except Exception as e:
+            logger.error(f"Request {request.request_id} ({request.command}) failed: {e}")
+            logger.debug(traceback.format_exc())
+            response.update({'status': 'error', 'error': str(e), 'error_type': type(e).__name__})
+
+        response['queue_ms'] = round((request.started - request.received) * 1000.0, 2)
+        response['duration_ms'] = round((time.time() - request.started) * 1000.0, 2)
+
+        with self._lock:
+            self._requests.pop(request.request_id, None)
+            self.stats['completed' if response['status'] == 'ok' else 'failed'] += 1
+
+        request.writer.write('response', response)
+
+    def cancel(self, request_id: Any) -> bool:
+        """
+        Cancel a queued request
+
+        The request is answered as cancelled right away. Running requests
+        cannot be interrupted and are answered when they complete.
+
+        Args:
+            request_id: Id of the request to cancel
+
+        Returns:
+            True if the request was still queued and is now cancelled
+        """
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is None or request.future is None or not request.future.cancel():
+                return False
+            self._requests.pop(request_id, None)
+            self.stats['cancelled'] += 1
+        request.writer.write('response', {'id': request_id, 'status': 'cancelled'})
+        return True
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Report the state of the service
+
+        Returns:
+            Dictionary with uptime, load, counters and warm resources
+        """
+        with self._lock:
+            running = sum(1 for r in self._requests.values() if r.started is not None)
+            queued = len(self._requests) - running
+            warm = {}
+            for (kind, _), count in self._instance_counts.items():
+                warm[kind] = warm.get(kind, 0) + count
+
+        engines = []
+        if self._engine_manager is not None:
+            engines = sorted(self._engine_manager.engine_instances.keys())
+
+        return {
+            'status': 'shutting_down' if self._closed.is_set() else 'ok',
+            'pid': os.getpid(),
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'max_workers': self.config['max_workers'],
+            'max_pending': self.config['max_pending'],
+            'running': running,
+            'queued': queued,
+            **self.stats,
+            'warm_instances': warm,
+            'engines_loaded': engines
+        }
+
+    @contextmanager
+    def _instance(self, kind: str, config: Dict[str, Any], factory: Callable[[], Any]):
+        """
+        Check out a warm instance for a component configuration
+
+        Instances are created on demand, up to one per worker thread and
+        configuration, and reused by later requests.
+        """
+        key = (kind, json.dumps(config or {}, sort_keys=True, default=str))
+
+        with self._lock:
+            idle = self._idle_instances.setdefault(key, queue.Queue())
+            create = idle.empty() and self._instance_counts.get(key, 0) < self.config['max_workers']
+            if create:
+                self._instance_counts[key] = self._instance_counts.get(key, 0) + 1
+
+        if create:
+            try:
+                instance = factory()
+            except Exception:
+                with self._lock:
+                    self._instance_counts[key] -= 1
+                raise
+        else:
+            instance = idle.get()
+
+        try:
+            yield instance
+        finally:
+            idle.put(instance)
+
+    def _get_engine_manager(self):
+        """Create the shared EngineManager on first use"""
+        with self._lock:
+            if self._engine_manager is None:
+                from extensible_engine_manager import EngineManager
+                self._engine_manager = EngineManager(self.config['engine_manager_config'])
+            return self._engine_manager
+
+    def warm_up(self):
+        """Load the configured EngineManager engines in the background"""
+        if not self.config['warm_engines']:
+            return
+
+        def load():
+            manager = self._get_engine_manager()
+            for engine_name in self.config['warm_engines']:
+                try:
+                    manager.get_engine(engine_name)
+                    logger.info(f"Warmed engine {engine_name}")
+                except Exception as e:
+                    logger.warning(f"Could not warm engine {engine_name}: {e}")
+
+        threading.Thread(target=load, name='ocr-worker-warm-up', daemon=True).start()
+
+    def _resolve_script(self, script: str) -> str:
+        """Map a script path or dotted module path to an allow-listed entry point"""
+        name = os.path.basename(script)
+        if name.endswith('.py'):
+            name = name[:-3]
+        elif '/' not in script:
+            name = script.rsplit('.', 1)[-1]
+
+        if name not in self.config['scripts'] or not os.path.isfile(os.path.join(self.config['script_dir'], f"{name}.py")):
+            raise ValueError(f"Script is not served by the worker: {script}")
+        return name
+
+    def _run_script(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run an entry point's main() with command-line arguments
+
+        Params:
+            script: Script path ('packages/ml/python/x.py'), file name or module path
+            args: Command-line arguments
+
+        Returns:
+            Dictionary with 'exit_code' and the captured 'stdout'
+        """
+        module_name = self._resolve_script(params['script'])
+        args = [str(a) for a in params.get('args', [])]
+
+        with self._lock:
+            self._install_script_io(stdout_fallback=sys.stdout)
+
+        module = importlib.import_module(module_name)
+        main = getattr(module, 'main', None)
+        if main is None:
+            raise ValueError(f"Script {module_name} has no main()")
+
+        exit_code = 0
+        with sys.argv.use([f"{module_name}.py", *args]), sys.stdout.capture() as output:
+            try:
+                returned = main()
+                if isinstance(returned, int):
+                    exit_code = returned
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    exit_code = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except Exception as e:
+                logger.error(f"Script {module_name} failed: {e}")
+                traceback.print_exc(file=sys.stderr)
+                exit_code = 1
+
+        return {'exit_code': exit_code, 'stdout': output.getvalue()}
+
+    def _run_engine(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a document with a warm EngineManager engine
+
+        Params:
+            document_path: Document to process
+            engine: Engine name (default engine if omitted)
+            options: Engine options
+        """
+        manager = self._get_engine_manager()
+        result = manager.process_document(params['document_path'], params.get('engine'), params.get('options'))
+        return dataclasses.asdict(result)
+
+    def _run_specialized_ocr(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run SpecializedOCR on an image or PDF
+
+        Params:
+            file_path: Image or PDF to process
+            output_dir: Directory for extracted text and images
+            config: SpecializedOCR configuration
+        """
+        from specialized_ocr import SpecializedOCR
+        config = params.get('config') or {}
+        with self._instance('specialized_ocr', config, lambda: SpecializedOCR(config)) as ocr:
+            return ocr.process_file(params['file_path'], params.get('output_dir'))
+
+    def _run_enhanced_ocr(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run EnhancedOCR on a document
+
+        Params:
+            input_path: Document to process
+            output_dir: Directory for results
+            config: EnhancedOCR configuration
+        """
+        from enhanced_ocr import EnhancedOCR
+        config = params.get('config') or {}
+        with self._instance('enhanced_ocr', config, lambda: EnhancedOCR(config)) as ocr:
+            return ocr.process_document(params['input_path'], params.get('output_dir'))
+
+    def _run_confidence_scoring(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Score and correct an OCR result file
+
+        Params:
+            input_path: OCR result JSON file
+            output_path: Path to save enhanced results
+            config: OCRConfidenceScorer configuration
+        """
+        from ocr_confidence_scoring import OCRConfidenceScorer
+        config = params.get('config') or {}
+
+        with open(params['input_path'], 'r', encoding='utf-8') as f:
+            ocr_data = json.load(f)
+
+        with self._instance('confidence_scoring', config, lambda: OCRConfidenceScorer(config)) as scorer:
+            result = scorer.process_ocr_results(ocr_data)
+            if params.get('output_path'):
+                scorer.save_results(result, params['output_path'])
+        return result
+
+    def serve_stdio(self):
+        """Serve requests from stdin, writing responses to stdout"""
+        requests, responses = _detach_protocol_streams()
+        self._install_script_io(stdout_fallback=sys.stderr)
+
+        self.warm_up()
+        with NDJSONWriter(stream=responses) as writer:
+            writer.write('ready', {'pid': os.getpid(), 'commands': sorted(self.commands) + list(CONTROL_COMMANDS)})
+            for line in requests:
+                self.handle_line(line, writer)
+                if self._closed.is_set():
+                    break
+            self.close()
+
+    def serve_socket(self, path: Optional[str] = None, port: Optional[int] = None):
+        """
+        Serve requests on a Unix domain socket or a local TCP port
+
+        Args:
+            path: Unix socket path
+            port: TCP port on 127.0.0.1 (used when no path is given)
+        """
+        self._install_script_io(stdout_fallback=sys.stdout)
+        self.warm_up()
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                with NDJSONWriter(stream=_SocketTextStream(self.wfile)) as writer:
+                    writer.write('ready', {'pid': os.getpid()})
+                    for raw in self.rfile:
+                        service.handle_line(raw.decode('utf-8'), writer)
+                        if service._closed.is_set():
+                            break
+
+        if path:
+            if os.path.exists(path):
+                os.unlink(path)
+            server = socketserver.ThreadingUnixStreamServer(path, Handler)
+            logger.info(f"OCR worker listening on {path}")
+        else:
+            server = socketserver.ThreadingTCPServer(('127.0.0.1', port), Handler)
+            logger.info(f"OCR worker listening on 127.0.0.1:{port}")
+        server.daemon_threads = True
+
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            self._closed.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            if path and os.path.exists(path):
+                os.unlink(path)
+            self.close()
+
+    def _install_script_io(self, stdout_fallback):
+        """Give script threads their own stdout and argv"""
+        if not isinstance(sys.stdout, _ThreadLocalStream):
+            sys.stdout = _ThreadLocalStream(stdout_fallback)
+        if not isinstance(sys.argv, _ThreadLocalArgv):
+            sys.argv = _ThreadLocalArgv(sys.argv)
+
+    def close(self):
+        """Finish running requests and release warm resources"""
+        self._closed.set()
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            idle_queues = list(self._idle_instances.values())
+            self._idle_instances = {}
+            self._instance_counts = {}
+        for idle in idle_queues:
+            while not idle.empty():
+                instance = idle.get_nowait()
+                if hasattr(instance, 'close'):
+                    instance.close()
+        if self._engine_manager is not None:
+            self._engine_manager.release_all_engines()
+
+
+def _detach_protocol_streams():
+    """
+    Move the stdio protocol off file descriptors 0 and 1
+
+    Child processes inherit fds 0 and 1, so an engine worker or tesseract
+    writing to its stdout would corrupt the response stream. The protocol
+    keeps duplicates of the original descriptors; fd 1 (and sys.stdout) then
+    point to stderr and fd 0 (and sys.stdin) to /dev/null.
+
+    Returns:
+        Tuple of (request stream, response stream)
+    """
+    sys.stdout.flush()
+    requests = os.fdopen(os.dup(0), 'r', encoding='utf-8')
+    responses = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+
+    os.dup2(2, 1)
+    null_fd = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null_fd, 0)
+    os.close(null_fd)
+    sys.stdin = open(os.devnull, 'r')
+    return requests, responses
+
+
+class _SocketTextStream:
+    """Text adapter over a socket's binary write file"""
+
+    def __init__(self, binary):
+        self._binary = binary
+
+    def write(self, text: str) -> int:
+        self._binary.write(text.encode('utf-8'))
+        return len(text)
+
+    def flush(self):
+        self._binary.flush()
+
+
+def main():
+    """Main function to run the OCR worker service"""
+    parser = argparse.ArgumentParser(description="Persistent OCR worker service")
+    parser.add_argument("--socket", help="Serve on this Unix domain socket instead of stdin/stdout")
+    parser.add_argument("--port", type=int, help="Serve on this local TCP port instead of stdin/stdout")
+    parser.add_argument("--max-workers", type=int, help="Requests processed concurrently")
+    parser.add_argument("--max-pending", type=int, help="Running plus queued requests before rejecting")
+    parser.add_argument("--warm-engines", help="Comma-separated EngineManager engines to load at startup")
+
+    args = parser.parse_args()
+
+    config = {}
+    if args.max_workers:
+        config['max_workers'] = args.max_workers
+    if args.max_pending:
+        config['max_pending'] = args.max_pending
+    if args.warm_engines:
+        config['warm_engines'] = [name.strip() for name in args.warm_engines.split(',') if name.strip()]
+
+    # Scripts may import through the project root, as under 'python -m'
+    if os.getcwd() not in sys.path:
+        sys.path.append(os.getcwd())
+
+    service = OCRWorkerService(config)
+
+    if args.socket or args.port:
+        service.serve_socket(path=args.socket, port=args.port)
+    else:
+        service.serve_stdio()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
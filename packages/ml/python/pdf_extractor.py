@@ -7,15 +7,19 @@ It identifies images, extracts them to files, and captures text content
 with their positions.
 
 Usage:
-    python pdf_extractor.py <pdf_path> <output_dir>
+    python pdf_extractor.py <pdf_path> <output_dir> [--stream] [--stream-output PATH]
 
 Arguments:
     pdf_path    Path to the PDF file
     output_dir  Directory to save extracted images and metadata
+    --stream    Write one NDJSON record per page instead of a single JSON
+                document at the end (bounded memory for large catalogs)
 
 Output:
     - Extracted images saved to the output directory
     - JSON file with metadata about extracted images and text
+    - Per-page text-layer classification, so callers only OCR pages
+      without a reliable embedded text layer
 """
 
 import os
@@ -29,49 +33,77 @@ import io
 import numpy as np
 from datetime import datetime
 
+from text_layer import classify_page
+from ndjson_stream import NDJSONWriter
 
-def extract_images_from_pdf(pdf_path, output_dir):
+
+def _document_metadata(doc, pdf_path):
     """
-    Extract images from a PDF file and save them to the output directory.
+    Build the document-level metadata for a PDF.
     
     Args:
+        doc: Open PyMuPDF document
         pdf_path (str): Path to the PDF file
-        output_dir (str): Directory to save extracted images
         
     Returns:
-        dict: Extraction results with image metadata and text content
+        dict: Filename, page count, extraction time and document info
     """
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Open the PDF
-    doc = fitz.open(pdf_path)
-    
-    # Prepare result structure
     result = {
-        "images": [],
-        "text": [],
-        "metadata": {
-            "filename": os.path.basename(pdf_path),
-            "page_count": len(doc),
-            "extraction_time": datetime.now().isoformat(),
-        }
+        "filename": os.path.basename(pdf_path),
+        "page_count": len(doc),
+        "extraction_time": datetime.now().isoformat(),
     }
     
     # Extract document metadata if available
     metadata = doc.metadata
     if metadata:
-        result["metadata"]["title"] = metadata.get("title", "")
-        result["metadata"]["author"] = metadata.get("author", "")
-        result["metadata"]["subject"] = metadata.get("subject", "")
-        result["metadata"]["keywords"] = metadata.get("keywords", "")
-        result["metadata"]["creator"] = metadata.get("creator", "")
-        result["metadata"]["producer"] = metadata.get("producer", "")
+        result["title"] = metadata.get("title", "")
+        result["author"] = metadata.get("author", "")
+        result["subject"] = metadata.get("subject", "")
+        result["keywords"] = metadata.get("keywords", "")
+        result["creator"] = metadata.get("creator", "")
+        result["producer"] = metadata.get("producer", "")
     
-    # Process each page
+    return result
+
+
+def iter_pdf_pages(doc, output_dir):
+    """
+    Extract text and images one page at a time.
+    
+    Only the current page is held in memory; images are written to the
+    output directory as they are found.
+    
+    Args:
+        doc: Open PyMuPDF document
+        output_dir (str): Directory to save extracted images
+        
+    Yields:
+        dict: Page record with 'page', 'text_layer', 'text' and 'images'
+    """
     for page_num, page in enumerate(doc):
+        page_record = {
+            "page": page_num + 1,
+            "text_layer": None,
+            "text": [],
+            "images": []
+        }
+        
         # Extract text with positions
-        text_blocks = page.get_text("dict")["blocks"]
+        page_dict = page.get_text("dict")
+        text_blocks = page_dict["blocks"]
+        
+        # Classify the page so that only pages without a usable text layer are OCR'd
+        text_layer = classify_page(page, page_dict=page_dict)
+        page_record["text_layer"] = {
+            "page": page_num + 1,
+            "has_text_layer": text_layer["has_text_layer"],
+            "needs_ocr": not text_layer["has_text_layer"],
+            "reason": text_layer["reason"],
+            "text_coverage": text_layer["text_coverage"],
+            "image_coverage": text_layer["image_coverage"]
+        }
+        
         for block in text_blocks:
             if "lines" in block:
                 for line in block["lines"]:
@@ -85,7 +117,7 @@ def extract_images_from_pdf(pdf_path, output_dir):
                                 x0, y0, x1, y1 = span["bbox"]
                                 height = page.rect.height
                                 
-                                result["text"].append({
+                                page_record["text"].append({
                                     "page": page_num + 1,
                                     "content": text_content,
                                     "coordinates": {
@@ -99,6 +131,9 @@ def extract_images_from_pdf(pdf_path, output_dir):
                                     "color": span.get("color", 0)
                                 })
         
+        # Release the parsed text before the images are decoded
+        del page_dict, text_blocks
+        
         # Extract images
         image_list = page.get_images(full=True)
         
@@ -140,7 +175,7 @@ def extract_images_from_pdf(pdf_path, output_dir):
                 page_height = page.rect.height
                 
                 # Add image metadata to result
-                result["images"].append({
+                page_record["images"].append({
                     "id": image_id,
                     "path": image_path,
                     "page": page_num + 1,
@@ -154,6 +189,42 @@ def extract_images_from_pdf(pdf_path, output_dir):
                         "height": y1 - y0
                     }
                 })
+        
+        yield page_record
+
+
+def extract_images_from_pdf(pdf_path, output_dir):
+    """
+    Extract images from a PDF file and save them to the output directory.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        output_dir (str): Directory to save extracted images
+        
+    Returns:
+        dict: Extraction results with image metadata and text content
+    """
+    # Ensure output directory exists
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Open the PDF
+    doc = fitz.open(pdf_path)
+    
+    # Prepare result structure
+    result = {
+        "images": [],
+        "text": [],
+        "pages": [],
+        "metadata": _document_metadata(doc, pdf_path)
+    }
+    
+    # Process each page
+    for page_record in iter_pdf_pages(doc, output_dir):
+        result["pages"].append(page_record["text_layer"])
+        result["text"].extend(page_record["text"])
+        result["images"].extend(page_record["images"])
+    
+    result["metadata"]["text_layer_pages"] = sum(1 for p in result["pages"] if p["has_text_layer"])
     
     # Close the document
     doc.close()
@@ -166,14 +237,78 @@ def extract_images_from_pdf(pdf_path, output_dir):
     return result
 
 
+def stream_pdf_extraction(pdf_path, output_dir, output=None):
+    """
+    Extract a PDF page by page, writing one NDJSON record per page.
+    
+    Emits a 'document' record with the metadata, one 'page' record per page
+    (in the same shape as iter_pdf_pages yields) and a final 'summary'
+    record. Nothing is accumulated, so memory stays bounded by the largest
+    page regardless of the page count.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        output_dir (str): Directory to save extracted images
+        output (str): NDJSON output path, or None for stdout
+        
+    Returns:
+        dict: The summary record
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    summary = {
+        "page_count": 0,
+        "text_layer_pages": 0,
+        "image_count": 0,
+        "text_count": 0
+    }
+    
+    with NDJSONWriter(output) as writer:
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            writer.write_error(e)
+            raise
+        
+        try:
+            writer.write("document", {"metadata": _document_metadata(doc, pdf_path)})
+            
+            for page_record in iter_pdf_pages(doc, output_dir):
+                writer.write("page", page_record)
+                summary["page_count"] += 1
+                summary["text_layer_pages"] += int(page_record["text_layer"]["has_text_layer"])
+                summary["image_count"] += len(page_record["images"])
+                summary["text_count"] += len(page_record["text"])
+        except Exception as e:
+            writer.write_error(e, page=summary["page_count"] + 1)
+            raise
+        finally:
+            doc.close()
+        
+        writer.write("summary", summary)
+    
+    return summary
+
+
 def main():
     """Main function to parse arguments and run the extraction"""
     parser = argparse.ArgumentParser(description="Extract images and text from PDF files")
     parser.add_argument("pdf_path", help="Path to the PDF file")
     parser.add_argument("output_dir", help="Directory to save extracted images")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write NDJSON records page by page instead of one JSON result")
+    parser.add_argument("--stream-output", help="Write the NDJSON stream to this file instead of stdout")
     
     args = parser.parse_args()
     
+    if args.stream:
+        try:
+            stream_pdf_extraction(args.pdf_path, args.output_dir, args.stream_output)
+        except Exception as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        return
+    
     try:
         result = extract_images_from_pdf(args.pdf_path, args.output_dir)
         # Print the result as JSON to stdout for the Node.js process to capture
@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+Async PostgREST Data Access
+
+This module provides the non-blocking data-access layer used by the
+knowledge base and vector search clients. Requests go to Supabase's
+PostgREST endpoint through one pooled async HTTP client instead of the
+synchronous supabase-py `.execute()`, so concurrent RAG requests no longer
+block the event loop for each other's network round trips.
+
+Key features:
+1. Pooled keep-alive HTTP/2 connections (httpx) with a bounded pool size
+2. Per-call timeouts
+3. Coalescing of identical in-flight requests into one round trip
+4. Table selects with PostgREST filters, ordering and limits, and RPC calls
+5. supabase-py fallback that runs the blocking calls in worker threads
+6. Local mock PostgREST server and benchmark for offline testing
+
+Usage:
+    python postgrest_async.py --benchmark [--requests 50] [--latency-ms 40]
+"""
+
+import os
+import re
+import sys
+import json
+import copy
+import time
+import asyncio
+import argparse
+import importlib.util
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+from typing import Dict, List, Any, Tuple, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('postgrest_async')
+
+# Try to import httpx
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logger.warning("httpx library not found, falling back to supabase-py in worker threads. Please install it: pip install 'httpx[http2]'")
+
+# Try to import supabase-py (fallback transport)
+try:
+    from supabase import create_client
+    SUPABASE_AVAILABLE = True
+except ImportError:
+    SUPABASE_AVAILABLE = False
+
+# A filter is (column, operator, value), e.g. ("material_id", "in", ["a", "b"])
+Filter = Tuple[str, str, Any]
+
+
+class PostgrestError(Exception):
+    """Error response from PostgREST"""
+
+    def __init__(self, message: str, status_code: int, details: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+def _format_value(value: Any) -> str:
+    """Format a filter value for a PostgREST query string"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return 'null'
+    text = str(value)
+    # Values with reserved characters are quoted inside lists
+    if re.search(r'[,.:()"\s]', text):
+        text = '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+
+def build_select_params(
+    columns: str = '*',
+    filters: Optional[List[Filter]] = None,
+    order: Optional[str] = None,
+    desc: bool = False,
+    limit: Optional[int] = None
+) -> List[Tuple[str, str]]:
+    """
+    Build the query parameters of a PostgREST select
+
+    Supported operators are the PostgREST ones (eq, neq, gt, gte, lt, lte,
+    like, ilike, is, in) plus text search: 'fts', 'plfts', 'phfts' and
+    'wfts', whose value is a (config, query) pair.
+
+    Args:
+        columns: Select expression
+        filters: Column filters
+        order: Column to order by
+        desc: Order descending
+        limit: Maximum number of rows
+
+    Returns:
+        List of (name, value) query parameters
+    """
+    params = [('select', columns)]
+
+    for column, operator, value in filters or []:
+        if operator == 'in':
+            params.append((column, f"in.({','.join(_format_value(v) for v in value)})"))
+        elif operator in ('fts', 'plfts', 'phfts', 'wfts'):
+            config, query = value
+            params.append((column, f"{operator}({config}).{query}" if config else f"{operator}.{query}"))
+        else:
+            params.append((column, f"{operator}.{value if not isinstance(value, bool) else _format_value(value)}"))
+
+    if order:
+        params.append(('order', f"{order}.{'desc' if desc else 'asc'}"))
+    if limit is not None:
+        params.append(('limit', str(int(limit))))
+
+    return params
+
+
+class AsyncPostgrestClient:
+    """
+    Async client for a Supabase PostgREST endpoint.
+
+    The pooled HTTP client is bound to the event loop that first uses it;
+    call aclose() before using the client from another loop. Identical
+    requests that are in flight at the same time share a single round trip;
+    each caller receives its own copy of the rows.
+    """
+
+    def __init__(self, supabase_url: str, supabase_key: str, config: Dict[str, Any] = None):
+        """
+        Initialize the client
+
+        Args:
+            supabase_url: Supabase project URL (or a PostgREST base URL ending in /rest/v1)
+            supabase_key: Supabase API key
+            config: Configuration dictionary
+        """
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx library is not installed.")
+
+        self.config = {
+            'timeout': 10.0,                 # Seconds per call
+            'connect_timeout': 5.0,
+            'max_connections': 20,
+            'max_keepalive_connections': 10,
+            'keepalive_expiry': 30.0,
+            'http2': True,
+            'coalesce_requests': True
+        }
+        self.config.update(config or {})
+
+        base_url = supabase_url.rstrip('/')
+        if not base_url.endswith('/rest/v1'):
+            base_url += '/rest/v1'
+        self.base_url = base_url
+        self.headers = {
+            'apikey': supabase_key,
+            'Authorization': f"Bearer {supabase_key}",
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+
+        self._client = None
+        self._client_loop = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.stats = {
+            'requests': 0,
+            'round_trips': 0,
+            'coalesced': 0,
+            'errors': 0,
+            'timeouts': 0
+        }
+
+    def _get_client(self):
+        """Get the pooled HTTP client, creating it on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._client_loop is not loop:
+            # Its connections belong to the other loop and can only be closed there
+            raise RuntimeError("AsyncPostgrestClient is bound to another event loop; "
+                               "call aclose() on that loop first or use one client per loop")
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                http2=self.config['http2'] and importlib.util.find_spec('h2') is not None,
+                timeout=httpx.Timeout(self.config['timeout'], connect=self.config['connect_timeout']),
+                limits=httpx.Limits(
+                    max_connections=self.config['max_connections'],
+                    max_keepalive_connections=self.config['max_keepalive_connections'],
+                    keepalive_expiry=self.config['keepalive_expiry']
+                )
+            )
+            self._client_loop = loop
+            self._inflight = {}
+        return self._client
+
+    async def select(
+        self,
+        table: str,
+        columns: str = '*',
+        filters: Optional[List[Filter]] = None,
+        order: Optional[str] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Select rows from a table
+
+        Args:
+            table: Table name
+            columns: Select expression
+            filters: Column filters (see build_select_params)
+            order: Column to order by
+            desc: Order descending
+            limit: Maximum number of rows
+            timeout: Seconds before the call fails (default from config)
+
+        Returns:
+            List of rows
+        """
+        params = build_select_params(columns, filters, order, desc, limit)
+        return await self._request('GET', f"/{table}", params=params, timeout=timeout)
+
+    async def rpc(self, function: str, params: Dict[str, Any],
+                  timeout: Optional[float] = None) -> Any:
+        """
+        Call a database function
+
+        Args:
+            function: Function name
+            params: Function arguments
+            timeout: Seconds before the call fails (default from config)
+
+        Returns:
+            The function result (rows for set-returning functions)
+        """
+        return await self._request('POST', f"/rpc/{function}", body=params, timeout=timeout)
+
+    async def _request(self, method: str, path: str, params: List[Tuple[str, str]] = None,
+                       body: Any = None, timeout: Optional[float] = None) -> Any:
+        """Send a request, sharing the round trip with identical in-flight requests"""
+        self.stats['requests'] += 1
+        client = self._get_client()
+
+        if not self.config['coalesce_requests']:
+            return await self._send(client, method, path, params, body, timeout)
+
+        key = json.dumps([method, path, params or [], body, timeout], sort_keys=True, default=str)
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.stats['coalesced'] += 1
+            return copy.deepcopy(await asyncio.shield(shared))
+
+        future = asyncio.ensure_future(self._send(client, method, path, params, body, timeout))
+        self._inflight[key] = future
+        try:
+            return copy.deepcopy(await asyncio.shield(future))
+        finally:
+            if future.done() and self._inflight.get(key) is future:
+                del self._inflight[key]
+            elif not future.done():
+                # The originating caller was cancelled; release the key once the call ends
+                future.add_done_callback(lambda f: self._inflight.pop(key, None) if self._inflight.get(key) is f else None)
+
+    async def _send(self, client, method: str, path: str, params: List[Tuple[str, str]],
+                    body: Any, timeout: Optional[float]) -> Any:
+        """Perform one HTTP round trip"""
+        self.stats['round_trips'] += 1
+        try:
+            response = await client.request(
+                method, path,
+                params=params,
+                json=body,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            )
+        except httpx.TimeoutException as e:
+            self.stats['timeouts'] += 1
+            raise asyncio.TimeoutError(f"PostgREST {method} {path} timed out") from e
+
+        if response.status_code >= 400:
+            self.stats['errors'] += 1
+            try:
+                details = response.json()
+            except ValueError:
+                details = response.text
+            message = details.get('message') if isinstance(details, dict) else str(details)
+            raise PostgrestError(f"PostgREST {method} {path} failed ({response.status_code}): {message}",
+                                 response.status_code, details)
+
+        if not response.content:
+            return []
+        return response.json()
+
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+
+
+class ThreadedSupabaseClient:
+    """
+    Fallback with the AsyncPostgrestClient interface for environments
+    without httpx: requests are built with supabase-py and its blocking
+    `.execute()` runs in a worker thread, so the event loop is not blocked.
+    """
+
+    _TEXT_SEARCH_TYPES = {'fts': None, 'plfts': 'plain', 'phfts': 'phrase', 'wfts': 'websearch'}
+
+    def __init__(self, supabase_url: str, supabase_key: str, config: Dict[str, Any] = None):
+        """
+        Initialize the client
+
+        Args:
+            supabase_url: Supabase project URL
+            supabase_key: Supabase API key
+            config: Configuration dictionary
+        """
+        if not SUPABASE_AVAILABLE:
+            raise ImportError("Supabase client library is not installed.")
+
+        self.config = {'timeout': 10.0}
+        self.config.update(config or {})
+        self.supabase = create_client(supabase_url, supabase_key)
+        self.stats = {'requests': 0, 'round_trips': 0, 'coalesced': 0, 'errors': 0, 'timeouts': 0}
+
+    async def _execute(self, query_builder, timeout: Optional[float]) -> Any:
+        """Run a blocking supabase-py request in a worker thread"""
+        self.stats['requests'] += 1
+        self.stats['round_trips'] += 1
+        try:
+            response = await asyncio.wait_for(
+                asyncio.to_thread(query_builder.execute),
+                timeout if timeout is not None else self.config['timeout']
+            )
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+        if getattr(response, 'error', None):
+            self.stats['errors'] += 1
+            raise PostgrestError(str(response.error), 400, response.error)
+        return response.data or []
+
+    async def select(
+        self,
+        table: str,
+        columns: str = '*',
+        filters: Optional[List[Filter]] = None,
+        order: Optional[str] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Select rows from a table (see AsyncPostgrestClient.select)"""
+        query_builder = self.supabase.table(table).select(columns)
+        for column, operator, value in filters or []:
+            if operator == 'in':
+                query_builder = query_builder.in_(column, value)
+            elif operator in self._TEXT_SEARCH_TYPES:
+                config, query = value
+                query_builder = query_builder.text_search(
+                    column, query, config=config, type=self._TEXT_SEARCH_TYPES[operator])
+            else:
+                query_builder = query_builder.filter(column, operator, value)
+        if order:
+            query_builder = query_builder.order(order, desc=desc)
+        if limit is not None:
+            query_builder = query_builder.limit(limit)
+        return await self._execute(query_builder, timeout)
+
+    async def rpc(self, function: str, params: Dict[str, Any],
+                  timeout: Optional[float] = None) -> Any:
+        """Call a database function (see AsyncPostgrestClient.rpc)"""
+        return await self._execute(self.supabase.rpc(function, params), timeout)
+
+    async def aclose(self):
+        """Nothing to release; kept for interface parity"""
+
+
+def create_data_client(supabase_url: Optional[str] = None, supabase_key: Optional[str] = None,
+                       config: Dict[str, Any] = None):
+    """
+    Create the async data client for a Supabase project
+
+    Uses the pooled httpx client when available and the threaded
+    supabase-py fallback otherwise.
+
+    Args:
+        supabase_url: Supabase project URL. Reads from SUPABASE_URL env var if None.
+        supabase_key: Supabase service role key. Reads from SUPABASE_KEY env var if None.
+        config: Client configuration
+
+    Returns:
+        AsyncPostgrestClient or ThreadedSupabaseClient
+    """
+    url = supabase_url or os.environ.get('SUPABASE_URL')
+    key = supabase_key or os.environ.get('SUPABASE_KEY')
+
+    if not url or not key:
+        raise ValueError("Supabase URL and Key must be provided or set as environment variables (SUPABASE_URL, SUPABASE_KEY).")
+
+    if HTTPX_AVAILABLE:
+        return AsyncPostgrestClient(url, key, config)
+    if SUPABASE_AVAILABLE:
+        return ThreadedSupabaseClient(url, key, config)
+    raise ImportError("Neither httpx nor the Supabase client library is installed.")
+
+
+class MockPostgrestServer:
+    """
+    Minimal in-process PostgREST stand-in for tests and benchmarks.
+
+    Serves rows from in-memory tables with eq/gte/lte/gt/lt/in filters,
+    ordering and limits, and RPC functions from Python callables, each
+    after a fixed artificial latency.
+    """
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]] = None,
+                 functions: Dict[str, Any] = None, latency: float = 0.0):
+        """
+        Initialize the server
+
+        Args:
+            tables: Rows per table name
+            functions: RPC callables taking the JSON arguments
+            latency: Seconds to wait before answering each request
+        """
+        self.tables = tables or {}
+        self.functions = functions or {}
+        self.latency = latency
+        self.request_count = 0
+        self.requests: List[Tuple[str, str]] = []  # (method, path with query string)
+        self.connections = set()  # Client addresses, one per TCP connection
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockPostgrestServer':
+        """Start serving on a free local port"""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload: Any):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _record(self):
+                mock.request_count += 1
+                mock.requests.append((self.command, self.path))
+                mock.connections.add(self.client_address)
+                time.sleep(mock.latency)
+
+            def do_GET(self):
+                self._record()
+                parsed = urlparse(self.path)
+                table = parsed.path.rsplit('/', 1)[-1]
+                if table not in mock.tables:
+                    self._reply(404, {'message': f"relation \"{table}\" does not exist"})
+                    return
+                self._reply(200, mock.query(mock.tables[table], parse_qsl(parsed.query)))
+
+            def do_POST(self):
+                self._record()
+                function = urlparse(self.path).path.rsplit('/', 1)[-1]
+                length = int(self.headers.get('Content-Length') or 0)
+                args = json.loads(self.rfile.read(length) or b'{}')
+                if function not in mock.functions:
+                    self._reply(404, {'message': f"function {function} does not exist"})
+                    return
+                self._reply(200, mock.functions[function](args))
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @staticmethod
+    def query(rows: List[Dict[str, Any]], params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Apply PostgREST filters, ordering and limit to rows"""
+        order, limit = None, None
+        for name, value in params:
+            if name == 'select':
+                continue
+            if name == 'order':
+                order = value.split('.')
+                continue
+            if name == 'limit':
+                limit = int(value)
+                continue
+
+            operator, _, operand = value.partition('.')
+            if operator == 'in':
+                allowed = {v.strip('"') for v in operand.strip('()').split(',')}
+                rows = [r for r in rows if str(r.get(name)) in allowed]
+            elif operator == 'eq':
+                rows = [r for r in rows if str(r.get(name)) == operand]
+            elif operator in ('gte', 'lte', 'gt', 'lt'):
+                bound = float(operand)
+                compare = {
+                    'gte': lambda v: v >= bound, 'lte': lambda v: v <= bound,
+                    'gt': lambda v: v > bound, 'lt': lambda v: v < bound
+                }[operator]
+                rows = [r for r in rows if r.get(name) is not None and compare(float(r[name]))]
+
+        if order:
+            rows = sorted(rows, key=lambda r: r.get(order[0]) or 0, reverse=order[-1] == 'desc')
+        return rows[:limit] if limit is not None else rows
+
+
+def run_benchmark(requests: int = 50, latency_ms: float = 40.0) -> Dict[str, Any]:
+    """
+    Compare blocking lookups with the async client against a mock server
+
+    Args:
+        requests: Concurrent lookups per scenario
+        latency_ms: Artificial server latency per request
+
+    Returns:
+        Dictionary with wall times and round-trip counts
+    """
+    tables = {
+        'knowledge_entries': [
+            {'id': f"k{i}", 'material_id': f"m{i % 20}", 'confidence': 0.5 + (i % 5) / 10}
+            for i in range(200)
+        ]
+    }
+    server = MockPostgrestServer(tables, latency=latency_ms / 1000.0).start()
+
+    async def scenario(client: AsyncPostgrestClient, distinct: bool) -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            client.select('knowledge_entries', filters=[
+                ('material_id', 'in', [f"m{(i if distinct else 0) % 20}"]),
+                ('confidence', 'gte', 0.7)
+            ])
+            for i in range(requests)
+        ])
+        return time.perf_counter() - start
+
+    async def run() -> Dict[str, Any]:
+        client = AsyncPostgrestClient(server.url, 'benchmark-key', {'http2': False})
+        results = {}
+
+        # Blocking baseline: one round trip after another, as with a synchronous .execute()
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.select('knowledge_entries', filters=[('material_id', 'in', [f"m{i % 20}"])])
+        results['sequential_s'] = time.perf_counter() - start
+
+        before = server.request_count
+        results['concurrent_distinct_s'] = await scenario(client, distinct=True)
+        results['concurrent_distinct_round_trips'] = server.request_count - before
+
+        before = server.request_count
+        results['concurrent_identical_s'] = await scenario(client, distinct=False)
+        results['concurrent_identical_round_trips'] = server.request_count - before
+
+        results['client_stats'] = dict(client.stats)
+        await client.aclose()
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        server.stop()
+
+    results.update({'requests': requests, 'latency_ms': latency_ms})
+    return results
+
+
+def main():
+    """Main function to run the async data-access benchmark"""
+    parser = argparse.ArgumentParser(description="Async PostgREST data access")
+    parser.add_argument("--benchmark", action="store_true", help="Run the mock-server benchmark")
+    parser.add_argument("--requests", type=int, default=50, help="Concurrent lookups per scenario")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Mock server latency per request")
+
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    print(json.dumps(run_benchmark(args.requests, args.latency_ms), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
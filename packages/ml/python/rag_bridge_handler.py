@@ -4,19 +4,27 @@ RAG Bridge Handler
 
 This script acts as a communication bridge between the TypeScript RAG Bridge and the Python RAG components.
 It parses command line arguments and routes requests to the appropriate RAG system components.
+
+With --mode serve it runs as a long-running server instead: the RAG service is
+created once and requests arrive as JSON lines on a local socket, so models and
+caches stay warm across requests.
+
+Usage:
+    python rag_bridge_handler.py --mode query --query '{"query": "..."}'
+    python rag_bridge_handler.py --mode serve [--socket PATH | --port PORT] [--config JSON]
 """
 
 import argparse
+import asyncio
 import json
 import logging
 import os
 import sys
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 # Import RAG components
 try:
-    from enhanced_text_embeddings import TextEmbeddingGenerator
     from hybrid_retriever import HybridRetriever
     from context_assembler import ContextAssembler
     from generative_enhancer import GenerativeEnhancer
@@ -26,6 +34,12 @@ except ImportError as e:
     print("Please ensure the RAG components are in the Python path.")
     sys.exit(1)
 
+try:
+    from enhanced_text_embeddings import TextEmbeddingGenerator
+except ImportError:
+    # Checked by verify mode; the server can run with an injected generator
+    TextEmbeddingGenerator = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -69,7 +83,8 @@ def handle_verify_modules(args: argparse.Namespace) -> None:
         logger.info("Verifying RAG modules...")
         
         # Check each module by accessing a key class/function
-        TextEmbeddingGenerator
+        if TextEmbeddingGenerator is None:
+            raise ImportError("enhanced_text_embeddings provides no TextEmbeddingGenerator")
         HybridRetriever
         ContextAssembler
         GenerativeEnhancer
@@ -173,20 +188,15 @@ def handle_streaming(args: argparse.Namespace) -> None:
         import asyncio
         
         async def stream_results():
-            # Start event
-            print(json.dumps({
-                "event": "start",
-                "timestamp": time.time()
-            }))
-            
-            # Use the streaming_query method
-            async for chunk in rag_service.streaming_query(
+            # One NDJSON event per line, written as soon as it is produced;
+            # streaming_query sends the start event itself
+            async for line in rag_service.streaming_query(
                 query_text=query_text,
                 filters=filters,
                 options=options,
                 session_id=session_id
             ):
-                print(chunk)
+                sys.stdout.write(line)
                 # Flush to ensure output is sent immediately
                 sys.stdout.flush()
         
@@ -395,6 +405,344 @@ def handle_optimize(args: argparse.Namespace) -> None:
             }
         }))
 
+class _Connection:
+    """Response writer of one client connection"""
+    
+    def __init__(self, writer: asyncio.StreamWriter):
+        self._writer = writer
+        self._lock = asyncio.Lock()
+        self.seq = 0
+        self.tasks: Dict[Any, asyncio.Task] = {}
+    
+    async def send(self, record_type: str, record: Dict[str, Any]) -> None:
+        """Write one JSON line, waiting while the client is not reading"""
+        async with self._lock:
+            payload = {"type": record_type, "seq": self.seq, **record}
+            self.seq += 1
+            self._writer.write((json.dumps(payload, default=str) + "\n").encode("utf-8"))
+            await self._writer.drain()
+    
+    def close(self) -> None:
+        """Close the connection, ending a pending read with end of file"""
+        self._writer.close()
+
+
+class RAGBridgeServer:
+    """
+    Long-running RAG bridge serving requests on a local socket.
+    
+    The RAG service is created once, so embedding models, the sparse
+    vectorizer, the response cache and the knowledge caches stay warm
+    across requests. Requests run concurrently as tasks on one event loop.
+    
+    Protocol (one JSON object per line):
+        request:  {"id": "r1", "command": "query", "params": {...}}
+        event:    {"type": "event", "seq": n, "id": "r1", "event": {...}}
+                  (streaming requests, one per stream event)
+        response: {"type": "response", "seq": n, "id": "r1", "status": "ok" | "error"
+                   | "cancelled" | "rejected", "result": ..., "error": ...}
+    
+    Commands and params (named as in the CLI query objects):
+        query:       query, filters, options, sessionId
+        streaming:   query, filters, options, sessionId
+        batch:       queries, sessionId, maxConcurrent
+        optimize:    materialId
+        stats, clear_cache, health
+        cancel:      target (id of a running request on the same connection)
+        shutdown
+    
+    Request ids only need to be unique per connection.
+    """
+    
+    def __init__(self, rag_service: MaterialRAGService, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the server.
+        
+        Args:
+            rag_service: RAG service shared by all requests
+            config: Configuration parameters
+        """
+        self.config = {
+            "max_pending": 64,                   # Running requests before rejecting
+            "max_line_bytes": 16 * 1024 * 1024   # Longest request line (large batches)
+        }
+        if config:
+            self.config.update(config)
+        
+        self.rag_service = rag_service
+        self.started_at = time.time()
+        self._running: Dict[Tuple[_Connection, Any], asyncio.Task] = {}
+        self._connections: Dict[_Connection, asyncio.Task] = {}  # Connection -> its handler task
+        self._closed: Optional[asyncio.Event] = None
+        
+        self.stats = {
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected": 0
+        }
+        
+        self.commands = {
+            "query": self._query,
+            "streaming": self._streaming,
+            "batch": self._batch,
+            "optimize": self._optimize,
+            "stats": self._stats,
+            "clear_cache": self._clear_cache,
+            "health": self._health
+        }
+    
+    async def handle_line(self, line: str, connection: _Connection) -> None:
+        """
+        Handle one request line.
+        
+        Args:
+            line: JSON request
+            connection: Connection the request arrived on
+        """
+        if not line.strip():
+            return
+        
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            command = request["command"]
+            params = request.get("params") or {}
+        except (ValueError, KeyError, AttributeError) as e:
+            await connection.send("response", {"id": None, "status": "error", "error": f"Invalid request: {e}"})
+            return
+        
+        if command == "cancel":
+            task = connection.tasks.get(params.get("target"))
+            if task is not None:
+                task.cancel()
+            await connection.send("response", {"id": request_id, "status": "ok", "result": {"cancelled": task is not None}})
+        elif command == "shutdown":
+            await connection.send("response", {"id": request_id, "status": "ok", "result": {"shutting_down": True}})
+            self._closed.set()
+        elif command not in self.commands:
+            await connection.send("response", {"id": request_id, "status": "error", "error": f"Unknown command: {command}"})
+        elif self._closed.is_set() or len(self._running) >= self.config["max_pending"]:
+            self.stats["rejected"] += 1
+            await connection.send("response", {"id": request_id, "status": "rejected", "error": "Server is busy or shutting down"})
+        elif request_id is None or request_id in connection.tasks:
+            await connection.send("response", {"id": request_id, "status": "error", "error": "Missing or duplicate request id"})
+        else:
+            task = asyncio.ensure_future(self._execute(request_id, command, params, connection))
+            self._running[(connection, request_id)] = task
+            connection.tasks[request_id] = task
+            
+            def forget(task):
+                self._running.pop((connection, request_id), None)
+                connection.tasks.pop(request_id, None)
+                if task.cancelled():
+                    # Cancelled before it started, so _execute did not answer
+                    self.stats["cancelled"] += 1
+                    asyncio.ensure_future(connection.send("response", {"id": request_id, "status": "cancelled"}))
+            task.add_done_callback(forget)
+    
+    async def _execute(self, request_id: Any, command: str, params: Dict[str, Any], connection: _Connection) -> None:
+        """Run a request and write its response"""
+        started = time.time()
+        response = {"id": request_id}
+        
+        try:
+            response["result"] = await self.commands[command](params, request_id, connection)
+            response["status"] = "ok"
+            self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            response["status"] = "cancelled"
+            self.stats["cancelled"] += 1
+        except Exception as e:
+            logger.error(f"Request {request_id} ({command}) failed: {e}")
+            response.update({"status": "error", "error": str(e), "error_type": type(e).__name__})
+            self.stats["failed"] += 1
+        
+        response["duration_ms"] = round((time.time() - started) * 1000.0, 2)
+        try:
+            await connection.send("response", response)
+        except (ConnectionError, RuntimeError) as e:
+            logger.warning(f"Could not send response to request {request_id}: {e}")
+    
+    async def _query(self, params: Dict[str, Any], request_id: Any, connection: _Connection) -> Dict[str, Any]:
+        if not params.get("query"):
+            raise ValueError("Query text is required")
+        return await self.rag_service.query(
+            query_text=params["query"],
+            filters=params.get("filters"),
+            options=params.get("options"),
+            session_id=params.get("sessionId")
+        )
+    
+    async def _streaming(self, params: Dict[str, Any], request_id: Any, connection: _Connection) -> Dict[str, Any]:
+        if not params.get("query"):
+            raise ValueError("Query text is required")
+        events = 0
+        async for event in self.rag_service.stream_events(
+            query_text=params["query"],
+            filters=params.get("filters"),
+            options=params.get("options"),
+            session_id=params.get("sessionId")
+        ):
+            await connection.send("event", {"id": request_id, "event": event})
+            events += 1
+        return {"events": events}
+    
+    async def _batch(self, params: Dict[str, Any], request_id: Any, connection: _Connection) -> List[Dict[str, Any]]:
+        queries = params.get("queries")
+        if not isinstance(queries, list):
+            raise ValueError("Queries must be a list")
+        max_concurrent = params.get("maxConcurrent")
+        return await self.rag_service.batch_query(
+            queries=queries,
+            session_id=params.get("sessionId"),
+            max_concurrent=int(max_concurrent) if max_concurrent else None
+        )
+    
+    async def _optimize(self, params: Dict[str, Any], request_id: Any, connection: _Connection) -> Dict[str, Any]:
+        if not params.get("materialId"):
+            raise ValueError("Material ID parameter is required")
+        return await self.rag_service.optimize_for_material(params["materialId"])
+    
+    async def _stats(self, params: Dict[str, Any], request_id: Any, connection: _Connection) -> Dict[str, Any]:
+        return self.rag_service.get_usage_statistics()
+    
+    async def _clear_cache(self, params: Dict[str, Any], request_id: Any, connection: _Connection) -> Dict[str, Any]:
+        self.rag_service.clear_cache()
+        return {"status": "success", "message": "Cache cleared successfully"}
+    
+    async def _health(self, params: Dict[str, Any], request_id: Any, connection: _Connection) -> Dict[str, Any]:
+        health = self.rag_service.get_health_status()
+        health["server"] = {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "running": len(self._running),
+            "max_pending": self.config["max_pending"],
+            **self.stats
+        }
+        return health
+    
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        Read one request line.
+        
+        Args:
+            reader: Connection reader
+            
+        Returns:
+            The line (empty at end of file), or None if it exceeded the
+            reader's limit; such a line is skipped up to its newline
+        """
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            overrun = e
+        
+        # Unlike readline, readuntil leaves the buffer intact, so the rest of
+        # the line can be dropped without mistaking its tail for a request
+        while overrun is not None:
+            try:
+                await reader.readexactly(overrun.consumed)
+                await reader.readuntil(b"\n")
+                overrun = None
+            except asyncio.LimitOverrunError as e:
+                overrun = e
+            except asyncio.IncompleteReadError:
+                break
+        return None
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one client connection"""
+        connection = _Connection(writer)
+        self._connections[connection] = asyncio.current_task()
+        try:
+            await connection.send("ready", {"pid": os.getpid(), "commands": sorted(self.commands) + ["cancel", "shutdown"]})
+            while not self._closed.is_set():
+                line = await self._read_request(reader)
+                if line is None:
+                    await connection.send("response", {
+                        "id": None,
+                        "status": "error",
+                        "error": f"Request line exceeds {self.config['max_line_bytes']} bytes"
+                    })
+                    continue
+                if not line:
+                    break
+                await self.handle_line(line.decode("utf-8", errors="replace"), connection)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Client connection lost: {e}")
+        finally:
+            if self._closed.is_set():
+                # Shutting down: answer the requests still running
+                await asyncio.gather(*list(connection.tasks.values()), return_exceptions=True)
+            else:
+                # Nobody is left to read the responses of this connection
+                for task in list(connection.tasks.values()):
+                    task.cancel()
+            self._connections.pop(connection, None)
+            writer.close()
+    
+    async def serve(self, path: Optional[str] = None, port: Optional[int] = None) -> None:
+        """
+        Serve requests on a Unix domain socket or a local TCP port until shutdown.
+        
+        Args:
+            path: Unix socket path
+            port: TCP port on 127.0.0.1 (used when no path is given)
+        """
+        self._closed = asyncio.Event()
+        if path:
+            if os.path.exists(path):
+                os.unlink(path)
+            server = await asyncio.start_unix_server(self._handle_connection, path=path, limit=self.config["max_line_bytes"])
+            logger.info(f"RAG bridge listening on {path}")
+        else:
+            server = await asyncio.start_server(self._handle_connection, host="127.0.0.1", port=port,
+                                                limit=self.config["max_line_bytes"])
+            logger.info(f"RAG bridge listening on 127.0.0.1:{port}")
+        
+        try:
+            await self._closed.wait()
+        finally:
+            server.close()
+            # Let running requests finish
+            if self._running:
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+            # Idle clients are blocked reading; closing their connections ends their handlers
+            handlers = list(self._connections.values())
+            for connection in list(self._connections):
+                connection.close()
+            if handlers:
+                await asyncio.gather(*handlers, return_exceptions=True)
+            await server.wait_closed()
+            if path and os.path.exists(path):
+                os.unlink(path)
+
+def handle_serve(args: argparse.Namespace) -> None:
+    """
+    Run the bridge as a long-running server.
+    
+    Args:
+        args: Command line arguments
+    """
+    if not args.socket and not args.port:
+        raise ValueError("--socket or --port is required in serve mode")
+    
+    # Load the models and caches once, before accepting requests
+    config = json.loads(args.config) if args.config else None
+    server = RAGBridgeServer(
+        get_rag_service(config),
+        {"max_pending": int(args.maxPending)} if args.maxPending else None
+    )
+    
+    try:
+        asyncio.run(server.serve(path=args.socket, port=args.port))
+    except KeyboardInterrupt:
+        pass
+
 def main():
     """
     Main entry point.
@@ -407,6 +755,9 @@ def main():
     parser.add_argument("--sessionId", help="Session ID")
     parser.add_argument("--maxConcurrent", help="Maximum concurrent requests")
     parser.add_argument("--materialId", help="Material ID")
+    parser.add_argument("--socket", help="Unix domain socket path (serve mode)")
+    parser.add_argument("--port", type=int, help="Local TCP port (serve mode)")
+    parser.add_argument("--maxPending", help="Running requests before rejecting (serve mode)")
     
     args = parser.parse_args()
     
@@ -429,6 +780,8 @@ def main():
         handle_update_config(args)
     elif args.mode == "optimize":
         handle_optimize(args)
+    elif args.mode == "serve":
+        handle_serve(args)
     else:
         logger.error(f"Unknown mode: {args.mode}")
         print(json.dumps({
@@ -22,6 +22,7 @@ Options:
     --language       OCR language (default: eng, can use multiple with +)
     --datasheet-type Type of datasheet (tile, stone, wood, etc.)
     --confidence     Minimum confidence threshold (0-100)
+    --stream         For PDFs, write one NDJSON record per page to stdout
 """
 
 import os
@@ -32,12 +33,18 @@ import cv2
 import numpy as np
 import pytesseract
 from PIL import Image
-import fitz  # PyMuPDF
-from typing import Dict, List, Any, Tuple, Optional, Union
+from typing import Dict, List, Any, Tuple, Optional, Union, Iterator
 import re
 import logging
 from pathlib import Path
 import tempfile
+import multiprocessing
+
+from tesseract_pool import get_tesseract_pool
+from table_cell_ocr import TableCellOCR, detect_table_grid, grid_cells, assemble_table
+from document_context import DocumentContext
+from ndjson_stream import NDJSONWriter
+from text_layer import extract_tables, DEFAULT_TEXT_LAYER_CONFIG
 
 # Configure logging
 logging.basicConfig(
@@ -140,7 +147,9 @@ class SpecializedOCR:
             'extraction_mode': 'structured',
             'table_detection': True,
             'form_field_detection': True,
-            'dictionary_boost': True
+            'dictionary_boost': True,
+            'use_text_layer': True,  # Skip OCR on pages with a reliable embedded text layer
+            'table_ocr_workers': multiprocessing.cpu_count()  # Parallel table-cell recognition
         }
         
         if config:
@@ -148,6 +157,22 @@ class SpecializedOCR:
         
         # Verify Tesseract is installed and languages are available
         self._verify_tesseract_setup()
+        
+        # Warm tesseract handles shared with the other OCR components
+        self.tesseract_pool = get_tesseract_pool()
+        
+        # Table cells are recognized in parallel batches
+        self.table_ocr = TableCellOCR({'max_workers': self.config['table_ocr_workers']})
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Shut down the table-cell OCR workers"""
+        self.table_ocr.close()
     
     def _verify_tesseract_setup(self):
         """Verify Tesseract is properly installed and configured"""
@@ -164,13 +189,15 @@ class SpecializedOCR:
             if lang not in available_langs:
                 logger.warning(f"Language '{lang}' is not available in Tesseract. OCR for this language may fail.")
     
-    def process_file(self, file_path: str, output_dir: str = None) -> Dict[str, Any]:
+    def process_file(self, file_path: str, output_dir: str = None,
+                     context: DocumentContext = None) -> Dict[str, Any]:
         """
         Process a file (image or PDF) with specialized OCR
         
         Args:
             file_path: Path to the image or PDF file
             output_dir: Directory to save extracted text and images
+            context: Shared document context for PDFs (opened here if not given)
             
         Returns:
             Dictionary with OCR results and metadata
@@ -187,163 +214,42 @@ class SpecializedOCR:
         
         if file_ext in ['.pdf']:
             # Process PDF file
-            return self.process_pdf(file_path, output_dir)
+            return self.process_pdf(file_path, output_dir, context)
         elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff']:
             # Process image file
             return self.process_image(file_path, output_dir)
         else:
             raise ValueError(f"Unsupported file type: {file_ext}")
     
-    def process_pdf(self, pdf_path: str, output_dir: str = None) -> Dict[str, Any]:
+    def process_pdf(self, pdf_path: str, output_dir: str = None,
+                    context: DocumentContext = None) -> Dict[str, Any]:
         """
         Process a PDF file with specialized OCR
         
         Args:
             pdf_path: Path to the PDF file
             output_dir: Directory to save extracted text and images
+            context: Shared document context (opened here if not given)
             
         Returns:
             Dictionary with OCR results and metadata
         """
         logger.info(f"Processing PDF: {pdf_path}")
         
-        # Open the PDF
-        doc = fitz.open(pdf_path)
+        # Open the PDF once; page rasters and line masks are shared through the context
+        owns_context = context is None
+        if owns_context:
+            context = DocumentContext(pdf_path, dpi=self.config['dpi'])
         
-        # Create temporary directory for extracted images
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Process each page
+        try:
+            doc = context.document
+            
+            # Process each page; a shared context keeps its page cache for the other components
             results = []
             form_fields = []
             
-            for page_num, page in enumerate(doc):
-                page_result = {
-                    'page_number': page_num + 1,
-                    'width': page.rect.width,
-                    'height': page.rect.height,
-                    'text_blocks': [],
-                    'tables': [],
-                    'images': []
-                }
-                
-                # Check if PDF has form fields
-                if self.config['form_field_detection']:
-                    fields = page.widgets()
-                    page_form_fields = []
-                    
-                    for field in fields:
-                        field_info = {
-                            'name': field.field_name,
-                            'type': field.field_type_string,
-                            'value': field.field_value,
-                            'rect': list(field.rect),
-                            'page': page_num + 1
-                        }
-                        page_form_fields.append(field_info)
-                    
-                    form_fields.extend(page_form_fields)
-                    page_result['form_fields'] = page_form_fields
-                
-                # Extract images from the page
-                image_list = page.get_images(full=True)
-                
-                for img_idx, img_info in enumerate(image_list):
-                    xref = img_info[0]
-                    base_img = doc.extract_image(xref)
-                    
-                    if not base_img:
-                        continue
-                    
-                    image_bytes = base_img["image"]
-                    image_ext = base_img["ext"]
-                    image_filename = f"page_{page_num+1}_img_{img_idx+1}.{image_ext}"
-                    image_path = os.path.join(temp_dir, image_filename)
-                    
-                    # Save the image
-                    with open(image_path, "wb") as img_file:
-                        img_file.write(image_bytes)
-                    
-                    # Process the image with OCR
-                    try:
-                        image_result = self.process_image(image_path)
-                        
-                        # Get image position on the page
-                        rect = page.get_image_bbox(xref)
-                        
-                        if rect:
-                            image_result['coordinates'] = {
-                                'x': rect[0],
-                                'y': rect[1],
-                                'width': rect[2] - rect[0],
-                                'height': rect[3] - rect[1]
-                            }
-                        
-                        page_result['images'].append(image_result)
-                        
-                        # Save processed image if output_dir is specified
-                        if output_dir:
-                            output_image_path = os.path.join(output_dir, image_filename)
-                            with open(output_image_path, "wb") as img_file:
-                                img_file.write(image_bytes)
-                    except Exception as e:
-                        logger.error(f"Error processing image {image_path}: {e}")
-                
-                # Extract text directly from the PDF
-                page_text = page.get_text("dict")
-                
-                # Process text blocks
-                if 'blocks' in page_text:
-                    for block in page_text['blocks']:
-                        # Process only text blocks
-                        if 'lines' in block:
-                            block_text = []
-                            block_bbox = block['bbox']
-                            
-                            for line in block['lines']:
-                                if 'spans' in line:
-                                    line_text = []
-                                    
-                                    for span in line['spans']:
-                                        if span['text'].strip():
-                                            line_text.append(span['text'])
-                                    
-                                    if line_text:
-                                        block_text.append(' '.join(line_text))
-                            
-                            if block_text:
-                                # Determine block type based on content and position
-                                block_type = self._classify_text_block(' '.join(block_text), block_bbox)
-                                
-                                text_block = {
-                                    'text': ' '.join(block_text),
-                                    'type': block_type,
-                                    'bbox': block_bbox,
-                                    'confidence': 0.95  # Directly extracted text usually has high confidence
-                                }
-                                
-                                page_result['text_blocks'].append(text_block)
-                
-                # Apply specialized OCR to detect tables and complex layouts
-                if self.config['table_detection']:
-                    # Convert page to image for table detection
-                    pix = page.get_pixmap(dpi=300)
-                    page_image_path = os.path.join(temp_dir, f"page_{page_num+1}.png")
-                    pix.save(page_image_path)
-                    
-                    # Detect tables in the page image
-                    tables = self._detect_tables(page_image_path)
-                    
-                    for table_idx, table in enumerate(tables):
-                        # Extract table region
-                        table_image_path = os.path.join(temp_dir, f"page_{page_num+1}_table_{table_idx+1}.png")
-                        self._extract_region(page_image_path, table_image_path, table['bbox'])
-                        
-                        # Process table with OCR
-                        table_result = self._process_table(table_image_path)
-                        table_result['bbox'] = table['bbox']
-                        
-                        page_result['tables'].append(table_result)
-                
+            for page_result in self.iter_pdf_pages(pdf_path, output_dir, context, release_pages=owns_context):
+                form_fields.extend(page_result.get('form_fields', []))
                 results.append(page_result)
             
             # Compile final results
@@ -351,15 +257,10 @@ class SpecializedOCR:
                 'filename': os.path.basename(pdf_path),
                 'path': pdf_path,
                 'page_count': len(doc),
+                'text_layer_pages': sum(1 for r in results if r['extraction_method'] == 'text_layer'),
                 'pages': results,
                 'form_fields': form_fields,
-                'metadata': {
-                    'title': doc.metadata.get('title', ''),
-                    'author': doc.metadata.get('author', ''),
-                    'subject': doc.metadata.get('subject', ''),
-                    'keywords': doc.metadata.get('keywords', ''),
-                    'producer': doc.metadata.get('producer', '')
-                },
+                'metadata': self._pdf_metadata(doc),
                 'languages_detected': self._detect_languages([r['text_blocks'] for r in results]),
                 'processing_config': self.config
             }
@@ -371,6 +272,293 @@ class SpecializedOCR:
                     json.dump(final_result, f, indent=2, ensure_ascii=False)
             
             return final_result
+        finally:
+            if owns_context:
+                context.close()
+    
+    def iter_pdf_pages(self, pdf_path: str, output_dir: str = None,
+                       context: DocumentContext = None,
+                       release_pages: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Process a PDF page by page
+        
+        Each page result is yielded as soon as it is complete, so callers can
+        forward it and drop it instead of holding the whole document.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output_dir: Directory to save extracted images
+            context: Shared document context (opened here if not given)
+            release_pages: Drop each page's cached rasters once it is yielded
+            
+        Yields:
+            Page result dictionaries in the 'pages' format of process_pdf
+        """
+        owns_context = context is None
+        if owns_context:
+            context = DocumentContext(pdf_path, dpi=self.config['dpi'])
+        
+        try:
+            # Create temporary directory for extracted images
+            with tempfile.TemporaryDirectory() as temp_dir:
+                for page_num in context.pages():
+                    page_result = self._process_pdf_page(context, page_num, temp_dir, output_dir)
+                    if release_pages:
+                        context.release_page(page_num)
+                    yield page_result
+        finally:
+            if owns_context:
+                context.close()
+    
+    def stream_pdf(self, pdf_path: str, output: str = None,
+                   output_dir: str = None) -> Dict[str, Any]:
+        """
+        Process a PDF and write the results as NDJSON, one record per page
+        
+        Emits a 'document' record, a 'page' record per page (with the page's
+        detected languages) and a closing 'summary' record. Nothing is kept
+        between pages, so memory does not grow with the page count.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output: NDJSON output path, or None for stdout
+            output_dir: Directory to save extracted images
+            
+        Returns:
+            The summary record
+        """
+        logger.info(f"Streaming PDF: {pdf_path}")
+        
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        summary = {
+            'page_count': 0,
+            'text_layer_pages': 0,
+            'tables_found': 0,
+            'form_fields_found': 0,
+            'languages_detected': []
+        }
+        language_pages = {}
+        
+        with NDJSONWriter(output) as writer:
+            try:
+                context = DocumentContext(pdf_path, dpi=self.config['dpi'])
+            except Exception as e:
+                writer.write_error(e)
+                raise
+            
+            try:
+                writer.write('document', {
+                    'filename': os.path.basename(pdf_path),
+                    'path': pdf_path,
+                    'page_count': len(context.document),
+                    'metadata': self._pdf_metadata(context.document)
+                })
+                
+                for page_result in self.iter_pdf_pages(pdf_path, output_dir, context, release_pages=True):
+                    languages = self._detect_languages(page_result['text_blocks'])
+                    page_result['languages_detected'] = languages
+                    writer.write('page', page_result)
+                    
+                    summary['page_count'] += 1
+                    summary['text_layer_pages'] += int(page_result['extraction_method'] == 'text_layer')
+                    summary['tables_found'] += len(page_result['tables'])
+                    summary['form_fields_found'] += len(page_result.get('form_fields', []))
+                    for lang in languages:
+                        language_pages[lang] = language_pages.get(lang, 0) + 1
+            except Exception as e:
+                writer.write_error(e, page=summary['page_count'] + 1)
+                raise
+            finally:
+                context.close()
+            
+            # Languages ordered by the number of pages they were detected on
+            summary['languages_detected'] = sorted(language_pages, key=lambda lang: -language_pages[lang])
+            writer.write('summary', summary)
+        
+        return summary
+    
+    def _pdf_metadata(self, doc) -> Dict[str, str]:
+        """
+        Get the document information of a PDF
+        
+        Args:
+            doc: PyMuPDF document
+            
+        Returns:
+            Dictionary with title, author, subject, keywords and producer
+        """
+        return {
+            'title': doc.metadata.get('title', ''),
+            'author': doc.metadata.get('author', ''),
+            'subject': doc.metadata.get('subject', ''),
+            'keywords': doc.metadata.get('keywords', ''),
+            'producer': doc.metadata.get('producer', '')
+        }
+    
+    def _process_pdf_page(self, context: DocumentContext, page_num: int,
+                          temp_dir: str, output_dir: str = None) -> Dict[str, Any]:
+        """
+        Process a single PDF page
+        
+        Args:
+            context: Document context of the PDF
+            page_num: Zero-based page index
+            temp_dir: Directory for images extracted from the page
+            output_dir: Directory to save extracted images
+            
+        Returns:
+            Page result dictionary
+        """
+        doc = context.document
+        dpi = self.config['dpi']
+        
+        page = context.page(page_num)
+        page_result = {
+            'page_number': page_num + 1,
+            'width': page.rect.width,
+            'height': page.rect.height,
+            'text_blocks': [],
+            'tables': [],
+            'images': []
+        }
+        
+        # Route born-digital pages around OCR
+        text_layer = context.text_layer(page_num)
+        use_text_layer = self.config['use_text_layer'] and text_layer['has_text_layer']
+        page_result['extraction_method'] = 'text_layer' if use_text_layer else 'ocr'
+        page_result['text_layer'] = {k: v for k, v in text_layer.items() if k != 'image_regions'}
+        min_image_area = DEFAULT_TEXT_LAYER_CONFIG['min_image_region_ratio'] * page.rect.get_area()
+        
+        # Check if PDF has form fields
+        if self.config['form_field_detection']:
+            fields = page.widgets()
+            page_form_fields = []
+            
+            for field in fields:
+                field_info = {
+                    'name': field.field_name,
+                    'type': field.field_type_string,
+                    'value': field.field_value,
+                    'rect': list(field.rect),
+                    'page': page_num + 1
+                }
+                page_form_fields.append(field_info)
+            
+            page_result['form_fields'] = page_form_fields
+        
+        # Extract images from the page
+        image_list = page.get_images(full=True)
+        
+        for img_idx, img_info in enumerate(image_list):
+            xref = img_info[0]
+            
+            # On text-layer pages only images large enough to carry text are OCR'd
+            if use_text_layer:
+                image_rect = page.get_image_bbox(img_info)
+                if image_rect.is_empty or image_rect.get_area() < min_image_area:
+                    continue
+            
+            base_img = doc.extract_image(xref)
+            
+            if not base_img:
+                continue
+            
+            image_bytes = base_img["image"]
+            image_ext = base_img["ext"]
+            image_filename = f"page_{page_num+1}_img_{img_idx+1}.{image_ext}"
+            image_path = os.path.join(temp_dir, image_filename)
+            
+            # Save the image
+            with open(image_path, "wb") as img_file:
+                img_file.write(image_bytes)
+            
+            # Process the image with OCR
+            try:
+                image_result = self.process_image(image_path)
+                
+                # Get image position on the page
+                rect = page.get_image_bbox(xref)
+                
+                if rect:
+                    image_result['coordinates'] = {
+                        'x': rect[0],
+                        'y': rect[1],
+                        'width': rect[2] - rect[0],
+                        'height': rect[3] - rect[1]
+                    }
+                
+                page_result['images'].append(image_result)
+                
+                # Save processed image if output_dir is specified
+                if output_dir:
+                    output_image_path = os.path.join(output_dir, image_filename)
+                    with open(output_image_path, "wb") as img_file:
+                        img_file.write(image_bytes)
+            except Exception as e:
+                logger.error(f"Error processing image {image_path}: {e}")
+        
+        # Extract text directly from the PDF
+        page_text = context.text_dict(page_num)
+        
+        # Process text blocks
+        if 'blocks' in page_text:
+            for block in page_text['blocks']:
+                # Process only text blocks
+                if 'lines' in block:
+                    block_text = []
+                    block_bbox = block['bbox']
+                    
+                    for line in block['lines']:
+                        if 'spans' in line:
+                            line_text = []
+                            
+                            for span in line['spans']:
+                                if span['text'].strip():
+                                    line_text.append(span['text'])
+                            
+                            if line_text:
+                                block_text.append(' '.join(line_text))
+                    
+                    if block_text:
+                        # Determine block type based on content and position
+                        block_type = self._classify_text_block(' '.join(block_text), block_bbox)
+                        
+                        text_block = {
+                            'text': ' '.join(block_text),
+                            'type': block_type,
+                            'bbox': block_bbox,
+                            'confidence': 0.95  # Directly extracted text usually has high confidence
+                        }
+                        
+                        page_result['text_blocks'].append(text_block)
+        
+        # Apply specialized OCR to detect tables and complex layouts
+        if self.config['table_detection']:
+            # Born-digital tables come straight from the text layer (in page pixels)
+            text_tables = extract_tables(page, scale=dpi / 72.0) if use_text_layer else None
+            
+            if text_tables is not None:
+                page_result['tables'].extend(text_tables)
+            else:
+                # Rasterized page and line masks come from the shared context
+                page_image = context.image(page_num, dpi)
+                
+                # Detect tables in the page image
+                tables = self._detect_tables(
+                    page_image, line_masks=context.line_masks(page_num, dpi, blur=False)
+                )
+                
+                for table in tables:
+                    # Process table region with OCR
+                    x, y, w, h = table['bbox']
+                    table_result = self._process_table(page_image[y:y+h, x:x+w])
+                    table_result['bbox'] = table['bbox']
+                    
+                    page_result['tables'].append(table_result)
+        
+        return page_result
     
     def process_image(self, image_path: str, output_dir: str = None) -> Dict[str, Any]:
         """
@@ -405,16 +593,11 @@ class SpecializedOCR:
             region_type = region['type']
             region_bbox = region['bbox']
             
-            # Extract region image
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                region_image_path = temp_file.name
-            
-            self._extract_region(preprocessed_path, region_image_path, region_bbox)
-            
             # Process region based on its type
             if region_type == 'table':
-                # Process as table
-                table_result = self._process_table(region_image_path)
+                # Process as table directly from the loaded image
+                x, y, w, h = region_bbox
+                table_result = self._process_table(image[y:y+h, x:x+w])
                 table_result['bbox'] = region_bbox
                 processed_regions.append({
                     'type': 'table',
@@ -423,8 +606,9 @@ class SpecializedOCR:
                 })
             else:
                 # Process text with appropriate settings for the region type
+                x, y, w, h = region_bbox
                 ocr_result = self._perform_ocr(
-                    region_image_path,
+                    image[y:y+h, x:x+w],
                     self.config['languages'],
                     region_type
                 )
@@ -435,9 +619,6 @@ class SpecializedOCR:
                     'confidence': ocr_result['confidence'],
                     'bbox': region_bbox
                 })
-            
-            # Clean up temporary file
-            os.unlink(region_image_path)
         
         # Check for handwriting if enabled
         handwriting_regions = []
@@ -445,15 +626,10 @@ class SpecializedOCR:
             handwriting_regions = self._detect_handwriting(preprocessed_path)
             
             for hw_region in handwriting_regions:
-                # Extract handwriting region
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                    hw_image_path = temp_file.name
-                
-                self._extract_region(preprocessed_path, hw_image_path, hw_region['bbox'])
-                
                 # Process handwriting with specialized settings
+                x, y, w, h = hw_region['bbox']
                 hw_result = self._perform_ocr(
-                    hw_image_path,
+                    image[y:y+h, x:x+w],
                     self.config['languages'],
                     'handwriting'
                 )
@@ -464,9 +640,6 @@ class SpecializedOCR:
                     'confidence': hw_result['confidence'],
                     'bbox': hw_region['bbox']
                 })
-                
-                # Clean up temporary file
-                os.unlink(hw_image_path)
         
         # Detect form fields if enabled
         form_fields = []
@@ -474,28 +647,20 @@ class SpecializedOCR:
             form_fields = self._detect_form_fields(preprocessed_path)
             
             for field in form_fields:
-                # Extract field region
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                    field_image_path = temp_file.name
-                
-                self._extract_region(preprocessed_path, field_image_path, field['bbox'])
-                
                 # Process field with OCR
+                x, y, w, h = field['bbox']
                 field_result = self._perform_ocr(
-                    field_image_path,
+                    image[y:y+h, x:x+w],
                     self.config['languages'],
                     'form_field'
                 )
                 
                 field['value'] = field_result['text']
                 field['confidence'] = field_result['confidence']
-                
-                # Clean up temporary file
-                os.unlink(field_image_path)
         
         # Process the entire image as fallback and for comparison
         full_ocr_result = self._perform_ocr(
-            preprocessed_path,
+            image,
             self.config['languages'],
             'full_page'
         )
@@ -731,36 +896,44 @@ class SpecializedOCR:
         
         return regions
     
-    def _detect_tables(self, image_path: str) -> List[Dict[str, Any]]:
+    def _detect_tables(self, image: Union[str, np.ndarray],
+                       line_masks: Tuple[np.ndarray, np.ndarray] = None) -> List[Dict[str, Any]]:
         """
         Detect tables in an image
         
         Args:
-            image_path: Path to the image
+            image: Image as numpy array or path
+            line_masks: Precomputed (horizontal, vertical) line masks, e.g.
+                from a DocumentContext
             
         Returns:
             List of detected tables with coordinates
         """
-        # Load the image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY_INV, 11, 2
-        )
-        
-        # Detect horizontal and vertical lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-        
-        horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-        vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+        if line_masks is not None:
+            horizontal_lines, vertical_lines = line_masks
+        else:
+            # Load the image
+            if isinstance(image, str):
+                image_path = image
+                image = cv2.imread(image_path)
+                if image is None:
+                    raise ValueError(f"Failed to load image: {image_path}")
+            
+            # Convert to grayscale
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            
+            # Apply adaptive thresholding
+            thresh = cv2.adaptiveThreshold(
+                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+                cv2.THRESH_BINARY_INV, 11, 2
+            )
+            
+            # Detect horizontal and vertical lines
+            horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+            vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+            
+            horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
+            vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
         
         # Combine horizontal and vertical lines
         table_mask = cv2.add(horizontal_lines, vertical_lines)
@@ -807,20 +980,23 @@ class SpecializedOCR:
         # Save the region
         cv2.imwrite(output_path, region)
     
-    def _process_table(self, table_image_path: str) -> Dict[str, Any]:
+    def _process_table(self, table_image: Union[str, np.ndarray]) -> Dict[str, Any]:
         """
         Process a table image with OCR
         
         Args:
-            table_image_path: Path to the table image
+            table_image: Table image as numpy array or path
             
         Returns:
             Dictionary with table data
         """
         # Load the image
-        image = cv2.imread(table_image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {table_image_path}")
+        if isinstance(table_image, str):
+            image = cv2.imread(table_image)
+            if image is None:
+                raise ValueError(f"Failed to load image: {table_image}")
+        else:
+            image = table_image
         
         height, width = image.shape[:2]
         
@@ -833,61 +1009,11 @@ class SpecializedOCR:
             cv2.THRESH_BINARY_INV, 11, 2
         )
         
-        # Detect horizontal and vertical lines
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width // 10, 1))
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 10))
-        
-        horizontal_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-        vertical_lines = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
-        
-        # Combine horizontal and vertical lines
-        lines = cv2.add(horizontal_lines, vertical_lines)
-        
-        # Find contours in the lines
-        contours, _ = cv2.findContours(lines, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Find intersection points (potential cell corners)
-        intersections = []
-        
-        for i, contour1 in enumerate(contours):
-            for j, contour2 in enumerate(contours):
-                if i >= j:
-                    continue
-                
-                # Check if contours are perpendicular (one horizontal, one vertical)
-                rect1 = cv2.minAreaRect(contour1)
-                rect2 = cv2.minAreaRect(contour2)
-                
-                # Get angles of the rectangles
-                angle1 = rect1[2]
-                angle2 = rect2[2]
-                
-                # Normalize angles to 0-90 degrees
-                angle1 = angle1 % 90
-                angle2 = angle2 % 90
-                
-                # Check if one is horizontal and one is vertical
-                is_perpendicular = (
-                    (angle1 < 10 and angle2 > 80) or
-                    (angle1 > 80 and angle2 < 10)
-                )
-                
-                if is_perpendicular:
-                    # Find intersection point
-                    # This is a simplified approach; in a real implementation, 
-                    # we would use line equations to find the exact intersection
-                    for pt1 in contour1:
-                        for pt2 in contour2:
-                            dist = np.linalg.norm(pt1 - pt2)
-                            if dist < 10:  # If points are close, they might be an intersection
-                                intersection = (
-                                    (pt1[0][0] + pt2[0][0]) // 2,
-                                    (pt1[0][1] + pt2[0][1]) // 2
-                                )
-                                intersections.append(intersection)
+        # Detect the grid once from the line projections
+        row_boundaries, col_boundaries = detect_table_grid(thresh)
         
         # If we couldn't determine the table structure, try a simpler approach
-        if len(intersections) < 4:
+        if len(row_boundaries) < 3 and len(col_boundaries) < 3:
             # Divide the table into a grid of cells
             cell_width = width // 3
             cell_height = height // 3
@@ -896,90 +1022,32 @@ class SpecializedOCR:
             
             for i in range(3):
                 for j in range(3):
-                    x = j * cell_width
-                    y = i * cell_height
-                    w = cell_width
-                    h = cell_height
-                    
                     cells.append({
                         'row': i,
                         'col': j,
-                        'bbox': (x, y, w, h)
+                        'bbox': (j * cell_width, i * cell_height, cell_width, cell_height)
                     })
         else:
-            # Sort intersections by y, then by x
-            intersections.sort(key=lambda p: (p[1], p[0]))
-            
-            # Determine the grid structure
-            x_coords = sorted(set(p[0] for p in intersections))
-            y_coords = sorted(set(p[1] for p in intersections))
-            
-            # Create cells from the grid
-            cells = []
-            
-            for i in range(len(y_coords) - 1):
-                for j in range(len(x_coords) - 1):
-                    x = x_coords[j]
-                    y = y_coords[i]
-                    w = x_coords[j + 1] - x
-                    h = y_coords[i + 1] - y
-                    
-                    cells.append({
-                        'row': i,
-                        'col': j,
-                        'bbox': (x, y, w, h)
-                    })
+            cells = [
+                {'row': cell['row'], 'col': cell['column'], 'bbox': cell['bbox']}
+                for cell in grid_cells(row_boundaries, col_boundaries)
+            ]
         
-        # Process each cell with OCR
-        for cell in cells:
-            # Extract cell region
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                cell_image_path = temp_file.name
-            
-            x, y, w, h = cell['bbox']
-            cell_region = image[y:y+h, x:x+w]
-            cv2.imwrite(cell_image_path, cell_region)
-            
-            # Process cell with OCR
-            ocr_result = self._perform_ocr(
-                cell_image_path,
-                self.config['languages'],
-                'table_cell'
-            )
-            
-            cell['text'] = ocr_result['text']
-            cell['confidence'] = ocr_result['confidence']
-            
-            # Clean up temporary file
-            os.unlink(cell_image_path)
+        # Recognize the non-empty cells in parallel batches
+        def recognize(crop):
+            ocr_result = self._perform_ocr(crop, self.config['languages'], 'table_cell')
+            return ocr_result['text'], ocr_result['confidence']
+        
+        self.table_ocr.recognize_cells(image, cells, binary=thresh, recognizer=recognize)
         
         # Combine cells into table data
-        # Group cells by row
-        rows = {}
-        for cell in cells:
-            row_idx = cell['row']
-            if row_idx not in rows:
-                rows[row_idx] = []
-            rows[row_idx].append(cell)
-        
-        # Sort rows by index
-        sorted_rows = [rows[idx] for idx in sorted(rows.keys())]
-        
-        # Sort cells within each row by column index
-        for row in sorted_rows:
-            row.sort(key=lambda c: c['col'])
-        
-        # Extract text for each row
-        table_data = []
-        for row in sorted_rows:
-            row_data = [cell['text'] for cell in row]
-            table_data.append(row_data)
+        table_data = assemble_table(cells, column_key='col')
         
         return {
             'data': table_data,
             'cells': cells,
-            'rows': len(sorted_rows),
-            'columns': max(len(row) for row in sorted_rows) if sorted_rows else 0
+            'rows': len(table_data),
+            'columns': max(len(row) for row in table_data) if table_data else 0
         }
     
     def _detect_handwriting(self, image_path: str) -> List[Dict[str, Any]]:
@@ -1117,12 +1185,12 @@ class SpecializedOCR:
         
         return form_fields
     
-    def _perform_ocr(self, image_path: str, languages: List[str], region_type: str) -> Dict[str, Any]:
+    def _perform_ocr(self, image: Union[str, np.ndarray], languages: List[str], region_type: str) -> Dict[str, Any]:
         """
         Perform OCR on an image with specified settings
         
         Args:
-            image_path: Path to the image
+            image: Image crop as numpy array, or path to the image
             languages: List of language codes to use
             region_type: Type of region being processed
             
@@ -1130,73 +1198,53 @@ class SpecializedOCR:
             Dictionary with OCR results
         """
         # Get optimal OCR settings for the region type
-        psm, config = self._get_optimal_ocr_settings(region_type)
+        psm, _ = self._get_optimal_ocr_settings(region_type)
         
         # Get custom dictionary for the region type if available
         custom_dict = None
-        if self.config['dictionary_boost'] and self.config['datasheet_type'] in MATERIAL_DICTIONARIES:
+        if (self.config['dictionary_boost'] and self.config['datasheet_type'] in MATERIAL_DICTIONARIES
+                and region_type in ['specifications', 'heading', 'text']):
             custom_dict = MATERIAL_DICTIONARIES[self.config['datasheet_type']]
         
-        # Prepare tesseract configuration
-        custom_config = f'--psm {psm} {config}'
+        # Perform OCR with the specified languages on a pooled tesseract handle
+        ocr_result = self.tesseract_pool.image_to_data(
+            image,
+            lang='+'.join(languages),
+            psm=psm,
+            oem=3,  # Default: LSTM when available, else legacy
+            user_words=custom_dict,
+            dpi=self.config['dpi']
+        )
         
-        # Add custom dictionary if available
-        if custom_dict and region_type in ['specifications', 'heading', 'text']:
-            # Create temporary file for user patterns
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
-                temp_file.write('\n'.join(custom_dict))
-                dict_path = temp_file.name
-            
-            custom_config += f' --user-patterns {dict_path}'
-        else:
-            dict_path = None
+        # Extract text and confidence
+        text_parts = []
+        total_confidence = 0
+        word_count = 0
         
-        try:
-            # Specify DPI if configured
-            if self.config['dpi'] > 0:
-                custom_config += f' --dpi {self.config["dpi"]}'
-            
-            # Perform OCR with the specified languages and configuration
-            ocr_result = pytesseract.image_to_data(
-                cv2.imread(image_path),
-                lang='+'.join(languages),
-                config=custom_config,
-                output_type=pytesseract.Output.DICT
-            )
-            
-            # Extract text and confidence
-            text_parts = []
-            total_confidence = 0
-            word_count = 0
-            
-            for i, conf in enumerate(ocr_result['conf']):
-                if conf > -1:  # Valid confidence value
-                    word = ocr_result['text'][i].strip()
-                    if word:
-                        text_parts.append(word)
-                        total_confidence += conf
-                        word_count += 1
-            
-            text = ' '.join(text_parts)
-            
-            # Calculate average confidence
-            avg_confidence = total_confidence / word_count if word_count > 0 else 0
-            
-            # Normalize confidence to 0-1 range
-            confidence = avg_confidence / 100.0
-            
-            # Apply post-processing based on region type
-            text = self._post_process_text(text, region_type)
-            
-            return {
-                'text': text,
-                'confidence': confidence
-            }
-            
-        finally:
-            # Clean up temporary file if it was created
-            if dict_path and os.path.exists(dict_path):
-                os.unlink(dict_path)
+        for i, conf in enumerate(ocr_result['conf']):
+            conf = float(conf)
+            if conf > -1:  # Valid confidence value
+                word = ocr_result['text'][i].strip()
+                if word:
+                    text_parts.append(word)
+                    total_confidence += conf
+                    word_count += 1
+        
+        text = ' '.join(text_parts)
+        
+        # Calculate average confidence
+        avg_confidence = total_confidence / word_count if word_count > 0 else 0
+        
+        # Normalize confidence to 0-1 range
+        confidence = avg_confidence / 100.0
+        
+        # Apply post-processing based on region type
+        text = self._post_process_text(text, region_type)
+        
+        return {
+            'text': text,
+            'confidence': confidence
+        }
     
     def _get_optimal_ocr_settings(self, region_type: str) -> Tuple[int, str]:
         """
@@ -1411,6 +1459,8 @@ def main():
     parser.add_argument("--preprocess", default="advanced", choices=["none", "basic", "advanced"], help="Preprocessing level")
     parser.add_argument("--disable-tables", action="store_true", help="Disable table detection")
     parser.add_argument("--disable-forms", action="store_true", help="Disable form field detection")
+    parser.add_argument("--stream", action="store_true", help="Write NDJSON page records as PDF pages complete")
+    parser.add_argument("--stream-output", help="Write the NDJSON stream to this file instead of stdout")
     
     args = parser.parse_args()
     
@@ -1419,7 +1469,7 @@ def main():
         languages = args.language.split('+')
         
         # Create OCR instance with configuration
-        ocr = SpecializedOCR({
+        with SpecializedOCR({
             'languages': languages,
             'datasheet_type': args.datasheet_type,
             'min_confidence': args.confidence,
@@ -1428,23 +1478,27 @@ def main():
             'preprocess_level': args.preprocess,
             'table_detection': not args.disable_tables,
             'form_field_detection': not args.disable_forms
-        })
-        
-        # Process the file
-        result = ocr.process_file(args.input_path, args.output_dir)
-        
-        # Print a summary of the results
-        print(json.dumps({
-            "input_file": args.input_path,
-            "output_dir": args.output_dir,
-            "languages_detected": result.get('languages_detected', []),
-            "text_extracted": bool(result.get('full_text', '')),
-            "confidence": result.get('full_text_confidence', 0) * 100,
-            "handwriting_detected": result.get('handwriting_detected', False),
-            "tables_found": len(result.get('tables', [])) if 'tables' in result else sum(1 for r in result.get('regions', []) if r.get('type') == 'table'),
-            "form_fields_found": len(result.get('form_fields', [])),
-            "regions_found": len(result.get('regions', []))
-        }, indent=2))
+        }) as ocr:
+            # Stream PDFs page by page if requested
+            if args.stream and args.input_path.lower().endswith('.pdf'):
+                ocr.stream_pdf(args.input_path, args.stream_output, args.output_dir)
+                return 0
+            
+            # Process the file
+            result = ocr.process_file(args.input_path, args.output_dir)
+            
+            # Print a summary of the results
+            print(json.dumps({
+                "input_file": args.input_path,
+                "output_dir": args.output_dir,
+                "languages_detected": result.get('languages_detected', []),
+                "text_extracted": bool(result.get('full_text', '')),
+                "confidence": result.get('full_text_confidence', 0) * 100,
+                "handwriting_detected": result.get('handwriting_detected', False),
+                "tables_found": len(result.get('tables', [])) if 'tables' in result else sum(1 for r in result.get('regions', []) if r.get('type') == 'table'),
+                "form_fields_found": len(result.get('form_fields', [])),
+                "regions_found": len(result.get('regions', []))
+            }, indent=2))
         
         return 0
     except Exception as e:
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Table Cell OCR
+
+This module recognizes the cells of ruled tables as one batch instead of one
+OCR call after another. The grid is detected once from the table's line
+projections, every cell is cropped as an in-memory view of the table image,
+cells without ink are skipped by a density check, and the remaining cells
+are recognized in parallel batches on the shared tesseract pool. Spec tables
+with hundreds of cells therefore scale with the number of cores.
+
+Key features:
+1. Grid detection from horizontal/vertical line projections
+2. Zero-copy cell crops
+3. Ink-density check that skips empty cells without calling OCR
+4. Parallel batched recognition with pluggable recognizers
+5. Reassembly of recognized cells into row/column table data
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple, Callable, Optional
+
+import numpy as np
+import cv2
+
+from tesseract_pool import get_tesseract_pool
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+Boundaries = List[Tuple[int, int]]  # (start, end) pixel span of each grid line
+
+
+def _group_positions(positions: List[int], gap: int = 2) -> Boundaries:
+    """Group adjacent projection positions into (start, end) line spans"""
+    boundaries = []
+    if positions:
+        start = positions[0]
+        for i in range(1, len(positions)):
+            if positions[i] > positions[i-1] + gap:  # Gap in projection
+                boundaries.append((start, positions[i-1]))
+                start = positions[i]
+        boundaries.append((start, positions[-1]))
+    return boundaries
+
+
+def detect_table_grid(binary: np.ndarray, line_ratio: float = 0.3) -> Tuple[Boundaries, Boundaries]:
+    """
+    Detect the row and column lines of a ruled table
+
+    Lines are opened with kernels of a tenth of the table size and located
+    by their projections. The table edges are added when no rule was found
+    close to them, so the boundaries always enclose the whole table.
+
+    Args:
+        binary: Binary table image with ink set to 255
+        line_ratio: Fraction of the table width/height a projection must
+            cover to count as a line
+
+    Returns:
+        Tuple of (row boundaries, column boundaries)
+    """
+    height, width = binary.shape[:2]
+
+    # Detect horizontal and vertical lines
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(1, width // 10), 1))
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(1, height // 10)))
+
+    horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
+    vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel, iterations=2)
+
+    # Find row and column positions from the line projections
+    h_projection = np.count_nonzero(horizontal_lines, axis=1)
+    v_projection = np.count_nonzero(vertical_lines, axis=0)
+    row_boundaries = _group_positions(np.flatnonzero(h_projection > width * line_ratio).tolist())
+    col_boundaries = _group_positions(np.flatnonzero(v_projection > height * line_ratio).tolist())
+
+    # Create row and column edges
+    if not row_boundaries:
+        row_boundaries = [(0, 0), (height, height)]
+    else:
+        # Add top and bottom edges if not already present
+        if row_boundaries[0][0] > 10:
+            row_boundaries.insert(0, (0, 0))
+        if row_boundaries[-1][1] < height - 10:
+            row_boundaries.append((height, height))
+
+    if not col_boundaries:
+        col_boundaries = [(0, 0), (width, width)]
+    else:
+        # Add left and right edges if not already present
+        if col_boundaries[0][0] > 10:
+            col_boundaries.insert(0, (0, 0))
+        if col_boundaries[-1][1] < width - 10:
+            col_boundaries.append((width, width))
+
+    return row_boundaries, col_boundaries
+
+
+def grid_cells(row_boundaries: Boundaries, col_boundaries: Boundaries,
+               min_size: int = 5) -> List[Dict[str, Any]]:
+    """
+    Build the cells between consecutive grid lines
+
+    Args:
+        row_boundaries: Row line spans
+        col_boundaries: Column line spans
+        min_size: Cells narrower or lower than this are dropped
+
+    Returns:
+        List of cells with 'row', 'column' and 'bbox' (x, y, width, height)
+    """
+    cells = []
+    for i in range(len(row_boundaries) - 1):
+        for j in range(len(col_boundaries) - 1):
+            # Cells start after the closing pixel of one line and end at the next line
+            cell_x = col_boundaries[j][1]
+            cell_y = row_boundaries[i][1]
+            cell_width = col_boundaries[j+1][0] - cell_x
+            cell_height = row_boundaries[i+1][0] - cell_y
+
+            # Skip cells that are too small
+            if cell_width < min_size or cell_height < min_size:
+                continue
+
+            cells.append({
+                'row': i,
+                'column': j,
+                'bbox': (cell_x, cell_y, cell_width, cell_height)
+            })
+    return cells
+
+
+def data_to_text(ocr_data: Dict[str, List[Any]], min_confidence: float = -1) -> Tuple[str, float]:
+    """
+    Rebuild text and mean confidence from word-level OCR data
+
+    Words are joined with spaces and text lines with newlines, as
+    image_to_string would return them.
+
+    Args:
+        ocr_data: Dictionary in pytesseract.Output.DICT layout
+        min_confidence: Words at or below this confidence are ignored
+
+    Returns:
+        Tuple of (text, mean word confidence on a 0-100 scale)
+    """
+    lines = {}
+    confidences = []
+    for i, text in enumerate(ocr_data.get('text', [])):
+        word = (text or '').strip()
+        conf = float(ocr_data['conf'][i])
+        if not word or conf <= min_confidence:
+            continue
+        key = (ocr_data['block_num'][i], ocr_data['par_num'][i], ocr_data['line_num'][i])
+        lines.setdefault(key, []).append(word)
+        confidences.append(conf)
+
+    text = '\n'.join(' '.join(words) for _, words in sorted(lines.items()))
+    return text, (sum(confidences) / len(confidences) if confidences else 0.0)
+
+
+def assemble_table(cells: List[Dict[str, Any]], column_key: str = 'column') -> List[List[str]]:
+    """
+    Arrange recognized cells into rows of text ordered by column
+
+    Args:
+        cells: Cells with 'row', the column key and 'text'
+        column_key: Name of the column index field
+
+    Returns:
+        List of rows, each a list of cell texts
+    """
+    rows = {}
+    for cell in cells:
+        rows.setdefault(cell['row'], []).append(cell)
+    return [
+        [cell['text'] for cell in sorted(rows[row], key=lambda c: c[column_key])]
+        for row in sorted(rows)
+    ]
+
+
+class TableCellOCR:
+    """
+    Batched, parallel OCR of the cells of one or more tables.
+
+    The recognizer is any function taking a cell crop and returning a
+    (text, confidence) pair; by default cells are read on the shared tesseract
+    pool, whose handles are used by one worker thread at a time.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the table cell OCR
+
+        Args:
+            config: Configuration dictionary
+        """
+        self.config = {
+            'max_workers': multiprocessing.cpu_count(),
+            'batch_size': 16,            # Cells recognized per worker task
+            'parallel_threshold': 4,     # Smaller tables are recognized inline
+            'min_ink_density': 0.002,    # Ink fraction below which a cell is empty
+            'min_ink_pixels': 8,         # Ink pixel count below which a cell is empty
+            'border_inset': 2,           # Pixels ignored at cell edges (rule remnants)
+            'lang': 'eng',
+            'psm': 6,
+            'dpi': 0
+        }
+
+        if config:
+            self.config.update(config)
+
+        self._executor = None
+        self.stats = {
+            'tables': 0,
+            'cells': 0,
+            'empty_cells_skipped': 0,
+            'cells_recognized': 0
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, int(self.config['max_workers'])),
+                thread_name_prefix='table-cell-ocr'
+            )
+        return self._executor
+
+    def is_empty(self, binary_cell: np.ndarray) -> bool:
+        """
+        Check whether a cell has no ink worth recognizing
+
+        Args:
+            binary_cell: Binary cell crop with ink set to 255
+
+        Returns:
+            True if the cell is empty
+        """
+        inset = self.config['border_inset']
+        height, width = binary_cell.shape[:2]
+        if height > 2 * inset and width > 2 * inset:
+            binary_cell = binary_cell[inset:height-inset, inset:width-inset]
+        if binary_cell.size == 0:
+            return True
+
+        ink = cv2.countNonZero(binary_cell)
+        return ink < self.config['min_ink_pixels'] or ink / binary_cell.size < self.config['min_ink_density']
+
+    def recognize_with_pool(self, crop: np.ndarray) -> Tuple[str, float]:
+        """
+        Default recognizer: word-level OCR on the shared tesseract pool
+
+        Args:
+            crop: Cell image
+
+        Returns:
+            Tuple of (text, confidence in 0-1)
+        """
+        ocr_data = get_tesseract_pool().image_to_data(
+            crop,
+            lang=self.config['lang'],
+            psm=self.config['psm'],
+            dpi=self.config['dpi']
+        )
+        text, confidence = data_to_text(ocr_data)
+        return text, confidence / 100.0
+
+    def recognize_cells(
+        self,
+        image: np.ndarray,
+        cells: List[Dict[str, Any]],
+        binary: Optional[np.ndarray] = None,
+        recognizer: Optional[Callable[[np.ndarray], Tuple[str, float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Recognize the text of table cells in place
+
+        Sets 'text', 'confidence' and 'empty' on every cell.
+
+        Args:
+            image: Table image the cell boxes refer to
+            cells: Cells with 'bbox' (x, y, width, height)
+            binary: Binary table image (ink 255) for the emptiness check;
+                no cells are skipped when None
+            recognizer: Function mapping a crop to (text, confidence)
+
+        Returns:
+            The cells
+        """
+        recognizer = recognizer or self.recognize_with_pool
+        self.stats['tables'] += 1
+        self.stats['cells'] += len(cells)
+
+        # Crop every cell as a view of the table image and drop the empty ones
+        pending = []
+        for cell in cells:
+            x, y, w, h = cell['bbox']
+            crop = image[y:y+h, x:x+w]
+            empty = crop.size == 0 or (binary is not None and self.is_empty(binary[y:y+h, x:x+w]))
+
+            cell['empty'] = empty
+            if empty:
+                cell['text'] = ''
+                cell['confidence'] = 0.0
+            else:
+                pending.append((cell, crop))
+
+        self.stats['empty_cells_skipped'] += len(cells) - len(pending)
+        self.stats['cells_recognized'] += len(pending)
+
+        def run_batch(batch):
+            return [recognizer(crop) for _, crop in batch]
+
+        if len(pending) < self.config['parallel_threshold'] or self.config['max_workers'] <= 1:
+            results = run_batch(pending)
+        else:
+            batch_size = max(1, int(self.config['batch_size']))
+            # Spread small tables over all workers rather than filling few batches
+            batch_size = min(batch_size, -(-len(pending) // self.config['max_workers']))
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            results = [
+                result
+                for batch_results in self._get_executor().map(run_batch, batches)
+                for result in batch_results
+            ]
+
+        for (cell, _), (text, confidence) in zip(pending, results):
+            cell['text'] = text
+            cell['confidence'] = confidence
+
+        return cells
+
+    def close(self):
+        """Shut down the worker pool; it is recreated if the instance is used again"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Tesseract Worker Pool
+
+This module keeps long-lived Tesseract API handles warm so that region-level
+OCR does not pay for a new tesseract process, traineddata loading and a
+temporary user-patterns file on every call.
+
+Key features:
+1. Pooled tesserocr API handles keyed by language set, PSM, OEM and patterns
+2. User-pattern files materialized once per dictionary
+3. Direct numpy image input (grayscale, BGR or BGRA crops)
+4. pytesseract-compatible output dictionaries
+5. Transparent pytesseract fallback when tesserocr is not installed
+"""
+
+import os
+import queue
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Union
+
+import cv2
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Try to import the in-process Tesseract API
+try:
+    import tesserocr
+    from tesserocr import PyTessBaseAPI, RIL
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+    logger.info("tesserocr not available, falling back to pytesseract subprocess calls")
+
+import pytesseract
+
+
+class TesseractPool:
+    """
+    Pool of warm Tesseract API handles shared by the OCR components.
+
+    A handle is bound to one (languages, psm, oem, user patterns) combination
+    at initialization time, so handles are grouped by that key. Each handle
+    is used by one thread at a time; up to `max_handles_per_key` handles are
+    created per key on demand.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the pool
+
+        Args:
+            config: Configuration dictionary
+        """
+        self.config = {
+            'max_handles_per_key': multiprocessing.cpu_count(),
+            'tessdata_path': None,  # Use tesseract's default
+            'patterns_dir': None,   # Directory for materialized user-pattern files
+            'use_tesserocr': True
+        }
+
+        if config:
+            self.config.update(config)
+
+        if not self.config['patterns_dir']:
+            self.config['patterns_dir'] = tempfile.mkdtemp(prefix='tesseract_patterns_')
+        os.makedirs(self.config['patterns_dir'], exist_ok=True)
+
+        self.use_tesserocr = TESSEROCR_AVAILABLE and self.config['use_tesserocr']
+
+        self._lock = threading.Lock()
+        self._idle_handles = {}      # key -> queue.Queue of idle handles
+        self._handle_counts = {}     # key -> number of handles created
+        self._pattern_files = {}     # dictionary hash -> file path
+
+        self.stats = {
+            'calls': 0,
+            'handles_created': 0,
+            'pattern_files_created': 0
+        }
+
+    def get_user_patterns_file(self, words: Optional[List[str]]) -> Optional[str]:
+        """
+        Get a user-patterns file for a dictionary, writing it only once
+
+        Args:
+            words: Dictionary entries (None or empty for no patterns)
+
+        Returns:
+            Path to the patterns file or None
+        """
+        if not words:
+            return None
+
+        content = '\n'.join(words)
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+        with self._lock:
+            path = self._pattern_files.get(digest)
+            if path is None:
+                path = os.path.join(self.config['patterns_dir'], f"patterns_{digest}.txt")
+                if not os.path.exists(path):
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                self._pattern_files[digest] = path
+                self.stats['pattern_files_created'] += 1
+
+        return path
+
+    def image_to_data(self, image: Union[str, np.ndarray], lang: str = 'eng', psm: int = 6,
+                      oem: int = 3, user_words: Optional[List[str]] = None,
+                      dpi: int = 0) -> Dict[str, List[Any]]:
+        """
+        Run OCR on an image and return word-level data
+
+        Args:
+            image: Image as numpy array or path
+            lang: Tesseract language string (e.g. 'eng+deu')
+            psm: Page segmentation mode
+            oem: OCR engine mode
+            user_words: Optional dictionary to boost
+            dpi: Source resolution hint (0 to let tesseract guess)
+
+        Returns:
+            Dictionary with the same keys as pytesseract.Output.DICT
+        """
+        if isinstance(image, str):
+            image = cv2.imread(image)
+            if image is None:
+                raise ValueError("Failed to load image for OCR")
+
+        patterns_file = self.get_user_patterns_file(user_words)
+        with self._lock:
+            self.stats['calls'] += 1
+
+        if not self.use_tesserocr:
+            return self._image_to_data_subprocess(image, lang, psm, oem, patterns_file, dpi)
+
+        with self._acquire(lang, psm, oem, patterns_file) as api:
+            self._set_image(api, image)
+            if dpi > 0:
+                api.SetSourceResolution(dpi)
+            api.Recognize()
+            return self._collect_words(api)
+
+    @contextmanager
+    def _acquire(self, lang: str, psm: int, oem: int, patterns_file: Optional[str]):
+        """Check out an idle handle for the key, creating one if allowed"""
+        key = (lang, psm, oem, patterns_file)
+
+        with self._lock:
+            idle = self._idle_handles.setdefault(key, queue.Queue())
+            create = idle.empty() and self._handle_counts.get(key, 0) < self.config['max_handles_per_key']
+            if create:
+                self._handle_counts[key] = self._handle_counts.get(key, 0) + 1
+
+        if create:
+            try:
+                api = self._create_handle(lang, psm, oem, patterns_file)
+            except Exception:
+                with self._lock:
+                    self._handle_counts[key] -= 1
+                raise
+        else:
+            api = idle.get()
+
+        try:
+            yield api
+        finally:
+            api.Clear()
+            idle.put(api)
+
+    def _create_handle(self, lang: str, psm: int, oem: int, patterns_file: Optional[str]):
+        """Create and initialize a Tesseract API handle"""
+        variables = {}
+        if patterns_file:
+            variables['user_patterns_file'] = patterns_file
+
+        # tesserocr's PSM and OEM are plain integer constants
+        kwargs = {
+            'lang': lang,
+            'psm': psm,
+            'oem': oem,
+            'variables': variables
+        }
+        if self.config['tessdata_path']:
+            kwargs['path'] = self.config['tessdata_path']
+
+        api = PyTessBaseAPI(**kwargs)
+        with self._lock:
+            self.stats['handles_created'] += 1
+        logger.debug(f"Created tesseract handle for lang={lang} psm={psm} oem={oem}")
+        return api
+
+    @staticmethod
+    def _set_image(api, image: np.ndarray):
+        """Pass a numpy image to tesseract without encoding it"""
+        if image.ndim == 2:
+            channels = 1
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGB)
+            channels = 3
+        else:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            channels = 3
+
+        if image.dtype != np.uint8:
+            image = image.astype(np.uint8)
+        image = np.ascontiguousarray(image)
+
+        height, width = image.shape[:2]
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+
+    @staticmethod
+    def _collect_words(api) -> Dict[str, List[Any]]:
+        """Convert recognized words into a pytesseract-style dictionary"""
+        data = {key: [] for key in (
+            'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+            'left', 'top', 'width', 'height', 'conf', 'text'
+        )}
+
+        iterator = api.GetIterator()
+        if iterator is None:
+            return data
+
+        block_num = par_num = line_num = word_num = 0
+        for word in tesserocr.iterate_level(iterator, RIL.WORD):
+            if word.IsAtBeginningOf(RIL.BLOCK):
+                block_num += 1
+                par_num = line_num = 0
+            if word.IsAtBeginningOf(RIL.PARA):
+                par_num += 1
+                line_num = 0
+            if word.IsAtBeginningOf(RIL.TEXTLINE):
+                line_num += 1
+                word_num = 0
+            word_num += 1
+
+            bbox = word.BoundingBox(RIL.WORD)
+            if bbox is None:
+                continue
+            left, top, right, bottom = bbox
+
+            data['level'].append(5)
+            data['page_num'].append(1)
+            data['block_num'].append(block_num)
+            data['par_num'].append(par_num)
+            data['line_num'].append(line_num)
+            data['word_num'].append(word_num)
+            data['left'].append(left)
+            data['top'].append(top)
+            data['width'].append(right - left)
+            data['height'].append(bottom - top)
+            data['conf'].append(word.Confidence(RIL.WORD))
+            data['text'].append(word.GetUTF8Text(RIL.WORD) or '')
+
+        return data
+
+    @staticmethod
+    def _image_to_data_subprocess(image: np.ndarray, lang: str, psm: int, oem: int,
+                                  patterns_file: Optional[str], dpi: int) -> Dict[str, List[Any]]:
+        """Fallback using the tesseract CLI through pytesseract"""
+        config = f'--psm {psm} --oem {oem}'
+        if patterns_file:
+            config += f' --user-patterns {patterns_file}'
+        if dpi > 0:
+            config += f' --dpi {dpi}'
+
+        return pytesseract.image_to_data(
+            image,
+            lang=lang,
+            config=config,
+            output_type=pytesseract.Output.DICT
+        )
+
+    def close(self):
+        """Release all idle handles"""
+        with self._lock:
+            for idle in self._idle_handles.values():
+                while not idle.empty():
+                    try:
+                        idle.get_nowait().End()
+                    except Exception:
+                        pass
+            self._idle_handles = {}
+            self._handle_counts = {}
+
+
+# Shared pool instance for the OCR components in this process
+_pool_instance = None
+_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool(config: Dict[str, Any] = None) -> TesseractPool:
+    """Get or create the shared TesseractPool instance"""
+    global _pool_instance
+    with _pool_lock:
+        if _pool_instance is None:
+            _pool_instance = TesseractPool(config)
+    return _pool_instance
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test Box Geometry
+
+Checks the R-tree backed NMS against the pairwise greedy loop it replaced,
+and R-tree queries against a linear scan.
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from box_geometry import STRtree, iou_matrix, nms, soft_nms, to_xyxy
+
+
+def calculate_iou(bbox1, bbox2):
+    x1, y1, w1, h1 = bbox1
+    x2, y2, w2, h2 = bbox2
+    x_left = max(x1, x2)
+    y_top = max(y1, y2)
+    x_right = min(x1 + w1, x2 + w2)
+    y_bottom = min(y1 + h1, y2 + h2)
+    if x_right < x_left or y_bottom < y_top:
+        return 0.0
+    intersection_area = (x_right - x_left) * (y_bottom - y_top)
+    union_area = w1 * h1 + w2 * h2 - intersection_area
+    return intersection_area / union_area if union_area > 0 else 0.0
+
+
+def pairwise_nms(boxes, scores, iou_threshold):
+    order = sorted(range(len(boxes)), key=lambda i: -scores[i])
+    kept = []
+    for i in order:
+        if all(calculate_iou(boxes[i], boxes[j]) <= iou_threshold for j in kept):
+            kept.append(i)
+    return kept
+
+
+def random_boxes(rng, count, extent=500.0):
+    boxes = []
+    for _ in range(count):
+        x, y = rng.uniform(0, extent), rng.uniform(0, extent)
+        boxes.append([x, y, rng.uniform(5, 80), rng.uniform(5, 80)])
+    # Near-duplicates so that suppression actually happens
+    for box in list(boxes[:count // 3]):
+        boxes.append([box[0] + rng.uniform(-4, 4), box[1] + rng.uniform(-4, 4), box[2], box[3]])
+    return boxes
+
+
+def test_nms_matches_pairwise_loop():
+    rng = random.Random(0)
+    for trial in range(20):
+        boxes = random_boxes(rng, rng.randint(1, 150))
+        scores = [round(rng.random(), 2) for _ in boxes]  # Rounded to create ties
+        for threshold in (0.3, 0.5, 0.7):
+            assert nms(boxes, scores, threshold) == pairwise_nms(boxes, scores, threshold), (trial, threshold)
+
+
+def test_nms_xyxy_and_empty():
+    assert nms([], []) == []
+    boxes = [[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30]]
+    assert nms(boxes, [0.9, 0.8, 0.7], 0.5, box_format='xyxy') == [0, 2]
+
+
+def test_strtree_query_matches_linear_scan():
+    rng = random.Random(1)
+    boxes = to_xyxy(random_boxes(rng, 400))
+    tree = STRtree(boxes, node_capacity=8)
+    for _ in range(100):
+        x, y = rng.uniform(0, 500), rng.uniform(0, 500)
+        query = np.array([x, y, x + rng.uniform(1, 120), y + rng.uniform(1, 120)])
+
+        intersects = np.flatnonzero((boxes[:, 0] <= query[2]) & (boxes[:, 2] >= query[0]) &
+                                    (boxes[:, 1] <= query[3]) & (boxes[:, 3] >= query[1]))
+        within = intersects[(boxes[intersects, 0] >= query[0]) & (boxes[intersects, 1] >= query[1]) &
+                            (boxes[intersects, 2] <= query[2]) & (boxes[intersects, 3] <= query[3])]
+
+        assert tree.query(query).tolist() == intersects.tolist()
+        assert tree.query(query, 'within').tolist() == within.tolist()
+
+
+def test_soft_nms_keeps_separate_boxes_and_decays_overlaps():
+    boxes = [[0, 0, 10, 10], [1, 1, 10, 10], [50, 50, 10, 10]]
+    kept, scores = soft_nms(boxes, [0.9, 0.8, 0.7], method='linear')
+    assert kept[:2] == [0, 2]
+    assert scores[0] == 0.9 and scores[1] == 0.7
+    iou = iou_matrix(to_xyxy(boxes[:1]), to_xyxy(boxes[1:2]))[0, 0]
+    assert kept[2] == 1 and abs(scores[2] - 0.8 * (1 - iou)) < 1e-9
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
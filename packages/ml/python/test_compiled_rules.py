@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test Compiled Rules
+
+Checks that CompiledRuleSet produces exactly the same output as applying
+every rule in order with re.sub, including when an earlier rule creates the
+trigger of a later one.
+"""
+
+import os
+import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from compiled_rules import CompiledRuleSet, _apply_sequential, derive_triggers
+
+RULES = [
+    {'pattern': r'(\d)\s*rnm\b', 'replacement': r'\1 mm', 'description': 'rnm_to_mm'},
+    {'pattern': r'(\d)\s*mrn\b', 'replacement': r'\1 mm', 'description': 'mrn_to_mm'},
+    {'pattern': r'\s+,', 'replacement': ',', 'description': 'space_before_comma'},
+    {'pattern': r'\bPE\s*l\s*l\b', 'replacement': 'PEI', 'description': 'pei_class'},
+    {'pattern': r'(\d+)\s*mm\b', 'replacement': r'\1mm', 'description': 'join_mm'},
+    {'pattern': r'\bR\s+(9|10|11|12|13)\b', 'replacement': r'R\1', 'description': 'slip_rating'},
+    {'pattern': r'(?:colour|color)', 'replacement': 'color', 'description': 'spelling'},
+    {'pattern': r'\bdisabled\b', 'replacement': 'x', 'enabled': False},
+]
+
+TEXTS = [
+    "Porcelain tile 600 x 600 rnm , thickness 10 mrn",
+    "Water absorption : 0.5 % according to ISO 10545-3",
+    "Slip resistance R 10 , PE l l abrasion class",
+    "Colour: grey , colour code 12",
+    "This row is disabled",
+    "",
+    "600 rnm",
+    "nothing to change here",
+]
+
+
+def test_matches_sequential_re_sub():
+    compiled = CompiledRuleSet(RULES)
+    enabled = [rule for rule in RULES if rule.get('enabled', True)]
+    for text in TEXTS:
+        assert compiled.apply(text)[0] == _apply_sequential(enabled, text)
+
+
+def test_matches_sequential_re_sub_ignorecase():
+    compiled = CompiledRuleSet(RULES, re.IGNORECASE)
+    enabled = [rule for rule in RULES if rule.get('enabled', True)]
+    for text in TEXTS + [text.upper() for text in TEXTS]:
+        assert compiled.apply(text)[0] == _apply_sequential(enabled, text, re.IGNORECASE)
+
+
+def test_later_rule_sees_output_of_earlier_rule():
+    # 'rnm' -> ' mm' creates the trigger that join_mm needs
+    compiled = CompiledRuleSet(RULES)
+    text, fired = compiled.apply("600 rnm")
+    assert text == "600mm"
+    assert fired == ['rnm_to_mm', 'join_mm']
+
+
+def test_batch_matches_single_application():
+    compiled = CompiledRuleSet(RULES)
+    texts = TEXTS * 3
+    assert compiled.apply_batch(texts) == [compiled.apply(text) for text in texts]
+
+
+def test_invalid_pattern_is_skipped():
+    compiled = CompiledRuleSet([{'pattern': '(', 'replacement': ''}] + RULES)
+    assert len(compiled.rules) == len([rule for rule in RULES if rule.get('enabled', True)])
+
+
+def test_derive_triggers():
+    assert derive_triggers(r'(?:colour|color)') is not None
+    assert derive_triggers(r'\s+,') == frozenset({','})
+    assert derive_triggers(r'\d+') is None
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
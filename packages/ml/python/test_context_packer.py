@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test Context Packer
+
+Checks that packed contexts stay within their token budget, keep the most
+relevant materials and never keep content of a dropped material.
+"""
+
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from context_packer import ContextPacker
+
+
+def build_context(materials=30, facts_per_material=5, seed=0):
+    rng = random.Random(seed)
+    context = {"query": "durable flooring for a commercial kitchen", "materials": [], "knowledge_facts": [],
+               "relationships": [], "metadata": {"material_count": materials}}
+    for i in range(materials):
+        context["materials"].append({
+            "id": f"m{i}", "name": f"Material {i}", "material_type": rng.choice(["wood", "tile", "stone"]),
+            "similarity_score": rng.random(),
+            "description": " ".join(rng.choice(["durable", "porous", "sealed", "glazed"]) for _ in range(40)),
+            "properties": {f"property_{p}": f"{rng.random():.3f} units" for p in range(8)}
+        })
+        for j in range(facts_per_material):
+            context["knowledge_facts"].append({
+                "id": f"k{i}_{j}", "material_id": f"m{i}", "fact": "Fact text " * rng.randint(3, 20),
+                "relevance": rng.random(), "confidence": rng.random(), "source": "test"
+            })
+        context["relationships"].append({"source_id": f"m{i}", "target_id": f"m{(i + 1) % materials}",
+                                         "type": "similar_to", "strength": rng.random(), "description": ""})
+    return context
+
+
+def test_packed_context_fits_budget():
+    packer = ContextPacker()
+    context = build_context()
+    for budget in (200, 500, 1000, 2000, 4000):
+        packed, stats = packer.pack(context, budget)
+        assert stats["trimmed"]
+        assert stats["tokens_after"] <= budget
+        assert packer.token_counter.count(json.dumps(packed, ensure_ascii=False)) <= budget
+
+
+def test_small_context_is_returned_unchanged():
+    context = build_context(materials=2, facts_per_material=1)
+    packed, stats = ContextPacker().pack(context, 100000)
+    assert packed is context
+    assert not stats["trimmed"] and stats["tokens_after"] == stats["tokens_before"]
+
+
+def test_items_of_dropped_materials_are_removed():
+    packed, stats = ContextPacker().pack(build_context(), 600)
+    kept = {m["id"] for m in packed["materials"]}
+    assert stats["dropped"]["materials"] > 0
+    assert all(f["material_id"] in kept for f in packed["knowledge_facts"])
+    assert all(r["source_id"] in kept for r in packed["relationships"])
+
+
+def test_most_relevant_materials_are_kept():
+    context = build_context()
+    packed, _ = ContextPacker().pack(context, 600)
+    kept = {m["id"] for m in packed["materials"]}
+    ranked = sorted(context["materials"], key=lambda m: -m["similarity_score"])
+    assert {m["id"] for m in ranked[:len(kept)]} == kept
+
+
+def test_original_order_is_kept():
+    context = build_context()
+    packed, _ = ContextPacker().pack(context, 1500)
+    order = [m["id"] for m in context["materials"]]
+    positions = [order.index(m["id"]) for m in packed["materials"]]
+    assert positions == sorted(positions)
+
+
+def test_null_scores_are_accepted():
+    context = build_context(materials=10)
+    for material in context["materials"][::2]:
+        material["similarity_score"] = None
+    for fact in context["knowledge_facts"][::2]:
+        fact["relevance"] = None
+        fact["confidence"] = None
+    for rel in context["relationships"]:
+        rel["strength"] = None
+    packed, stats = ContextPacker().pack(context, 500)
+    assert stats["tokens_after"] <= 500 and packed["materials"]
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test Cross-Modal Attention
+
+Runs CrossModalAttention with counting vision and LLM fakes: concurrent
+analyses of one image share a computation, cached results are not shared
+between callers, and attention is applied to batches of feature rows.
+"""
+
+import asyncio
+import base64
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cross_modal_attention import CrossModalAttention
+
+IMAGE = b"\x89PNG fake image content"
+
+
+class FakeVisionModel:
+    """Vision model whose analyses take a little time and count their calls"""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def _analyze(self, name, result):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        await asyncio.sleep(0.05)
+        return result
+
+    async def extract_features(self, image_bytes):
+        return await self._analyze("features", np.arange(512, dtype=float))
+
+    async def detect_materials(self, image_bytes):
+        return await self._analyze("materials", [{"name": "oak", "confidence": 0.9}])
+
+    async def analyze_colors(self, image_bytes):
+        return await self._analyze("colors", [{"name": "walnut brown"}])
+
+    async def analyze_textures(self, image_bytes):
+        return await self._analyze("textures", [{"name": "brushed"}])
+
+
+class FakeLLMClient:
+    """OpenAI-style client answering every completion with the same text"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='"oak floor"'))])
+
+
+def make_attention(**config):
+    return CrossModalAttention(config, vision_model=FakeVisionModel(), llm_client=FakeLLMClient())
+
+
+def test_concurrent_requests_for_one_image_share_the_analyses():
+    attention = make_attention()
+
+    async def run():
+        return await asyncio.gather(*(
+            attention.process_multi_modal_query(image_data=image)
+            for image in [IMAGE, base64.b64encode(IMAGE).decode("ascii")] * 4
+        ))
+
+    results = asyncio.run(run())
+    assert all(r["visual_context"] == results[0]["visual_context"] for r in results)
+    assert results[0]["visual_context"]["materials"] == [{"name": "oak", "confidence": 0.9}]
+
+    # Five analyses per image, each computed once for the eight requests
+    assert attention.vision_model.calls == {"features": 1, "materials": 1, "colors": 1, "textures": 1}
+    stats = attention.get_cache_stats()
+    assert stats["size"] == 5
+    assert stats["coalesced"] + stats["hits"] == 5 * 7
+
+
+def test_cached_results_are_copied_for_each_caller():
+    attention = make_attention()
+
+    async def run():
+        features = await attention._extract_visual_features(IMAGE)
+        context = await attention._extract_visual_context(IMAGE)
+        features[:] = -1
+        context["materials"][0]["name"] = "changed"
+        context["colors"].clear()
+        return await attention._extract_visual_features(IMAGE), await attention._extract_visual_context(IMAGE)
+
+    features, context = asyncio.run(run())
+    assert np.array_equal(features, np.arange(512, dtype=float))
+    assert context["materials"] == [{"name": "oak", "confidence": 0.9}]
+    assert context["colors"] == [{"name": "walnut brown"}]
+    assert attention.vision_model.calls["features"] == 1
+    assert attention.llm_client.calls == 1
+
+
+def test_failed_analyses_fall_back_and_are_retried():
+    attention = make_attention()
+    failures = []
+
+    async def broken(image_bytes):
+        failures.append(image_bytes)
+        raise RuntimeError("model offline")
+
+    attention.vision_model.detect_materials = broken
+    assert asyncio.run(attention._detect_materials(IMAGE)) == []
+    assert asyncio.run(attention._detect_materials(IMAGE)) == []
+    assert len(failures) == 2
+
+
+def test_attention_pairs_batches_row_by_row():
+    attention = make_attention(text_feature_dim=4, visual_feature_dim=3, joint_feature_dim=6)
+    text = np.arange(12, dtype=float).reshape(3, 4)
+    visual = np.arange(9, dtype=float).reshape(3, 3) + 100
+
+    joint = attention._apply_cross_modal_attention(text, visual)
+    assert joint.shape == (3, 6)
+    assert np.array_equal(joint, np.concatenate([text, visual], axis=1)[:, :6])
+
+    # One image shared by several text refinements
+    shared = attention._apply_cross_modal_attention(text, visual[0])
+    assert np.array_equal(shared[:, 4:], np.tile(visual[0, :2], (3, 1)))
+
+    single = attention._apply_cross_modal_attention(text[0], visual[0][:2])
+    assert single.shape == (6,)
+    assert np.array_equal(single, [0, 1, 2, 3, 100, 101])
+
+
+def test_attention_rejects_batches_that_cannot_be_paired():
+    attention = make_attention(text_feature_dim=4, visual_feature_dim=3, joint_feature_dim=6)
+
+    with pytest.raises(ValueError):
+        attention._apply_cross_modal_attention(np.ones((3, 4)), np.ones((2, 3)))
+    with pytest.raises(ValueError):
+        attention._apply_cross_modal_attention(np.ones((2, 2, 4)), np.ones(3))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
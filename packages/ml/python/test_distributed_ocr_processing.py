@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test Distributed OCR Processing
+
+Runs DistributedBatchProcessor against a manager that records the submitted
+shards, so shard planning, merging in page order and resuming a batch from
+its checkpoints are checked without OCR engines or worker processes.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from distributed_ocr_processing import DistributedBatchProcessor
+
+PAGE_COUNTS = {"catalog.pdf": 20, "sheet.pdf": 4, "notes.docx": 0}
+
+
+class RecordingManager:
+    """Stands in for DistributedOCRManager and keeps the submitted tasks"""
+
+    def __init__(self, checkpoint_dir, num_workers=2):
+        self.config = {"checkpoint_dir": str(checkpoint_dir), "num_workers": num_workers}
+        self.tasks = []
+
+    def submit_task(self, document_path=None, engine_type="nougat", options=None,
+                    callback=None, page_range=None, size=None, **kwargs):
+        self.tasks.append({"task_id": f"task-{len(self.tasks)}", "document_path": document_path,
+                           "page_range": page_range, "callback": callback})
+        return self.tasks[-1]["task_id"]
+
+    def cancel_task(self, task_id):
+        return True
+
+
+def page_result(page_number):
+    return {
+        "text": f"page {page_number}",
+        "structured_content": {"headings": [{"level": 1, "text": f"Section {page_number}"}], "tables": []},
+        "confidence": 0.5 + page_number / 100.0
+    }
+
+
+def complete(task, fail=False):
+    """Answer a task the way the manager's result collector would"""
+    if fail:
+        task["callback"]({"task_id": task["task_id"], "status": "failed", "error": "worker died"})
+    elif task["page_range"] is None:
+        task["callback"]({"task_id": task["task_id"], "status": "completed",
+                          "result": page_result(1), "processing_time": 1.0})
+    else:
+        start, end = task["page_range"]
+        pages = [{"page_number": n + 1, "result": page_result(n + 1)} for n in range(start, end)]
+        task["callback"]({"task_id": task["task_id"], "status": "completed",
+                          "result": {"page_range": [start, end], "pages": pages}, "processing_time": 1.0})
+
+
+def make_processor(tmp_path, **kwargs):
+    processor = DistributedBatchProcessor(RecordingManager(tmp_path), **kwargs)
+    processor._count_pages = PAGE_COUNTS.get
+    return processor
+
+
+def test_documents_are_split_into_contiguous_shards(tmp_path):
+    processor = make_processor(tmp_path)
+    batch_id = processor.process_batch(list(PAGE_COUNTS))
+    tasks = processor.manager.tasks
+
+    # 24 pages over 2 workers x 4 shards each: 3 pages per shard
+    catalog = [t["page_range"] for t in tasks if t["document_path"] == "catalog.pdf"]
+    assert catalog == [[s, min(s + 3, 20)] for s in range(0, 20, 3)]
+    assert [t["page_range"] for t in tasks if t["document_path"] == "sheet.pdf"] == [[0, 3], [3, 4]]
+    assert [t["page_range"] for t in tasks if t["document_path"] == "notes.docx"] == [None]
+    assert processor.get_batch_status(batch_id)["shards_total"] == len(tasks) == 10
+
+
+def test_merged_shards_have_the_unsharded_result_shape(tmp_path):
+    processor = make_processor(tmp_path)
+    batch_id = processor.process_batch(list(PAGE_COUNTS))
+    for task in reversed(processor.manager.tasks):
+        complete(task)
+
+    batch = processor.get_batch_status(batch_id)
+    assert batch["status"] == "completed" and batch["completed"] == 3
+
+    unsharded = batch["results"]["notes.docx"]["result"]
+    merged = batch["results"]["catalog.pdf"]
+    assert merged["status"] == "completed" and merged["shards"] == 7
+    assert set(unsharded) <= set(merged["result"])
+
+    result = merged["result"]
+    assert result["text"] == "\n\n".join(f"page {n}" for n in range(1, 21))
+    assert [h["text"] for h in result["structured_content"]["headings"]] == [f"Section {n}" for n in range(1, 21)]
+    assert result["structured_content"]["tables"] == []
+    assert result["confidence"] == pytest.approx(sum(0.5 + n / 100.0 for n in range(1, 21)) / 20)
+    assert [page["page_number"] for page in result["pages"]] == list(range(1, 21))
+
+
+def test_failed_shard_fails_its_document_only(tmp_path):
+    processor = make_processor(tmp_path, pages_per_shard=2)
+    batch_id = processor.process_batch(["sheet.pdf", "notes.docx"])
+    first, second, unsharded = processor.manager.tasks
+    complete(first)
+    complete(second, fail=True)
+    complete(unsharded)
+
+    batch = processor.get_batch_status(batch_id)
+    sheet = batch["results"]["sheet.pdf"]
+    assert sheet["status"] == "failed" and sheet["failed_page_ranges"] == [[2, 4]]
+    assert [page["page_number"] for page in sheet["result"]["pages"]] == [1, 2]
+    assert batch["completed"] == 1 and batch["failed"] == 1
+
+
+def test_interrupted_batch_resumes_from_checkpoints(tmp_path):
+    processor = make_processor(tmp_path, pages_per_shard=5)
+    batch_id = processor.process_batch(["catalog.pdf", "sheet.pdf"])
+    tasks = processor.manager.tasks
+    complete(tasks[0])
+    complete(tasks[2])
+    complete(tasks[3], fail=True)
+
+    # A new processor after a crash submits only the unfinished shards
+    resumed = make_processor(tmp_path, pages_per_shard=3)
+    assert resumed.process_batch(["catalog.pdf", "sheet.pdf"], batch_id=batch_id) == batch_id
+    assert [t["page_range"] for t in resumed.manager.tasks] == [[5, 10], [15, 20], [0, 4]]
+    assert resumed.get_batch_status(batch_id)["shards_resumed"] == 2
+
+    for task in resumed.manager.tasks:
+        complete(task)
+    batch = resumed.get_batch_status(batch_id)
+    assert batch["status"] == "completed" and batch["completed"] == 2
+    pages = batch["results"]["catalog.pdf"]["result"]["pages"]
+    assert [page["page_number"] for page in pages] == list(range(1, 21))
+
+
+def test_resuming_with_different_documents_is_rejected(tmp_path):
+    processor = make_processor(tmp_path)
+    batch_id = processor.process_batch(["catalog.pdf", "sheet.pdf"])
+
+    with pytest.raises(ValueError):
+        make_processor(tmp_path).process_batch(["sheet.pdf", "catalog.pdf"], batch_id=batch_id)
+    with pytest.raises(ValueError):
+        make_processor(tmp_path).process_batch(["catalog.pdf"], batch_id=batch_id)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test Extensible Engine Manager
+
+Runs parallel voting with small scripted engines in worker processes:
+early quorum, per-engine timeouts, failing engines, warm workers across
+votes and usage bookkeeping.
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from extensible_engine_manager import EngineManager, EngineMetadata, EngineResult, ModelType, OCREngineInterface
+
+START_METHOD = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class ScriptedEngine(OCREngineInterface):
+    """Engine whose text, confidence, delay and failure come from its config"""
+
+    def initialize(self, config=None):
+        self.config = {"text": "porcelain tile 600 x 600 mm", "confidence": 0.95, "delay": 0.0, "fail": False}
+        self.config.update(config or {})
+        return True
+
+    def get_metadata(self):
+        return EngineMetadata(name="scripted", version="1.0", model_type=ModelType.OCR)
+
+    def process_document(self, document_path, options=None):
+        time.sleep(self.config["delay"])
+        if self.config["fail"]:
+            raise RuntimeError("engine crashed")
+        return EngineResult(
+            engine_name=self.config.get("name", "scripted"),
+            success=True,
+            result_type="text",
+            data={"text": self.config["text"], "document": document_path},
+            confidence=self.config["confidence"],
+            metadata={"pid": os.getpid()}
+        )
+
+    def process_image(self, image_data, options=None):
+        return self.process_document("<image>", options)
+
+    def supports_format(self, file_format):
+        return True
+
+
+def make_manager(engine_configs, **config):
+    manager = EngineManager({
+        "builtin_engines_enabled": False,
+        "third_party_engines_enabled": False,
+        "cache_results": False,
+        "voting_start_method": START_METHOD,
+        "engine_configs": {name: {"name": name, **c} for name, c in engine_configs.items()},
+        **config
+    })
+    for name in engine_configs:
+        manager.register_engine_class(name, ScriptedEngine)
+    return manager
+
+
+@pytest.fixture
+def managers():
+    created = []
+    yield lambda *args, **kwargs: created.append(make_manager(*args, **kwargs)) or created[-1]
+    for manager in created:
+        manager.release_all_engines()
+
+
+def test_quorum_returns_early_and_keeps_slow_workers_warm(managers):
+    manager = managers({"a": {}, "b": {}, "slow": {"delay": 1.0}}, voting_quorum=2)
+
+    start = time.time()
+    result = manager.process_with_voting("doc1.pdf", ["a", "b", "slow"])
+    assert time.time() - start < 0.9
+    assert result.success and sorted(result.metadata["combined_from"]) == ["a", "b"]
+
+    slow = manager.voting_workers["slow"]
+    pid = slow.process.pid
+    assert slow.is_alive() and slow.abandoned == 1
+
+    # Without a quorum the next vote waits for the slow engine: the late
+    # result for doc1 is discarded and the same warm process answers doc2
+    manager.config["voting_quorum"] = 0
+    result = manager.process_with_voting("doc2.pdf", ["a", "b", "slow"])
+    assert sorted(result.metadata["combined_from"]) == ["a", "b", "slow"]
+    assert slow.process.pid == pid and slow.abandoned == 0
+    assert manager.engine_usage["slow"]["successes"] == 1
+
+
+def test_engine_exceeding_its_timeout_is_dropped(managers):
+    manager = managers({"a": {}, "b": {}, "hung": {"delay": 30}},
+                       voting_quorum=0, voting_engine_timeout=0.5)
+
+    start = time.time()
+    result = manager.process_with_voting("doc.pdf", ["a", "b", "hung"])
+    assert time.time() - start < 5
+    assert sorted(result.metadata["combined_from"]) == ["a", "b"]
+    assert not manager.voting_workers["hung"].is_alive()
+    assert manager.engine_usage["hung"]["failures"] == 1
+
+
+def test_failing_engine_does_not_fail_the_vote(managers):
+    manager = managers({"a": {}, "broken": {"fail": True}}, voting_quorum=0)
+
+    result = manager.process_with_voting("doc.pdf", ["a", "broken"])
+    assert result.success and result.metadata["combined_from"] == ["a"]
+    assert manager.engine_usage["broken"] == {
+        "calls": 1, "successes": 0, "failures": 1, "cache_hits": 0, "total_processing_time": pytest.approx(0.0, abs=0.5)
+    }
+
+    manager = managers({"broken": {"fail": True}, "broken2": {"fail": True}}, voting_quorum=0)
+    assert not manager.process_with_voting("doc.pdf", ["broken", "broken2"]).success
+
+
+def test_disagreeing_results_do_not_reach_quorum(managers):
+    manager = managers({"a": {}, "b": {"text": "granite slab 30 mm polished"}, "c": {"delay": 0.3}},
+                       voting_quorum=2)
+
+    result = manager.process_with_voting("doc.pdf", ["a", "b", "c"])
+    assert sorted(result.metadata["combined_from"]) == ["a", "b", "c"]
+
+
+def test_usage_is_recorded_for_direct_and_cached_calls(managers):
+    manager = managers({"a": {}}, cache_results=True)
+
+    manager.process_document("doc.pdf", "a")
+    manager.process_document("doc.pdf", "a")
+    manager.process_document("doc.pdf", "missing")
+
+    usage = manager.get_statistics()["engines"]["a"]["usage"]
+    assert usage["calls"] == 2 and usage["successes"] == 1 and usage["cache_hits"] == 1
+    assert manager.engine_usage["missing"]["failures"] == 1
+
+    manager.config["monitoring_enabled"] = False
+    manager.process_document("doc.pdf", "a")
+    assert manager.engine_usage["a"]["calls"] == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
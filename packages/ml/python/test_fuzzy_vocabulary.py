@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test Fuzzy Vocabulary
+
+Checks that the SymSpell index returns exactly what a brute-force scan of the
+vocabulary with a plain Levenshtein distance returns.
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fuzzy_vocabulary import FuzzyVocabularyIndex, bounded_levenshtein
+
+VOCABULARY = [
+    "porcelain", "ceramic", "granite", "marble", "limestone", "travertine",
+    "slate", "quartzite", "oak", "maple", "walnut", "bamboo", "vinyl",
+    "laminate", "matte", "glossy", "polished", "honed", "brushed", "R10",
+    "PEI", "ISO", "tile", "tiles", "a", "ab", "Oak",
+]
+
+
+def levenshtein(s1, s2):
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current = [i + 1]
+        for j, c2 in enumerate(s2):
+            current.append(min(previous[j + 1] + 1, current[j] + 1, previous[j] + (c1 != c2)))
+        previous = current
+    return previous[-1]
+
+
+def brute_force(terms, word, min_similarity=0.0, max_distance=2):
+    key = word.lower()
+    if not key:
+        return []
+    seen = set()
+    matches = []
+    for position, term in enumerate(terms):
+        term_key = term.lower()
+        if term_key in seen:
+            continue
+        seen.add(term_key)
+        distance = levenshtein(key, term_key)
+        if distance > max_distance:
+            continue
+        similarity = 1.0 - distance / max(len(key), len(term_key))
+        if min_similarity > 0 and similarity <= min_similarity:
+            continue
+        matches.append((position, term, similarity))
+    matches.sort(key=lambda m: (-m[2], m[0]))
+    return [(term, similarity) for _, term, similarity in matches]
+
+
+def misspellings(rng, count):
+    alphabet = "abcdefghijklmnopqrstuvwxyz0"
+    words = []
+    for _ in range(count):
+        word = list(rng.choice(VOCABULARY).lower())
+        for _ in range(rng.randint(0, 3)):
+            operation = rng.choice(("insert", "delete", "replace", "swap"))
+            i = rng.randrange(len(word) + 1)
+            if operation == "insert":
+                word.insert(i, rng.choice(alphabet))
+            elif word and operation == "delete":
+                del word[min(i, len(word) - 1)]
+            elif word and operation == "replace":
+                word[min(i, len(word) - 1)] = rng.choice(alphabet)
+            elif len(word) > 1:
+                i = min(i, len(word) - 2)
+                word[i], word[i + 1] = word[i + 1], word[i]
+        words.append("".join(word))
+    return words
+
+
+def test_bounded_levenshtein_matches_full_distance():
+    rng = random.Random(0)
+    for word in misspellings(rng, 300):
+        for term in VOCABULARY:
+            expected = levenshtein(word, term.lower())
+            assert bounded_levenshtein(word, term.lower(), 2) == min(expected, 3)
+
+
+def test_lookup_matches_brute_force():
+    index = FuzzyVocabularyIndex(VOCABULARY, max_edit_distance=2)
+    rng = random.Random(1)
+    for word in misspellings(rng, 500) + ["b", "x", "ba", "OAK", ""]:
+        assert index.lookup(word) == brute_force(VOCABULARY, word), word
+
+
+def test_lookup_with_threshold_matches_brute_force():
+    index = FuzzyVocabularyIndex(VOCABULARY, max_edit_distance=2)
+    rng = random.Random(2)
+    for word in misspellings(rng, 300):
+        for threshold in (0.5, 0.7, 0.8):
+            assert index.lookup(word, threshold) == brute_force(VOCABULARY, word, threshold), (word, threshold)
+
+
+def test_best_match_and_batch():
+    index = FuzzyVocabularyIndex(VOCABULARY)
+    assert index.best_match("porcelian") == ("porcelain", 1.0 - 2 / 9)
+    assert index.best_match("zzzzzz") is None
+    assert "oak" in index and len(index) == len(VOCABULARY) - 1
+    words = ["marbel", "graniet", "marbel"]
+    assert index.lookup_batch(words) == [index.lookup(word) for word in words]
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test Generative Enhancer
+
+Checks that the output of concurrently running enhancements reaches the
+stream handler complete and without interleaving.
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generative_enhancer import _EnhancementStream
+
+
+def test_first_writer_streams_live_and_others_follow():
+    output = []
+    stream = _EnhancementStream(output.append)
+    explanation = stream.writer("explanation")
+    similarity = stream.writer("similarity")
+
+    explanation("e1 ")
+    similarity("s1 ")
+    explanation("e2 ")
+    assert output == ["e1 ", "e2 "]
+
+    stream.finish("explanation")
+    assert output == ["e1 ", "e2 ", "s1 "]
+
+    similarity("s2 ")  # Now the owner, streams live
+    assert output[-1] == "s2 "
+    stream.finish("similarity")
+    assert stream.owner is None and not stream.buffers
+
+
+def test_finished_enhancements_flush_in_completion_order():
+    output = []
+    stream = _EnhancementStream(output.append)
+    stream.writer("explanation")("e ")
+    stream.writer("application")("a ")
+    stream.writer("similarity")("s ")
+    stream.finish("similarity")
+    stream.finish("application")
+    stream.finish("explanation")
+    assert output == ["e ", "s ", "a "]
+
+
+def test_enhancement_without_output_does_not_block_the_stream():
+    output = []
+    stream = _EnhancementStream(output.append)
+    stream.finish("similarity")
+    stream.writer("explanation")("e ")
+    assert output == ["e "]
+
+
+def test_random_schedules_never_interleave_or_lose_output():
+    rng = random.Random(0)
+    names = ["explanation", "similarity", "application"]
+    for _ in range(500):
+        output = []
+        stream = _EnhancementStream(output.append)
+        writers = {name: stream.writer(name) for name in names}
+        pending = {name: [f"{name}:{i}" for i in range(rng.randint(0, 4))] for name in names}
+        expected = {name: list(chunks) for name, chunks in pending.items()}
+        running = list(names)
+
+        while running:
+            name = rng.choice(running)
+            if pending[name]:
+                writers[name](pending[name].pop(0))
+            else:
+                stream.finish(name)
+                running.remove(name)
+
+        # Every chunk arrives once, in order, and each enhancement is contiguous
+        owners = [chunk.split(":")[0] for chunk in output]
+        blocks = [owner for i, owner in enumerate(owners) if i == 0 or owners[i - 1] != owner]
+        assert len(blocks) == len(set(blocks)), output
+        for name in names:
+            chunks = [chunk for chunk in output if chunk.startswith(name + ":")]
+            assert chunks == expected[name]
+        assert not stream.buffers
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
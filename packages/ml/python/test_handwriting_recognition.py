@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test Handwriting Recognition
+
+Compares the vectorized component features of HandwritingDetector with the
+per-contour loop they replaced (RETR_EXTERNAL contours, contourArea,
+arcLength) on a synthetic page of pen strokes.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from handwriting_recognition import HandwritingDetector
+
+
+def stroke_page(seed=0):
+    """White page with cursive-like strokes, loops with marks inside and a printed box"""
+    rng = np.random.default_rng(seed)
+    page = np.full((420, 640, 3), 255, np.uint8)
+
+    for row in range(4):
+        for word in range(4):
+            x, y = 30 + word * 150, 60 + row * 95
+            points = [(x, y)]
+            for _ in range(12):
+                x += int(rng.integers(4, 11))
+                y = int(np.clip(y + rng.integers(-14, 15), 60 + row * 95 - 30, 60 + row * 95 + 30))
+                points.append((x, y))
+            cv2.polylines(page, [np.array(points, np.int32)], False, (20, 20, 20),
+                          thickness=int(rng.integers(2, 4)), lineType=cv2.LINE_8)
+
+    # Loops with a mark inside: the inner mark belongs to the outer component
+    cv2.ellipse(page, (560, 380), (40, 25), 15, 0, 360, (10, 10, 10), 3)
+    cv2.line(page, (550, 378), (572, 384), (10, 10, 10), 2)
+    cv2.circle(page, (470, 385), 22, (10, 10, 10), 2)
+    cv2.circle(page, (470, 385), 4, (10, 10, 10), -1)
+
+    cv2.rectangle(page, (20, 380), (200, 410), (0, 0, 0), 1)
+    return page
+
+
+def binarize(page):
+    gray = cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    thresh = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+    kernel = np.ones((3, 3), np.uint8)
+    stroke_var = cv2.absdiff(cv2.dilate(thresh, kernel), cv2.erode(thresh, kernel))
+    return thresh, stroke_var
+
+
+def contour_features(thresh, stroke_var):
+    """Features as the former per-contour loop computed them, keyed by bounding box"""
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    features = {}
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        x, y, w, h = cv2.boundingRect(contour)
+        perimeter = cv2.arcLength(contour, True)
+        features[(x, y, w, h)] = {
+            "area": area,
+            "stroke_variation": float(np.mean(stroke_var[y:y + h, x:x + w])),
+            "circularity": 4 * np.pi * area / (perimeter * perimeter) if perimeter > 0 else 0,
+            "density": np.count_nonzero(thresh[y:y + h, x:x + w]) / (w * h)
+        }
+    return features
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setattr(HandwritingDetector, "_verify_tesseract_setup", lambda self: None)
+    return HandwritingDetector()
+
+
+def test_components_match_external_contours(detector):
+    thresh, stroke_var = binarize(stroke_page())
+    expected = contour_features(thresh, stroke_var)
+    features = detector._component_features(thresh, stroke_var)
+
+    boxes = [tuple(int(v) for v in box) for box in features["bbox"]]
+    assert sorted(boxes) == sorted(expected)
+
+    large = 0
+    for i, box in enumerate(boxes):
+        old = expected[box]
+        assert features["density"][i] == pytest.approx(old["density"])
+        assert features["stroke_variation"][i] == pytest.approx(old["stroke_variation"])
+        if old["area"] >= 100:
+            large += 1
+            assert features["area"][i] == pytest.approx(old["area"], rel=0.02)
+            assert features["circularity"][i] == pytest.approx(min(old["circularity"], 1.0), abs=0.02)
+    assert large >= 16
+
+
+def test_nested_marks_belong_to_the_enclosing_loop(detector):
+    page = np.full((120, 120, 3), 255, np.uint8)
+    cv2.circle(page, (60, 60), 40, (0, 0, 0), 3)
+    cv2.circle(page, (60, 60), 8, (0, 0, 0), -1)
+    thresh, stroke_var = binarize(page)
+
+    features = detector._component_features(thresh, stroke_var)
+    assert len(features["area"]) == 1
+    # The enclosed area of the loop, not its ink
+    assert features["area"][0] == pytest.approx(np.pi * 42 * 42, rel=0.1)
+    assert features["density"][0] < 0.3
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_detected_regions_match_the_contour_loop(detector, seed):
+    page = stroke_page(seed)
+    thresh, stroke_var = binarize(page)
+    candidates = []
+    for box, f in contour_features(thresh, stroke_var).items():
+        if 100 <= f["area"] <= thresh.size * 0.2 and f["stroke_variation"] > 20 and f["circularity"] < 0.5 \
+                and 0.1 < box[2] / box[3] < 10 and 0.05 < f["density"] < 0.5:
+            confidence = (min(1.0, f["stroke_variation"] / 50) * 0.4 + (1.0 - min(1.0, f["circularity"] * 2)) * 0.3
+                          + min(1.0, f["density"] * 3.0) * 0.3)
+            candidates.append((box, confidence))
+
+    regions = detector._detect_handwritten_regions(page, thresh)
+    expected = {box for box, confidence in candidates if confidence >= detector.config["detection_sensitivity"]}
+    assert len(candidates) >= 10 and expected
+    assert {r["bbox"] for r in regions} == expected
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
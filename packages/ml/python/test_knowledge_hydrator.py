@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test Knowledge Hydrator
+
+Checks that BatchLoader batches the loads of one loop iteration, splits
+large batches, caches results (including empty ones), hands each caller
+its own copy of the rows and does not cache failures.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import knowledge_hydrator
+from knowledge_hydrator import BatchLoader, group_rows
+
+
+class RecordingSource:
+    """Batch function returning one row per key except keys starting with 'empty'"""
+
+    def __init__(self, latency=0.0, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.batches = []
+
+    async def __call__(self, keys):
+        self.batches.append(list(keys))
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        return {key: [{"material_id": key, "value": key.upper()}] for key in keys if not key.startswith("empty")}
+
+
+def test_loads_of_one_iteration_share_one_batch():
+    source = RecordingSource()
+    loader = BatchLoader("test", source)
+
+    async def run():
+        return await asyncio.gather(loader.load("a"), loader.load("b"), loader.load_many(["c", "a", None]))
+
+    a, b, many = asyncio.run(run())
+    assert source.batches == [["a", "b", "c"]]
+    assert a == [{"material_id": "a", "value": "A"}]
+    assert b[0]["value"] == "B" and set(many) == {"c", "a"}
+    assert loader.stats["coalesced"] == 1
+
+
+def test_batches_are_split_by_max_batch_size():
+    source = RecordingSource()
+    loader = BatchLoader("test", source, {"max_batch_size": 2})
+    keys = [f"m{i}" for i in range(5)]
+
+    results = asyncio.run(loader.load_many(keys))
+    assert [len(batch) for batch in source.batches] == [2, 2, 1]
+    assert sorted(results) == keys
+
+
+def test_results_are_cached_across_loops():
+    source = RecordingSource()
+    loader = BatchLoader("test", source)
+
+    asyncio.run(loader.load_many(["a", "empty1"]))
+    results = asyncio.run(loader.load_many(["a", "empty1"]))
+    assert len(source.batches) == 1
+    assert results["empty1"] == []
+    assert loader.get_stats()["hits"] == 2
+
+
+def test_inflight_keys_are_not_fetched_twice():
+    source = RecordingSource(latency=0.05)
+    loader = BatchLoader("test", source)
+
+    async def run():
+        first = asyncio.ensure_future(loader.load_many(["a", "b"]))
+        await asyncio.sleep(0.01)
+        second = await loader.load_many(["b", "c"])
+        return await first, second
+
+    first, second = asyncio.run(run())
+    assert source.batches == [["a", "b"], ["c"]]
+    assert first["b"] == second["b"]
+
+
+def test_callers_get_their_own_copy_of_the_rows():
+    source = RecordingSource(latency=0.01)
+    loader = BatchLoader("test", source)
+
+    async def run():
+        first, second = await asyncio.gather(loader.load("a"), loader.load("a"))
+        first[0]["value"] = "changed"
+        second.append({"material_id": "a", "value": "extra"})
+        return first, second, await loader.load("a")
+
+    first, second, cached = asyncio.run(run())
+    assert second[0]["value"] == "A"
+    assert cached == [{"material_id": "a", "value": "A"}]
+    assert len(source.batches) == 1
+
+
+def test_failures_propagate_and_are_not_cached():
+    source = RecordingSource(fail=True)
+    loader = BatchLoader("test", source)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(loader.load("a"))
+    source.fail = False
+    assert asyncio.run(loader.load("a"))[0]["value"] == "A"
+    assert len(source.batches) == 2 and loader.stats["errors"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(knowledge_hydrator.time, "monotonic", lambda: now[0])
+    source = RecordingSource()
+    loader = BatchLoader("test", source, {"ttl_seconds": 10})
+
+    asyncio.run(loader.load("a"))
+    now[0] += 11
+    asyncio.run(loader.load("a"))
+    assert len(source.batches) == 2 and loader.stats["expirations"] == 1
+
+
+def test_group_rows_keeps_order_and_limit():
+    rows = [{"m": "a", "i": 1}, {"m": "b", "i": 2}, {"m": "a", "i": 3}, {"m": None}, {"m": "a", "i": 4}]
+    grouped = group_rows(rows, "m", limit=2)
+    assert grouped == {"a": [{"m": "a", "i": 1}, {"m": "a", "i": 3}], "b": [{"m": "b", "i": 2}]}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test LLM Cache
+
+Checks single-flight deduplication, expiry, eviction and the temperature
+bypass of the completion cache.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import llm_cache
+from llm_cache import FakeLLMClient, LLMCompletionCache, get_completion_cache
+
+
+def test_concurrent_requests_share_one_call():
+    cache = LLMCompletionCache()
+    client = FakeLLMClient(latency=0.05)
+
+    async def run():
+        return await asyncio.gather(*[
+            cache.complete(client, "model", "system", "user", 0.0, 100)
+            for _ in range(10)
+        ])
+
+    results = asyncio.run(run())
+    assert client.calls == 1
+    assert len(set(results)) == 1
+    assert cache.stats["misses"] == 1 and cache.stats["coalesced"] == 9
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    cache = LLMCompletionCache()
+    client = FakeLLMClient(latency=0.05)
+
+    async def run():
+        first = asyncio.ensure_future(cache.complete(client, "model", "system", "user", 0.0, 100))
+        second = asyncio.ensure_future(cache.complete(client, "model", "system", "user", 0.0, 100))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run())
+    assert client.calls == 1
+
+
+def test_failures_are_not_cached():
+    cache = LLMCompletionCache()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        raise RuntimeError("boom")
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.get_or_create("key", failing)
+
+    asyncio.run(run())
+    assert len(attempts) == 2
+    assert cache.stats["errors"] == 2
+    assert cache.get("key") == (False, None)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "monotonic", lambda: now[0])
+    cache = LLMCompletionCache({"ttl_seconds": 10})
+
+    cache.put("key", "value")
+    now[0] += 9
+    assert cache.get("key") == (True, "value")
+    now[0] += 2
+    assert cache.get("key") == (False, None)
+    assert cache.stats["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LLMCompletionCache({"max_entries": 2})
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1) and cache.get("c") == (True, 3)
+    assert cache.stats["evictions"] == 1
+
+
+def test_sampled_completions_bypass_the_cache():
+    cache = LLMCompletionCache()
+    client = FakeLLMClient()
+
+    async def run():
+        for _ in range(3):
+            await cache.complete(client, "model", "system", "user", 0.7, 100)
+
+    asyncio.run(run())
+    assert client.calls == 3
+    assert cache.stats["bypassed"] == 3 and cache.get_stats()["size"] == 0
+
+
+def test_shared_caches_are_keyed_by_config():
+    assert get_completion_cache({"ttl_seconds": 5}) is get_completion_cache({"ttl_seconds": 5})
+    assert get_completion_cache({"ttl_seconds": 5}) is not get_completion_cache({"ttl_seconds": 6})
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Test Material RAG Service
+
+Checks that citations are found in streamed text even when their markers
+are split across chunks, that each source is reported once under the id
+used in the final response, and runs the query pipeline with fake
+pipeline components.
+"""
+
+import asyncio
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+material_rag_service = pytest.importorskip("material_rag_service", exc_type=ImportError)
+_CitationTracker = material_rag_service._CitationTracker
+MaterialRAGService = material_rag_service.MaterialRAGService
+
+TEXT = (
+    "Oak is durable [Source: Wood Handbook, p. 12] and suits kitchens. "
+    "Maple is harder [Ref: ASTM D143] than oak [Source: Wood Handbook, p. 12]. "
+    "Brackets like [this] or [Note: x] are not citations. "
+    "Porcelain absorbs little water [Citation: ISO 10545-3]."
+)
+SOURCES = ["Wood Handbook, p. 12", "ASTM D143", "ISO 10545-3"]
+
+
+def stream(text, sizes):
+    tracker = _CitationTracker()
+    found = []
+    position = 0
+    for size in sizes:
+        found += tracker.feed(text[position:position + size])
+        position += size
+    found += tracker.feed(text[position:])
+    return found
+
+
+def test_whole_text_in_one_chunk():
+    found = stream(TEXT, [])
+    assert [c["source"] for c in found] == SOURCES
+    assert [c["id"] for c in found] == ["cit-1", "cit-2", "cit-3"]
+
+
+def test_single_character_chunks():
+    assert [c["source"] for c in stream(TEXT, [1] * len(TEXT))] == SOURCES
+
+
+def test_random_chunk_boundaries():
+    rng = random.Random(0)
+    for _ in range(200):
+        sizes = [rng.randint(1, 12) for _ in range(len(TEXT) // 4)]
+        assert [c["source"] for c in stream(TEXT, sizes)] == SOURCES
+
+
+def test_split_marker_is_reported_when_complete():
+    tracker = _CitationTracker()
+    assert tracker.feed("Durable [Sou") == []
+    assert tracker.feed("rce: Wood Hand") == []
+    assert tracker.feed("book] and more") == [{"id": "cit-1", "source": "Wood Handbook"}]
+
+
+def test_sources_added_directly_are_not_reported_again():
+    tracker = _CitationTracker()
+    assert tracker.add({"source": "ASTM D143"})
+    assert not tracker.add({"source": "ASTM D143"})
+    assert tracker.feed("Harder [Ref: ASTM D143].") == []
+
+
+class FakeEmbeddingGenerator:
+    """Embeds a text as a small dict and records every call"""
+
+    def __init__(self, batch=True):
+        self.calls = []
+        if not batch:
+            self.batch_generate_embeddings = None
+
+    def _embed(self, text, include_dense, include_sparse):
+        return {"dense": [len(text)], "sparse": {"text": text} if include_sparse else None}
+
+    async def generate_embeddings(self, text, include_dense=True, include_sparse=False):
+        self.calls.append(("single", text, include_dense, include_sparse))
+        return self._embed(text, include_dense, include_sparse)
+
+    def batch_generate_embeddings(self, texts, include_dense=True, include_sparse=False):
+        self.calls.append(("batch", list(texts), include_dense, include_sparse))
+        return [self._embed(text, include_dense, include_sparse) for text in texts]
+
+
+class FakeRetriever:
+    """Returns one material per query and fails queries containing 'fail'"""
+
+    def __init__(self):
+        self.embeddings = {}
+
+    async def retrieve(self, query_text, query_embedding, filters=None, limit=10):
+        self.embeddings.setdefault(query_text, []).append(query_embedding)
+        await asyncio.sleep(random.random() * 0.01)
+        if "fail" in query_text:
+            raise RuntimeError("vector store unavailable")
+        return [{"id": f"m-{query_text}", "name": query_text, "limit": limit}]
+
+
+class FakeAssembler:
+    async def assemble(self, query, materials, include_relationships=True, include_properties=True):
+        return {"query": query, "materials": materials}
+
+
+class FakeEnhancer:
+    async def enhance(self, context, query, enhancement_types=None, stream_handler=None):
+        await asyncio.sleep(random.random() * 0.01)
+        return {"materials": context["materials"], "enhancements": {"explanation": query}, "citations": []}
+
+
+def make_service(batch=True, **batch_config):
+    return MaterialRAGService(
+        config={"batch": batch_config},
+        embedding_generator=FakeEmbeddingGenerator(batch=batch),
+        retriever=FakeRetriever(),
+        context_assembler=FakeAssembler(),
+        generative_enhancer=FakeEnhancer()
+    )
+
+
+def test_batch_keeps_query_order_and_embeds_once_per_chunk():
+    service = make_service(embedding_batch_size=4, generation_concurrency=2)
+    queries = [{"query": f"tile {i}", "options": {"limit": i + 1}} for i in range(10)]
+    results = asyncio.run(service.batch_query(queries))
+
+    assert [r["query"] for r in results] == [f"tile {i}" for i in range(10)]
+    assert [r["materials"][0]["limit"] for r in results] == list(range(1, 11))
+    assert [call[:2] for call in service.embedding_generator.calls] == [
+        ("batch", ["tile 0", "tile 1", "tile 2", "tile 3"]),
+        ("batch", ["tile 4", "tile 5", "tile 6", "tile 7"]),
+        ("batch", ["tile 8", "tile 9"]),
+    ]
+
+    stages = service.get_usage_statistics()["batch_stages"]
+    assert stages["embedding"]["calls"] == 3 and stages["embedding"]["items"] == 10
+    assert stages["retrieval"]["items"] == stages["generation"]["items"] == 10
+    assert 1 <= stages["generation"]["max_in_flight"] <= 2
+    assert stages["generation"]["throughput_per_second"] > 0
+
+
+def test_batch_and_single_queries_share_the_embedding_contract():
+    for batch in (True, False):
+        service = make_service(batch=batch)
+        asyncio.run(service.query("oak flooring", options={"limit": 3}))
+        asyncio.run(service.batch_query([{"query": "oak flooring"}]))
+
+        single, batched = service.retriever.embeddings["oak flooring"]
+        assert single == batched
+        assert all(call[2:] == (True, True) for call in service.embedding_generator.calls)
+        assert [call[0] for call in service.embedding_generator.calls] == ["single", "batch" if batch else "single"]
+
+
+def test_repeated_queries_are_processed_once():
+    service = make_service()
+    queries = [{"query": "oak"}, {"query": "maple"}, {"query": "oak"}, {"query": "oak", "options": {"limit": 2}}]
+    results = asyncio.run(service.batch_query(queries, session_id="s"))
+
+    assert service.embedding_generator.calls[0][1] == ["oak", "maple"]
+    assert len(service.retriever.embeddings["oak"]) == 2
+    assert results[2]["materials"] == results[0]["materials"]
+    assert results[2]["metadata"]["from_cache"] and not results[0]["metadata"]["from_cache"]
+    assert results[2]["metadata"]["request_id"] != results[0]["metadata"]["request_id"]
+    assert results[3]["materials"][0]["limit"] == 2
+
+
+def test_cached_queries_skip_the_pipeline():
+    service = make_service()
+    asyncio.run(service.query("oak"))
+    service.embedding_generator.calls.clear()
+
+    results = asyncio.run(service.batch_query([{"query": "oak"}, {"query": "maple"}]))
+    assert results[0]["metadata"]["from_cache"] and not results[1]["metadata"]["from_cache"]
+    assert [call[1] for call in service.embedding_generator.calls] == [["maple"]]
+    assert service.usage_stats["cache_hits"] == 1 and service.usage_stats["cache_misses"] == 2
+
+
+def test_failed_items_keep_the_error_shape():
+    service = make_service()
+    results = asyncio.run(service.batch_query([{"query": "oak"}, {"query": "fail me"}, {"query": "fail me"}],
+                                              session_id="s"))
+
+    assert results[0]["materials"][0]["name"] == "oak"
+    for failed in results[1:]:
+        assert failed["query"] == "fail me" and failed["error"] == "vector store unavailable"
+        assert failed["metadata"]["error"] is True and failed["metadata"]["session_id"] == "s"
+        assert "from_cache" not in failed["metadata"]
+    assert service.usage_stats["errors"] == 1
+    assert service.get_usage_statistics()["batch_stages"]["retrieval"]["errors"] == 1
+    assert not any("fail me" in key for key in service.cache)
+
+
+def test_cache_hits_do_not_change_the_cached_response():
+    service = make_service()
+    first = asyncio.run(service.query("oak", session_id="a"))
+    second = asyncio.run(service.query("oak", session_id="b"))
+    batched, = asyncio.run(service.batch_query([{"query": "oak"}], session_id="c"))
+
+    assert not first["metadata"]["from_cache"] and first["metadata"]["session_id"] == "a"
+    assert second["metadata"]["from_cache"] and second["metadata"]["session_id"] == "b"
+    assert batched["metadata"]["from_cache"] and batched["metadata"]["session_id"] == "c"
+    assert len({first["metadata"]["request_id"], second["metadata"]["request_id"],
+                batched["metadata"]["request_id"]}) == 3
+    assert second["materials"] == first["materials"]
+
+
+class StreamingEnhancer:
+    """Streams text with citation markers and numbers its own citations differently"""
+
+    async def enhance(self, context, query, enhancement_types=None, stream_handler=None):
+        for chunk in ["Oak [Source: Wood Hand", "book] is harder than pine [Ref: ASTM D143]."]:
+            await asyncio.sleep(0)
+            stream_handler(chunk)
+        return {
+            "materials": context["materials"],
+            "enhancements": {},
+            "citations": [
+                {"id": "cit-1", "source": "ASTM D143", "material_id": "m-oak"},
+                {"id": "cit-2", "source": "ISO 10545-3", "material_id": "m-oak"},
+                {"id": "cit-3", "source": "Wood Handbook", "material_id": "m-oak"},
+            ]
+        }
+
+
+def test_streamed_citation_ids_match_the_final_response():
+    service = make_service()
+    service.generative_enhancer = StreamingEnhancer()
+
+    async def run():
+        return [event async for event in service.stream_events("oak")]
+
+    events = asyncio.run(run())
+    streamed = {e["citation"]["source"]: e["citation"]["id"] for e in events if e["event"] == "citation"}
+    assert streamed == {"Wood Handbook": "cit-1", "ASTM D143": "cit-2", "ISO 10545-3": "cit-3"}
+
+    final = events[-1]["response"]["citations"]
+    assert {c["source"]: c["id"] for c in final} == streamed
+    assert all(c["material_id"] == "m-oak" for c in final)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test OCR Worker Service
+
+Drives the worker in-process with small registered commands: request
+handling, rejection when busy, cancellation of queued requests, run_script,
+release of warm instances and the stdio protocol guarded against output
+from child processes.
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ndjson_stream import NDJSONWriter
+from ocr_worker_service import OCRWorkerService
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class RecordingStream(io.StringIO):
+    """Text stream that can be parsed back into NDJSON records"""
+
+    def records(self):
+        return [json.loads(line) for line in self.getvalue().splitlines()]
+
+    def responses(self, request_id):
+        return [r for r in self.records() if r["type"] == "response" and r["id"] == request_id]
+
+
+@pytest.fixture
+def service():
+    created = []
+
+    def make(**config):
+        service = OCRWorkerService(config)
+        service.gate = threading.Event()
+        service.started = threading.Semaphore(0)
+
+        def blocking(params):
+            service.started.release()
+            service.gate.wait(5)
+            return {"echo": params.get("value")}
+
+        def failing(params):
+            raise RuntimeError("engine crashed")
+
+        service.commands["blocking"] = blocking
+        service.commands["failing"] = failing
+        created.append(service)
+        return service
+
+    yield make
+    for service in created:
+        service.gate.set()
+        service.close()
+
+
+def send(service, writer, request_id, command, **params):
+    service.handle_line(json.dumps({"id": request_id, "command": command, "params": params}), writer)
+
+
+def test_commands_errors_and_health(service):
+    worker = service(max_workers=2)
+    stream = RecordingStream()
+    writer = NDJSONWriter(stream=stream)
+    worker.gate.set()
+
+    send(worker, writer, "ok", "blocking", value=3)
+    send(worker, writer, "bad", "failing")
+    send(worker, writer, "x", "explode")
+    worker.handle_line("not json", writer)
+    worker.handle_line("\n", writer)
+    worker._executor.shutdown(wait=True)
+    send(worker, writer, "h", "health")
+
+    assert stream.responses("ok")[0]["result"] == {"echo": 3}
+    assert stream.responses("bad")[0]["status"] == "error"
+    assert stream.responses("bad")[0]["error_type"] == "RuntimeError"
+    assert "Unknown command" in stream.responses("x")[0]["error"]
+    assert "Invalid request" in stream.responses(None)[0]["error"]
+
+    health = stream.responses("h")[0]["result"]
+    assert health["completed"] == 1 and health["failed"] == 1
+    assert health["running"] == 0 and health["queued"] == 0
+    assert [r["seq"] for r in stream.records()] == list(range(len(stream.records())))
+
+
+def test_requests_beyond_max_pending_and_duplicates_are_refused(service):
+    worker = service(max_workers=1, max_pending=2)
+    stream = RecordingStream()
+    writer = NDJSONWriter(stream=stream)
+
+    send(worker, writer, 1, "blocking")
+    send(worker, writer, 1, "blocking")
+    send(worker, writer, 2, "blocking")
+    send(worker, writer, 3, "blocking")
+    worker.gate.set()
+    worker._executor.shutdown(wait=True)
+
+    assert [r["status"] for r in stream.responses(1)] == ["error", "ok"]
+    assert stream.responses(2)[0]["status"] == "ok"
+    assert stream.responses(3)[0]["status"] == "rejected"
+    assert worker.stats["rejected"] == 1
+
+
+def test_only_queued_requests_are_cancelled(service):
+    worker = service(max_workers=1)
+    stream = RecordingStream()
+    writer = NDJSONWriter(stream=stream)
+
+    send(worker, writer, "running", "blocking", value="a")
+    assert worker.started.acquire(timeout=5)
+    send(worker, writer, "queued", "blocking", value="b")
+
+    send(worker, writer, "c1", "cancel", target="queued")
+    send(worker, writer, "c2", "cancel", target="running")
+    send(worker, writer, "c3", "cancel", target="unknown")
+    worker.gate.set()
+    worker._executor.shutdown(wait=True)
+
+    assert stream.responses("c1")[0]["result"] == {"cancelled": True}
+    assert [r["status"] for r in stream.responses("queued")] == ["cancelled"]
+    assert stream.responses("c2")[0]["result"] == {"cancelled": False}
+    assert stream.responses("running")[0]["status"] == "ok"
+    assert stream.responses("running")[0]["result"] == {"echo": "a"}
+    assert stream.responses("c3")[0]["result"] == {"cancelled": False}
+    assert worker.stats["cancelled"] == 1 and worker.stats["completed"] == 1
+
+
+def test_run_script_captures_stdout_per_request(service, monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    monkeypatch.setattr(sys, "argv", list(sys.argv))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "echo_args.py").write_text(textwrap.dedent("""
+        import sys
+
+        def main():
+            print(" ".join(sys.argv[1:]))
+            return len(sys.argv) - 1
+    """))
+    worker = service(max_workers=4, script_dir=str(tmp_path), scripts=("echo_args",))
+
+    results = [None] * 8
+
+    def run(index):
+        results[index] = worker._run_script({"script": "packages/ml/python/echo_args.py", "args": [index, "tile"]})
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"exit_code": 2, "stdout": f"{i} tile\n"} for i in range(8)]
+    with pytest.raises(ValueError):
+        worker._run_script({"script": "scene_graph_service.py"})
+
+
+def test_close_releases_warm_instances(service):
+    worker = service(max_workers=2)
+    closed = []
+
+    class Component:
+        def close(self):
+            closed.append(self)
+
+    with worker._instance("component", {}, Component) as first:
+        with worker._instance("component", {}, Component) as second:
+            pass
+    with worker._instance("component", {}, Component) as reused:
+        assert reused is second
+    worker.close()
+
+    assert sorted(map(id, closed)) == sorted([id(first), id(second)])
+    assert worker.health()["warm_instances"] == {}
+
+
+def test_stdio_protocol_is_not_corrupted_by_child_output(tmp_path):
+    (tmp_path / "noisy.py").write_text(textwrap.dedent("""
+        import os
+        import subprocess
+
+        def main():
+            subprocess.run(["sh", "-c", "echo child-noise"])
+            os.write(1, b"fd-noise\\n")
+            print("captured")
+            return 0
+    """))
+    driver = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {SCRIPT_DIR!r})
+        from ocr_worker_service import OCRWorkerService
+        OCRWorkerService({{"script_dir": {str(tmp_path)!r}, "scripts": ("noisy",)}}).serve_stdio()
+    """)
+    requests = "\n".join(json.dumps(r) for r in [
+        {"id": 1, "command": "run_script", "params": {"script": "noisy"}},
+        {"id": 2, "command": "health"},
+    ]) + "\n"
+
+    completed = subprocess.run([sys.executable, "-c", driver], input=requests,
+                               capture_output=True, text=True, timeout=60)
+
+    records = [json.loads(line) for line in completed.stdout.splitlines()]
+    assert [r["type"] for r in records] == ["ready", "response", "response"]
+    script = next(r for r in records if r.get("id") == 1)
+    assert script["status"] == "ok"
+    assert script["result"] == {"exit_code": 0, "stdout": "captured\n"}
+    assert "child-noise" in completed.stderr and "fd-noise" in completed.stderr
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Test Async PostgREST Data Access
+
+Runs the pooled client, the supabase-py fallback and the knowledge client
+against MockPostgrestServer: connection reuse, coalescing of identical
+requests, error and timeout handling, and the bounded relationship fetch.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import postgrest_async
+from postgrest_async import (AsyncPostgrestClient, MockPostgrestServer, PostgrestError,
+                             ThreadedSupabaseClient, build_select_params, create_data_client)
+
+pytest.importorskip("httpx")
+
+ENTRIES = [
+    {"id": f"k{i}", "material_id": f"m{i % 4}", "confidence": round(0.5 + (i % 5) / 10, 1)}
+    for i in range(40)
+]
+
+
+@pytest.fixture
+def server():
+    mock = MockPostgrestServer(
+        {"knowledge_entries": ENTRIES},
+        {"echo": lambda args: [{"echo": args}]}
+    ).start()
+    yield mock
+    mock.stop()
+
+
+def make_client(server, **config):
+    return AsyncPostgrestClient(server.url, "test-key", {"http2": False, **config})
+
+
+def test_select_params_follow_postgrest_syntax():
+    params = build_select_params(
+        "id,name",
+        [("material_id", "in", ["a", "b c"]), ("confidence", "gte", 0.7), ("active", "is", True),
+         ("fts", "wfts", ("english", "oak floor"))],
+        order="confidence", desc=True, limit=5
+    )
+    assert params == [
+        ("select", "id,name"), ("material_id", 'in.(a,"b c")'), ("confidence", "gte.0.7"),
+        ("active", "is.true"), ("fts", "wfts(english).oak floor"), ("order", "confidence.desc"), ("limit", "5")
+    ]
+
+
+def test_requests_share_pooled_connections(server):
+    server.latency = 0.1
+
+    async def run():
+        client = make_client(server)
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client.select("knowledge_entries", filters=[("material_id", "eq", f"m{i % 4}"), ("confidence", "gte", i / 20)])
+            for i in range(10)
+        ))
+        concurrent = time.perf_counter() - start
+        for _ in range(5):
+            await client.select("knowledge_entries", limit=1)
+        await client.aclose()
+        return client, concurrent
+
+    client, concurrent = asyncio.run(run())
+    # Ten 100 ms round trips in flight together rather than one after another
+    assert concurrent < 0.6
+    assert client.stats["round_trips"] == server.request_count == 15
+    # Keep-alive: the sequential requests reused the connections opened before
+    assert len(server.connections) <= 10
+
+
+def test_identical_in_flight_requests_are_coalesced(server):
+    server.latency = 0.1
+
+    async def run():
+        client = make_client(server)
+        query = dict(filters=[("material_id", "in", ["m1"]), ("confidence", "gte", 0.7)], order="confidence", desc=True)
+        results = await asyncio.gather(*(client.select("knowledge_entries", **query) for _ in range(8)))
+        later = await client.select("knowledge_entries", **query)
+        await client.aclose()
+        return client, results, later
+
+    client, results, later = asyncio.run(run())
+    assert server.request_count == 2
+    assert client.stats == {"requests": 9, "round_trips": 2, "coalesced": 7, "errors": 0, "timeouts": 0}
+    assert all(rows == later for rows in results)
+    assert all(row["material_id"] == "m1" and row["confidence"] >= 0.7 for row in later)
+
+    # Every caller has its own copy of the shared rows
+    results[0][0]["confidence"] = -1
+    assert results[1][0]["confidence"] != -1
+
+
+def test_errors_timeouts_and_rpc(server):
+    async def run():
+        client = make_client(server, timeout=0.2)
+        with pytest.raises(PostgrestError) as missing:
+            await client.select("no_such_table")
+        assert await client.rpc("echo", {"material_id": "m1"}) == [{"echo": {"material_id": "m1"}}]
+
+        server.latency = 0.5
+        with pytest.raises(asyncio.TimeoutError):
+            await client.select("knowledge_entries")
+        server.latency = 0.0
+        await client.aclose()
+        return client, missing.value
+
+    client, error = asyncio.run(run())
+    assert error.status_code == 404 and "does not exist" in str(error)
+    assert client.stats["errors"] == 1 and client.stats["timeouts"] == 1
+
+
+def test_client_refuses_a_second_event_loop_until_closed(server):
+    client = make_client(server)
+    assert asyncio.run(client.select("knowledge_entries", limit=2))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(client.select("knowledge_entries", limit=2))
+
+
+class FakeQuery:
+    """supabase-py style query builder that runs blocking HTTP requests against the mock server"""
+
+    def __init__(self, url, path, params=None, body=None):
+        self.url, self.path, self.params, self.body = url, path, list(params or []), body
+
+    def select(self, columns):
+        self.params.append(("select", columns))
+        return self
+
+    def in_(self, column, values):
+        self.params.append((column, f"in.({','.join(values)})"))
+        return self
+
+    def filter(self, column, operator, value):
+        self.params.append((column, f"{operator}.{value}"))
+        return self
+
+    def order(self, column, desc=False):
+        self.params.append(("order", f"{column}.{'desc' if desc else 'asc'}"))
+        return self
+
+    def limit(self, count):
+        self.params.append(("limit", str(count)))
+        return self
+
+    def execute(self):
+        data = json.dumps(self.body).encode("utf-8") if self.body is not None else None
+        request = urllib.request.Request(f"{self.url}/rest/v1/{self.path}?{urlencode(self.params)}", data=data)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return SimpleNamespace(data=json.loads(response.read()), error=None)
+        except urllib.error.HTTPError as e:
+            return SimpleNamespace(data=None, error=json.loads(e.read()))
+
+
+class FakeSupabase:
+    def __init__(self, url, key):
+        self.url = url
+
+    def table(self, name):
+        return FakeQuery(self.url, name)
+
+    def rpc(self, function, params):
+        return FakeQuery(self.url, f"rpc/{function}", body=params)
+
+
+def test_threaded_fallback_keeps_the_event_loop_free(server, monkeypatch):
+    monkeypatch.setattr(postgrest_async, "HTTPX_AVAILABLE", False)
+    monkeypatch.setattr(postgrest_async, "SUPABASE_AVAILABLE", True)
+    monkeypatch.setattr(postgrest_async, "create_client", FakeSupabase, raising=False)
+    server.latency = 0.1
+
+    client = create_data_client(server.url, "test-key", {"timeout": 0.5})
+    assert isinstance(client, ThreadedSupabaseClient)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        start = time.perf_counter()
+        rows = await asyncio.gather(*(
+            client.select("knowledge_entries", filters=[("material_id", "in", [f"m{i % 4}"]), ("confidence", "gte", 0.7)],
+                          order="confidence", desc=True, limit=3)
+            for i in range(4)
+        ))
+        elapsed = time.perf_counter() - start
+        ticking.cancel()
+
+        with pytest.raises(PostgrestError):
+            await client.select("no_such_table")
+        server.latency = 1.0
+        with pytest.raises(asyncio.TimeoutError):
+            await client.rpc("echo", {})
+        return rows, elapsed, ticks
+
+    rows, elapsed, ticks = asyncio.run(run())
+    assert [[r["material_id"] for r in group] for group in rows] == [[f"m{i}"] * 3 for i in range(4)]
+    assert elapsed < 0.35 and ticks >= 5
+    assert client.stats["errors"] == 1 and client.stats["timeouts"] == 1
+
+
+def relationship_rows():
+    rows = []
+    # m1 has many strong relationships, m2 a few weak ones, m3 some medium ones
+    rows += [{"id": f"r1-{i}", "source_id": "m1", "type": "similar", "strength": 0.9 - i / 100} for i in range(20)]
+    rows += [{"id": f"r2-{i}", "source_id": "m2", "type": "similar", "strength": 0.2 - i / 100} for i in range(2)]
+    rows += [{"id": f"r3-{i}", "source_id": "m3", "type": "accessory", "strength": 0.5 - i / 100} for i in range(5)]
+    return rows
+
+
+def limits(server):
+    return [dict(pair for pair in (p.split("=", 1) for p in path.split("?", 1)[1].split("&"))).get("limit")
+            for _, path in server.requests]
+
+
+def test_relationships_per_material_are_fetched_with_a_bounded_query():
+    from knowledge_client import KnowledgeClient
+    server = MockPostgrestServer({"material_relationships": relationship_rows()}).start()
+
+    async def run():
+        client = KnowledgeClient(server.url, "test-key", {"http2": False})
+        per_material = await client.get_material_relationships(["m1", "m2", "m3"], max_relationships_per_material=3)
+        requests_for_bulk = len(server.requests)
+        total = await client.get_material_relationships(["m1", "m2", "m3"], max_relationships=4)
+        await client.close()
+        return per_material, requests_for_bulk, total
+
+    try:
+        per_material, requests_for_bulk, total = asyncio.run(run())
+    finally:
+        server.stop()
+
+    counts = {m: sum(r["source_id"] == m for r in per_material) for m in ("m1", "m2", "m3")}
+    assert counts == {"m1": 3, "m2": 2, "m3": 3}
+    strengths = [r["strength"] for r in per_material]
+    assert strengths == sorted(strengths, reverse=True)
+
+    # The bulk query is capped; the materials it starved are topped up with their own limit
+    assert limits(server)[:requests_for_bulk] == ["9", "3", "3"]
+    assert limits(server)[requests_for_bulk:] == ["4"]
+    assert [r["source_id"] for r in total] == ["m1"] * 4
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
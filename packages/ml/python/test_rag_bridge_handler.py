@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Test RAG Bridge Handler
+
+Drives the long-running bridge server with a fake RAG service: request
+handling, cancellation, rejection when busy, oversized request lines and
+shutdown.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_bridge_handler import RAGBridgeServer, _Connection
+
+
+class FakeRAGService:
+    """Answers queries after `latency` seconds, echoing the query text"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.queries = []
+
+    async def query(self, query_text, filters=None, options=None, session_id=None):
+        self.queries.append(query_text)
+        await asyncio.sleep(self.latency)
+        return {"query": query_text, "session_id": session_id}
+
+    async def stream_events(self, query_text, filters=None, options=None, session_id=None):
+        for index in range(3):
+            yield {"type": "text", "index": index, "query": query_text}
+
+    async def batch_query(self, queries, session_id=None, max_concurrent=None):
+        return [{"query": q.get("query")} for q in queries]
+
+    def get_usage_statistics(self):
+        return {"total_queries": len(self.queries)}
+
+    def get_health_status(self):
+        return {"status": "healthy"}
+
+    def clear_cache(self):
+        pass
+
+
+class FakeWriter:
+    """StreamWriter collecting the JSON lines written to it"""
+
+    def __init__(self):
+        self.records = []
+        self.closed = False
+
+    def write(self, data):
+        self.records.append(json.loads(data.decode("utf-8")))
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def make_server(service=None, config=None):
+    server = RAGBridgeServer(service or FakeRAGService(), config)
+    server._closed = asyncio.Event()
+    return server
+
+
+def connect():
+    writer = FakeWriter()
+    return _Connection(writer), writer.records
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def responses(records, request_id=None):
+    return [r for r in records if r["type"] == "response" and (request_id is None or r["id"] == request_id)]
+
+
+def test_handle_line_runs_commands():
+    async def run():
+        server = make_server()
+        connection, records = connect()
+        await server.handle_line(json.dumps({"id": "q", "command": "query", "params": {"query": "oak", "sessionId": "s"}}), connection)
+        await server.handle_line(json.dumps({"id": "s", "command": "streaming", "params": {"query": "maple"}}), connection)
+        await server.handle_line(json.dumps({"id": "b", "command": "batch", "params": {"queries": [{"query": "a"}, {"query": "b"}]}}), connection)
+        await server.handle_line("not json", connection)
+        await server.handle_line(json.dumps({"id": "x", "command": "explode"}), connection)
+        await server.handle_line(json.dumps({"id": "e", "command": "query", "params": {}}), connection)
+        await settle()
+        return server, records
+
+    server, records = asyncio.run(run())
+    assert responses(records, "q")[0]["result"] == {"query": "oak", "session_id": "s"}
+    assert [r["event"]["index"] for r in records if r["type"] == "event"] == [0, 1, 2]
+    assert responses(records, "s")[0]["result"] == {"events": 3}
+    assert responses(records, "b")[0]["result"] == [{"query": "a"}, {"query": "b"}]
+    assert responses(records, None)[0]["status"] == "error" and "Invalid request" in responses(records, None)[0]["error"]
+    assert "Unknown command" in responses(records, "x")[0]["error"]
+    assert responses(records, "e")[0]["status"] == "error"
+    assert [r["seq"] for r in records] == list(range(len(records)))
+    assert server.stats["completed"] == 3 and server.stats["failed"] == 1
+
+
+def test_cancel_only_reaches_requests_of_the_same_connection():
+    async def run():
+        server = make_server(FakeRAGService(latency=0.2))
+        first, first_records = connect()
+        second, second_records = connect()
+        await server.handle_line(json.dumps({"id": 1, "command": "query", "params": {"query": "oak"}}), first)
+        await server.handle_line(json.dumps({"id": 1, "command": "query", "params": {"query": "maple"}}), second)
+        await settle()
+
+        await server.handle_line(json.dumps({"id": 2, "command": "cancel", "params": {"target": 1}}), second)
+        await server.handle_line(json.dumps({"id": 3, "command": "cancel", "params": {"target": 99}}), first)
+        await asyncio.sleep(0.3)
+        return server, first_records, second_records
+
+    server, first_records, second_records = asyncio.run(run())
+    assert responses(second_records, 2)[0]["result"] == {"cancelled": True}
+    assert responses(second_records, 1)[0]["status"] == "cancelled"
+    assert responses(first_records, 3)[0]["result"] == {"cancelled": False}
+    assert responses(first_records, 1)[0]["result"]["query"] == "oak"
+    assert server.stats["cancelled"] == 1 and not server._running
+
+
+def test_requests_beyond_max_pending_are_rejected():
+    async def run():
+        server = make_server(FakeRAGService(latency=0.1), {"max_pending": 2})
+        connection, records = connect()
+        for request_id in range(3):
+            await server.handle_line(json.dumps({"id": request_id, "command": "query", "params": {"query": "oak"}}), connection)
+        await server.handle_line(json.dumps({"id": 0, "command": "query", "params": {"query": "oak"}}), connection)
+        await asyncio.sleep(0.2)
+        return server, records
+
+    server, records = asyncio.run(run())
+    assert responses(records, 2)[0]["status"] == "rejected"
+    assert [r["status"] for r in responses(records, 0)] == ["rejected", "ok"]
+    assert server.stats["rejected"] == 2 and server.stats["completed"] == 2
+
+
+def test_duplicate_request_id_is_refused():
+    async def run():
+        server = make_server(FakeRAGService(latency=0.05))
+        connection, records = connect()
+        for _ in range(2):
+            await server.handle_line(json.dumps({"id": "r", "command": "query", "params": {"query": "oak"}}), connection)
+        await asyncio.sleep(0.1)
+        return records
+
+    statuses = [r["status"] for r in responses(asyncio.run(run()), "r")]
+    assert statuses == ["error", "ok"]
+
+
+@pytest.mark.skipif(not hasattr(asyncio, "start_unix_server"), reason="Unix sockets required")
+def test_socket_large_lines_and_shutdown(tmp_path):
+    path = str(tmp_path / "bridge.sock")
+
+    async def request(reader, writer, payload):
+        writer.write((payload + "\n").encode("utf-8"))
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    async def run():
+        server = RAGBridgeServer(FakeRAGService(), {"max_line_bytes": 256 * 1024})
+        serving = asyncio.ensure_future(server.serve(path=path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+
+        reader, writer = await asyncio.open_unix_connection(path, limit=1024 * 1024)
+        idle_reader, idle_writer = await asyncio.open_unix_connection(path)
+        assert json.loads(await reader.readline())["type"] == "ready"
+        assert json.loads(await idle_reader.readline())["type"] == "ready"
+
+        # A bulk batch well above asyncio's default 64 KiB line limit
+        queries = [{"query": f"durable flooring option {i} for a commercial kitchen", "options": {"limit": 5}}
+                   for i in range(1000)]
+        batch = await request(reader, writer, json.dumps({"id": "b", "command": "batch", "params": {"queries": queries}}))
+
+        # Lines over the configured limit are answered with an error, the connection stays usable
+        oversized = await request(reader, writer, json.dumps({"id": "o", "command": "query", "params": {"query": "x" * 300000}}))
+        after = await request(reader, writer, json.dumps({"id": "a", "command": "health"}))
+
+        shutdown = await request(reader, writer, json.dumps({"id": "s", "command": "shutdown"}))
+        await asyncio.wait_for(serving, timeout=5)
+        idle_eof = await asyncio.wait_for(idle_reader.read(), timeout=5)
+        writer.close()
+        idle_writer.close()
+        return batch, oversized, after, shutdown, idle_eof
+
+    batch, oversized, after, shutdown, idle_eof = asyncio.run(run())
+    assert batch["status"] == "ok" and len(batch["result"]) == 1000
+    assert oversized["status"] == "error" and "exceeds" in oversized["error"]
+    assert after["id"] == "a" and after["status"] == "ok"
+    assert shutdown["result"] == {"shutting_down": True}
+    assert idle_eof == b""
+    assert not os.path.exists(path)
+
+
+def test_read_request_skips_overlong_line_split_across_chunks():
+    async def run():
+        reader = asyncio.StreamReader(limit=16)
+        reader.feed_data(b"x" * 40)
+        reader.feed_data(b"y" * 40 + b"\n")
+        reader.feed_data(b'{"id": 1}\n')
+        reader.feed_eof()
+        return [await RAGBridgeServer._read_request(reader) for _ in range(3)]
+
+    assert asyncio.run(run()) == [None, b'{"id": 1}\n', b""]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
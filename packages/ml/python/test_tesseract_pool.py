@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test Tesseract Pool
+
+Runs the pooled tesserocr path against a stub PyTessBaseAPI, so handle
+creation, reuse and word collection are checked without tesseract.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tesseract_pool
+from tesseract_pool import TesseractPool
+from table_cell_ocr import TableCellOCR
+
+RIL = SimpleNamespace(BLOCK=0, PARA=1, TEXTLINE=2, WORD=3)
+
+
+class StubWord:
+    def __init__(self, text, bbox, conf, starts):
+        self.text = text
+        self.bbox = bbox
+        self.conf = conf
+        self.starts = starts
+
+    def IsAtBeginningOf(self, level):
+        return level in self.starts
+
+    def BoundingBox(self, level):
+        return self.bbox
+
+    def Confidence(self, level):
+        return self.conf
+
+    def GetUTF8Text(self, level):
+        return self.text
+
+
+class StubTessBaseAPI:
+    """Records its initialization and returns two words on two lines"""
+
+    instances = []
+
+    def __init__(self, lang="eng", psm=3, oem=3, variables=None, path=None):
+        # tesserocr only accepts plain integers here
+        assert type(psm) is int and type(oem) is int
+        self.kwargs = {"lang": lang, "psm": psm, "oem": oem, "variables": variables or {}, "path": path}
+        self.images = []
+        self.ended = False
+        StubTessBaseAPI.instances.append(self)
+
+    def SetImageBytes(self, data, width, height, channels, stride):
+        assert len(data) == height * stride
+        self.images.append((width, height, channels))
+
+    def SetSourceResolution(self, dpi):
+        self.dpi = dpi
+
+    def Recognize(self):
+        pass
+
+    def GetIterator(self):
+        return [
+            StubWord("Oak", (1, 2, 11, 12), 91.0, {RIL.BLOCK, RIL.PARA, RIL.TEXTLINE}),
+            StubWord("flooring", (14, 2, 40, 12), 87.0, set()),
+            StubWord("12mm", (1, 20, 20, 30), 80.0, {RIL.TEXTLINE}),
+        ]
+
+    def Clear(self):
+        pass
+
+    def End(self):
+        self.ended = True
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    StubTessBaseAPI.instances = []
+    monkeypatch.setattr(tesseract_pool, "PyTessBaseAPI", StubTessBaseAPI, raising=False)
+    monkeypatch.setattr(tesseract_pool, "RIL", RIL, raising=False)
+    monkeypatch.setattr(tesseract_pool, "tesserocr",
+                        SimpleNamespace(iterate_level=lambda iterator, level: iter(iterator)), raising=False)
+    pool = TesseractPool({"patterns_dir": str(tmp_path)})
+    pool.use_tesserocr = True
+    yield pool
+    pool.close()
+
+
+def test_handles_are_created_with_integer_modes(pool):
+    image = np.zeros((40, 50), dtype=np.uint8)
+    pool.image_to_data(image, lang="eng+deu", psm=7, oem=1, user_words=["R10", "PEI"])
+
+    api = StubTessBaseAPI.instances[0]
+    assert api.kwargs["psm"] == 7 and api.kwargs["oem"] == 1 and api.kwargs["lang"] == "eng+deu"
+    assert os.path.exists(api.kwargs["variables"]["user_patterns_file"])
+    assert api.images == [(50, 40, 1)]
+
+
+def test_handles_are_reused_per_key(pool):
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    for _ in range(3):
+        pool.image_to_data(image, psm=6)
+    pool.image_to_data(image, psm=7)
+
+    assert len(StubTessBaseAPI.instances) == 2
+    assert pool.stats["calls"] == 4 and pool.stats["handles_created"] == 2
+
+    pool.close()
+    assert all(api.ended for api in StubTessBaseAPI.instances)
+
+
+def test_words_are_collected_in_pytesseract_layout(pool):
+    data = pool.image_to_data(np.zeros((10, 10, 4), dtype=np.uint8))
+    assert data["text"] == ["Oak", "flooring", "12mm"]
+    assert data["line_num"] == [1, 1, 2]
+    assert data["word_num"] == [1, 2, 1]
+    assert data["width"] == [10, 26, 19]
+
+
+def test_table_cells_are_recognized_on_the_pool(pool, monkeypatch):
+    monkeypatch.setattr(tesseract_pool, "_pool_instance", pool)
+    text, confidence = TableCellOCR({"psm": 6}).recognize_with_pool(np.zeros((12, 30), dtype=np.uint8))
+    assert text == "Oak flooring\n12mm"
+    assert abs(confidence - (91.0 + 87.0 + 80.0) / 300.0) < 1e-9
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Native PDF Text Layer Extraction
+
+This module decides, page by page, whether a PDF carries a reliable embedded
+text layer (born-digital datasheets) and extracts text blocks and tables
+directly from it. Pages that pass are routed around the OCR engines; only
+scanned pages and image regions on text pages still need OCR.
+
+Key features:
+1. Page classifier based on text coverage, character sanity and image coverage
+2. Detection of invisible OCR text layers (e.g. GlyphLessFont) as unreliable
+3. Text block extraction with font statistics for heading detection
+4. Table extraction through PyMuPDF's table finder when available
+5. Image regions on text pages reported for targeted OCR
+
+Usage:
+    python text_layer.py <pdf_path> [--pages N]
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+from statistics import median
+from typing import Dict, List, Any, Tuple, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Default thresholds for the page classifier
+DEFAULT_TEXT_LAYER_CONFIG = {
+    'min_chars': 40,                  # Fewer characters than this means no usable text layer
+    'min_text_coverage': 0.01,        # Fraction of the page area covered by text spans
+    'min_valid_char_ratio': 0.9,      # Printable, non-replacement, non-private-use characters
+    'max_image_coverage': 0.6,        # Page-sized images indicate a scan (with or without overlay text)
+    'max_ocr_font_ratio': 0.5,        # Share of characters set in fonts written by OCR tools
+    'ocr_fonts': ['GlyphLessFont'],   # Invisible fonts used by tesseract/ocrmypdf text layers
+    'min_image_region_ratio': 0.02    # Images smaller than this fraction of the page are not OCR'd
+}
+
+
+def _is_valid_char(char: str) -> bool:
+    """Check that a character is a plausible decoded glyph"""
+    code = ord(char)
+    if char == '\ufffd' or 0xE000 <= code <= 0xF8FF:
+        return False
+    return char.isprintable() or char.isspace()
+
+
+def _area(bbox: Tuple[float, float, float, float]) -> float:
+    """Area of an (x0, y0, x1, y1) box"""
+    return max(0.0, bbox[2] - bbox[0]) * max(0.0, bbox[3] - bbox[1])
+
+
+def _image_rects(page) -> List[Tuple[float, float, float, float]]:
+    """Bounding boxes of the images placed on a page"""
+    rects = []
+    if hasattr(page, 'get_image_info'):
+        for info in page.get_image_info():
+            rects.append(tuple(info['bbox']))
+    else:
+        for img_info in page.get_images(full=True):
+            rect = page.get_image_bbox(img_info)
+            if rect:
+                rects.append((rect.x0, rect.y0, rect.x1, rect.y1))
+    return rects
+
+
+def classify_page(page, config: Dict[str, Any] = None,
+                  page_dict: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Decide whether a page has a reliable embedded text layer
+
+    Args:
+        page: PyMuPDF page
+        config: Threshold overrides (see DEFAULT_TEXT_LAYER_CONFIG)
+        page_dict: Result of page.get_text("dict") if already available
+
+    Returns:
+        Dictionary with 'has_text_layer', the measured statistics, a
+        'reason' and the 'image_regions' (x0, y0, x1, y1) that still need OCR
+    """
+    settings = dict(DEFAULT_TEXT_LAYER_CONFIG)
+    if config:
+        settings.update(config)
+
+    if page_dict is None:
+        page_dict = page.get_text("dict")
+
+    page_area = _area(tuple(page.rect)) or 1.0
+    ocr_fonts = set(settings['ocr_fonts'])
+
+    char_count = 0
+    valid_chars = 0
+    ocr_font_chars = 0
+    text_area = 0.0
+
+    for block in page_dict.get('blocks', []):
+        for line in block.get('lines', []):
+            for span in line.get('spans', []):
+                text = span.get('text', '')
+                stripped = text.strip()
+                if not stripped:
+                    continue
+                char_count += len(stripped)
+                valid_chars += sum(1 for c in stripped if _is_valid_char(c))
+                text_area += _area(span['bbox'])
+                if span.get('font', '') in ocr_fonts:
+                    ocr_font_chars += len(stripped)
+
+    image_rects = _image_rects(page)
+    image_coverage = min(1.0, sum(_area(r) for r in image_rects) / page_area)
+    text_coverage = min(1.0, text_area / page_area)
+    valid_ratio = valid_chars / char_count if char_count else 0.0
+    ocr_font_ratio = ocr_font_chars / char_count if char_count else 0.0
+
+    if char_count < settings['min_chars']:
+        reason = 'too_little_text'
+    elif text_coverage < settings['min_text_coverage']:
+        reason = 'low_text_coverage'
+    elif valid_ratio < settings['min_valid_char_ratio']:
+        reason = 'undecodable_glyphs'
+    elif ocr_font_ratio > settings['max_ocr_font_ratio']:
+        reason = 'ocr_text_layer'
+    elif image_coverage > settings['max_image_coverage']:
+        reason = 'image_dominated'
+    else:
+        reason = 'reliable_text_layer'
+
+    min_image_area = settings['min_image_region_ratio'] * page_area
+    return {
+        'has_text_layer': reason == 'reliable_text_layer',
+        'reason': reason,
+        'char_count': char_count,
+        'text_coverage': text_coverage,
+        'valid_char_ratio': valid_ratio,
+        'ocr_font_ratio': ocr_font_ratio,
+        'image_coverage': image_coverage,
+        'image_regions': [r for r in image_rects if _area(r) >= min_image_area]
+    }
+
+
+def extract_text_blocks(page, page_dict: Dict[str, Any] = None,
+                        scale: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Extract text blocks from a page's text layer
+
+    Args:
+        page: PyMuPDF page
+        page_dict: Result of page.get_text("dict") if already available
+        scale: Factor applied to coordinates (e.g. dpi / 72 for pixel space)
+
+    Returns:
+        List of blocks with 'text', 'lines', 'bbox' (x, y, width, height),
+        'font_size', 'is_bold' and 'is_heading'
+    """
+    if page_dict is None:
+        page_dict = page.get_text("dict")
+
+    blocks = []
+    for block in page_dict.get('blocks', []):
+        lines = []
+        sizes = []
+        bold = False
+        for line in block.get('lines', []):
+            spans = [s for s in line.get('spans', []) if s.get('text', '').strip()]
+            if not spans:
+                continue
+            lines.append(' '.join(s['text'].strip() for s in spans))
+            sizes.extend(s.get('size', 0) for s in spans)
+            bold = bold or any('bold' in s.get('font', '').lower() or s.get('flags', 0) & 16 for s in spans)
+
+        if not lines:
+            continue
+
+        x0, y0, x1, y1 = block['bbox']
+        blocks.append({
+            'text': ' '.join(lines),
+            'lines': lines,
+            'bbox': (x0 * scale, y0 * scale, (x1 - x0) * scale, (y1 - y0) * scale),
+            'font_size': max(sizes) if sizes else 0,
+            'is_bold': bool(bold)
+        })
+
+    # Headings are short blocks set noticeably larger (or bold at body size)
+    body_size = median([b['font_size'] for b in blocks]) if blocks else 0
+    for block in blocks:
+        larger = body_size and block['font_size'] >= body_size * 1.2
+        block['is_heading'] = bool(len(block['text']) < 120 and (larger or (block['is_bold'] and len(block['lines']) == 1)))
+
+    return blocks
+
+
+def extract_tables(page, scale: float = 1.0) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract tables from a page's text layer
+
+    Args:
+        page: PyMuPDF page
+        scale: Factor applied to coordinates
+
+    Returns:
+        Tables with 'data', 'cells', 'rows', 'columns' and 'bbox' (x, y,
+        width, height), or None if this PyMuPDF version has no table finder
+    """
+    if not hasattr(page, 'find_tables'):
+        return None
+
+    def to_xywh(rect):
+        x0, y0, x1, y1 = rect
+        return (x0 * scale, y0 * scale, (x1 - x0) * scale, (y1 - y0) * scale)
+
+    tables = []
+    try:
+        found = page.find_tables()
+    except Exception as e:
+        logger.warning(f"Table finder failed on page {page.number + 1}: {e}")
+        return None
+
+    for table in found.tables:
+        data = [[(value or '').strip() for value in row] for row in table.extract()]
+        if not data:
+            continue
+
+        cells = []
+        for row_idx, row in enumerate(table.rows):
+            for col_idx, cell_rect in enumerate(row.cells):
+                if cell_rect is None:
+                    continue  # Covered by a merged cell
+                text = data[row_idx][col_idx] if col_idx < len(data[row_idx]) else ''
+                cells.append({
+                    'row': row_idx,
+                    'col': col_idx,
+                    'bbox': to_xywh(cell_rect),
+                    'text': text,
+                    'confidence': 1.0
+                })
+
+        tables.append({
+            'data': data,
+            'cells': cells,
+            'rows': len(data),
+            'columns': max(len(row) for row in data),
+            'bbox': to_xywh(table.bbox)
+        })
+
+    return tables
+
+
+def main():
+    """Classify the pages of a PDF and print the routing decision"""
+    parser = argparse.ArgumentParser(description="Detect PDF pages with a reliable text layer")
+    parser.add_argument("pdf_path", help="Path to the PDF file")
+    parser.add_argument("--pages", type=int, help="Only classify the first N pages")
+
+    args = parser.parse_args()
+
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(args.pdf_path)
+    pages = []
+    for page_num, page in enumerate(doc):
+        if args.pages and page_num >= args.pages:
+            break
+        classification = classify_page(page)
+        classification['page'] = page_num + 1
+        classification['image_regions'] = len(classification['image_regions'])
+        pages.append(classification)
+    doc.close()
+
+    print(json.dumps({
+        'document': os.path.basename(args.pdf_path),
+        'text_layer_pages': sum(1 for p in pages if p['has_text_layer']),
+        'ocr_pages': sum(1 for p in pages if not p['has_text_layer']),
+        'pages': pages
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,29 +4,31 @@ Vector Search Client for Supabase
 
 This module provides a client class to interact with Supabase for vector search operations,
 including dense, sparse, and text-based searches on material data.
-It replaces the previous local FAISS/NumPy implementation.
+It replaces the previous local FAISS/NumPy implementation. Requests go through
+the pooled async PostgREST client, so concurrent searches do not block the
+event loop.
 """
 
 import os
 import sys
 import json
+import asyncio
 import argparse
+import importlib.util
 import numpy as np
 import logging
 from typing import Dict, List, Any, Tuple, Optional
 
+from postgrest_async import create_data_client, HTTPX_AVAILABLE
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('vector_search_client')
 
-# Try to import supabase-py
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
+# Check for supabase-py (fallback transport when httpx is missing)
+SUPABASE_AVAILABLE = importlib.util.find_spec("supabase") is not None
+if not SUPABASE_AVAILABLE and not HTTPX_AVAILABLE:
     logger.error("supabase-py library not found. Please install it: pip install supabase")
-    # Allow script to load but client will fail if used without library
 
 # Type Aliases
 SearchResult = Dict[str, Any]
@@ -36,15 +38,17 @@ SparseEmbedding = Dict[str, Any] # Expects {'indices': List[int], 'values': List
 class VectorSearchClient:
     """Client for performing vector search operations using Supabase."""
 
-    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None):
+    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None,
+                 client_config: Optional[Dict[str, Any]] = None):
         """
         Initialize the VectorSearchClient.
 
         Args:
             supabase_url: Supabase project URL. Reads from SUPABASE_URL env var if None.
             supabase_key: Supabase service role key. Reads from SUPABASE_KEY env var if None.
+            client_config: Data client settings (timeout, pool size, request coalescing).
         """
-        if not SUPABASE_AVAILABLE:
+        if not HTTPX_AVAILABLE and not SUPABASE_AVAILABLE:
             raise ImportError("Supabase client library is not installed.")
 
         url = supabase_url or os.environ.get('SUPABASE_URL')
@@ -54,12 +58,16 @@ class VectorSearchClient:
             raise ValueError("Supabase URL and Key must be provided or set as environment variables (SUPABASE_URL, SUPABASE_KEY).")
 
         try:
-            self.supabase: Client = create_client(url, key)
-            logger.info("Supabase client initialized successfully.")
+            self.db = create_data_client(url, key, client_config)
+            logger.info(f"{type(self.db).__name__} initialized successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize Supabase client: {e}")
             raise
 
+    async def close(self):
+        """Release pooled connections."""
+        await self.db.aclose()
+
     async def find_similar_by_vector(
         self,
         vector: List[float],
@@ -69,7 +77,8 @@ class VectorSearchClient:
         limit: int = 10,
         filters: Optional[Dict[str, Any]] = None,
         material_type: Optional[str] = None,
-        index_name: Optional[str] = None # Added for potential index hints
+        index_name: Optional[str] = None, # Added for potential index hints
+        timeout: Optional[float] = None
     ) -> ResultList:
         """
         Find similar items using dense vector similarity search via RPC.
@@ -83,6 +92,7 @@ class VectorSearchClient:
             filters: Dictionary of metadata filters (e.g., {"manufacturer": "Acme"}).
             material_type: Optional material type filter.
             index_name: Optional index name hint (unused, RPC handles index).
+            timeout: Seconds before the search fails (client default if None).
 
         Returns:
             List of search results with similarity scores.
@@ -103,9 +113,9 @@ class VectorSearchClient:
                 rpc_params['material_type_filter'] = material_type
 
             logger.debug(f"Calling RPC '{rpc_function}' with params: {rpc_params.keys()}")
-            response = self.supabase.rpc(rpc_function, rpc_params).execute()
+            rows = await self.db.rpc(rpc_function, rpc_params, timeout=timeout)
 
-            if response.data:
+            if rows:
                 # Assuming RPC returns id, name, material_type, similarity
                 return [
                     {
@@ -114,13 +124,9 @@ class VectorSearchClient:
                         "materialType": item.get("material_type"),
                         "similarity": item.get("similarity"),
                         "matchedBy": "dense"
-                    } for item in response.data
+                    } for item in rows
                 ]
-            else:
-                 # Log potential RPC errors if available in response structure
-                 if hasattr(response, 'error') and response.error:
-                     logger.error(f"RPC '{rpc_function}' error: {response.error}")
-                 return []
+            return []
 
         except Exception as e:
             logger.error(f"Error in find_similar_by_vector: {e}")
@@ -136,7 +142,8 @@ class VectorSearchClient:
         threshold: float = 0.4,
         limit: int = 10,
         filters: Optional[Dict[str, Any]] = None,
-        material_type: Optional[str] = None
+        material_type: Optional[str] = None,
+        timeout: Optional[float] = None
     ) -> ResultList:
         """
         Find similar items using sparse vector similarity search via RPC.
@@ -150,6 +157,7 @@ class VectorSearchClient:
             limit: Maximum number of results.
             filters: Dictionary of metadata filters.
             material_type: Optional material type filter.
+            timeout: Seconds before the search fails (client default if None).
 
         Returns:
             List of search results with similarity scores.
@@ -173,9 +181,9 @@ class VectorSearchClient:
                 rpc_params['material_type_filter'] = material_type
 
             logger.debug(f"Calling RPC '{rpc_function}' with params: {rpc_params.keys()}")
-            response = self.supabase.rpc(rpc_function, rpc_params).execute()
+            rows = await self.db.rpc(rpc_function, rpc_params, timeout=timeout)
 
-            if response.data:
+            if rows:
                  # Assuming RPC returns id, name, material_type, similarity
                  return [
                      {
@@ -184,12 +192,9 @@ class VectorSearchClient:
                          "materialType": item.get("material_type"),
                          "similarity": item.get("similarity"),
                          "matchedBy": "sparse"
-                     } for item in response.data
+                     } for item in rows
                  ]
-            else:
-                 if hasattr(response, 'error') and response.error:
-                     logger.error(f"RPC '{rpc_function}' error: {response.error}")
-                 return []
+            return []
 
         except Exception as e:
             logger.error(f"Error in find_similar_by_sparse_vector: {e}")
@@ -201,7 +206,8 @@ class VectorSearchClient:
         table: str = "materials",
         text_columns: List[str] = ["name", "description", "keywords"], # Assuming these columns exist and are indexed
         limit: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
     ) -> ResultList:
         """
         Find items using full-text search.
@@ -212,6 +218,7 @@ class VectorSearchClient:
             text_columns: List of columns to search against.
             limit: Maximum number of results.
             filters: Dictionary of metadata filters.
+            timeout: Seconds before the search fails (client default if None).
 
         Returns:
             List of search results with relevance scores (if available).
@@ -221,25 +228,29 @@ class VectorSearchClient:
             # Note: Requires tsvector column and index in the database
             # Example: searching 'fts' column using 'websearch' config
             fts_column = 'fts' # Assumed tsvector column name
-            query_builder = self.supabase.table(table).select('*, similarity: fts <=> websearch_to_tsquery(\'english\', query)') # Calculate similarity
+            conditions = []
 
             # Apply filters
             if filters:
                 for key, value in filters.items():
                     # Basic equality filter, extend as needed
-                    query_builder = query_builder.eq(key, value)
+                    conditions.append((key, 'eq', value))
 
             # Apply text search
             # Use websearch_to_tsquery for more flexible query parsing
-            query_builder = query_builder.text_search(fts_column, f"'{query}'", config='english', type='websearch')
-
-            # Order by similarity (descending) and limit
-            query_builder = query_builder.order('similarity', desc=True).limit(limit)
+            conditions.append((fts_column, 'wfts', ('english', query)))
 
             logger.debug(f"Executing text search query on table '{table}' for query: {query}")
-            response = query_builder.execute()
+            rows = await self.db.select(
+                table,
+                columns='*, similarity: fts <=> websearch_to_tsquery(\'english\', query)', # Calculate similarity
+                filters=conditions,
+                order='similarity', desc=True, # Order by similarity (descending) and limit
+                limit=limit,
+                timeout=timeout
+            )
 
-            if response.data:
+            if rows:
                  return [
                      {
                          "id": item.get("id"),
@@ -247,23 +258,21 @@ class VectorSearchClient:
                          "materialType": item.get("material_type"),
                          "similarity": item.get("similarity", 0.0), # Use calculated similarity
                          "matchedBy": "text"
-                     } for item in response.data
+                     } for item in rows
                  ]
-            else:
-                 if hasattr(response, 'error') and response.error:
-                     logger.error(f"Text search error: {response.error}")
-                 return []
+            return []
 
         except Exception as e:
             logger.error(f"Error in find_by_text: {e}")
             raise
 
-    async def get_materials_by_ids(self, material_ids: List[str]) -> ResultList:
+    async def get_materials_by_ids(self, material_ids: List[str], timeout: Optional[float] = None) -> ResultList:
         """
         Retrieve full material details for a list of IDs.
 
         Args:
             material_ids: List of material IDs to retrieve.
+            timeout: Seconds before the lookup fails (client default if None).
 
         Returns:
             List of material details.
@@ -271,14 +280,7 @@ class VectorSearchClient:
         if not material_ids:
             return []
         try:
-            response = self.supabase.table("materials").select("*").in_("id", material_ids).execute()
-
-            if response.data:
-                return response.data
-            else:
-                if hasattr(response, 'error') and response.error:
-                    logger.error(f"Error getting materials by IDs: {response.error}")
-                return []
+            return await self.db.select("materials", filters=[("id", "in", material_ids)], timeout=timeout)
         except Exception as e:
             logger.error(f"Error in get_materials_by_ids: {e}")
             raise
@@ -291,7 +293,8 @@ class VectorSearchClient:
         limit: int = 10,
         threshold: float = 0.5,
         dense_weight: float = 0.7,
-        exclude_ids: Optional[List[str]] = None # Added for knowledge_first search
+        exclude_ids: Optional[List[str]] = None, # Added for knowledge_first search
+        timeout: Optional[float] = None
     ) -> ResultList:
         """
         Performs a hybrid search using the Supabase RPC function.
@@ -305,6 +308,7 @@ class VectorSearchClient:
             threshold: Similarity threshold.
             dense_weight: Weight for dense vector contribution (passed to RPC).
             exclude_ids: Optional list of IDs to exclude from results.
+            timeout: Seconds before the RPC call fails (client default if None).
 
         Returns:
             List of search results.
@@ -314,7 +318,9 @@ class VectorSearchClient:
             # Assuming HybridEmbeddingGenerator exists and works
             # Need to instantiate it or import a function
             from enhanced_text_embeddings import generate_text_embedding
-            embedding_result = generate_text_embedding(
+            # Embedding is CPU-bound; keep it off the event loop
+            embedding_result = await asyncio.to_thread(
+                generate_text_embedding,
                 text=query,
                 method='hybrid',
                 material_category=material_type
@@ -345,9 +351,9 @@ class VectorSearchClient:
             }
 
             logger.debug(f"Calling RPC '{rpc_function}' with params: {rpc_params.keys()}")
-            response = self.supabase.rpc(rpc_function, rpc_params).execute()
+            rows = await self.db.rpc(rpc_function, rpc_params, timeout=timeout)
 
-            if response.data:
+            if rows:
                  # Assuming RPC returns id, name, material_type, similarity, matched_by
                  return [
                      {
@@ -356,12 +362,9 @@ class VectorSearchClient:
                          "materialType": item.get("material_type"),
                          "similarity": item.get("similarity"),
                          "matchedBy": item.get("matched_by", "hybrid") # Default to hybrid if missing
-                     } for item in response.data
+                     } for item in rows
                  ]
-            else:
-                 if hasattr(response, 'error') and response.error:
-                     logger.error(f"RPC '{rpc_function}' error: {response.error}")
-                 return []
+            return []
 
         except Exception as e:
             logger.error(f"Error in hybrid search: {e}")
@@ -439,6 +442,8 @@ async def main_test(args):
         results = await client.get_materials_by_ids(ids_list)
         print(json.dumps(results, indent=2))
 
+    await client.close()
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Supabase Vector Search Client CLI")
@@ -461,7 +466,6 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if hasattr(args, 'command') and args.command:
-        import asyncio
         asyncio.run(main_test(args))
     else:
         parser.print_help()
\ No newline at end of file
@@ -106,10 +106,16 @@ export interface Citation {
 }
 
 export interface RAGStreamChunk {
-  event: 'start' | 'status' | 'materials' | 'content' | 'complete' | 'error';
+  event: 'start' | 'status' | 'materials' | 'content' | 'citation' | 'complete' | 'error';
+  request_id?: string;
+  session_id?: string;
+  seq?: number; // Increases by one per event of a request
+  stage?: 'embedding' | 'retrieval' | 'assembly' | 'generation';
   message?: string;
-  chunk?: string;
-  materials?: MaterialRAGData[];
+  chunk?: string; // Generated text as it arrives
+  count?: number;
+  materials?: MaterialRAGData[]; // Material cards, sent as soon as retrieval completes
+  citation?: Citation;
   error?: string;
   timestamp?: number;
   response?: RAGResponse;
@@ -1,6 +1,7 @@
 import { spawn } from 'child_process';
 import { ApiError } from '../middleware/error.middleware';
 import { logger } from './logger';
+import { mlWorker, MlWorkerBusyError } from './mlWorkerClient';
 
 interface MlScriptOptions {
   scriptPath: string; // Path relative to project root, e.g., 'packages/ml/python/script.py'
@@ -8,13 +9,86 @@ interface MlScriptOptions {
   timeout?: number; // Optional timeout in milliseconds
 }
 
+// OCR entry points with a main() that the persistent ML worker runs in-process
+// (must match SCRIPT_ENTRY_POINTS in ocr_worker_service.py); every other script is spawned
+const ML_WORKER_SCRIPT_DIR = 'packages/ml/python';
+const ML_WORKER_SCRIPTS = new Set([
+  'ocr_confidence_scoring',
+  'specialized_ocr',
+  'enhanced_ocr',
+  'handwriting_recognition',
+  'form_field_extraction',
+]);
+const ML_WORKER_ENABLED = process.env.ML_WORKER_ENABLED !== 'false';
+
+const runsInWorker = (scriptPath: string): boolean => {
+  const normalized = scriptPath.includes('/') ? scriptPath.replace(/\.py$/, '') : scriptPath.replace(/\.py$/, '').replace(/\./g, '/');
+  const separator = normalized.lastIndexOf('/');
+  const directory = normalized.substring(0, separator);
+  const name = normalized.substring(separator + 1);
+  return ML_WORKER_ENABLED && directory === ML_WORKER_SCRIPT_DIR && ML_WORKER_SCRIPTS.has(name);
+};
+
+/**
+ * Executes a Python ML script and returns the parsed JSON output.
+ *
+ * The OCR entry points in ML_WORKER_SCRIPTS run their main() inside the persistent ML
+ * worker, which keeps imports and models warm between calls. Other scripts, and all
+ * scripts when ML_WORKER_ENABLED=false, the worker cannot be started or it rejects the
+ * request as busy, run as a child process.
+ * 
+ * @param options - Configuration for running the script.
+ * @returns A promise that resolves with the parsed JSON output or rejects with an ApiError.
+ */
+export async function runMlScript<T>(options: MlScriptOptions): Promise<T> {
+  if (!runsInWorker(options.scriptPath)) {
+    return runMlScriptProcess<T>(options);
+  }
+
+  try {
+    await mlWorker.start();
+  } catch (startError) {
+    logger.warn(`ML worker unavailable, spawning ${options.scriptPath} instead.`, startError);
+    return runMlScriptProcess<T>(options);
+  }
+
+  const { scriptPath, args, timeout = 600000 } = options;
+  logger.info(`Running ML script in worker: ${scriptPath} with args: ${args.join(' ')}`);
+
+  let code: number;
+  let stdout: string;
+  try {
+    ({ exit_code: code, stdout } = await mlWorker.request<{ exit_code: number; stdout: string }>(
+      'run_script',
+      { script: scriptPath, args },
+      timeout
+    ));
+  } catch (requestError) {
+    if (!(requestError instanceof MlWorkerBusyError)) throw requestError;
+    logger.warn(`ML worker busy, spawning ${scriptPath} instead.`);
+    return runMlScriptProcess<T>(options);
+  }
+
+  if (code !== 0) {
+    logger.error(`ML script ${scriptPath} failed with code ${code} in worker.`);
+    throw new ApiError(500, `ML script execution failed with code ${code}.`);
+  }
+
+  try {
+    return JSON.parse(stdout) as T;
+  } catch (parseError) {
+    logger.error(`Failed to parse JSON output from ML script ${scriptPath}. Output: ${stdout}`, parseError);
+    throw new ApiError(500, 'Failed to parse ML script output.');
+  }
+}
+
 /**
  * Executes a Python ML script as a child process and returns the parsed JSON output.
  * 
  * @param options - Configuration for running the script.
  * @returns A promise that resolves with the parsed JSON output or rejects with an ApiError.
  */
-export function runMlScript<T>(options: MlScriptOptions): Promise<T> {
+function runMlScriptProcess<T>(options: MlScriptOptions): Promise<T> {
   return new Promise((resolve, reject) => {
     const { scriptPath, args, timeout = 600000 } = options; // Default 10 min timeout
 
@@ -79,4 +153,140 @@ export function runMlScript<T>(options: MlScriptOptions): Promise<T> {
       }
     });
   });
-}
\ No newline at end of file
+}
+
+/**
+ * A record emitted by an ML script running in NDJSON streaming mode (--stream).
+ */
+export interface MlStreamRecord {
+  type: 'document' | 'page' | 'summary' | 'error';
+  seq: number;
+  [key: string]: any;
+}
+
+interface MlScriptStreamOptions extends MlScriptOptions {
+  onRecord: (record: MlStreamRecord) => void | Promise<void>; // Called for each record in order
+  maxQueuedRecords?: number; // Records waiting for onRecord before the script's output is paused
+}
+
+/**
+ * Executes a Python ML script that writes NDJSON records (one JSON object per line)
+ * and hands each record to a callback as soon as its line is complete, so callers can
+ * index early pages while later pages are still being processed. When an async callback
+ * falls behind, the script's stdout is paused until the queued records are delivered, so
+ * the script blocks on its writes instead of records piling up in memory.
+ *
+ * @param options - Configuration for running the script, including the record callback.
+ * @returns A promise that resolves with the final 'summary' record or rejects with an ApiError.
+ */
+export function runMlScriptStream(options: MlScriptStreamOptions): Promise<MlStreamRecord> {
+  return new Promise((resolve, reject) => {
+    const { scriptPath, args, timeout = 600000, onRecord, maxQueuedRecords = 32 } = options;
+
+    logger.info(`Spawning streaming ML script: ${scriptPath} with args: ${args.join(' ')}`);
+
+    const spawnArgs = scriptPath.includes('/')
+      ? [scriptPath, ...args]
+      : ['-m', scriptPath.replace('.py', ''), ...args];
+
+    const pythonProcess = spawn('python', spawnArgs);
+
+    let pendingLine = '';
+    let errorOutput = '';
+    let summary: MlStreamRecord | null = null;
+    let scriptError: MlStreamRecord | null = null;
+    let settled = false;
+    // Records are delivered sequentially, even when the callback is async
+    let delivery: Promise<void> = Promise.resolve();
+    let queuedRecords = 0;
+
+    const fail = (error: ApiError) => {
+      if (settled) return;
+      settled = true;
+      clearTimeout(timer);
+      pythonProcess.kill('SIGTERM');
+      pythonProcess.stdout.resume();
+      reject(error);
+    };
+
+    const timer = setTimeout(() => {
+      logger.error(`ML script ${scriptPath} timed out after ${timeout}ms.`);
+      fail(new ApiError(504, `ML script execution timed out after ${timeout / 1000} seconds.`));
+    }, timeout);
+
+    const handleLine = (line: string) => {
+      if (settled || !line.trim()) return;
+
+      let record: MlStreamRecord;
+      try {
+        record = JSON.parse(line);
+      } catch (parseError) {
+        logger.warn(`Ignoring non-JSON output line from ML script ${scriptPath}: ${line}`);
+        return;
+      }
+
+      if (record.type === 'summary') summary = record;
+      if (record.type === 'error') scriptError = record;
+
+      queuedRecords += 1;
+      if (queuedRecords >= maxQueuedRecords) pythonProcess.stdout.pause();
+
+      delivery = delivery
+        .then(() => {
+          if (!settled) return onRecord(record);
+        })
+        .catch((callbackError) => {
+          logger.error(`Record handler failed for ML script ${scriptPath}`, callbackError);
+          fail(new ApiError(500, 'Failed to handle ML script output.'));
+        })
+        .finally(() => {
+          queuedRecords -= 1;
+          if (queuedRecords === 0 && !settled) pythonProcess.stdout.resume();
+        });
+    };
+
+    // Decode as a stream so multi-byte characters split across chunks stay intact
+    pythonProcess.stdout.setEncoding('utf8');
+    pythonProcess.stdout.on('data', (data: string) => {
+      pendingLine += data;
+      const lines = pendingLine.split('\n');
+      pendingLine = lines.pop() ?? '';
+      lines.forEach(handleLine);
+    });
+
+    pythonProcess.stderr.on('data', (data: Buffer) => {
+      errorOutput += data.toString();
+      logger.warn(`ML script ${scriptPath} stderr: ${data.toString()}`);
+    });
+
+    pythonProcess.on('error', (err) => {
+      logger.error(`Failed to start ML script ${scriptPath}: ${err.message}`);
+      fail(new ApiError(500, `Failed to start ML script: ${err.message}`));
+    });
+
+    pythonProcess.on('close', async (code) => {
+      handleLine(pendingLine);
+      await delivery;
+      if (settled) return;
+
+      logger.info(`ML script ${scriptPath} finished with code ${code}.`);
+
+      if (code !== 0 || scriptError) {
+        const message = scriptError ? scriptError.error : `code ${code}`;
+        logger.error(`ML script ${scriptPath} failed: ${message}. Error output: ${errorOutput}`);
+        fail(new ApiError(500, `ML script execution failed: ${message}.`));
+        return;
+      }
+
+      if (!summary) {
+        logger.error(`ML script ${scriptPath} ended without a summary record.`);
+        fail(new ApiError(500, 'ML script output stream was truncated.'));
+        return;
+      }
+
+      settled = true;
+      clearTimeout(timer);
+      resolve(summary);
+    });
+  });
+}
@@ -0,0 +1,230 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { ApiError } from '../middleware/error.middleware';
+import { logger } from './logger';
+
+/**
+ * A response line written by the persistent ML worker (ocr_worker_service.py).
+ */
+export interface MlWorkerResponse {
+  type: 'ready' | 'response';
+  seq: number;
+  id?: string | null;
+  status?: 'ok' | 'error' | 'cancelled' | 'rejected';
+  result?: any;
+  error?: string;
+  error_type?: string;
+  queue_ms?: number;
+  duration_ms?: number;
+  [key: string]: any;
+}
+
+/**
+ * Raised when the worker rejects a request because it is at its pending limit or
+ * shutting down; callers can run the work elsewhere.
+ */
+export class MlWorkerBusyError extends ApiError {
+  constructor(message: string = 'ML worker is busy.') {
+    super(503, message, true);
+    this.name = 'MlWorkerBusyError';
+  }
+}
+
+interface PendingRequest {
+  resolve: (result: any) => void;
+  reject: (error: ApiError) => void;
+  timer: NodeJS.Timeout;
+}
+
+interface MlWorkerClientOptions {
+  workerScript?: string; // Path relative to project root
+  maxWorkers?: number; // Requests processed concurrently by the worker
+  startTimeout?: number; // Milliseconds to wait for the worker to become ready
+}
+
+/**
+ * Client for the long-running Python ML worker.
+ *
+ * The worker is started on the first request and kept alive, so OpenCV, torch and
+ * model loading are paid once instead of on every call. Requests are multiplexed over
+ * the worker's stdin/stdout as JSON lines and matched to responses by id. A request
+ * that times out is cancelled in the worker. If the worker exits, pending requests
+ * are rejected and the next request starts a new worker.
+ */
+export class MlWorkerClient {
+  private readonly workerScript: string;
+  private readonly maxWorkers?: number;
+  private readonly startTimeout: number;
+  private worker: ChildProcessWithoutNullStreams | null = null;
+  private ready: Promise<void> | null = null;
+  private pending = new Map<string, PendingRequest>();
+  private nextId = 0;
+  private pendingLine = '';
+
+  constructor(options: MlWorkerClientOptions = {}) {
+    this.workerScript = options.workerScript ?? 'packages/ml/python/ocr_worker_service.py';
+    this.maxWorkers = options.maxWorkers;
+    this.startTimeout = options.startTimeout ?? 60000;
+  }
+
+  /**
+   * Sends a command to the worker and resolves with its result.
+   *
+   * @param command - Worker command, e.g. 'run_script', 'specialized_ocr' or 'health'.
+   * @param params - Command parameters.
+   * @param timeout - Milliseconds before the request is cancelled and rejected.
+   * @returns A promise that resolves with the command result or rejects with an ApiError.
+   */
+  async request<T>(command: string, params: Record<string, any> = {}, timeout = 600000): Promise<T> {
+    await this.start();
+
+    const id = `req-${++this.nextId}`;
+    return new Promise<T>((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        logger.error(`ML worker command ${command} (${id}) timed out after ${timeout}ms.`);
+        this.send({ id: `cancel-${id}`, command: 'cancel', params: { target: id } });
+        reject(new ApiError(504, `ML script execution timed out after ${timeout / 1000} seconds.`));
+      }, timeout);
+
+      this.pending.set(id, { resolve, reject, timer });
+      this.send({ id, command, params });
+    });
+  }
+
+  /**
+   * Reports the worker's load, counters and warm resources.
+   */
+  health(): Promise<Record<string, any>> {
+    return this.request<Record<string, any>>('health', {}, 10000);
+  }
+
+  /**
+   * Starts the worker if it is not running and waits until it is ready.
+   */
+  start(): Promise<void> {
+    if (this.ready) return this.ready;
+
+    this.ready = new Promise<void>((resolve, reject) => {
+      const args = [this.workerScript];
+      if (this.maxWorkers) args.push('--max-workers', String(this.maxWorkers));
+
+      logger.info(`Starting ML worker: ${args.join(' ')}`);
+      const worker = spawn('python', args);
+      this.worker = worker;
+      this.pendingLine = '';
+
+      const startTimer = setTimeout(() => {
+        logger.error(`ML worker did not become ready within ${this.startTimeout}ms.`);
+        worker.kill('SIGTERM');
+        reject(new ApiError(503, 'ML worker failed to start.'));
+      }, this.startTimeout);
+
+      // Decode as a stream so multi-byte characters split across chunks stay intact
+      worker.stdout.setEncoding('utf8');
+      worker.stdout.on('data', (data: string) => {
+        this.pendingLine += data;
+        const lines = this.pendingLine.split('\n');
+        this.pendingLine = lines.pop() ?? '';
+        for (const line of lines) {
+          const message = this.parseLine(line);
+          if (!message) continue;
+          if (message.type === 'ready') {
+            clearTimeout(startTimer);
+            logger.info(`ML worker ready (pid ${message.pid}).`);
+            resolve();
+          } else {
+            this.handleResponse(message);
+          }
+        }
+      });
+
+      worker.stderr.on('data', (data: Buffer) => {
+        logger.warn(`ML worker stderr: ${data.toString()}`);
+      });
+
+      worker.on('error', (err) => {
+        clearTimeout(startTimer);
+        logger.error(`Failed to start ML worker: ${err.message}`);
+        this.reset(new ApiError(500, `Failed to start ML worker: ${err.message}`));
+        reject(new ApiError(500, `Failed to start ML worker: ${err.message}`));
+      });
+
+      worker.on('close', (code) => {
+        clearTimeout(startTimer);
+        logger.warn(`ML worker exited with code ${code}.`);
+        this.reset(new ApiError(500, `ML worker exited with code ${code}.`));
+        reject(new ApiError(503, 'ML worker exited before it was ready.'));
+      });
+    });
+
+    return this.ready;
+  }
+
+  /**
+   * Asks the worker to finish running requests and exit.
+   */
+  stop(): void {
+    if (!this.worker) return;
+    this.send({ id: 'shutdown', command: 'shutdown' });
+    this.worker.stdin.end();
+  }
+
+  private send(message: Record<string, any>): void {
+    if (!this.worker) return;
+    this.worker.stdin.write(`${JSON.stringify(message)}\n`);
+  }
+
+  private parseLine(line: string): MlWorkerResponse | null {
+    if (!line.trim()) return null;
+    try {
+      return JSON.parse(line);
+    } catch (parseError) {
+      logger.warn(`Ignoring non-JSON output line from ML worker: ${line}`);
+      return null;
+    }
+  }
+
+  private handleResponse(message: MlWorkerResponse): void {
+    if (!message.id) {
+      if (message.status === 'error') logger.error(`ML worker error: ${message.error}`);
+      return;
+    }
+
+    const request = this.pending.get(message.id);
+    if (!request) return; // Cancel acknowledgements and responses to timed-out requests
+    this.pending.delete(message.id);
+    clearTimeout(request.timer);
+
+    switch (message.status) {
+      case 'ok':
+        request.resolve(message.result);
+        break;
+      case 'rejected':
+        request.reject(new MlWorkerBusyError());
+        break;
+      case 'cancelled':
+        request.reject(new ApiError(499, 'ML request was cancelled.'));
+        break;
+      default:
+        logger.error(`ML worker command failed: ${message.error_type}: ${message.error}`);
+        request.reject(new ApiError(500, `ML script execution failed: ${message.error}.`));
+    }
+  }
+
+  private reset(error: ApiError): void {
+    this.worker = null;
+    this.ready = null;
+    for (const request of this.pending.values()) {
+      clearTimeout(request.timer);
+      request.reject(error);
+    }
+    this.pending.clear();
+  }
+}
+
+/**
+ * Shared worker used by runMlScript.
+ */
+export const mlWorker = new MlWorkerClient({
+  maxWorkers: process.env.ML_WORKER_MAX_WORKERS ? parseInt(process.env.ML_WORKER_MAX_WORKERS, 10) : undefined,
+});